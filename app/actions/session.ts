@@ -18,6 +18,17 @@ export async function generateSession(
   const { data: { user } } = await supabase.auth.getUser()
   if (!user) return { questions: [], error: "Not authenticated" }
 
+  // ── Precomputed plan (editor/lib/planner.py) ──────────────
+  // Planned for the default filters; empty when missing or stale.
+  if (filters.testament === "BOTH" && !filters.bookIds?.length) {
+    const { data: planned } = await supabase.rpc("planned_session", {
+      p_translation_id: filters.translationId,
+      p_count: count,
+    })
+    const plannedQuestions = ((planned ?? []) as unknown[]).map(toGameQuestion).filter(Boolean) as GameQuestion[]
+    if (plannedQuestions.length > 0) return { questions: plannedQuestions }
+  }
+
   const dueTarget = Math.floor(count * 0.6)
   const nearDueTarget = Math.floor(count * 0.3)
   const newTarget = count - dueTarget - nearDueTarget
@@ -1,3 +1,4 @@
+// Mirrored in editor/lib/srs.py (SRS forecast) — keep the two in sync.
 const SRS_INTERVALS_DAYS = [1, 3, 7, 14, 30]
 
 /**
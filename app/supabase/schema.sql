@@ -93,6 +93,11 @@ create table if not exists verse_text (
   unique (verse_ref_id, translation_id)
 );
 
+-- md5 of text, so bulk loads (editor/lib/ingest.py) can skip unchanged verses
+-- without reading their text back.
+alter table verse_text
+  add column if not exists content_hash text generated always as (md5(text)) stored;
+
 -- ── Tags (themes, packs, flags) ─────────────────────────────
 create table if not exists tag (
   id          uuid primary key default gen_random_uuid(),
@@ -170,6 +175,7 @@ create index if not exists idx_uvs_user_due      on user_verse_state (user_id, n
 create index if not exists idx_verse_release_rank on verse_release (global_rank);
 create index if not exists idx_question_type     on question (type, active);
 create index if not exists idx_attempt_user      on attempt (user_id, created_at desc);
+create index if not exists idx_attempt_created   on attempt (created_at, id);
 
 -- ============================================================
 -- ROW LEVEL SECURITY
@@ -285,3 +291,191 @@ $$;
 --   );
 --
 -- Step 3: Confirm with: select * from cron.job;
+
+-- ============================================================
+-- INCREMENTAL DIFFICULTY (editor/lib/difficulty.py)
+-- ============================================================
+-- Same result as update_question_difficulty(), but the job only reads
+-- attempts newer than its watermark and writes back the questions whose
+-- difficulty changed. Once it runs on a schedule, unschedule the cron job:
+--   select cron.unschedule('update-question-difficulty');
+
+-- The job connects as service_role, which bypasses RLS, so these run with
+-- the caller's rights and only service_role may call them: attempt_page
+-- reads every user's attempts and apply_question_difficulty writes
+-- difficulties.
+
+-- Attempts in (created_at, id) order after a keyset cursor.
+-- p_before stops short of rows that may still be committing.
+create or replace function attempt_page(
+  p_after_created_at timestamptz default null,
+  p_after_id         uuid        default null,
+  p_before           timestamptz default null,
+  p_limit            int         default 1000
+)
+returns setof attempt language sql stable as $$
+  select *
+  from attempt a
+  where (p_after_created_at is null
+         or (a.created_at, a.id) > (p_after_created_at, p_after_id))
+    and (p_before is null or a.created_at < p_before)
+  order by a.created_at, a.id
+  limit p_limit;
+$$;
+
+revoke execute on function attempt_page(timestamptz, uuid, timestamptz, int) from public, anon, authenticated;
+grant execute on function attempt_page(timestamptz, uuid, timestamptz, int) to service_role;
+
+-- Set question.difficulty for a batch of questions, then re-sync
+-- verse_release.global_difficulty for their verses (as above).
+-- Returns the affected verse_ref ids.
+create or replace function apply_question_difficulty(p_ids uuid[], p_difficulty numeric[])
+returns setof uuid language plpgsql as $$
+declare
+  refs uuid[];
+begin
+  with changed as (
+    update question q
+    set difficulty = d.difficulty
+    from unnest(p_ids, p_difficulty) as d(id, difficulty)
+    where q.id = d.id
+    returning q.verse_ref_id
+  )
+  select coalesce(array_agg(distinct verse_ref_id), '{}') into refs
+  from changed
+  where verse_ref_id is not null;
+
+  -- A separate statement, so the averages see the new difficulties.
+  update verse_release vr
+  set global_difficulty = s.difficulty
+  from (
+    select q.verse_ref_id, round(avg(q.difficulty)) as difficulty
+    from question q
+    where q.verse_ref_id = any(refs) and q.active = true
+    group by q.verse_ref_id
+  ) s
+  where vr.verse_ref_id = s.verse_ref_id;
+
+  return query select unnest(refs);
+end;
+$$;
+
+revoke execute on function apply_question_difficulty(uuid[], numeric[]) from public, anon, authenticated;
+grant execute on function apply_question_difficulty(uuid[], numeric[]) to service_role;
+
+-- ============================================================
+-- ANALYTICS ROLLUPS (editor/lib/rollups.py)
+-- ============================================================
+-- Per-verse user_verse_state totals, a page of verses at a time in
+-- verse_ref_id order after a keyset cursor. The index lets each page
+-- aggregate only its own verses. It totals every user's states, so only
+-- service_role (which bypasses RLS) may call it.
+create index if not exists idx_uvs_verse on user_verse_state (verse_ref_id);
+
+create or replace function verse_lapse_page(
+  p_after uuid default null,
+  p_limit int  default 1000
+)
+returns table (verse_ref_id uuid, states int, lapsed int, lapses int)
+language sql stable as $$
+  select s.verse_ref_id,
+         count(*)::int,
+         (count(*) filter (where s.lapse_count > 0))::int,
+         sum(s.lapse_count)::int
+  from user_verse_state s
+  where p_after is null or s.verse_ref_id > p_after
+  group by s.verse_ref_id
+  order by s.verse_ref_id
+  limit p_limit;
+$$;
+
+revoke execute on function verse_lapse_page(uuid, int) from public, anon, authenticated;
+grant execute on function verse_lapse_page(uuid, int) to service_role;
+
+-- ============================================================
+-- PRECOMPUTED SESSIONS (editor/lib/planner.py)
+-- ============================================================
+-- Each active student's next generateSession, planned in bulk: the
+-- picked verses in order (n_due due, then n_near near-due, then new).
+-- A plan is stale once any of the student's states has been seen since
+-- computed_at, or after valid_until.
+create table if not exists session_plan (
+  user_id       uuid references profiles(id) on delete cascade primary key,
+  verse_ref_ids uuid[] not null,
+  n_due         smallint not null,
+  n_near        smallint not null,
+  computed_at   timestamptz not null,
+  valid_until   timestamptz not null
+);
+
+alter table session_plan enable row level security;
+create policy "session_plan_owner_select" on session_plan for select using (auth.uid() = user_id);
+
+-- generateSession's question query and planned_session look questions up by verse.
+create index if not exists idx_question_verse on question (verse_ref_id, translation_id);
+
+-- Students' states, one row per student with parallel arrays, in user_id
+-- order after a keyset cursor and before p_before (so callers can read
+-- disjoint user_id ranges in parallel). p_active_since skips students
+-- who haven't played since; p_user_ids reads only those students.
+-- next_due_at is in epoch seconds. Every student's states, so only
+-- service_role (lib.planner, which bypasses RLS) may call it.
+create or replace function plan_state_page(
+  p_after        uuid        default null,
+  p_before       uuid        default null,
+  p_limit        int         default 1000,
+  p_active_since timestamptz default null,
+  p_user_ids     uuid[]      default null
+)
+returns table (user_id uuid, verse_ref_ids uuid[], mastery real[], next_due_at double precision[])
+language sql stable as $$
+  select s.user_id,
+         array_agg(s.verse_ref_id),
+         array_agg(s.mastery::real),
+         array_agg(extract(epoch from s.next_due_at)::double precision)
+  from user_verse_state s
+  where (p_after is null or s.user_id > p_after)
+    and (p_before is null or s.user_id < p_before)
+    and (p_user_ids is null or s.user_id = any(p_user_ids))
+  group by s.user_id
+  having p_active_since is null or max(s.last_seen_at) >= p_active_since
+  order by s.user_id
+  limit p_limit;
+$$;
+
+revoke execute on function plan_state_page(uuid, uuid, int, timestamptz, uuid[]) from public, anon, authenticated;
+grant execute on function plan_state_page(uuid, uuid, int, timestamptz, uuid[]) to service_role;
+
+-- The caller's planned session in p_translation_id, shaped like
+-- generateSession's question query; no rows when there is no fresh plan.
+create or replace function planned_session(p_translation_id text, p_count int default 10)
+returns setof json language sql stable as $$
+  select json_build_object(
+    'id', q.id,
+    'type', q.type,
+    'verse_ref_id', q.verse_ref_id,
+    'translation_id', q.translation_id,
+    'prompt', q.prompt,
+    'answer_json', q.answer_json,
+    'difficulty', q.difficulty,
+    'verse_ref', json_build_object(
+      'id', vr.id, 'chapter', vr.chapter, 'verse', vr.verse,
+      'book', json_build_object('name', b.name, 'testament', b.testament)
+    ),
+    'verse_text', json_build_object('text', vt.text)
+  )
+  from session_plan p
+  cross join lateral unnest(p.verse_ref_ids) with ordinality as v(verse_ref_id, pos)
+  join question q    on q.verse_ref_id = v.verse_ref_id and q.translation_id = p_translation_id and q.active
+  join verse_ref vr  on vr.id = q.verse_ref_id
+  join book b        on b.id = vr.book_id
+  join verse_text vt on vt.verse_ref_id = q.verse_ref_id and vt.translation_id = p_translation_id
+  where p.user_id = auth.uid()
+    and p.valid_until > now()
+    and not exists (
+      select 1 from user_verse_state s
+      where s.user_id = p.user_id and s.last_seen_at > p.computed_at
+    )
+  order by v.pos
+  limit p_count;
+$$;
@@ -0,0 +1,96 @@
+"""Time `lib.blanks_scan` over a full synthetic catalog.
+
+    cd editor
+    python -m bench.bench_blanks                      # 31k refs × 3 translations
+    python -m bench.bench_blanks --rtt-ms 20 --workers 1 4
+
+Builds a catalog, then damages it the way the editor can: 1% of verse
+texts edited after their question was saved (a word inserted near the
+start, as `save_verse` would leave it), 0.5% with a doubled space, and
+0.2% of questions with an index past the end. For each worker count it
+scans, checks that every damaged question is found, applies --fix, and
+rescans to check nothing fixable is left.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, build_catalog
+from lib import blanks, blanks_scan, db
+
+
+def _damage(c: FakeClient, rng: random.Random) -> set[str]:
+    """Damage some questions' texts or indices; return the ids of those now wrong."""
+    texts = {(t["verse_ref_id"], t["translation_id"]): t for t in c.tables["verse_text"]}
+    questions = [q for q in c.tables["question"] if q["active"]]
+    damaged: set[str] = set()
+    for q in rng.sample(questions, len(questions) // 100):
+        vt = texts[(q["verse_ref_id"], q["translation_id"])]
+        w = vt["text"].split(" ")
+        w.insert(1, "indeed")
+        vt["text"] = " ".join(w)
+        aj = q["answer_json"]
+        # Blanks on the first word, or on a repeated word, may still line up.
+        if any(i >= len(w) or w[i] != a for i, a in zip(aj["word_indices"], aj["answers"])):
+            damaged.add(q["id"])
+    for q in rng.sample(questions, len(questions) // 200):
+        vt = texts[(q["verse_ref_id"], q["translation_id"])]
+        vt["text"] = vt["text"].replace(" ", "  ", 1)
+        damaged.add(q["id"])
+    for q in rng.sample(questions, len(questions) // 500):
+        q["answer_json"] = {**q["answer_json"], "word_indices": [*q["answer_json"]["word_indices"], 99]}
+        damaged.add(q["id"])
+    for vt in texts.values():
+        c.schema["verse_text"].generate(vt)
+    c.touch("verse_text")
+    c.touch("question")
+    return damaged
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--refs", type=int, default=FULL_SIZE)
+    p.add_argument("--workers", type=int, nargs="+", default=sorted({1, blanks_scan.WORKERS}))
+    p.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network delay per round trip")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    original = db._connect
+    print(f"{'workers':>7}  {'pass':<7}{'questions':>10}{'issues':>8}{'fixable':>8}{'seconds':>8}{'trips':>7}")
+    try:
+        for workers in args.workers:
+            c = FakeClient()
+            build_catalog(c, n_refs=args.refs, seed=args.seed)
+            damaged = _damage(c, random.Random(args.seed))
+            c.latency_ms = args.rtt_ms
+            db._connect = lambda: c
+            db.clear_cache()
+            for name, fix in (("scan", True), ("rescan", False)):
+                before = c.round_trips
+                blanks.words.cache_clear()
+                r = blanks_scan.scan(workers=workers, fix=fix)
+                fixable = [f for f in r.findings if blanks.FIXABLE.intersection(f.issues)]
+                print(
+                    f"{workers:>7}  {name:<7}{r.questions:>10,}{len(r.findings):>8,}{len(fixable):>8,}"
+                    f"{r.seconds:>8.2f}{c.round_trips - before:>7}",
+                    flush=True,
+                )
+                if name == "scan":
+                    missed = damaged - {f.question_id for f in fixable}
+                    if missed:
+                        raise SystemExit(f"{len(missed)} damaged questions not reported, e.g. {min(missed)}")
+                elif fixable:
+                    raise SystemExit(f"still fixable after --fix: {fixable[0]}")
+    finally:
+        db._connect = original
+        db.clear_cache()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"total {time.perf_counter() - start:.1f} s")
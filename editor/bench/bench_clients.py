@@ -0,0 +1,136 @@
+"""Exercise `lib.clients` pooling and retries over real HTTP.
+
+    cd editor
+    python -m bench.bench_clients
+    python -m bench.bench_clients --threads 16 --requests 200 --fail-rate 0.1
+
+Starts a local stand-in for PostgREST (answers `GET /rest/v1/<table>`
+with a small JSON page after `--rtt-ms`, and with a bare 503 or 429 for
+`--fail-rate` of requests, as a gateway would), points `lib.db` at it and
+has `--threads` workers issue selects through `db._client()`. Each
+configuration reports failed requests, retries, mean wait for a pooled
+connection and connections opened:
+
+    shared, 1 conn     one client, pool of one connection: workers queue
+    shared             one client, pool of `SUPABASE_POOL_SIZE`
+    dedicated          each worker in `db.dedicated_client()`
+    no retries         the shared pool with SUPABASE_RETRIES=0
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lib import db, metrics
+
+
+def _server(rtt_ms: float, fail_rate: float, seed: int) -> ThreadingHTTPServer:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    body = json.dumps([{"id": f"ref-{i}", "text": "In the beginning"} for i in range(20)]).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            time.sleep(rtt_ms / 1000)
+            with lock:
+                roll = rng.random()
+            if roll < fail_rate:
+                status, payload = (429 if roll < fail_rate / 4 else 503), b"upstream unavailable"
+            else:
+                status, payload = 200, body
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json" if status == 200 else "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _select(n: int) -> int:
+    """Issue `n` selects; return how many failed."""
+    failed = 0
+    for _ in range(n):
+        try:
+            db._client().table("verse_ref").select("id, text").limit(20).execute()
+        except Exception:
+            failed += 1
+    return failed
+
+
+def _run(threads: int, requests: int, dedicated: bool) -> int:
+    def task() -> int:
+        if not dedicated:
+            return _select(requests)
+        with db.dedicated_client():
+            return _select(requests)
+
+    with ThreadPoolExecutor(threads) as pool:
+        # Copies of this context, so the workers' requests count in the scope.
+        return sum(f.result() for f in [pool.submit(copy_context().run, task) for _ in range(threads)])
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--requests", type=int, default=100, help="per thread")
+    p.add_argument("--rtt-ms", type=float, default=5.0)
+    p.add_argument("--fail-rate", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    server = _server(args.rtt_ms, args.fail_rate, args.seed)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    saved = db.SUPABASE_URL, db.SUPABASE_KEY, db.CLIENT_CONFIG, metrics.ENABLED, metrics.LOG_PATH
+    base = replace(db.CLIENT_CONFIG, backoff=0.01, max_backoff=0.2)  # keep the run short
+    configs = [
+        ("shared, 1 conn", replace(base, pool_size=1, keepalive=1), False),
+        ("shared", base, False),
+        ("dedicated", base, True),
+        ("no retries", replace(base, retries=0), False),
+    ]
+    total = args.threads * args.requests
+    print(f"{'client':<16}{'requests':>9}{'failed':>8}{'retries':>9}{'wait ms':>9}{'conns':>7}{'seconds':>9}")
+    try:
+        db.SUPABASE_URL, db.SUPABASE_KEY = url, "bench.bench.bench"
+        metrics.enable()
+        metrics.LOG_PATH = ""
+        for name, config, dedicated in configs:
+            db.CLIENT_CONFIG = config
+            db._clients.close()
+            start = time.perf_counter()
+            with metrics.scope("bench_clients") as s:
+                failed = _run(args.threads, args.requests, dedicated)
+            seconds = time.perf_counter() - start
+            waits = s.pool_wait
+            print(
+                f"{name:<16}{total:>9}{failed:>8}{s.retries.calls:>9}"
+                f"{waits.ms / max(waits.calls, 1):>9.2f}{s.connections:>7}{seconds:>9.2f}",
+                flush=True,
+            )
+    finally:
+        db.SUPABASE_URL, db.SUPABASE_KEY, db.CLIENT_CONFIG, enabled, metrics.LOG_PATH = saved
+        metrics.enable(enabled)
+        db._clients.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Benchmark the editor's data layer against an in-memory Supabase stand-in.
+
+    cd editor
+    python -m bench.bench_db                       # 3k / 10k / 31k refs
+    python -m bench.bench_db --sizes 31102 --rtt-ms 20 --json out.json
+
+`lib.db` runs unmodified; only `db._connect` is swapped for a `FakeClient`
+seeded by `bench.synthetic`. For every operation and catalog size it
+reports latency percentiles, round trips per call and peak Python memory
+allocated during the call (traced in a separate pass, so tracing doesn't
+skew the timings; the stand-in's own query work is included).
+
+Latency against the fake is CPU time in `lib.db` plus the fake's own
+query work; `--rtt-ms` adds a fixed delay per round trip to approximate
+a real network hop. Compare runs with the same flags.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, Catalog, build_catalog, import_batch
+from lib import db
+from lib.catalog import VerseCatalog
+
+DEFAULT_SIZES = (3000, 10000, FULL_SIZE)
+
+
+@dataclass
+class Result:
+    size: int
+    op: str
+    reps: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    round_trips: float  # per call
+    peak_kib: float
+
+
+def _pct(sorted_ms: list[float], q: float) -> float:
+    i = min(len(sorted_ms) - 1, max(0, round(q * (len(sorted_ms) - 1))))
+    return round(sorted_ms[i], 2)
+
+
+# ── Operations ────────────────────────────────────────────────────────────────
+# Each factory returns a zero-argument callable; `rep` varies the inputs.
+# Reads run against a cold cache unless the name says "warm".
+
+Op = Callable[[FakeClient, Catalog, random.Random, int], Callable[[], object]]
+
+
+def _verse_detail(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+    ref = rng.choice(cat.refs)[0]
+    tid = rng.choice(cat.translations)
+    return lambda: db.get_verse_detail(ref, tid)
+
+
+def _dialog_open(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+    ref = rng.choice(cat.refs)[0]
+    tid = rng.choice(cat.translations)
+    return lambda: db.gather(lambda: db.get_verse_detail(ref, tid), db.get_max_rank)
+
+
+def _max_rank(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+    return db.get_max_rank
+
+
+def _preview(size: int) -> Op:
+    def make(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+        batch = import_batch(cat, size, seed=rep)
+        return lambda: db.preview_import(batch, cat.translations[0])
+
+    return make
+
+
+def _import(size: int) -> Op:
+    def make(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+        # A fresh seed per rep, so every rep writes the same mix of new and updated verses.
+        batch = import_batch(cat, size, seed=1000 + rep)
+        return lambda: db.import_verses(batch, start_rank=10**6 + rep * size)
+
+    return make
+
+
+def _catalog_load(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+    return lambda: VerseCatalog().load()
+
+
+def _catalog_search(**kw) -> Op:
+    loaded: dict[int, VerseCatalog] = {}
+
+    def make(c: FakeClient, cat: Catalog, rng: random.Random, rep: int):
+        vc = loaded.get(id(c))
+        if vc is None:
+            vc = loaded[id(c)] = VerseCatalog()
+            vc.load()
+            vc.search(cat.translations[0], **kw)  # build the text index and sort orders
+        return lambda: vc.search(cat.translations[0], limit=100, **kw)
+
+    return make
+
+
+OPS: dict[str, Op] = {
+    "get_verse_detail": _verse_detail,
+    "get_max_rank": _max_rank,
+    "dialog open (gather)": _dialog_open,
+    "preview_import(500)": _preview(500),
+    "import_verses(500)": _import(500),
+    "catalog.load": _catalog_load,
+    "catalog.search(book)": _catalog_search(book_id=1),
+    "catalog.search(rank, offset 2000)": _catalog_search(sort_by="rank", offset=2000),
+    "catalog.search(text)": _catalog_search(text_search="lord god"),
+}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def run_op(name: str, c: FakeClient, cat: Catalog, size: int, reps: int, seed: int) -> Result:
+    make = OPS[name]
+    rng = random.Random(seed)
+    times: list[float] = []
+    trips = 0
+    # One untimed call first, so the stand-in has built its indexes.
+    db.clear_cache()
+    make(c, cat, rng, -1)()
+    for rep in range(reps):
+        db.clear_cache()
+        fn = make(c, cat, rng, rep)
+        before = c.round_trips
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+        trips += c.round_trips - before
+
+    db.clear_cache()
+    fn = make(c, cat, rng, reps)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return Result(
+        size=size,
+        op=name,
+        reps=reps,
+        p50_ms=_pct(times, 0.50),
+        p95_ms=_pct(times, 0.95),
+        p99_ms=_pct(times, 0.99),
+        max_ms=round(times[-1], 2),
+        round_trips=round(trips / reps, 1),
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def run(sizes: list[int], ops: list[str], reps: int, rtt_ms: float, seed: int) -> list[Result]:
+    results = []
+    original = db._connect
+    try:
+        for size in sizes:
+            c = FakeClient()
+            cat = build_catalog(c, n_refs=size, seed=seed)
+            c.latency_ms = rtt_ms
+            db._connect = lambda: c
+            for name in ops:
+                r = run_op(name, c, cat, size, reps, seed)
+                results.append(r)
+                _print_row(r)
+    finally:
+        db._connect = original
+        db.clear_cache()
+    return results
+
+
+_HEADER = f"{'refs':>6}  {'operation':<32}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'trips':>7}{'peak KiB':>10}"
+
+
+def _print_row(r: Result) -> None:
+    print(
+        f"{r.size:>6}  {r.op:<32}{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}{r.max_ms:>9.2f}"
+        f"{r.round_trips:>7g}{r.peak_kib:>10.1f}",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="catalog sizes (verse refs)")
+    p.add_argument("--ops", nargs="+", default=list(OPS), choices=list(OPS), metavar="OP", help="operations to run")
+    p.add_argument("--reps", type=int, default=20, help="timed calls per operation")
+    p.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network delay per round trip")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", help="also write results to this file")
+    args = p.parse_args(argv)
+
+    print(f"times in ms; rtt {args.rtt_ms} ms; {args.reps} reps")
+    print(_HEADER)
+    results = run(args.sizes, args.ops, args.reps, args.rtt_ms, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"rtt_ms": args.rtt_ms, "reps": args.reps, "seed": args.seed, "results": [asdict(r) for r in results]},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time `lib.dedup` near-duplicate detection over a full-Bible translation.
+
+    cd editor
+    python -m bench.bench_dedup                        # 31k verses, 1000 planted duplicates
+    python -m bench.bench_dedup --planted 5000 --threshold 0.6
+
+Generates a synthetic translation (`bench.synthetic.translation_texts`)
+and copies `--planted` random verses under new rows the way an LLM import
+gets them wrong: different case and punctuation, one word swapped, a word
+added or dropped. Reports the index build, the catalog-wide duplicate
+report, a preview-sized batch query and single-row updates, and how many
+planted copies at or above `--threshold` were found. Each
+planted pair's exact similarity is the reference, so a miss is a pair the
+LSH never compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from bench.synthetic import translation_texts
+from lib import dedup
+
+
+def _variant(rng: random.Random, text: str) -> str:
+    words = text.split(" ")
+    kind = rng.randrange(4)
+    if kind == 0:
+        words = [w.upper() if rng.random() < 0.3 else w.strip(",.") for w in words]
+    elif kind == 1:
+        words[rng.randrange(len(words))] = rng.choice(words)
+    elif kind == 2:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(words))
+    elif len(words) > 1:
+        del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--planted", type=int, default=1000)
+    p.add_argument("--threshold", type=float, default=dedup.THRESHOLD)
+    p.add_argument("--batch", type=int, default=500, help="verses per preview query")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    texts = list(translation_texts(seed=args.seed).values())
+    originals = len(texts)
+    planted = []
+    for _ in range(args.planted):
+        source = rng.randrange(originals)
+        planted.append((source, len(texts)))
+        texts.append(_variant(rng, texts[source]))
+
+    start = time.perf_counter()
+    index = dedup.MinHashIndex(texts)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    pairs = index.pairs(args.threshold)
+    report_s = time.perf_counter() - start
+
+    expected = [(a, b) for a, b in planted if dedup.similarity(texts[a], texts[b]) >= args.threshold]
+    found = {(a, b) for a, b, _ in pairs}
+    print(f"{len(texts):,} verses: index built in {build_s:.1f} s, report in {report_s:.2f} s")
+    print(
+        f"{len(pairs):,} pairs ≥ {args.threshold}; planted: {sum(pair in found for pair in expected):,} of "
+        f"{len(expected):,} found ({args.planted - len(expected):,} planted copies fell below the threshold)"
+    )
+
+    batch = [_variant(rng, texts[rng.randrange(originals)]) for _ in range(args.batch)]
+    start = time.perf_counter()
+    matched = index.similar(batch, args.threshold)
+    query_s = time.perf_counter() - start
+    print(
+        f"preview of {args.batch} verses: {query_s * 1000:.0f} ms, "
+        f"{sum(bool(m) for m in matched)} flagged"
+    )
+
+    times = []
+    for _ in range(200):
+        row = rng.randrange(len(texts))
+        texts[row] = _variant(rng, texts[row])
+        start = time.perf_counter()
+        index.update(row, texts[row])
+        times.append(time.perf_counter() - start)
+    print(f"update one verse: {statistics.median(times) * 1e6:.0f} µs median")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare the nightly difficulty full scan with the incremental job.
+
+    cd editor
+    python -m bench.bench_difficulty                   # 31k refs, 1M attempts, 3 days
+    python -m bench.bench_difficulty --history 3000000 --daily 50000 --rtt-ms 20
+
+Two identical synthetic databases receive the same attempts. One runs
+`update_question_difficulty()` (the stand-in's copy of the SQL), the other
+runs `lib.difficulty` against a fresh state file. After the first night
+and after each following day both must hold the same `question.difficulty`
+and `verse_release.global_difficulty`; the table shows what each night cost.
+
+"full s" is the stand-in's in-memory scan, so it leaves out what Postgres
+pays to read every attempt; the "read" columns are the numbers to compare.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from bench import fake_supabase
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, add_attempts, build_catalog
+from lib import db, difficulty
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _database(n_refs: int, history: int, history_days: int, seed: int) -> FakeClient:
+    c = FakeClient()
+    build_catalog(c, n_refs=n_refs, seed=seed)
+    add_attempts(c, history, start=START, days=history_days, seed=seed)
+    # Start from releases that agree with their questions, as after any nightly run.
+    fake_supabase._sync_release_difficulty(c, {q["verse_ref_id"] for q in c.tables["question"]})
+    return c
+
+
+def _copy(c: FakeClient) -> FakeClient:
+    twin = FakeClient(c.latency_ms, c.schema)
+    twin.tables = {t: [dict(r) for r in rows] for t, rows in c.tables.items()}
+    return twin
+
+
+def _snapshot(c: FakeClient) -> tuple[dict, dict]:
+    return (
+        {q["id"]: float(q["difficulty"]) for q in c.tables["question"]},
+        {r["verse_ref_id"]: r["global_difficulty"] for r in c.tables["verse_release"]},
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--refs", type=int, default=FULL_SIZE, help="catalog size (verse refs)")
+    p.add_argument("--history", type=int, default=1_000_000, help="attempts before the first night")
+    p.add_argument("--history-days", type=int, default=90)
+    p.add_argument("--daily", type=int, default=20_000, help="new attempts per following day")
+    p.add_argument("--days", type=int, default=3, help="nights after the first")
+    p.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network delay per round trip")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    full = _database(args.refs, args.history, args.history_days, args.seed)
+    incr = _copy(full)
+    full.latency_ms = incr.latency_ms = args.rtt_ms
+
+    original = db._connect
+    db._connect = lambda: incr
+    print(
+        f"{'night':>5}{'attempts':>10}  {'full s':>8}{'read':>10}  "
+        f"{'incr s':>8}{'read':>10}{'trips':>7}{'written':>9}"
+    )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            state = str(Path(tmp) / "difficulty.sqlite")
+            for night in range(args.days + 1):
+                if night:
+                    day = START + timedelta(days=args.history_days + night - 1)
+                    for c in (full, incr):
+                        add_attempts(c, args.daily, start=day, seed=args.seed + night)
+
+                start = time.perf_counter()
+                fake_supabase.update_question_difficulty(full)
+                full_s = time.perf_counter() - start
+
+                before = incr.round_trips
+                start = time.perf_counter()
+                stats = difficulty.run(state, settle_seconds=0)
+                incr_s = time.perf_counter() - start
+
+                if _snapshot(full) != _snapshot(incr):
+                    raise SystemExit(f"night {night}: incremental result differs from the full scan")
+                print(
+                    f"{night:>5}{len(full.tables['attempt']):>10}  {full_s:>8.2f}{len(full.tables['attempt']):>10}  "
+                    f"{incr_s:>8.2f}{stats['attempts']:>10}{incr.round_trips - before:>7}{stats['written']:>9}",
+                    flush=True,
+                )
+    finally:
+        db._connect = original
+        db.clear_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time `lib.ingest` loading a full-Bible translation.
+
+    cd editor
+    python -m bench.bench_ingest                       # OSIS and USFM, 31k verses
+    python -m bench.bench_ingest --rtt-ms 1 --workers 1 8
+
+Writes a synthetic translation as one OSIS file and as 66 USFM files,
+then for each format and worker count loads it three times into a
+`FakeClient` catalog: into an empty translation, again unchanged (nothing
+to write), and after editing 1% of the verses. Every load is checked
+against the source text.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, build_catalog, translation_texts, write_osis, write_usfm
+from lib import db, ingest
+
+
+def _check(c: FakeClient, tid: str, texts: dict) -> None:
+    refs = {r["id"]: (r["book_id"], r["chapter"], r["verse"]) for r in c.tables["verse_ref"]}
+    loaded = {refs[t["verse_ref_id"]]: t["text"] for t in c.tables["verse_text"] if t["translation_id"] == tid}
+    if loaded != texts:
+        wrong = next(k for k in texts if loaded.get(k) != texts[k])
+        raise SystemExit(f"{wrong}: loaded {loaded.get(wrong)!r}, expected {texts[wrong]!r}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--formats", nargs="+", default=["osis", "usfm"], choices=["osis", "usfm"])
+    p.add_argument("--workers", type=int, nargs="+", default=sorted({1, ingest.WORKERS}))
+    p.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network delay per round trip")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    texts = translation_texts(seed=args.seed + 1)
+    rng = random.Random(args.seed)
+    edited = dict(texts)
+    for key in rng.sample(sorted(texts), len(texts) // 100):
+        edited[key] = edited[key].replace(".", "!")
+
+    original = db._connect
+    print(f"{'format':<6}{'workers':>8}  {'load':<10}{'parse s':>8}{'resolve s':>10}{'write s':>9}{'written':>9}{'trips':>7}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in args.formats:
+                for workers in args.workers:
+                    c = FakeClient()
+                    build_catalog(c, n_refs=FULL_SIZE, translations=("NIV",), seed=args.seed)
+                    c.latency_ms = args.rtt_ms
+                    db._connect = lambda: c
+                    db.clear_cache()
+                    db.create_translation("WEB", "Synthetic WEB", "public_domain")
+                    for load, source in (("empty", texts), ("unchanged", texts), ("1% edits", edited)):
+                        path = Path(tmp) / f"{fmt}-{load}"
+                        if not path.exists():
+                            write_osis(path.with_suffix(".xml"), source) if fmt == "osis" else write_usfm(path, source)
+                        target = path.with_suffix(".xml") if fmt == "osis" else path
+                        before = c.round_trips
+                        r = ingest.ingest("WEB", [target], workers)
+                        _check(c, "WEB", source)
+                        s = r.seconds
+                        print(
+                            f"{fmt:<6}{workers:>8}  {load:<10}{s['parse']:>8.2f}{s['resolve']:>10.2f}{s['write']:>9.2f}"
+                            f"{r.written:>9}{c.round_trips - before:>7}",
+                            flush=True,
+                        )
+    finally:
+        db._connect = original
+        db.clear_cache()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"total {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,107 @@
+"""Time `lib.planner` planning every student's next session.
+
+    cd editor
+    python -m bench.bench_planner                      # 100k students
+    python -m bench.bench_planner --users 20000 --states 200
+
+Generates `plan_state_page`-shaped pages (`--states` verse states per
+student on average, the lowest-ranked released verses first as the pool
+gate introduces them, mostly mastered, due from a week overdue to a
+month out) over `--released` released verses and runs them through
+`planner.plan_users` with a local state file and a save that only
+JSON-encodes the rows it would upsert. Reports the planning rate apart
+from the page generation, the session mix and the upsert payload size.
+Network time isn't included: a full run reads `USERS_PER_PAGE` students
+per RPC call on `SHARDS` connections.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from lib import planner
+
+
+def _releases(n: int, rng: np.random.Generator) -> list[dict]:
+    return [
+        {"verse_ref_id": str(uuid.UUID(int=int(rng.integers(1 << 62)) << 64 | i)), "global_rank": i + 1,
+         "global_difficulty": round(d)}
+        for i, d in enumerate(rng.normal(500, 120, n).clip(0, 1000))
+    ]
+
+
+def _pages(users: int, states: int, releases: list[dict], now: float, seed: int):
+    rng = np.random.default_rng(seed)
+    ids = [r["verse_ref_id"] for r in releases]
+    for start in range(0, users, planner.USERS_PER_PAGE):
+        page = []
+        for u in range(start, min(users, start + planner.USERS_PER_PAGE)):
+            n = max(1, int(states * rng.uniform(0.25, 1.75)))
+            page.append(
+                {
+                    "user_id": str(uuid.UUID(int=u)),
+                    "verse_ref_ids": ids[:n],
+                    "mastery": rng.beta(6, 2, n).round(3).tolist(),
+                    "next_due_at": (now + rng.uniform(-7, 30, n) * 86400).tolist(),
+                }
+            )
+        yield page
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--users", type=int, default=100_000)
+    p.add_argument("--states", type=int, default=60, help="mean verse states per student")
+    p.add_argument("--released", type=int, default=20_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    releases_rows = _releases(args.released, np.random.default_rng(args.seed))
+    releases = planner.Releases.from_rows(releases_rows)
+    now = datetime.now(timezone.utc).timestamp()
+    payload = [0]
+
+    def save(plans: list[dict]) -> int:
+        payload[0] += len(json.dumps(plans))
+        return len(plans)
+
+    generate_s = 0.0
+
+    def timed_pages():
+        nonlocal generate_s
+        pages = _pages(args.users, args.states, releases_rows, now, args.seed)
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            generate_s += time.perf_counter() - start
+            if page is None:
+                return
+            yield page
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state = planner.PlanState(os.path.join(tmp, "planner.sqlite"))
+        start = time.perf_counter()
+        stats = planner.plan_users(timed_pages(), releases, state, save)
+        total_s = time.perf_counter() - start
+        plan_s = total_s - generate_s
+        print(
+            f"{stats['students']:,} students, ~{args.states} states each: planned in {plan_s:.1f} s "
+            f"({stats['students'] / plan_s:,.0f}/s; page generation {generate_s:.1f} s more)"
+        )
+        print(
+            f"{stats['planned'] / stats['students']:.1f} verses per plan; upsert payload "
+            f"{payload[0] / 2**20:.0f} MiB ({payload[0] / stats['students']:.0f} B per student); "
+            f"{state.count():,} plans in the state file"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark `lib.rollups`: folding in attempts, and the stats page's reads.
+
+    cd editor
+    python -m bench.bench_rollups                      # 2M attempts, full catalog
+    python -m bench.bench_rollups --attempts 500000 --size 3000
+
+Seeds a `FakeClient` catalog (questions are looked up through it the
+first time they are seen) and streams `--attempts` synthetic attempts
+into a fresh state file: accuracies and response times vary per question,
+about 5% of answers are under 1500 ms and 10% have no response time.
+Lapse totals come from a generated page source rather than the fake's
+`user_verse_state`. Reports the fold rate, the state file's size, an
+incremental run of `--increment` further attempts, and read latencies
+(median of `--reps`) for what the stats page and verse dialog ask for.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, build_catalog
+from lib import db, rollups
+
+
+def _attempt_source(questions: list[dict], n: int, start: datetime, seed: int):
+    """A `PageSource` over `n` attempts spread over a day from `start`."""
+    rng = random.Random(seed)
+    ease = [random.Random(q["id"]).uniform(0.3, 0.95) for q in questions]
+    pace = [random.Random(q["id"] + "t").uniform(3000, 15000) for q in questions]
+    step = timedelta(days=1) / max(1, n)
+
+    def pages(after, before, page_size) -> Iterator[list[dict]]:
+        rows: list[dict] = []
+        first = 0 if after is None else int((datetime.fromisoformat(after[0]) - start) / step) + 1
+        for i in range(first, n):
+            created = db.to_timestamptz(start + step * i)
+            if before is not None and created >= before:
+                break
+            k = rng.randrange(len(questions))
+            roll = rng.random()
+            rows.append(
+                {
+                    "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "question_id": questions[k]["id"],
+                    "verse_ref_id": questions[k]["verse_ref_id"],
+                    "is_correct": rng.random() < ease[k],
+                    "response_time_ms": (
+                        None if roll < 0.10
+                        else rng.randint(400, 1499) if roll < 0.15
+                        else int(rng.lognormvariate(0, 0.5) * pace[k])
+                    ),
+                    "created_at": created,
+                }
+            )
+            if len(rows) == page_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    return pages
+
+
+def _lapse_pages(refs: list[str], seed: int) -> Callable[[], Iterator[list[dict]]]:
+    def pages() -> Iterator[list[dict]]:
+        rng = random.Random(seed)
+        page: list[dict] = []
+        for ref in sorted(refs):
+            states = rng.randint(0, 400)
+            lapsed = int(states * rng.uniform(0, 0.4))
+            lapses = lapsed + rng.randint(0, lapsed)
+            page.append({"verse_ref_id": ref, "states": states, "lapsed": lapsed, "lapses": lapses})
+            if len(page) == db.PAGE_SIZE:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    return pages
+
+
+def _median_ms(fn: Callable[[], object], reps: int) -> float:
+    times = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--attempts", type=int, default=2_000_000)
+    p.add_argument("--increment", type=int, default=20_000, help="attempts in the incremental run")
+    p.add_argument("--size", type=int, default=FULL_SIZE, help="catalog size (verse refs)")
+    p.add_argument("--batch", type=int, default=rollups.BATCH, help="attempts per fold")
+    p.add_argument("--reps", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    fake = FakeClient()
+    build_catalog(fake, n_refs=args.size, seed=args.seed)
+    saved = db._connect
+    db._connect = lambda: fake
+    questions = [q for q in fake.tables["question"] if q["active"]]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rollups.sqlite")
+            r = rollups.Rollups(path)
+            source = _attempt_source(questions, args.attempts + args.increment, start, args.seed)
+            until = db.to_timestamptz(start + timedelta(days=1) * args.attempts / (args.attempts + args.increment))
+
+            t = time.perf_counter()
+            stats = rollups.ingest(r, before=until, source=source, batch=args.batch)
+            fold_s = time.perf_counter() - t
+            rollups.refresh_lapses(r, _lapse_pages([ref["id"] for ref in fake.tables["verse_ref"]], args.seed))
+            t = time.perf_counter()
+            more = rollups.ingest(r, source=source, batch=args.batch)
+            increment_s = time.perf_counter() - t
+            size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            totals = r.totals()
+            print(
+                f"{stats['attempts']:,} attempts folded in {fold_s:.1f} s ({stats['attempts'] / fold_s:,.0f}/s); "
+                f"{more['attempts']:,} more in {increment_s:.2f} s"
+            )
+            print(f"{totals['verses']:,} verses, {totals['questions']:,} questions; state {size / 2**20:.1f} MiB")
+
+            verse_id = r.verses(limit=1)[0]["verse_ref_id"]
+            reads = [
+                *[(f"verses by {s}", lambda s=s: r.verses(s, True, 100, 5)) for s in rollups.SORTS],
+                ("questions by p90, NIV", lambda: r.questions("p90", True, 100, 5, "NIV")),
+                ("one verse + questions", lambda: r.verse(verse_id)),
+            ]
+            print(f"{'read':<28}{'ms':>8}")
+            for name, fn in reads:
+                print(f"{name:<28}{_median_ms(fn, args.reps):>8.2f}", flush=True)
+    finally:
+        db._connect = saved
+
+
+if __name__ == "__main__":
+    main()
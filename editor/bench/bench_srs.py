@@ -0,0 +1,42 @@
+"""Time `lib.srs.simulate` on a synthetic snapshot.
+
+    cd editor
+    python -m bench.bench_srs                      # 1M pairs, 90 days
+    python -m bench.bench_srs --pairs 100000 300000 1000000 --days 30 90
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from bench.synthetic import srs_snapshot
+from lib import srs
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--pairs", type=int, nargs="+", default=[1_000_000], help="user-verse states")
+    p.add_argument("--pairs-per-user", type=int, default=40)
+    p.add_argument("--days", type=int, nargs="+", default=[90])
+    p.add_argument("--sessions", type=int, default=1, help="sessions per active user per day")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    behaviour = srs.Behaviour(sessions_per_day=args.sessions)
+    print(f"{'pairs':>9}{'users':>8}{'days':>6}{'seconds':>9}{'reviews':>11}{'new':>9}{'mastered':>10}")
+    for n_pairs in args.pairs:
+        snap = srs_snapshot(n_pairs, args.pairs_per_user, seed=args.seed)
+        for days in args.days:
+            start = time.perf_counter()
+            f = srs.simulate(snap, days, behaviour=behaviour, seed=args.seed)
+            secs = time.perf_counter() - start
+            print(
+                f"{n_pairs:>9}{snap.n_users:>8}{days:>6}{secs:>9.2f}"
+                f"{int(f.reviews.sum()):>11}{int(f.new.sum()):>9}{int(f.mastered[-1]):>10}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
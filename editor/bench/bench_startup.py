@@ -0,0 +1,117 @@
+"""Time the editor's cold start, with and without the catalog snapshot.
+
+    cd editor
+    python -m bench.bench_startup
+    python -m bench.bench_startup --size 3000 --rtt-ms 40
+
+Seeds a `FakeClient` (`--rtt-ms` per round trip) with `--size` verse refs
+in three translations and runs `editor.py` under Streamlit's `AppTest`,
+timing its first run — page, filters and the first table of verses — in
+each state a new editor process can start in:
+
+    no snapshot        the catalog loads from Supabase before the table shows
+    snapshot           mapped from disk; fresh, so nothing is fetched
+    snapshot, stale    mapped from disk; the reload runs in the background
+    snapshot, offline  mapped from disk; every request fails
+
+Module state (`lib.catalog`'s catalog, `lib.db`'s read cache) is reset
+between runs; imports stay warm. Also reports the snapshot's size and
+how long writing and mapping it take.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import FULL_SIZE, build_catalog
+from lib import catalog, db
+
+EDITOR = str(Path(__file__).parents[1] / "editor.py")
+
+
+def _offline():
+    raise ConnectionError("offline")
+
+
+def _settle() -> None:
+    """Wait for the catalog's background reload / save, so it doesn't slow the next run."""
+    while catalog._catalog is not None and catalog._catalog._syncing:
+        time.sleep(0.05)
+
+
+def _first_render(connect, max_age: float) -> tuple[float, int]:
+    """Seconds to the first table of verses; rows shown."""
+    from streamlit.testing.v1 import AppTest
+
+    # AppTest's own "missing ScriptRunContext" warning, once per run
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    catalog._catalog = None
+    db.clear_cache()
+    db._clients.close()
+    db._connect = connect
+    saved = catalog.MAX_AGE
+    catalog.MAX_AGE = max_age
+    try:
+        at = AppTest.from_file(EDITOR, default_timeout=120)
+        start = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - start
+    finally:
+        catalog.MAX_AGE = saved
+        _settle()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    found = [m.value for m in at.markdown if "found**" in m.value]
+    if not found:
+        raise RuntimeError("no table rendered")
+    return seconds, int(found[0].split()[0].strip("*").replace(",", ""))
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--size", type=int, default=FULL_SIZE, help="catalog size (verse refs)")
+    p.add_argument("--rtt-ms", type=float, default=20.0, help="simulated network delay per round trip")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    fake = FakeClient()
+    build_catalog(fake, n_refs=args.size, seed=args.seed)
+    fake.latency_ms = args.rtt_ms
+    online = lambda: fake  # noqa: E731
+
+    saved = catalog.SNAPSHOT_PATH, db._connect
+    with tempfile.TemporaryDirectory() as tmp:
+        path = catalog.SNAPSHOT_PATH = os.path.join(tmp, "catalog.snap")
+        try:
+            cold, rows = _first_render(online, max_age=600)  # leaves a snapshot behind
+            start = time.perf_counter()
+            size = catalog.get_catalog().save_snapshot(path)
+            write_s = time.perf_counter() - start
+            start = time.perf_counter()
+            catalog.VerseCatalog().load_snapshot(path)
+            map_s = time.perf_counter() - start
+            print(f"{args.size:,} refs, 3 translations; snapshot {size / 2**20:.1f} MiB, "
+                  f"written in {write_s:.2f} s, mapped in {map_s:.2f} s; rtt {args.rtt_ms:g} ms")
+            print(f"{'start':<20}{'first table s':>14}{'rows':>8}")
+            print(f"{'no snapshot':<20}{cold:>14.2f}{rows:>8,}")
+            for name, connect, max_age in [
+                ("snapshot", online, 600),
+                ("snapshot, stale", online, 0),
+                ("snapshot, offline", _offline, 0),
+            ]:
+                seconds, rows = _first_render(connect, max_age)
+                print(f"{name:<20}{seconds:>14.2f}{rows:>8,}", flush=True)
+        finally:
+            catalog.SNAPSHOT_PATH, db._connect = saved
+            catalog._catalog = None
+            db._clients.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,668 @@
+"""In-memory stand-in for the parts of supabase-py that `lib.db` uses.
+
+`FakeClient` mimics the PostgREST query builder closely enough to run
+`lib.db` unmodified: select with embedded resources (`verse_ref!inner(...)`
+and nested filters such as `verse_ref.book_id`), eq/neq/gt/gte/lt/lte/
+in_/is_/ilike filters, or_ over eq filters (`and(a.eq.1,b.eq.2),...`),
+order/limit/range/single, insert/upsert (single or multi-row, with
+on_conflict)/update/delete, and the RPCs defined in supabase/schema.sql.
+`max_rows` caps every select the way PostgREST's max-rows setting does
+(1000 on Supabase); by default there is no cap.
+
+Every `execute()` counts as one round trip. `latency_ms` adds a sleep per
+round trip, so benchmarks can show what a network hop costs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from fractions import Fraction
+from typing import Any, Callable
+
+
+@dataclass
+class TableSpec:
+    pk: tuple[str, ...]
+    unique: list[tuple[str, ...]] = field(default_factory=list)
+    defaults: dict[str, Any] = field(default_factory=dict)
+    fks: dict[str, str] = field(default_factory=dict)  # column -> referenced table
+    generated: dict[str, Callable[[dict], Any]] = field(default_factory=dict)  # `generated always as`
+
+    def generate(self, row: dict) -> dict:
+        for col, fn in self.generated.items():
+            row[col] = fn(row)
+        return row
+
+
+# Mirrors supabase/schema.sql (only what lib.db and the bench tools touch).
+SCHEMA: dict[str, TableSpec] = {
+    "book": TableSpec(pk=("id",)),
+    "translation": TableSpec(pk=("id",), defaults={"active": True}),
+    "verse_ref": TableSpec(pk=("id",), unique=[("book_id", "chapter", "verse")], fks={"book_id": "book"}),
+    "verse_text": TableSpec(
+        pk=("id",),
+        unique=[("verse_ref_id", "translation_id")],
+        fks={"verse_ref_id": "verse_ref", "translation_id": "translation"},
+        defaults={"fetched_at": None},
+        generated={"content_hash": lambda r: hashlib.md5(r["text"].encode()).hexdigest()},
+    ),
+    "verse_release": TableSpec(
+        pk=("verse_ref_id",),
+        fks={"verse_ref_id": "verse_ref"},
+        defaults={"global_difficulty": 500, "released": True},
+    ),
+    "question": TableSpec(
+        pk=("id",),
+        unique=[("type", "verse_ref_id", "translation_id")],
+        fks={"verse_ref_id": "verse_ref", "translation_id": "translation"},
+        defaults={"difficulty": 500, "active": True, "prompt": None, "created_at": None},
+    ),
+    "profiles": TableSpec(pk=("id",), defaults={"level": 1, "xp": 0}),
+    "user_verse_state": TableSpec(
+        pk=("user_id", "verse_ref_id"),
+        fks={"verse_ref_id": "verse_ref", "user_id": "profiles"},
+        defaults={
+            "mastery": 0,
+            "correct_streak": 0,
+            "lapse_count": 0,
+            "introduced_at": None,
+            "last_seen_at": None,
+            "next_due_at": None,
+        },
+    ),
+    "attempt": TableSpec(
+        pk=("id",),
+        fks={"question_id": "question", "verse_ref_id": "verse_ref", "user_id": "profiles"},
+        defaults={"response_time_ms": None, "created_at": None},
+    ),
+    "session_plan": TableSpec(pk=("user_id",), fks={"user_id": "profiles"}),
+}
+
+
+class APIError(Exception):
+    pass
+
+
+@dataclass
+class APIResponse:
+    data: Any
+    count: int | None = None
+
+
+def _clone(row: dict) -> dict:
+    # Rows are flat JSON; only answer_json-style values need a deep copy.
+    return {k: (_deep(v) if isinstance(v, (dict, list)) else v) for k, v in row.items()}
+
+
+def _deep(v: Any) -> Any:
+    if isinstance(v, dict):
+        return {k: _deep(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_deep(x) for x in v]
+    return v
+
+
+# ── select parsing ────────────────────────────────────────────────────────────
+
+@dataclass
+class _Sel:
+    columns: list[str]
+    embeds: list[tuple[str, bool, "_Sel"]]  # (table, inner join, sub-select)
+
+
+def _parse_select(text: str) -> _Sel:
+    sel, _ = _parse_items(re.sub(r"\s+", "", text), 0)
+    return sel
+
+
+def _parse_items(text: str, i: int) -> tuple[_Sel, int]:
+    cols: list[str] = []
+    embeds: list[tuple[str, bool, _Sel]] = []
+    buf = ""
+    while i < len(text):
+        ch = text[i]
+        if ch == "(":
+            inner = buf.endswith("!inner")
+            name = buf.split("!")[0]
+            sub, i = _parse_items(text, i + 1)
+            embeds.append((name, inner, sub))
+            buf = ""
+            continue
+        if ch == ")":
+            if buf:
+                cols.append(buf)
+            return _Sel(cols, embeds), i + 1
+        if ch == ",":
+            if buf:
+                cols.append(buf)
+            buf = ""
+        else:
+            buf += ch
+        i += 1
+    if buf:
+        cols.append(buf)
+    return _Sel(cols, embeds), i
+
+
+def _like(pattern: str, flags: int = 0) -> re.Pattern:
+    parts = [".*" if p == "%" else "." if p == "_" else re.escape(p) for p in re.split(r"([%_])", pattern)]
+    return re.compile("".join(parts), flags | re.DOTALL)
+
+
+_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+    "is": lambda a, b: a is b,
+    "ilike": lambda a, b: a is not None and b.fullmatch(str(a)) is not None,
+    "like": lambda a, b: a is not None and b.fullmatch(str(a)) is not None,
+    # `or_`: the whole row against groups of and-ed (col, op, value) filters
+    "or": lambda row, groups: any(all(_test(row, c, op, v) for c, op, v in group) for group in groups),
+}
+
+
+def _test(row: dict, col: str, op: str, value: Any) -> bool:
+    return _OPS[op](row if op == "or" else row.get(col), value)
+
+
+def _or_groups(filters: str) -> list[list[tuple[str, str, Any]]]:
+    """Parse `or_`'s "and(a.eq.1,b.eq.x),c.eq.2" into groups of and-ed filters (eq only)."""
+    groups = []
+    for term in re.findall(r"and\(([^()]*)\)|([^,()]+)", filters):
+        group = []
+        for part in (term[0] or term[1]).split(","):
+            col, op, value = part.split(".", 2)
+            if op != "eq":
+                raise APIError(f"fake or_ supports eq only, got {op}")
+            group.append((col, "eq", int(value) if re.fullmatch(r"-?\d+", value) else value))
+        groups.append(group)
+    return groups
+
+
+# ── client ────────────────────────────────────────────────────────────────────
+
+class FakeClient:
+    """A supabase-py `Client` look-alike holding every table as a list of dicts."""
+
+    def __init__(
+        self, latency_ms: float = 0.0, schema: dict[str, TableSpec] | None = None, max_rows: int | None = None
+    ) -> None:
+        self.schema = schema or SCHEMA
+        self.tables: dict[str, list[dict]] = {t: [] for t in self.schema}
+        self.latency_ms = latency_ms
+        self.max_rows = max_rows
+        self.round_trips = 0
+        self.rpcs: dict[str, Callable[..., Any]] = dict(RPCS)
+        self._versions: dict[str, int] = {t: 0 for t in self.schema}
+        self._indexes: dict[tuple[str, str], tuple[int, dict[Any, list[dict]]]] = {}
+        self._sorted: dict[tuple[str, tuple], tuple[int, list[dict]]] = {}
+        self._unique: dict[tuple[str, tuple[str, ...]], dict[tuple, dict]] = {}
+
+    def table(self, name: str) -> "_Query":
+        if name not in self.tables:
+            raise APIError(f'relation "{name}" does not exist')
+        return _Query(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: dict | None = None) -> "_Rpc":
+        return _Rpc(self, name, params or {})
+
+    def touch(self, table: str, cols: tuple[str, ...] | None = None) -> None:
+        """
+        Call after editing `tables[table]` directly so indexes rebuild.
+        If only `cols` changed in place, indexes on other columns are kept.
+        """
+        version = self._versions[table] = self._versions[table] + 1
+        if cols is not None:
+            for (t, col), (_, idx) in list(self._indexes.items()):
+                if t == table and col not in cols:
+                    self._indexes[(t, col)] = (version, idx)
+        for key in [k for k in self._unique if k[0] == table and (cols is None or set(k[1]) & set(cols))]:
+            del self._unique[key]
+
+    def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def index(self, table: str, col: str) -> dict[Any, list[dict]]:
+        """Equality index on `table.col`, rebuilt after writes."""
+        version = self._versions[table]
+        cached = self._indexes.get((table, col))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        idx: dict[Any, list[dict]] = {}
+        for row in self.tables[table]:
+            idx.setdefault(row.get(col), []).append(row)
+        self._indexes[(table, col)] = (version, idx)
+        return idx
+
+    def sorted_rows(
+        self, table: str, orders: list[tuple[str, bool]], filters: list, candidates: Callable[[], list[dict]]
+    ) -> list[dict]:
+        """`candidates()` in `orders` order, cached until the next write (paging re-runs the same query)."""
+        key = (table, tuple(orders), repr(filters))
+        version = self._versions[table]
+        cached = self._sorted.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rows = candidates()
+        for col, desc in reversed(orders):
+            rows.sort(key=lambda x: (x.get(col) is None, x.get(col)), reverse=desc)
+        if len(self._sorted) > 64:
+            self._sorted.clear()
+        self._sorted[key] = (version, rows)
+        return rows
+
+    def unique_index(self, table: str, cols: tuple[str, ...]) -> dict[tuple, dict]:
+        """Key → row map for a unique key, kept up to date by inserts."""
+        idx = self._unique.get((table, cols))
+        if idx is None:
+            idx = self._unique[(table, cols)] = {tuple(r.get(k) for k in cols): r for r in self.tables[table]}
+        return idx
+
+    def relation(self, parent: str, child: str) -> tuple[str, str, bool]:
+        """(parent column, child column, to-many) for embedding `child` in `parent`."""
+        pspec, cspec = self.schema[parent], self.schema[child]
+        for col, ref in pspec.fks.items():
+            if ref == child:
+                return col, cspec.pk[0], False
+        for col, ref in cspec.fks.items():
+            if ref == parent:
+                to_many = cspec.pk != (col,) and (col,) not in cspec.unique
+                return pspec.pk[0], col, to_many
+        raise APIError(f"Could not find a relationship between '{parent}' and '{child}'")
+
+
+class _Rpc:
+    def __init__(self, client: FakeClient, name: str, params: dict) -> None:
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self) -> APIResponse:
+        self.client._round_trip()
+        fn = self.client.rpcs.get(self.name)
+        if fn is None:
+            raise APIError(f"Could not find the function public.{self.name}")
+        return APIResponse(fn(self.client, **self.params))
+
+
+class _Query:
+    def __init__(self, client: FakeClient, table: str) -> None:
+        self.c = client
+        self.t = table
+        self.mode = "select"
+        self.sel = _parse_select("*")
+        self.filters: list[tuple[str, str, Any]] = []
+        self.orders: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._single = False
+        self._maybe = False
+        self.payload: Any = None
+        self.on_conflict: str | None = None
+        self.ignore_duplicates = False
+        self.count: str | None = None
+        self.head = False
+
+    # ── builders ──────────────────────────────────────────────────────────────
+
+    def select(self, columns: str = "*", count: str | None = None, head: bool = False) -> "_Query":
+        self.sel = _parse_select(columns)
+        self.count = count
+        self.head = head
+        return self
+
+    def _filter(self, op: str, col: str, value: Any) -> "_Query":
+        self.filters.append((col, op, value))
+        return self
+
+    def eq(self, col: str, value: Any) -> "_Query":
+        return self._filter("eq", col, value)
+
+    def neq(self, col: str, value: Any) -> "_Query":
+        return self._filter("neq", col, value)
+
+    def gt(self, col: str, value: Any) -> "_Query":
+        return self._filter("gt", col, value)
+
+    def gte(self, col: str, value: Any) -> "_Query":
+        return self._filter("gte", col, value)
+
+    def lt(self, col: str, value: Any) -> "_Query":
+        return self._filter("lt", col, value)
+
+    def lte(self, col: str, value: Any) -> "_Query":
+        return self._filter("lte", col, value)
+
+    def in_(self, col: str, values: Any) -> "_Query":
+        return self._filter("in", col, set(values))
+
+    def or_(self, filters: str) -> "_Query":
+        return self._filter("or", "", _or_groups(filters))
+
+    def is_(self, col: str, value: Any) -> "_Query":
+        return self._filter("is", col, None if value in (None, "null") else value)
+
+    def ilike(self, col: str, pattern: str) -> "_Query":
+        return self._filter("ilike", col, _like(pattern, re.IGNORECASE))
+
+    def like(self, col: str, pattern: str) -> "_Query":
+        return self._filter("like", col, _like(pattern))
+
+    def order(self, col: str, desc: bool = False, **_: Any) -> "_Query":
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n: int) -> "_Query":
+        self._limit = n
+        return self
+
+    def range(self, start: int, end: int) -> "_Query":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "_Query":
+        self._single = True
+        return self
+
+    def maybe_single(self) -> "_Query":
+        self._maybe = True
+        return self
+
+    def insert(self, payload: Any, **_: Any) -> "_Query":
+        self.mode, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload: Any, on_conflict: str | None = None, ignore_duplicates: bool = False, **_: Any) -> "_Query":
+        self.mode, self.payload = "upsert", payload
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, payload: dict, **_: Any) -> "_Query":
+        self.mode, self.payload = "update", payload
+        return self
+
+    def delete(self, **_: Any) -> "_Query":
+        self.mode = "delete"
+        return self
+
+    # ── execution ─────────────────────────────────────────────────────────────
+
+    def execute(self) -> APIResponse:
+        self.c._round_trip()
+        if self.mode == "select":
+            return self._select()
+        if self.mode in ("insert", "upsert"):
+            return self._write()
+        rows = self._candidates()
+        if self.mode == "update":
+            spec = self.c.schema[self.t]
+            for r in rows:
+                r.update(_deep(self.payload))
+                spec.generate(r)
+            self.c.touch(self.t)
+            return APIResponse([_clone(r) for r in rows])
+        gone = {id(r) for r in rows}
+        self.c.tables[self.t] = [r for r in self.c.tables[self.t] if id(r) not in gone]
+        self.c.touch(self.t)
+        return APIResponse([_clone(r) for r in rows])
+
+    def _candidates(self, local: list | None = None) -> list[dict]:
+        """Rows of this table matching the non-embedded filters (or `local`)."""
+        if local is None:
+            local = [(c, op, v) for c, op, v in self.filters if "." not in c]
+        rows = None
+        for col, op, val in local:
+            if op == "eq":
+                rows = self.c.index(self.t, col).get(val, [])
+                break
+            if op == "in":
+                idx = self.c.index(self.t, col)
+                rows = [r for v in val for r in idx.get(v, [])]
+                break
+        if rows is None:
+            rows = self.c.tables[self.t]
+        return [r for r in rows if all(_test(r, c, op, v) for c, op, v in local)]
+
+    def _write(self) -> APIResponse:
+        c = self.c
+        spec = c.schema[self.t]
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        conflict = tuple(self.on_conflict.split(",")) if self.on_conflict else spec.pk
+        keys = list(dict.fromkeys([spec.pk, *spec.unique, conflict]))
+        existing = {u: c.unique_index(self.t, u) for u in keys}
+        seen: set = set()
+        out = []
+        stale: set[tuple[str, ...]] = set()
+        for raw in rows:
+            key = tuple(raw.get(k) for k in conflict)
+            current = existing[conflict].get(key) if self.mode == "upsert" else None
+            if self.mode == "upsert":
+                if key in seen:
+                    raise APIError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+                seen.add(key)
+            if current is not None:
+                if not self.ignore_duplicates:
+                    current.update(_deep(raw))
+                    spec.generate(current)
+                    stale.update(u for u in keys if u != conflict and set(u) & raw.keys())
+                    out.append(_clone(current))
+                continue
+            row = spec.generate({**spec.defaults, **_deep(raw)})
+            if spec.pk == ("id",) and row.get("id") is None:
+                row["id"] = str(uuid.uuid4())
+            for u in keys:
+                if tuple(row.get(k) for k in u) in existing[u]:
+                    raise APIError(f'duplicate key value violates unique constraint "{self.t}_{"_".join(u)}_key"')
+            for u in keys:
+                existing[u][tuple(row.get(k) for k in u)] = row
+            c.tables[self.t].append(row)
+            out.append(_clone(row))
+        c._versions[self.t] += 1
+        for u in stale:
+            c._unique.pop((self.t, u), None)
+        return APIResponse(out)
+
+    def _select(self) -> APIResponse:
+        local = [f for f in self.filters if "." not in f[0]]
+        # Keyset paging (`order(k).gt(k, last)`): slice the cached sorted rows,
+        # as an index range scan would, instead of re-sorting every page.
+        keyset = [
+            f for f in local if self.orders[:1] == [(f[0], False)] and f[1] in ("gt", "gte") and f[2] is not None
+        ]
+        if len(keyset) == 1:
+            col, op, val = keyset[0]
+            rest = [f for f in local if f is not keyset[0]]
+            rows = self.c.sorted_rows(self.t, self.orders, rest, lambda: self._candidates(rest))
+            find = bisect_right if op == "gt" else bisect_left
+            rows = rows[find(rows, (False, val), key=lambda r: (r.get(col) is None, r.get(col))) :]
+        else:
+            rows = self.c.sorted_rows(self.t, self.orders, local, self._candidates)
+        if any(inner for _, inner, _ in self.sel.embeds):
+            # Inner joins drop rows, so shape everything before paging.
+            out = [s for s in (self._shape(self.t, r, self.sel, "") for r in rows) if s is not None]
+            total = len(out)
+            out = out[self._offset :][: self._page_size()]
+        else:
+            total = len(rows)
+            rows = rows[self._offset :][: self._page_size()]
+            out = [self._shape(self.t, r, self.sel, "") for r in rows]
+        if self.head:
+            out = []
+        count = total if self.count else None
+        if self._single:
+            if len(out) != 1:
+                raise APIError("JSON object requested, multiple (or no) rows returned")
+            return APIResponse(out[0], count)
+        if self._maybe:
+            return APIResponse(out[0] if out else None, count)
+        return APIResponse(out, count)
+
+    def _page_size(self) -> int | None:
+        sizes = [n for n in (self._limit, self.c.max_rows) if n is not None]
+        return min(sizes) if sizes else None
+
+    def _shape(self, table: str, row: dict, sel: _Sel, prefix: str) -> dict | None:
+        cols = sel.columns
+        if not cols or "*" in cols:
+            shaped = _clone(row)
+        else:
+            shaped = {c: _deep(row.get(c)) for c in cols}
+        for name, inner, sub in sel.embeds:
+            path = f"{prefix}{name}."
+            pcol, ccol, to_many = self.c.relation(table, name)
+            kids = self.c.index(name, ccol).get(row.get(pcol), [])
+            local = [(c[len(path) :], op, v) for c, op, v in self.filters if c.startswith(path) and "." not in c[len(path) :]]
+            kids = [k for k in kids if all(_OPS[op](k.get(c), v) for c, op, v in local)]
+            shaped_kids = [s for s in (self._shape(name, k, sub, path) for k in kids) if s is not None]
+            if inner and not shaped_kids:
+                return None
+            shaped[name] = shaped_kids if to_many else (shaped_kids[0] if shaped_kids else None)
+        return shaped
+
+
+# ── RPCs from supabase/schema.sql ─────────────────────────────────────────────
+
+def _attempt_key(a: dict) -> tuple[str, str]:
+    return a["created_at"], a["id"]
+
+
+def attempt_page(
+    c: FakeClient,
+    p_after_created_at: str | None = None,
+    p_after_id: str | None = None,
+    p_before: str | None = None,
+    p_limit: int = 1000,
+) -> list[dict]:
+    # One keyed sort (what idx_attempt_created gives the real table); attempts arrive almost in order.
+    rows = c.sorted_rows("attempt", [], ["created_at, id"], lambda: sorted(c.tables["attempt"], key=_attempt_key))
+    start = 0
+    if p_after_created_at is not None:
+        start = bisect_right(rows, (p_after_created_at, p_after_id), key=_attempt_key)
+    page = rows[start : start + p_limit]
+    if p_before is not None:
+        page = [a for a in page if a["created_at"] < p_before]
+    return [_clone(a) for a in page]
+
+
+def _sync_release_difficulty(c: FakeClient, verse_ref_ids: set[str]) -> None:
+    questions = c.index("question", "verse_ref_id")
+    releases = c.index("verse_release", "verse_ref_id")
+    for ref in verse_ref_ids:
+        active = [q["difficulty"] for q in questions.get(ref, []) if q["active"]]
+        if active:
+            for rel in releases.get(ref, []):
+                rel["global_difficulty"] = _round_half_up(sum(active) / len(active))
+    c.touch("verse_release", ("global_difficulty",))
+
+
+def apply_question_difficulty(c: FakeClient, p_ids: list[str], p_difficulty: list[float]) -> list[str]:
+    by_id = c.index("question", "id")
+    refs: set[str] = set()
+    for qid, d in zip(p_ids, p_difficulty):
+        for q in by_id.get(qid, []):
+            q["difficulty"] = d
+            if q["verse_ref_id"] is not None:
+                refs.add(q["verse_ref_id"])
+    c.touch("question", ("difficulty",))
+    _sync_release_difficulty(c, refs)
+    return sorted(refs)
+
+
+def update_question_difficulty(c: FakeClient) -> None:
+    """The nightly full scan from schema.sql, for comparisons."""
+    ranked: dict[tuple[str, str], list[dict]] = {}
+    for a in c.tables["attempt"]:
+        if a["response_time_ms"] is None or a["response_time_ms"] >= 1500:
+            ranked.setdefault((a["user_id"], a["question_id"]), []).append(a)
+    stats: dict[str, list[int]] = {}
+    for attempts in ranked.values():
+        attempts.sort(key=lambda a: (a["created_at"], a["id"]))
+        for a in attempts[:3]:
+            s = stats.setdefault(a["question_id"], [0, 0])
+            s[0] += bool(a["is_correct"])
+            s[1] += 1
+    for q in c.tables["question"]:
+        s = stats.get(q["id"])
+        if s:
+            q["difficulty"] = _round_half_up((1 - Fraction(s[0] + 5, s[1] + 8)) * 1000)
+    c.touch("question")
+    _sync_release_difficulty(c, {q["verse_ref_id"] for q in c.tables["question"] if q["active"]})
+
+
+def _round_half_up(x: Any) -> int:
+    return int(Fraction(x) + Fraction(1, 2))
+
+
+def verse_lapse_page(c: FakeClient, p_after: str | None = None, p_limit: int = 1000) -> list[dict]:
+    totals: dict[str, list[int]] = {}
+    for s in c.tables["user_verse_state"]:
+        if p_after is None or s["verse_ref_id"] > p_after:
+            t = totals.setdefault(s["verse_ref_id"], [0, 0, 0])
+            t[0] += 1
+            t[1] += s["lapse_count"] > 0
+            t[2] += s["lapse_count"]
+    return [
+        {"verse_ref_id": ref, "states": t[0], "lapsed": t[1], "lapses": t[2]}
+        for ref, t in sorted(totals.items())[:p_limit]
+    ]
+
+
+def _epoch(iso: str | None) -> float | None:
+    return None if iso is None else datetime.fromisoformat(iso).timestamp()
+
+
+def plan_state_page(
+    c: FakeClient,
+    p_after: str | None = None,
+    p_before: str | None = None,
+    p_limit: int = 1000,
+    p_active_since: str | None = None,
+    p_user_ids: list[str] | None = None,
+) -> list[dict]:
+    wanted = None if p_user_ids is None else set(p_user_ids)
+    since = None if p_active_since is None else datetime.fromisoformat(p_active_since)
+    by_user: dict[str, list[dict]] = {}
+    for s in c.tables["user_verse_state"]:
+        u = s["user_id"]
+        if (p_after is None or u > p_after) and (p_before is None or u < p_before) and (wanted is None or u in wanted):
+            by_user.setdefault(u, []).append(s)
+    out = []
+    for u in sorted(by_user):
+        states = by_user[u]
+        if since is not None:
+            seen = [datetime.fromisoformat(s["last_seen_at"]) for s in states if s["last_seen_at"]]
+            if not seen or max(seen) < since:
+                continue
+        out.append(
+            {
+                "user_id": u,
+                "verse_ref_ids": [s["verse_ref_id"] for s in states],
+                "mastery": [float(s["mastery"]) for s in states],
+                "next_due_at": [_epoch(s["next_due_at"]) for s in states],
+            }
+        )
+        if len(out) == p_limit:
+            break
+    return out
+
+
+RPCS: dict[str, Callable[..., Any]] = {
+    "attempt_page": attempt_page,
+    "verse_lapse_page": verse_lapse_page,
+    "plan_state_page": plan_state_page,
+    "apply_question_difficulty": apply_question_difficulty,
+    "update_question_difficulty": update_question_difficulty,
+}
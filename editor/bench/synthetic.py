@@ -0,0 +1,410 @@
+"""Synthetic LearnBible catalog for benchmarks.
+
+`build_catalog` fills a `FakeClient` with all 66 books (real chapter and
+verse counts), a sample of their verse refs, several translations of
+Zipf-distributed text, BLANKS questions and shuffled `verse_release`
+ranks. Everything is derived from `seed`, so runs are comparable.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from bench.fake_supabase import FakeClient
+
+# (id, name, abbr, api_bible_id, testament, chapters, verses)
+BOOKS: list[tuple[int, str, str, str, str, int, int]] = [
+    (1, "Genesis", "Gen", "GEN", "OT", 50, 1533),
+    (2, "Exodus", "Exod", "EXO", "OT", 40, 1213),
+    (3, "Leviticus", "Lev", "LEV", "OT", 27, 859),
+    (4, "Numbers", "Num", "NUM", "OT", 36, 1288),
+    (5, "Deuteronomy", "Deut", "DEU", "OT", 34, 959),
+    (6, "Joshua", "Josh", "JOS", "OT", 24, 658),
+    (7, "Judges", "Judg", "JDG", "OT", 21, 618),
+    (8, "Ruth", "Ruth", "RUT", "OT", 4, 85),
+    (9, "1 Samuel", "1Sam", "1SA", "OT", 31, 810),
+    (10, "2 Samuel", "2Sam", "2SA", "OT", 24, 695),
+    (11, "1 Kings", "1Kgs", "1KI", "OT", 22, 816),
+    (12, "2 Kings", "2Kgs", "2KI", "OT", 25, 719),
+    (13, "1 Chronicles", "1Chr", "1CH", "OT", 29, 942),
+    (14, "2 Chronicles", "2Chr", "2CH", "OT", 36, 822),
+    (15, "Ezra", "Ezra", "EZR", "OT", 10, 280),
+    (16, "Nehemiah", "Neh", "NEH", "OT", 13, 406),
+    (17, "Esther", "Esth", "EST", "OT", 10, 167),
+    (18, "Job", "Job", "JOB", "OT", 42, 1070),
+    (19, "Psalms", "Ps", "PSA", "OT", 150, 2461),
+    (20, "Proverbs", "Prov", "PRO", "OT", 31, 915),
+    (21, "Ecclesiastes", "Eccl", "ECC", "OT", 12, 222),
+    (22, "Song of Solomon", "Song", "SNG", "OT", 8, 117),
+    (23, "Isaiah", "Isa", "ISA", "OT", 66, 1292),
+    (24, "Jeremiah", "Jer", "JER", "OT", 52, 1364),
+    (25, "Lamentations", "Lam", "LAM", "OT", 5, 154),
+    (26, "Ezekiel", "Ezek", "EZK", "OT", 48, 1273),
+    (27, "Daniel", "Dan", "DAN", "OT", 12, 357),
+    (28, "Hosea", "Hos", "HOS", "OT", 14, 197),
+    (29, "Joel", "Joel", "JOL", "OT", 3, 73),
+    (30, "Amos", "Amos", "AMO", "OT", 9, 146),
+    (31, "Obadiah", "Obad", "OBA", "OT", 1, 21),
+    (32, "Jonah", "Jonah", "JON", "OT", 4, 48),
+    (33, "Micah", "Mic", "MIC", "OT", 7, 105),
+    (34, "Nahum", "Nah", "NAM", "OT", 3, 47),
+    (35, "Habakkuk", "Hab", "HAB", "OT", 3, 56),
+    (36, "Zephaniah", "Zeph", "ZEP", "OT", 3, 53),
+    (37, "Haggai", "Hag", "HAG", "OT", 2, 38),
+    (38, "Zechariah", "Zech", "ZEC", "OT", 14, 211),
+    (39, "Malachi", "Mal", "MAL", "OT", 4, 55),
+    (40, "Matthew", "Matt", "MAT", "NT", 28, 1071),
+    (41, "Mark", "Mark", "MRK", "NT", 16, 678),
+    (42, "Luke", "Luke", "LUK", "NT", 24, 1151),
+    (43, "John", "John", "JHN", "NT", 21, 879),
+    (44, "Acts", "Acts", "ACT", "NT", 28, 1007),
+    (45, "Romans", "Rom", "ROM", "NT", 16, 433),
+    (46, "1 Corinthians", "1Cor", "1CO", "NT", 16, 437),
+    (47, "2 Corinthians", "2Cor", "2CO", "NT", 13, 257),
+    (48, "Galatians", "Gal", "GAL", "NT", 6, 149),
+    (49, "Ephesians", "Eph", "EPH", "NT", 6, 155),
+    (50, "Philippians", "Phil", "PHP", "NT", 4, 104),
+    (51, "Colossians", "Col", "COL", "NT", 4, 95),
+    (52, "1 Thessalonians", "1Thes", "1TH", "NT", 5, 89),
+    (53, "2 Thessalonians", "2Thes", "2TH", "NT", 3, 47),
+    (54, "1 Timothy", "1Tim", "1TI", "NT", 6, 113),
+    (55, "2 Timothy", "2Tim", "2TI", "NT", 4, 83),
+    (56, "Titus", "Titus", "TIT", "NT", 3, 46),
+    (57, "Philemon", "Phlm", "PHM", "NT", 1, 25),
+    (58, "Hebrews", "Heb", "HEB", "NT", 13, 303),
+    (59, "James", "Jas", "JAS", "NT", 5, 108),
+    (60, "1 Peter", "1Pet", "1PE", "NT", 5, 105),
+    (61, "2 Peter", "2Pet", "2PE", "NT", 3, 61),
+    (62, "1 John", "1John", "1JN", "NT", 5, 105),
+    (63, "2 John", "2John", "2JN", "NT", 1, 13),
+    (64, "3 John", "3John", "3JN", "NT", 1, 14),
+    (65, "Jude", "Jude", "JUD", "NT", 1, 25),
+    (66, "Revelation", "Rev", "REV", "NT", 22, 404),
+]
+
+FULL_SIZE = sum(b[6] for b in BOOKS)  # 31,102 verse refs
+
+TRANSLATIONS = ("NIV", "KJV", "ESV")
+
+# Frequent words first; the rest of the vocabulary is made up.
+_COMMON = (
+    "the and of to that in he shall unto for i his a lord they be is him not them it with all "
+    "thou thy was god which my me said but ye their have will thee from as are when this out "
+    "were upon man by you israel king son up there hath then people came had house into her on "
+    "before one also so at let do go what came went day against land hand come over children"
+).split()
+_SYLLABLES = "ba be bi da de el en ha he ja ka la le lo ma me mi na ne no ra re ri sa se sh ta te tho ur".split()
+
+
+@dataclass
+class Catalog:
+    """What `build_catalog` generated, for picking benchmark inputs."""
+
+    refs: list[tuple[str, int, int, int]]  # (verse_ref_id, book_id, chapter, verse)
+    translations: tuple[str, ...]
+    vocab: list[str]
+
+
+def all_refs() -> list[tuple[int, int, int]]:
+    """Every (book_id, chapter, verse), spreading each book's verses evenly over its chapters."""
+    out = []
+    for book_id, _, _, _, _, chapters, verses in BOOKS:
+        per, extra = divmod(verses, chapters)
+        for ch in range(1, chapters + 1):
+            out += [(book_id, ch, v) for v in range(1, per + (ch <= extra) + 1)]
+    return out
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = list(_COMMON)
+    seen = set(words)
+    while len(words) < size:
+        w = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    return words
+
+
+class TextGen:
+    """Verse-like sentences with Zipf-distributed words."""
+
+    def __init__(self, rng: random.Random, vocab: list[str]) -> None:
+        self.rng = rng
+        self.vocab = vocab
+        self.cum = list(accumulate(1 / (r + 1) for r in range(len(vocab))))
+
+    def verse(self) -> str:
+        n = self.rng.randint(8, 40)
+        words = self.rng.choices(self.vocab, cum_weights=self.cum, k=n)
+        words[0] = words[0].capitalize()
+        for i in range(4, n - 1, self.rng.randint(5, 9)):
+            words[i] += ","
+        return " ".join(words) + "."
+
+
+def blanks_for(rng: random.Random, text: str) -> list[int]:
+    n_words = len(text.split(" "))
+    return sorted(rng.sample(range(n_words), min(n_words, rng.randint(1, 3))))
+
+
+def build_catalog(
+    client: FakeClient,
+    n_refs: int = FULL_SIZE,
+    translations: tuple[str, ...] = TRANSLATIONS,
+    question_rate: float = 0.8,
+    inactive_rate: float = 0.05,
+    release_rate: float = 0.7,
+    vocab_size: int = 12000,
+    seed: int = 0,
+) -> Catalog:
+    """Fill `client` with a catalog of `n_refs` verse refs (sampled across all books)."""
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng, vocab_size)
+    gen = TextGen(rng, vocab)
+    t = client.tables
+
+    t["book"] = [
+        {"id": b[0], "name": b[1], "abbr": b[2], "api_bible_id": b[3], "testament": b[4], "sort_order": b[0]}
+        for b in BOOKS
+    ]
+    t["translation"] = [
+        {"id": tid, "name": tid, "language_code": "en", "provider": "local", "active": True}
+        for tid in translations
+    ]
+
+    keys = all_refs()
+    if n_refs < len(keys):
+        keys = sorted(rng.sample(keys, n_refs))
+    refs = [(str(uuid.UUID(int=rng.getrandbits(128))), b, c, v) for b, c, v in keys]
+    t["verse_ref"] = [{"id": rid, "book_id": b, "chapter": c, "verse": v} for rid, b, c, v in refs]
+
+    t["verse_text"], t["question"] = [], []
+    for tid in translations:
+        for rid, *_ in refs:
+            text = gen.verse()
+            t["verse_text"].append(
+                client.schema["verse_text"].generate(
+                    {"id": str(uuid.uuid4()), "verse_ref_id": rid, "translation_id": tid, "text": text, "fetched_at": None}
+                )
+            )
+            if rng.random() < question_rate:
+                idx = blanks_for(rng, text)
+                words = text.split(" ")
+                t["question"].append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "type": "BLANKS",
+                        "verse_ref_id": rid,
+                        "translation_id": tid,
+                        "prompt": None,
+                        "answer_json": {"word_indices": idx, "answers": [words[i] for i in idx]},
+                        "difficulty": 500,
+                        "active": rng.random() >= inactive_rate,
+                        "created_at": None,
+                    }
+                )
+
+    released = [r[0] for r in refs if rng.random() < release_rate]
+    rng.shuffle(released)
+    t["verse_release"] = [
+        {
+            "verse_ref_id": rid,
+            "global_rank": rank,
+            "global_difficulty": rng.randint(200, 800),
+            "released": rng.random() < 0.9,
+        }
+        for rank, rid in enumerate(released, 1)
+    ]
+
+    for name in t:
+        client.touch(name)
+    return Catalog(refs, tuple(translations), vocab)
+
+
+def import_batch(cat: Catalog, size: int, new_share: float = 0.5, seed: int = 0) -> list[dict]:
+    """
+    `size` verses shaped for `db.import_verses`: a `new_share` of them are
+    refs the catalog doesn't have yet, the rest update existing refs.
+    """
+    rng = random.Random(seed)
+    gen = TextGen(rng, cat.vocab)
+    have = {(b, c, v) for _, b, c, v in cat.refs}
+    n_new = round(size * new_share)
+    missing = [k for k in all_refs() if k not in have]
+    if len(missing) < n_new:
+        # Full-size catalog: invent verses past the end of each chapter.
+        missing += [(b, c, v + 500 + seed) for _, b, c, v in cat.refs]
+    keys = rng.sample(missing, n_new) + [r[1:] for r in rng.sample(cat.refs, size - n_new)]
+    rng.shuffle(keys)
+    out = []
+    for b, c, v in keys:
+        text = gen.verse()
+        out.append(
+            {
+                "book_id": b,
+                "chapter": c,
+                "verse": v,
+                "text": text,
+                "blanks": blanks_for(rng, text),
+                "translation_id": rng.choice(cat.translations),
+            }
+        )
+    return out
+
+
+def srs_snapshot(n_pairs: int = 1_000_000, pairs_per_user: int = 40, n_released: int = 20_000, seed: int = 0):
+    """
+    A `lib.srs.Snapshot` of `n_pairs` user-verse states spread over
+    `n_pairs // pairs_per_user` users, with mostly mastered verses (as the
+    pool rule implies), streaks that follow mastery, and due dates from a
+    week overdue to a month out.
+    """
+    import numpy as np
+
+    from lib.srs import Snapshot
+
+    rng = np.random.default_rng(seed)
+    n_users = max(1, n_pairs // pairs_per_user)
+    user = np.sort(rng.integers(0, n_users, n_pairs, dtype=np.int32))
+    mastery = rng.beta(6, 2, n_pairs)
+    streak = rng.poisson(mastery * 4).astype(np.int32)
+    return Snapshot(
+        n_users=n_users,
+        user=user,
+        mastery=mastery,
+        streak=streak,
+        lapses=rng.poisson(0.5, n_pairs).astype(np.int32),
+        due=rng.uniform(-7, 30, n_pairs),
+        difficulty=rng.normal(500, 120, n_pairs).clip(0, 1000),
+        new_difficulty=rng.normal(500, 120, n_released).clip(0, 1000),
+    )
+
+
+def add_attempts(
+    client: FakeClient,
+    n_attempts: int,
+    n_users: int = 2000,
+    questions_per_user: int = 60,
+    start: datetime | None = None,
+    days: float = 1.0,
+    seed: int = 0,
+) -> None:
+    """
+    Append `n_attempts` attempts spread evenly over `days` from `start`,
+    creating `n_users` profiles on first use. Each user drills a fixed set
+    of questions, so most pairs get far more than three attempts; about
+    5% are too fast to count and 10% have no response time.
+    """
+    rng = random.Random(seed)
+    t = client.tables
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+    known = {p["id"] for p in t["profiles"]}
+    users = [str(uuid.UUID(int=random.Random(u).getrandbits(128))) for u in range(n_users)]
+    for i, uid in enumerate(users):
+        if uid not in known:
+            t["profiles"].append(
+                {"id": uid, "username": f"user{i}", "first_name": "Test", "last_name": f"User {i}", "grade": "6"}
+            )
+    questions = [q for q in t["question"] if q["active"]]
+    # A stable hidden ease per question, and a stable drill set per user.
+    ease = {q["id"]: random.Random(q["id"]).uniform(0.3, 0.95) for q in questions}
+    drills = {
+        uid: random.Random(uid).sample(questions, min(questions_per_user, len(questions))) for uid in users
+    }
+    step = timedelta(days=days) / max(1, n_attempts)
+    for i in range(n_attempts):
+        uid = rng.choice(users)
+        q = rng.choice(drills[uid])
+        roll = rng.random()
+        t["attempt"].append(
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "user_id": uid,
+                "question_id": q["id"],
+                "verse_ref_id": q["verse_ref_id"],
+                "is_correct": rng.random() < ease[q["id"]],
+                "response_time_ms": (
+                    None if roll < 0.10 else rng.randint(400, 1499) if roll < 0.15 else rng.randint(1500, 20000)
+                ),
+                "created_at": (start + step * i).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00"),
+            }
+        )
+    client.touch("profiles")
+    client.touch("attempt")
+
+
+def add_verse_states(client: FakeClient, seed: int = 0) -> None:
+    """
+    A `user_verse_state` row for every (user, verse) with attempts, its
+    lapse_count drawn from the pair's wrong answers.
+    """
+    rng = random.Random(seed)
+    wrong: dict[tuple[str, str], int] = {}
+    for a in client.tables["attempt"]:
+        if a["verse_ref_id"] is not None:
+            key = (a["user_id"], a["verse_ref_id"])
+            wrong[key] = wrong.get(key, 0) + (not a["is_correct"])
+    client.tables["user_verse_state"] = [
+        {
+            "user_id": uid,
+            "verse_ref_id": ref,
+            "mastery": round(rng.random(), 2),
+            "correct_streak": 0,
+            "lapse_count": sum(rng.random() < 0.3 for _ in range(n)),
+            "introduced_at": None,
+            "last_seen_at": None,
+            "next_due_at": None,
+        }
+        for (uid, ref), n in wrong.items()
+    ]
+    client.touch("user_verse_state")
+
+
+def translation_texts(vocab_size: int = 12000, seed: int = 0) -> dict[tuple[int, int, int], str]:
+    """A full-Bible translation: text for every (book_id, chapter, verse)."""
+    rng = random.Random(seed)
+    gen = TextGen(rng, _vocabulary(rng, vocab_size))
+    return {key: gen.verse() for key in all_refs()}
+
+
+def write_osis(path: Path, texts: dict[tuple[int, int, int], str]) -> None:
+    """One OSIS file with container verses, some carrying a footnote."""
+    codes = {b[0]: b[2] for b in BOOKS}
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<osis><osisText>']
+    book = chapter = None
+    for (b, c, v), text in sorted(texts.items()):
+        if b != book:
+            out.append(("</chapter></div>" if book else "") + f'<div type="book" osisID="{codes[b]}">')
+            book, chapter = b, None
+        if c != chapter:
+            out.append(("</chapter>" if chapter else "") + f'<chapter osisID="{codes[b]}.{c}">')
+            chapter = c
+        body = escape(text)
+        if v % 7 == 0:
+            body = body.replace(" ", ' <note type="study">A <hi>note</hi>.</note> ', 1)
+        out.append(f'<verse osisID="{codes[b]}.{c}.{v}">{body}</verse>\n')
+    out.append("</chapter></div></osisText></osis>\n")
+    path.write_text("".join(out), encoding="utf-8")
+
+
+def write_usfm(directory: Path, texts: dict[tuple[int, int, int], str]) -> None:
+    """One USFM file per book, some verses carrying a footnote."""
+    codes = {b[0]: b[3] for b in BOOKS}
+    books: dict[int, list[str]] = {}
+    for (b, c, v), text in sorted(texts.items()):
+        lines = books.setdefault(b, [f"\\id {codes[b]} synthetic\n\\h {codes[b]}\n"])
+        if v == 1:
+            lines.append(f"\\c {c}\n\\s1 Heading\n\\p\n")
+        if v % 7 == 0:
+            text = text.replace(" ", f" \\f + \\fr {c}.{v} \\ft A note.\\f* ", 1)
+        lines.append(f"\\v {v} {text}\n")
+    directory.mkdir(parents=True, exist_ok=True)
+    for b, lines in books.items():
+        (directory / f"{b:02d}{codes[b]}.usfm").write_text("".join(lines), encoding="utf-8")
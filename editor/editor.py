@@ -7,12 +7,15 @@ Run:
 
 from __future__ import annotations
 
-import json
-from typing import Any
+import io
+from datetime import datetime
+from itertools import islice
+from typing import IO, Any, Iterator
 
 import streamlit as st
 
-from lib import db
+from lib import blanks, db, import_jobs, import_stream, metrics, rollups, suggest
+from lib.catalog import get_catalog
 from lib.prompts import IMPORT_PROMPT
 
 # ── Page config ───────────────────────────────────────────────────────────────
@@ -58,19 +61,16 @@ div[data-testid="stHorizontalBlock"] .stButton > button {
 )
 
 
-# ── Cached reference data ─────────────────────────────────────────────────────
+# ── Reference data (cached in lib/db.py, primed by the catalog) ───────────────
 
-@st.cache_data(ttl=300)
 def load_translations() -> list[dict]:
     return db.get_translations()
 
 
-@st.cache_data(ttl=300)
 def load_books() -> list[dict]:
     return db.get_books()
 
 
-@st.cache_data(ttl=600)
 def _book_id_map() -> dict[int, str]:
     return {b["id"]: b["name"] for b in db.get_books()}
 
@@ -81,18 +81,18 @@ def _book_name_for_id(book_id: int | None) -> str:
     return _book_id_map().get(book_id, f"Book {book_id}")
 
 
-# ── Cached search (so word-chip reruns hit cache, not Supabase) ───────────────
+# ── Verse catalog (so filter changes and word-chip reruns stay in memory) ─────
 
-@st.cache_data(ttl=60)
-def cached_search(translation_id: str, book_id, chapter, verse, text_search: str, limit: int = 300) -> list[dict]:
-    return db.search_verses(translation_id, book_id, chapter, verse, text_search, limit)
+# Rows per page of _render_verse_table; "Load more" appends another page.
+TABLE_PAGE_SIZE = 100
 
 
 # ── Session state ─────────────────────────────────────────────────────────────
 
 def _close_edit_dialog() -> None:
-    """Clear edit dialog state — used as on_change on filter widgets."""
+    """Clear edit dialog state and paging — used as on_change on filter widgets."""
     st.session_state.edit_verse_ref_id = None
+    st.session_state.table_pages = 1
 
 
 def _init_session() -> None:
@@ -100,11 +100,17 @@ def _init_session() -> None:
         # editor modal
         "edit_verse_ref_id": None,
         "edit_translation_id": None,
+        "edit_max_rank": None,  # fetched once per dialog open, for unranked verses
+        # verse table
+        "table_pages": 1,
         # import modal
         "show_import_modal": False,
         "import_step": 1,
         "import_verses_raw": None,
         "import_previewed": None,
+        "import_max_rank": None,  # fetched with import_previewed
+        "import_staged": None,  # summary of a large import staged by _stage_import
+        "import_job_id": None,
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -122,6 +128,10 @@ _init_session()
 @st.dialog("Edit Verse", width="large")
 def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
     detail = db.get_verse_detail(verse_ref_id, translation_id)
+    # Unranked verses default to the end of the drip. get_max_rank isn't
+    # cached, so query it once per dialog open rather than on every rerun.
+    if detail and detail["global_rank"] is None and st.session_state.edit_max_rank is None:
+        st.session_state.edit_max_rank = db.get_max_rank()
     if not detail:
         st.error("Could not load verse detail.")
         if st.button("Close"):
@@ -129,7 +139,7 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
             st.rerun()
         return
 
-    tab_details, tab_games = st.tabs(["📖 Verse Details", "🎮 Games"])
+    tab_details, tab_games, tab_stats = st.tabs(["📖 Verse Details", "🎮 Games", "📊 Stats"])
 
     # ── Tab 1: Verse Details ─────────────────────────────────────────────────
     with tab_details:
@@ -164,7 +174,7 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
 
         st.divider()
         st.markdown("**Drip Settings**")
-        rank_val = detail["global_rank"] if detail["global_rank"] is not None else (db.get_max_rank() + 1)
+        rank_val = detail["global_rank"] if detail["global_rank"] is not None else (st.session_state.edit_max_rank + 1)
         new_rank = st.number_input(
             "Global Rank",
             min_value=1,
@@ -192,7 +202,15 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
                     rank=new_rank,
                     released=new_released,
                 )
-                st.cache_data.clear()
+                get_catalog().verse_saved(
+                    verse_ref_id=verse_ref_id,
+                    chapter=detail["chapter"],
+                    verse=detail["verse"],
+                    verse_text_id=detail["verse_text_id"],
+                    text=new_text,
+                    rank=new_rank,
+                    released=new_released,
+                )
             except Exception as e:
                 st.error(f"Save failed: {e}")
 
@@ -200,12 +218,28 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
     with tab_games:
         st.markdown("#### BLANKS")
         text = detail["text"]
-        words = text.split(" ")
+        words = blanks.words(text)
 
         # Existing blanks from DB
         existing_indices: list[int] = []
         if detail["answer_json"] and "word_indices" in detail["answer_json"]:
             existing_indices = detail["answer_json"]["word_indices"]
+            issues, notes = blanks.check(detail["answer_json"], text)
+            if set(issues) & blanks.FIXABLE:
+                # Saving only rewrites answer_json; the verse text's spacing
+                # is repaired (with the indices shifted to match) by the scanner.
+                advice = []
+                if set(issues) & (blanks.FIXABLE - {blanks.DOUBLE_SPACE}):
+                    advice.append("Re-select and save to fix the blanks.")
+                if blanks.DOUBLE_SPACE in issues:
+                    advice.append("Fix the spacing with `python -m lib.blanks_scan --fix`.")
+                st.warning(
+                    "⚠️ The saved blanks don't match this text ("
+                    + ", ".join(i.replace("_", " ") for i in issues)
+                    + "). "
+                    + " ".join(advice)
+                    + "".join(f"\n- {n}" for n in notes)
+                )
 
         # Selection state — scoped to this verse, seeded from DB on first open
         sel_key = f"blanks_{verse_ref_id}"
@@ -247,17 +281,67 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
 
         if st.button("💾 Save Question", type="primary", disabled=(n_sel != 2), key="save_question_btn"):
             try:
-                db.save_question(
+                question_id = db.save_question(
                     verse_ref_id=verse_ref_id,
                     translation_id=translation_id,
                     word_indices=selected,
                     text=text,
                     question_id=detail.get("question_id"),
                 )
-                st.cache_data.clear()
+                if question_id:
+                    get_catalog().question_saved(
+                        verse_ref_id, translation_id, question_id, blanks.answer_json(text, selected)
+                    )
             except Exception as e:
                 st.toast(f"Save failed: {e}", icon="🚨")
 
+    # ── Tab 3: Stats ─────────────────────────────────────────────────────────
+    with tab_stats:
+        _render_verse_stats(verse_ref_id, translation_id)
+
+
+def _render_verse_stats(verse_ref_id: str, translation_id: str) -> None:
+    """This verse's rollups (lib/rollups.py): all attempts, then per translation's question."""
+    verse, questions = rollups.Rollups().verse(verse_ref_id)
+    if verse is None:
+        st.info("No attempts or learners for this verse yet (as of the last rollup update).")
+        return
+
+    def pct(x: float | None) -> str:
+        return "—" if x is None else f"{100 * x:.0f}%"
+
+    def secs(ms: float | None) -> str:
+        return "—" if ms is None else f"{ms / 1000:.1f} s"
+
+    st.caption("All translations")
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Attempts", f"{verse['attempts']:,}")
+    c2.metric("Accuracy", pct(verse["accuracy"]))
+    c3.metric("Median / p90", f"{secs(verse['p50'])} / {secs(verse['p90'])}")
+    c4.metric(f"Under {rollups.MIN_RESPONSE_MS} ms", pct(verse["fast_share"]), help="Suspected cheats")
+    c5.metric(
+        "Lapse rate",
+        pct(verse["lapse_rate"]),
+        help=f"{verse['lapsed']:,} of {verse['states']:,} learners lapsed" if verse["states"] else "No learners yet",
+    )
+    if questions:
+        st.caption("Per question")
+        st.dataframe(
+            [
+                {
+                    "Translation": ("▶ " if q["translation_id"] == translation_id else "") + (q["translation_id"] or "?"),
+                    "Attempts": q["attempts"],
+                    "Accuracy": pct(q["accuracy"]),
+                    "Median": secs(q["p50"]),
+                    "p90": secs(q["p90"]),
+                    "Fast": pct(q["fast_share"]),
+                }
+                for q in questions
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
 
 # ── Import Modal ──────────────────────────────────────────────────────────────
 
@@ -265,8 +349,15 @@ def verse_editor_modal(verse_ref_id: str, translation_id: str) -> None:
 def import_modal() -> None:
     if st.session_state.import_step == 1:
         _import_step1()
-    else:
+    elif st.session_state.import_step == 2:
         _import_step2()
+    else:
+        _import_step3()
+
+
+# Imports with more verses than this skip the per-verse review: they are
+# streamed into a staged import job, previewed one chunk at a time.
+REVIEW_LIMIT = 200
 
 
 def _import_step1() -> None:
@@ -275,35 +366,101 @@ def _import_step1() -> None:
     st.code(IMPORT_PROMPT, language="text")
 
     st.divider()
-    st.markdown("2. Paste the JSON response below, or upload a `.json` file:")
+    st.markdown("2. Paste the JSON response below, or upload a `.json` or `.ndjson` file:")
 
     pasted = st.text_area("Paste JSON here", height=200, key="import_json_paste")
-    uploaded = st.file_uploader("Or upload JSON file", type=["json"], key="import_upload")
+    uploaded = st.file_uploader("Or upload JSON file", type=["json", "ndjson", "jsonl"], key="import_upload")
 
-    raw_json: str | None = None
+    source: IO | None = None
+    ndjson: bool | None = None
     if uploaded is not None:
-        raw_json = uploaded.read().decode("utf-8")
+        source = uploaded  # read incrementally, never decoded whole
+        if uploaded.name.lower().endswith((".ndjson", ".jsonl")):
+            ndjson = True
     elif pasted.strip():
-        raw_json = pasted.strip()
+        source = io.StringIO(pasted.strip())
 
-    if st.button("Preview Import →", type="primary", disabled=raw_json is None):
+    if st.button("Preview Import →", type="primary", disabled=source is None):
+        reader = import_stream.VerseReader(source, book_ids={b["id"] for b in db.get_books()}, ndjson=ndjson)
+        verses = iter(reader)
         try:
-            parsed = json.loads(raw_json)  # type: ignore[arg-type]
-            verses_in = parsed.get("verses") if isinstance(parsed, dict) else parsed
-            if not isinstance(verses_in, list):
-                st.error("JSON must contain a 'verses' array.")
-                return
-            translation_id = parsed.get("translation", "NIV") if isinstance(parsed, dict) else "NIV"
-            st.session_state.import_verses_raw = {"verses": verses_in, "translation": translation_id}
-            st.session_state.import_step = 2
-            # No st.rerun() — dialog re-renders naturally on next interaction.
-            # The step change is immediate for the current render pass.
-            st.rerun()
-        except json.JSONDecodeError as e:
-            st.error(f"Invalid JSON: {e}")
+            with st.spinner("Reading verses…"):
+                first = list(islice(verses, REVIEW_LIMIT + 1))
+                if len(first) > REVIEW_LIMIT:
+                    _stage_import(reader, first, verses)
+                else:
+                    st.session_state.import_verses_raw = {
+                        "verses": first,
+                        "translation": reader.translation,
+                        "errors": [str(e) for e in reader.errors],
+                    }
+        except import_stream.ParseError as e:
+            st.error(f"Invalid JSON at {e}")
+            return
+        if not reader.valid:
+            st.error("No valid verses" + (f": {reader.errors[0]}" if reader.errors else "."))
+            return
+        st.session_state.import_step = 2
+        st.rerun()
+
+
+def _stage_import(reader: import_stream.VerseReader, first: list[dict], rest: Iterator[dict]) -> None:
+    """Preview and store a large import one chunk at a time, as a staged job."""
+    store = import_jobs.get_store()
+    job = store.stage(reader.translation)
+    summary = {
+        "job_id": job.id, "translation": reader.translation, "new": 0, "updated": 0, "skipped": [], "skipped_count": 0,
+        "duplicates": [], "duplicate_count": 0,
+    }
+    stats = suggest.get_stats(reader.translation)
+    try:
+        chunk = first
+        while chunk:
+            keep = []
+            previewed = db.preview_import(chunk, reader.translation)
+            _flag_duplicates(previewed, reader.translation)
+            for v in previewed:
+                where = f"{_book_name_for_id(v['book_id'])} {v['chapter']}:{v['verse']}"
+                if v["status"] == "ERROR":
+                    problem = v.get("error") or "error"
+                elif not suggest.has_valid_blanks(v):
+                    problem = "no 2 valid blanks" + ("" if stats else f" (python -m lib.suggest build {reader.translation})")
+                else:
+                    keep.append({k: v[k] for k in ("book_id", "chapter", "verse", "text", "blanks", "translation_id")})
+                    summary["new" if v["status"] == "NEW" else "updated"] += 1
+                    if v["duplicates"]:
+                        summary["duplicate_count"] += 1
+                        if len(summary["duplicates"]) < 50:
+                            d = v["duplicates"][0]
+                            summary["duplicates"].append(f"{where} ~ {d['reference']} ({d['similarity']:.0%} similar)")
+                    continue
+                summary["skipped_count"] += 1
+                if len(summary["skipped"]) < 50:
+                    summary["skipped"].append(f"{where}: {problem}")
+            store.add_verses(job.id, keep)
+            chunk = list(islice(rest, db.IMPORT_CHUNK_SIZE))
+    except BaseException:
+        store.discard(job.id)
+        raise
+    summary["errors"] = [str(e) for e in reader.errors[:50]]
+    summary["error_count"] = reader.error_count
+    st.session_state.import_staged = summary
+
+
+def _flag_duplicates(previewed: list[dict], translation_id: str) -> None:
+    """Set `duplicates` on previewed verses: catalog verses with near-identical text under another reference."""
+    rows = [v for v in previewed if v["status"] != "ERROR"]
+    found = get_catalog().near_duplicates(
+        translation_id, [v.get("text") or "" for v in rows], [v.get("verse_ref_id") for v in rows]
+    )
+    for v, matches in zip(rows, found):
+        v["duplicates"] = matches
 
 
 def _import_step2() -> None:
+    if st.session_state.import_staged:
+        _import_step2_staged()
+        return
     raw = st.session_state.import_verses_raw
     if not raw:
         st.session_state.import_step = 1
@@ -314,19 +471,31 @@ def _import_step2() -> None:
 
     if st.session_state.import_previewed is None:
         with st.spinner("Checking against database…"):
-            st.session_state.import_previewed = db.preview_import(verses_in, translation_id)
+            st.session_state.import_previewed, st.session_state.import_max_rank = db.gather(
+                lambda: db.preview_import(verses_in, translation_id), db.get_max_rank
+            )
+            _flag_duplicates(st.session_state.import_previewed, translation_id)
+    max_rank: int = st.session_state.import_max_rank
 
     previewed: list[dict] = st.session_state.import_previewed
+    stats = suggest.get_stats(translation_id)
 
     new_count = sum(1 for v in previewed if v["status"] == "NEW")
     upd_count = sum(1 for v in previewed if v["status"] == "UPDATE")
     err_count = sum(1 for v in previewed if v["status"] == "ERROR")
+    dup_count = sum(1 for v in previewed if v.get("duplicates"))
 
-    max_rank = db.get_max_rank()
     start_rank = max_rank + 1
     end_rank = max_rank + new_count
 
     st.markdown(f"### Preview: {len(previewed)} verses — {new_count} NEW · {upd_count} UPDATES · {err_count} ERR")
+    for err in raw.get("errors", []):
+        st.warning(f"Skipped: {err}")
+    if dup_count:
+        st.warning(
+            f"⚠️ {dup_count} possible near-duplicate{'s' if dup_count != 1 else ''}: text matching a verse already "
+            f"in {translation_id} under another reference. Check the reference before importing."
+        )
 
     if new_count > 0:
         st.info(
@@ -337,16 +506,20 @@ def _import_step2() -> None:
     for v in previewed:
         status = v["status"]
         icon = {"NEW": "🆕", "UPDATE": "♻️", "ERROR": "❌"}.get(status, "?")
+        dups = v.get("duplicates") or []
         with st.expander(
-            f"{icon} {_book_name_for_id(v['book_id'])} {v['chapter']}:{v['verse']} [{status}]",
-            expanded=(status == "ERROR"),
+            f"{icon} {_book_name_for_id(v['book_id'])} {v['chapter']}:{v['verse']} [{status}]"
+            + (f" ⚠️ ~ {dups[0]['reference']}" if dups else ""),
+            expanded=(status == "ERROR" or bool(dups)),
         ):
             if status == "ERROR":
                 st.error(v.get("error", "Unknown error"))
                 continue
 
             st.write(v["text"])
-            words = v["text"].split(" ")
+            for d in dups:
+                st.warning(f"Near-duplicate of **{d['reference']}** ({d['similarity']:.0%} similar): {d['text']}")
+            words = blanks.words(v["text"])
             bk = f"import_blanks_{v['book_id']}_{v['chapter']}_{v['verse']}"
             if bk not in st.session_state:
                 st.session_state[bk] = list(sorted(v.get("blanks", [])))[:2]
@@ -372,9 +545,12 @@ def _import_step2() -> None:
             n = len(selected)
             if n == 2:
                 sel_words = [words[i] if i < len(words) else "?" for i in sorted(selected)]
-                st.caption(f"✅ {sel_words[0]} · {sel_words[1]}")
+                st.caption(f"✅ {sel_words[0]} · {sel_words[1]}" + (" (suggested)" if v.get("blanks_suggested") else ""))
             else:
                 st.caption(f"⚠️ {n}/2 blanks selected")
+            if stats is not None:
+                for note in stats.review(v["text"], selected):
+                    st.caption(f"💡 {note}")
 
     st.divider()
     col_back, col_import = st.columns([1, 2])
@@ -398,23 +574,128 @@ def _import_step2() -> None:
             bk = f"import_blanks_{v['book_id']}_{v['chapter']}_{v['verse']}"
             v["blanks"] = sorted(st.session_state.get(bk, v.get("blanks", [])))
 
-        with st.spinner("Importing…"):
-            result = db.import_verses(importable, start_rank)
+        job = import_jobs.submit(importable, translation_id)
+        st.session_state.import_job_id = job.id
+        st.session_state.import_step = 3
+        st.rerun()
 
-        if result["errors"]:
-            for err in result["errors"]:
-                st.error(err)
 
-        st.success(f"✅ Done! {result['new']} new · {result['updated']} updated · {len(result['errors'])} errors")
+def _import_step2_staged() -> None:
+    staged = st.session_state.import_staged
+    store = import_jobs.get_store()
+    job = store.get(staged["job_id"])
+    not_imported = staged["error_count"] + staged["skipped_count"]
+    st.markdown(
+        f"### Preview: {job.total + not_imported:,} verses — {staged['new']:,} NEW · "
+        f"{staged['updated']:,} UPDATES · {not_imported:,} not imported"
+    )
+    st.caption(
+        f"Too many to review one by one: the blanks come from the file, or were suggested where missing. "
+        f"Translation: {staged['translation']}."
+    )
+    if staged["new"]:
+        start_rank = db.get_max_rank() + 1
+        st.info(
+            f"📌 **Drip position:** ranks {start_rank} → {start_rank + staged['new'] - 1}  \n"
+            "New verses unlock after users have mastered enough prior verses. Released = ON."
+        )
+    if staged["duplicate_count"]:
+        with st.expander(f"⚠️ {staged['duplicate_count']:,} verses look like near-duplicates of existing verses"):
+            for line in staged["duplicates"]:
+                st.text(line)
+            if len(staged["duplicates"]) < staged["duplicate_count"]:
+                st.caption("Only the first ones are listed.")
+    if not_imported:
+        with st.expander(f"❌ {not_imported:,} verses will not be imported"):
+            for line in staged["errors"] + staged["skipped"]:
+                st.text(line)
+            if len(staged["errors"]) + len(staged["skipped"]) < not_imported:
+                st.caption("Only the first problems are listed.")
 
-        st.session_state.show_import_modal = False
+    st.divider()
+    col_back, col_import = st.columns([1, 2])
+    if col_back.button("← Back"):
+        store.discard(job.id)
+        st.session_state.import_staged = None
         st.session_state.import_step = 1
-        st.session_state.import_previewed = None
-        st.session_state.import_verses_raw = None
-        st.cache_data.clear()
+        st.rerun()
+    if col_import.button("✅ Import All", type="primary", disabled=not job.total):
+        store.queue(job.id)
+        import_jobs.ensure_worker().set()
+        st.session_state.import_job_id = job.id
+        st.session_state.import_staged = None
+        st.session_state.import_step = 3
         st.rerun()
 
 
+def _reset_import() -> None:
+    if st.session_state.import_staged:
+        import_jobs.get_store().discard(st.session_state.import_staged["job_id"])
+    st.session_state.show_import_modal = False
+    st.session_state.import_step = 1
+    st.session_state.import_previewed = None
+    st.session_state.import_verses_raw = None
+    st.session_state.import_staged = None
+    st.session_state.import_job_id = None
+
+
+def _import_step3() -> None:
+    job = import_jobs.get_store().get(st.session_state.import_job_id or "")
+    if job is None:
+        _reset_import()
+        st.rerun()
+    if not job.finished:
+        _import_progress(job.id)
+        return
+
+    for err in job.errors:
+        st.error(err)
+    if job.status == "done":
+        st.success(f"✅ Done! {job.new} new · {job.updated} updated · {len(job.errors)} errors")
+    else:
+        st.warning(
+            f"Import {job.status} after {job.done}/{job.total} verses ({job.new} new · {job.updated} updated)"
+            + (f": {job.message}" if job.message else ".")
+        )
+        if st.button("↻ Resume", help="Continue from the last completed chunk"):
+            import_jobs.get_store().retry(job.id)
+            import_jobs.ensure_worker().set()
+            st.rerun()
+    if st.button("Close", type="primary"):
+        _reset_import()
+        st.rerun()
+
+
+@st.fragment(run_every=1)
+def _import_progress(job_id: str) -> None:
+    """Polls the running job; the full page reruns once it ends."""
+    job = import_jobs.get_store().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    label = "Waiting for the import worker…" if job.status == "queued" else f"Importing… {job.done}/{job.total} verses"
+    st.progress(job.progress, text=label)
+    if error := import_jobs.worker_error():
+        st.error(error)
+    st.caption(f"{job.new} new · {job.updated} updated · {len(job.errors)} errors")
+    col_bg, col_cancel = st.columns(2)
+    if col_bg.button("Run in background", help="Close this dialog; the import keeps going"):
+        _reset_import()
+        st.rerun()
+    if col_cancel.button("✖ Cancel import", help="Stop after the current chunk"):
+        import_jobs.get_store().cancel(job_id)
+        st.rerun()
+
+
+@st.fragment(run_every=2)
+def _import_status() -> None:
+    """One line per running import, shown while the Import dialog is closed."""
+    jobs = import_jobs.get_store().active()
+    if not jobs:
+        st.rerun()  # refresh the page (and the catalog) once the last one ends
+    for job in jobs:
+        st.caption(f"📥 Importing {job.translation_id}: {job.done}/{job.total} verses…")
+
+
 # ── Main page ─────────────────────────────────────────────────────────────────
 
 def main() -> None:
@@ -425,19 +706,28 @@ def main() -> None:
         st.session_state.edit_verse_ref_id = None  # can't have two dialogs open
         st.session_state.show_import_modal = True
 
+    # Starts this process's import worker, which also resumes interrupted jobs.
+    import_jobs.ensure_worker()
+    if not st.session_state.show_import_modal and import_jobs.get_store().active():
+        _import_status()
+
     st.markdown("---")
 
     # ── Row 1: Search text (full width) ──────────────────────────────────────
     text_search = st.text_input(
         "Search text",
-        placeholder="Search verse text…",
+        placeholder='Search verse text…  (all words · "exact phrase" · prefix*)',
         label_visibility="collapsed",
         on_change=_close_edit_dialog,
     )
 
     # ── Row 2: Filters ───────────────────────────────────────────────────────
-    translations = load_translations()
-    books = load_books()
+    with st.spinner("Loading…"):
+        # From the on-disk snapshot in a new process; also primes translations and books.
+        catalog = get_catalog()
+        for job in import_jobs.take_finished():
+            catalog.refresh_books(job.book_ids)
+    translations, books = load_translations(), load_books()
     trans_options = {t["id"]: f"{t['id']} — {t['name']}" for t in translations}
     book_options = {b["id"]: b["name"] for b in books}
     default_trans = "NIV" if "NIV" in trans_options else (list(trans_options.keys())[0] if trans_options else "NIV")
@@ -460,26 +750,43 @@ def main() -> None:
     )
     chapter_input = col_ch.number_input("Chapter", min_value=0, value=0, step=1, help="0 = all chapters", on_change=_close_edit_dialog)
     verse_input = col_v.number_input("Verse", min_value=0, value=0, step=1, help="0 = all verses", on_change=_close_edit_dialog)
-    sort_by = col_sort.selectbox("Sort by", ["Book order", "Rank"], on_change=_close_edit_dialog)
+    sort_by = col_sort.selectbox("Sort by", ["Book order", "Rank", "Relevance"], on_change=_close_edit_dialog)
 
     # ── Results ───────────────────────────────────────────────────────────────
-    with st.spinner("Loading…"):
-        rows = cached_search(
-            translation_id=selected_trans,
-            book_id=selected_book,
-            chapter=int(chapter_input) if chapter_input > 0 else None,
-            verse=int(verse_input) if verse_input > 0 else None,
-            text_search=text_search,
-        )
-
-    if sort_by == "Rank":
-        rows.sort(key=lambda x: (x.get("global_rank") is None, x.get("global_rank") or 0))
+    if catalog.error:
+        as_of = datetime.fromtimestamp(catalog.loaded_at).strftime("%Y-%m-%d %H:%M")
+        st.caption(f"⚠️ {catalog.error}. Showing verses as of {as_of}.")
+    total, rows = catalog.search(
+        translation_id=selected_trans,
+        book_id=selected_book,
+        chapter=int(chapter_input) if chapter_input > 0 else None,
+        verse=int(verse_input) if verse_input > 0 else None,
+        text_search=text_search,
+        sort_by={"Rank": "rank", "Relevance": "relevance"}.get(sort_by, "book"),
+        limit=TABLE_PAGE_SIZE * st.session_state.table_pages,
+    )
 
     if not rows:
         st.info("No verses found.")
     else:
-        st.markdown(f"**{len(rows)} verse{'s' if len(rows) != 1 else ''} found**")
-        _render_verse_table(rows, selected_trans)
+        shown = f" (showing {len(rows)})" if total > len(rows) else ""
+        col_count, col_view = st.columns([4, 1])
+        col_count.markdown(f"**{total} verse{'s' if total != 1 else ''} found**{shown}")
+        view = col_view.radio(
+            "View",
+            ["Rows", "Grid"],
+            horizontal=True,
+            label_visibility="collapsed",
+            key="table_view",
+            help="Grid renders the results as one scrollable widget — faster for long lists.",
+        )
+        if view == "Grid":
+            _render_verse_grid(rows, selected_trans)
+        else:
+            _render_verse_table(rows, selected_trans)
+        if total > len(rows) and st.button(f"Load {min(TABLE_PAGE_SIZE, total - len(rows))} more", key="table_load_more"):
+            st.session_state.table_pages += 1
+            st.rerun()
 
     # ── Dialogs — only one can be open at a time ──────────────────────────────
     if st.session_state.edit_verse_ref_id:
@@ -490,6 +797,40 @@ def main() -> None:
     elif st.session_state.show_import_modal:
         import_modal()
 
+    _render_debug_panel()
+
+
+def _render_debug_panel() -> None:
+    with st.expander("🔧 Debug", expanded=False):
+        on = st.toggle("Record DB metrics", value=metrics.ENABLED, key="debug_metrics")
+        if on != metrics.ENABLED:
+            metrics.enable(on)
+            st.rerun()
+
+        rerun = st.session_state.get("last_rerun_metrics")
+        if metrics.ENABLED and rerun:
+            st.markdown(
+                f"**Previous rerun:** {rerun['round_trips']} round trips · "
+                f"{rerun['query_ms']:.0f} ms in queries · {rerun['rows']} rows · "
+                f"{rerun['bytes'] / 1024:.1f} KiB · {rerun['retries']} retries · "
+                f"{rerun['pool_wait_ms']:.0f} ms waiting for a connection"
+            )
+            st.dataframe(
+                [{"query": k, **v} for k, v in rerun["queries"].items()],
+                hide_index=True,
+                use_container_width=True,
+            )
+            st.dataframe(
+                [{"function": k, **v} for k, v in rerun["functions"].items()],
+                hide_index=True,
+                use_container_width=True,
+            )
+        elif metrics.ENABLED:
+            st.caption("No DB calls recorded yet.")
+
+        st.markdown("**Read cache**")
+        st.json(db.cache_stats())
+
 
 # ── Verse table ───────────────────────────────────────────────────────────────
 
@@ -518,12 +859,7 @@ def _render_verse_table(rows: list[dict], translation_id: str) -> None:
 
         # Edit
         if cols[6].button("✏️", key=f"edit_{row['verse_ref_id']}", help="Edit verse"):
-            # Clear stale blank selection so modal re-seeds from DB
-            sel_key = f"blanks_{row['verse_ref_id']}"
-            if sel_key in st.session_state:
-                del st.session_state[sel_key]
-            st.session_state.edit_verse_ref_id = row["verse_ref_id"]
-            st.session_state.edit_translation_id = translation_id
+            _open_verse_editor(row["verse_ref_id"], translation_id)
 
         # Delete (soft)
         if row.get("question_id"):
@@ -540,9 +876,8 @@ def _render_verse_table(rows: list[dict], translation_id: str) -> None:
                 with cols[7]:
                     st.warning(f"Delete {row['book_name']} {row['chapter']}:{row['verse']}?")
                     if st.button("Yes", key=f"del_yes_{q_id}", type="primary"):
-                        db.soft_delete_question(q_id)
+                        _delete_question(q_id)
                         st.session_state[active_key] = False
-                        st.cache_data.clear()
                         st.rerun()
                     if st.button("No", key=f"del_no_{q_id}"):
                         st.session_state[active_key] = False
@@ -551,6 +886,79 @@ def _render_verse_table(rows: list[dict], translation_id: str) -> None:
             cols[7].write("—")
 
 
+def _render_verse_grid(rows: list[dict], translation_id: str) -> None:
+    """
+    Same rows as _render_verse_table, drawn as a single st.dataframe.
+
+    The grid only renders the rows scrolled into view, and edit/delete act
+    on the selected row, so the widget count stays flat however many rows
+    are loaded.
+    """
+    event = st.dataframe(
+        {
+            "Book": [r["book_name"] for r in rows],
+            "Ch:V": [f"{r['chapter']}:{r['verse']}" for r in rows],
+            "Text": [r["text"] for r in rows],
+            "Blanks": [_blanks_label(r.get("answer_json")) for r in rows],
+            "Out": [
+                "✅" if r.get("released") else ("—" if r.get("global_rank") is None else "🔒") for r in rows
+            ],
+            "Rank": [r.get("global_rank") for r in rows],
+        },
+        key="verse_grid",
+        on_select="rerun",
+        selection_mode="single-row",
+        hide_index=True,
+        use_container_width=True,
+        height=min(600, 38 + 35 * len(rows)),
+    )
+
+    selected = event.selection.rows if event else []
+    if not selected or selected[0] >= len(rows):
+        st.caption("Select a row to edit or delete it.")
+        return
+    row = rows[selected[0]]
+    label = f"{row['book_name']} {row['chapter']}:{row['verse']}"
+
+    col_edit, col_del, _ = st.columns([1, 1, 4])
+    if col_edit.button(f"✏️ Edit {label}", key="grid_edit"):
+        _open_verse_editor(row["verse_ref_id"], translation_id)
+
+    q_id = row.get("question_id")
+    active_key = f"del_active_{q_id}"
+    if not q_id:
+        col_del.button("🗑️ Delete question", key="grid_del", disabled=True)
+    elif not st.session_state.get(active_key):
+        if col_del.button("🗑️ Delete question", key="grid_del"):
+            st.session_state[active_key] = True
+            st.rerun()
+    else:
+        st.warning(f"Delete {label}?")
+        col_yes, col_no, _ = st.columns([1, 1, 4])
+        if col_yes.button("Yes", key="grid_del_yes", type="primary"):
+            _delete_question(q_id)
+            st.session_state[active_key] = False
+            st.rerun()
+        if col_no.button("No", key="grid_del_no"):
+            st.session_state[active_key] = False
+            st.rerun()
+
+
+def _open_verse_editor(verse_ref_id: str, translation_id: str) -> None:
+    # Clear stale blank selection so modal re-seeds from DB
+    sel_key = f"blanks_{verse_ref_id}"
+    if sel_key in st.session_state:
+        del st.session_state[sel_key]
+    st.session_state.edit_verse_ref_id = verse_ref_id
+    st.session_state.edit_translation_id = translation_id
+    st.session_state.edit_max_rank = None
+
+
+def _delete_question(question_id: str) -> None:
+    db.soft_delete_question(question_id)
+    get_catalog().question_deleted(question_id)
+
+
 def _blanks_label(answer_json: dict | None) -> str:
     if not answer_json:
         return "—"
@@ -565,4 +973,9 @@ def _blanks_label(answer_json: dict | None) -> str:
 
 # ── Entry point ───────────────────────────────────────────────────────────────
 
-main()
+with metrics.scope("rerun") as _rerun:
+    try:
+        main()
+    finally:
+        # Shown by the debug panel on the next rerun
+        st.session_state.last_rerun_metrics = _rerun.summary()
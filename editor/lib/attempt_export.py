@@ -0,0 +1,247 @@
+"""Export the `attempt` log to day-partitioned Parquet files.
+
+Pages through `attempt` in (created_at, id) order with the keyset cursor
+of the `attempt_page` RPC, adds each attempt's question type and
+translation and its verse's book/chapter/verse, and writes one file per
+UTC day:
+
+    exports/attempt/day=2026-03-14/attempts.parquet
+
+Memory stays bounded: rows go to disk in row groups of `ROW_GROUP`, and
+question/verse details are fetched only for ids not seen before. A day is
+written under a temporary name and renamed once complete, so an
+interrupted export never leaves a partial partition behind. Only finished
+days are exported; the next run resumes after the last attempt of the
+newest partition.
+
+Run:
+    cd editor
+    python -m lib.attempt_export                     # export new days
+    python -m lib.attempt_export --until 2026-03-01  # stop before this day
+
+Read back with `read_attempts` (a pyarrow Table, for analysis) or
+`iter_pages` (pages shaped like `db.fetch_attempts_page`, used by
+`python -m lib.difficulty --from-export`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from lib import db
+
+EXPORT_DIR = os.environ.get("ATTEMPT_EXPORT_DIR", str(Path(__file__).parents[1] / "exports" / "attempt"))
+FILE_NAME = "attempts.parquet"
+ROW_GROUP = 50_000
+
+# A day is exported once it ended this long ago, so late commits are in.
+SETTLE_SECONDS = 300
+_LOOKUP_CHUNK = 100  # ids per `in.(...)` filter, as in lib.db
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("user_id", pa.string()),
+        ("question_id", pa.string()),
+        ("question_type", pa.string()),
+        ("translation_id", pa.string()),
+        ("verse_ref_id", pa.string()),
+        ("book_id", pa.int16()),
+        ("chapter", pa.int16()),
+        ("verse", pa.int16()),
+        ("is_correct", pa.bool_()),
+        ("response_time_ms", pa.int32()),
+    ]
+)
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+
+class _Lookup:
+    """id → row of `table`, fetched in chunks the first time an id is seen."""
+
+    def __init__(self, table: str, columns: str) -> None:
+        self.table, self.columns = table, columns
+        self.rows: dict[str, dict] = {}
+
+    def fill(self, ids: set[str | None]) -> None:
+        missing = [i for i in ids if i is not None and i not in self.rows]
+        chunks = [missing[i : i + _LOOKUP_CHUNK] for i in range(0, len(missing), _LOOKUP_CHUNK)]
+        for rows in db.gather(
+            *[lambda chunk=chunk: db.fetch_all(self.table, self.columns, in_filter=("id", chunk)) for chunk in chunks]
+        ):
+            self.rows.update((r["id"], r) for r in rows)
+        # Remember ids that no longer exist, so they aren't fetched again.
+        self.rows.update((i, {}) for i in missing if i not in self.rows)
+
+    def get(self, id_: str | None) -> dict:
+        return self.rows.get(id_, {}) if id_ is not None else {}
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+
+def _partition(root: str, day: date) -> Path:
+    return Path(root) / f"day={day.isoformat()}" / FILE_NAME
+
+
+def exported_days(root: str = EXPORT_DIR) -> list[date]:
+    return sorted(date.fromisoformat(p.parent.name.removeprefix("day=")) for p in Path(root).glob(f"day=*/{FILE_NAME}"))
+
+
+def last_cursor(root: str = EXPORT_DIR) -> db.AttemptCursor | None:
+    """(created_at, id) of the last exported attempt."""
+    days = exported_days(root)
+    if not days:
+        return None
+    f = pq.ParquetFile(_partition(root, days[-1]))
+    last = f.read_row_group(f.num_row_groups - 1, columns=["created_at", "id"]).to_pylist()[-1]
+    return db.to_timestamptz(last["created_at"]), last["id"]
+
+
+class _DayFile:
+    def __init__(self, root: str, day: date) -> None:
+        self.day = day
+        self.path = _partition(root, day)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = self.path.with_name(FILE_NAME + ".tmp")
+        self.writer = pq.ParquetWriter(self.tmp, SCHEMA, compression="zstd")
+
+    def write(self, rows: list[dict]) -> None:
+        if rows:
+            self.writer.write_table(pa.Table.from_pylist(rows, SCHEMA))
+
+    def commit(self) -> None:
+        self.writer.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        self.writer.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def export(
+    root: str = EXPORT_DIR, until: date | None = None, page_size: int = db.PAGE_SIZE
+) -> dict[str, int]:
+    """Export every finished day after the last exported attempt (and before `until`)."""
+    end = (datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)).date()
+    if until is not None:
+        end = min(end, until)
+    before = db.to_timestamptz(datetime.combine(end, time.min, timezone.utc))
+    done = set(exported_days(root))
+    questions = _Lookup("question", "id, type, translation_id")
+    verses = _Lookup("verse_ref", "id, book_id, chapter, verse")
+
+    stats = {"days": 0, "attempts": 0, "late": 0}
+    current: _DayFile | None = None
+    buffer: list[dict] = []
+    try:
+        for page in db.iter_attempt_pages(last_cursor(root), before, page_size):
+            questions.fill({a["question_id"] for a in page})
+            verses.fill({a["verse_ref_id"] for a in page})
+            for a in page:
+                created_at = datetime.fromisoformat(a["created_at"])
+                day = created_at.astimezone(timezone.utc).date()
+                if day in done:
+                    # Committed after its day was exported; the file is final.
+                    stats["late"] += 1
+                    continue
+                if current is None or day != current.day:
+                    if current is not None:
+                        current.write(buffer)
+                        current.commit()
+                        buffer = []
+                    current = _DayFile(root, day)
+                    stats["days"] += 1
+                q, v = questions.get(a["question_id"]), verses.get(a["verse_ref_id"])
+                buffer.append(
+                    {
+                        "id": a["id"],
+                        "created_at": created_at,
+                        "user_id": a["user_id"],
+                        "question_id": a["question_id"],
+                        "question_type": q.get("type"),
+                        "translation_id": q.get("translation_id"),
+                        "verse_ref_id": a["verse_ref_id"],
+                        "book_id": v.get("book_id"),
+                        "chapter": v.get("chapter"),
+                        "verse": v.get("verse"),
+                        "is_correct": a["is_correct"],
+                        "response_time_ms": a["response_time_ms"],
+                    }
+                )
+                stats["attempts"] += 1
+                if len(buffer) >= ROW_GROUP:
+                    current.write(buffer)
+                    buffer = []
+        if current is not None:
+            current.write(buffer)
+            current.commit()
+    except BaseException:
+        if current is not None:
+            current.abort()
+        raise
+    return stats
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def read_attempts(
+    root: str = EXPORT_DIR, start: date | None = None, end: date | None = None, columns: list[str] | None = None
+) -> pa.Table:
+    """Exported attempts from days start <= day < end, with a `day` column."""
+    if not exported_days(root):
+        return SCHEMA.empty_table().select(columns) if columns else SCHEMA.empty_table()
+    dataset = ds.dataset(
+        root, format="parquet", partitioning=ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+    )
+    where = None
+    if start is not None:
+        where = ds.field("day") >= start.isoformat()
+    if end is not None:
+        upper = ds.field("day") < end.isoformat()
+        where = upper if where is None else where & upper
+    return dataset.to_table(columns=columns, filter=where)
+
+
+def iter_pages(
+    after: db.AttemptCursor | None, before: str | None = None, page_size: int = db.PAGE_SIZE, root: str = EXPORT_DIR
+) -> Iterator[list[dict]]:
+    """Like `db.iter_attempt_pages`, but reading exported files."""
+    after_key = None if after is None else (datetime.fromisoformat(after[0]), after[1])
+    before_at = None if before is None else datetime.fromisoformat(before)
+    for day in exported_days(root):
+        if after_key is not None and day < after_key[0].astimezone(timezone.utc).date():
+            continue
+        if before_at is not None and day > before_at.astimezone(timezone.utc).date():
+            return
+        for batch in pq.ParquetFile(_partition(root, day)).iter_batches(batch_size=page_size):
+            rows = batch.to_pylist()
+            if after_key is not None:
+                rows = [r for r in rows if (r["created_at"], r["id"]) > after_key]
+            if before_at is not None:
+                rows = [r for r in rows if r["created_at"] < before_at]
+            for r in rows:
+                r["created_at"] = db.to_timestamptz(r["created_at"])
+            if rows:
+                yield rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Export the attempt log to day-partitioned Parquet files.")
+    p.add_argument("--out", default=EXPORT_DIR, help="export directory")
+    p.add_argument("--until", type=date.fromisoformat, help="export only days before this one (YYYY-MM-DD)")
+    args = p.parse_args(argv)
+    print(export(args.out, args.until))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""BLANKS questions: the word split shared with the app, checks and repairs.
+
+A BLANKS question stores `answer_json = {"word_indices": [...], "answers":
+[...]}`, where each index points into `text.split(" ")` — the split the app
+uses to render the verse (FillInBlank.tsx). Every place that turns verse
+text into words goes through `words`, so the editor, imports and the
+integrity scanner (`lib.blanks_scan`) agree on the indices.
+
+The checks are plain functions of (answer_json, text) with no database
+access, so they can run in worker processes.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# From the import prompt (lib.prompts), plus the rest of the articles,
+# conjunctions, common prepositions and forms of "be"/"have"/"do".
+FUNCTION_WORDS = frozenset(
+    """
+    a an the and but or nor so yet for in of to into onto upon on at by from with as than that
+    is are was were be been being am has have had do does did it its
+    """.split()
+)
+
+# app/scripts/seed.ts stores answers with everything but letters, digits
+# and apostrophes stripped; the editor stores the word as split.
+_NOT_ANSWER = re.compile(r"[^A-Za-z0-9']")
+
+# Issue kinds, in report order.
+OUT_OF_RANGE = "out_of_range"  # an index past the last word
+UNSORTED = "unsorted"  # indices out of order or repeated
+ANSWER_MISMATCH = "answer_mismatch"  # answers don't match the words at the indices
+DOUBLE_SPACE = "double_space"  # repeated, leading, trailing or non-space whitespace
+FUNCTION_WORD = "function_word"  # a blank on "the", "and", …
+NO_BLANKS = "no_blanks"
+MISSING_TEXT = "missing_text"  # no verse_text in the question's translation
+KINDS = (OUT_OF_RANGE, UNSORTED, ANSWER_MISMATCH, DOUBLE_SPACE, FUNCTION_WORD, NO_BLANKS, MISSING_TEXT)
+FIXABLE = frozenset({OUT_OF_RANGE, UNSORTED, ANSWER_MISMATCH, DOUBLE_SPACE})
+
+
+@lru_cache(maxsize=65536)
+def words(text: str) -> tuple[str, ...]:
+    """The words a blank index refers to: `text.split(" ")`, as the app splits it."""
+    return tuple(text.split(" "))
+
+
+def answers_for(text: str, indices: list[int]) -> list[str]:
+    w = words(text)
+    return [w[i] for i in indices if 0 <= i < len(w)]
+
+
+def answer_json(text: str, indices: list[int]) -> dict:
+    """`answer_json` for blanks at `indices` (sorted; answers taken from the text)."""
+    indices = sorted(indices)
+    return {"word_indices": indices, "answers": answers_for(text, indices)}
+
+
+def normalize_spaces(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _matches(answer: str | None, word: str) -> bool:
+    return answer is not None and (answer == word or answer == _NOT_ANSWER.sub("", word))
+
+
+def is_function_word(word: str) -> bool:
+    return _NOT_ANSWER.sub("", word).casefold() in FUNCTION_WORDS
+
+
+# ── Checks ────────────────────────────────────────────────────────────────────
+
+@dataclass
+class Finding:
+    question_id: str
+    verse_ref_id: str
+    translation_id: str
+    issues: list[str]
+    # Repairs, when the issues can be fixed without a human choosing new blanks.
+    text: str | None = None
+    answer_json: dict | None = None
+    notes: list[str] = field(default_factory=list)
+
+
+def check(answer: dict | None, text: str) -> tuple[list[str], list[str]]:
+    """(issue kinds, human-readable notes) for one question and its verse text."""
+    answer = answer or {}
+    indices = list(answer.get("word_indices") or [])
+    answers = list(answer.get("answers") or [])
+    w = words(text)
+    issues: list[str] = []
+    notes: list[str] = []
+
+    bad = [i for i in indices if not 0 <= i < len(w)]
+    if bad:
+        issues.append(OUT_OF_RANGE)
+        notes.append(f"indices {bad} past word {len(w) - 1}")
+    if indices != sorted(set(indices)):
+        issues.append(UNSORTED)
+    wrong = [
+        (i, a, w[i]) for i, a in zip(indices, answers) if 0 <= i < len(w) and not _matches(a, w[i])
+    ]
+    if wrong or len(answers) != len(indices):
+        issues.append(ANSWER_MISMATCH)
+        notes += [f"[{i}] answer {a!r}, word {word!r}" for i, a, word in wrong]
+        if len(answers) != len(indices):
+            notes.append(f"{len(indices)} indices, {len(answers)} answers")
+    if text != normalize_spaces(text):
+        issues.append(DOUBLE_SPACE)
+    fw = [w[i] for i in indices if 0 <= i < len(w) and is_function_word(w[i])]
+    if fw:
+        issues.append(FUNCTION_WORD)
+        notes.append(f"function words {fw}")
+    if not indices:
+        issues.append(NO_BLANKS)
+    return issues, notes
+
+
+def repair(answer: dict | None, text: str) -> tuple[str | None, dict | None]:
+    """
+    (new text or None, new answer_json or None) fixing the mechanical issues.
+
+    Whitespace is normalized and indices are shifted to match. A blank whose
+    stored answer no longer matches its word moves to the nearest word that
+    does (the usual result of a text edit), else keeps its position with
+    the answer re-read from the text; blanks past the end are dropped.
+    Function-word blanks need a human and are left alone. Returns
+    (None, None) when nothing would change or no blank would be left.
+    """
+    answer = answer or {}
+    indices = list(answer.get("word_indices") or [])
+    answers = list(answer.get("answers") or [])
+    new_text = normalize_spaces(text)
+
+    # old word index → new word index (empty words vanish; a word holding
+    # a tab or newline becomes several, the first takes its place)
+    shift: dict[int, int] = {}
+    n = 0
+    for i, word in enumerate(words(text)):
+        if word.split():
+            shift[i] = n
+            n += len(word.split())
+    new_words = words(new_text)
+
+    kept: dict[int, str] = {}  # new index → answer (a stored answer that still matches is kept as is)
+    for k, i in enumerate(indices):
+        stored = answers[k] if k < len(answers) else None
+        at = shift.get(i)
+        if at is not None and _matches(stored, new_words[at]):
+            kept.setdefault(at, stored)
+            continue
+        found = [j for j, word in enumerate(new_words) if _matches(stored, word)]
+        if found:
+            target = at if at is not None else min(i, len(new_words) - 1)
+            j = min(found, key=lambda j: (abs(j - target), j))
+            kept.setdefault(j, stored)
+        elif at is not None:
+            kept.setdefault(at, new_words[at])
+
+    if not kept:
+        return None, None
+    order = sorted(kept)
+    fixed = {**answer, "word_indices": order, "answers": [kept[j] for j in order]}
+    return (
+        new_text if new_text != text else None,
+        fixed if fixed != answer else None,
+    )
+
+
+def inspect_question(question: dict, text: str) -> Finding | None:
+    """A `Finding` for a question row (id, verse_ref_id, translation_id, answer_json), or None if clean."""
+    issues, notes = check(question.get("answer_json"), text)
+    if not issues:
+        return None
+    new_text, new_answer = (
+        repair(question.get("answer_json"), text) if FIXABLE.intersection(issues) else (None, None)
+    )
+    return Finding(
+        question_id=question["id"],
+        verse_ref_id=question["verse_ref_id"],
+        translation_id=question["translation_id"],
+        issues=issues,
+        text=new_text,
+        answer_json=new_answer,
+        notes=notes,
+    )
@@ -0,0 +1,220 @@
+"""Check every active BLANKS question against its verse text.
+
+`save_verse` changes `verse_text.text` without touching the question, so
+a text edit can leave `word_indices` pointing at other words. This scan
+streams each translation's questions and verse texts side by side (both
+in verse_ref_id order, one page at a time), checks each pair with
+`lib.blanks.check` in worker processes, and reports:
+
+    out_of_range     an index past the last word
+    unsorted         indices out of order or repeated
+    answer_mismatch  stored answers differ from the words at the indices
+    double_space     repeated / leading / trailing / non-space whitespace
+    function_word    a blank on "the", "and", … (reported, never fixed)
+    no_blanks        empty word_indices
+    missing_text     no verse_text in the question's translation
+
+With --fix, the mechanical issues are repaired (see `lib.blanks.repair`)
+in a few bulk upserts: whitespace is normalized in verse_text, and
+indices and answers are rewritten in question.answer_json.
+
+Run:
+    cd editor
+    python -m lib.blanks_scan                          # report
+    python -m lib.blanks_scan NIV --report issues.jsonl
+    python -m lib.blanks_scan --fix
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextvars import copy_context
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+from lib import blanks, db
+
+WORKERS = min(8, os.cpu_count() or 1)
+
+Pair = tuple[dict, dict | None]  # (question row, verse_text row or None)
+
+_QUESTION_COLUMNS = "id, verse_ref_id, translation_id, answer_json"
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def iter_pairs(translation_id: str, page_size: int = db.PAGE_SIZE) -> Iterator[list[Pair]]:
+    """Chunks of (question, verse_text) for a translation's active BLANKS questions."""
+    questions = db.iter_rows(
+        "question",
+        _QUESTION_COLUMNS,
+        key="verse_ref_id",
+        filters={"type": "BLANKS", "active": True, "translation_id": translation_id},
+        page_size=page_size,
+    )
+    texts = db.iter_rows(
+        "verse_text", "id, verse_ref_id, text", key="verse_ref_id",
+        filters={"translation_id": translation_id}, page_size=page_size,
+    )
+    page: list[dict] | None = []
+    at = 0
+    for chunk in questions:
+        pairs: list[Pair] = []
+        for q in chunk:
+            ref = q["verse_ref_id"]
+            # Merge join: both streams are sorted by verse_ref_id.
+            while page is not None:
+                while at < len(page) and page[at]["verse_ref_id"] < ref:
+                    at += 1
+                if at < len(page):
+                    break
+                page, at = next(texts, None), 0
+            pairs.append((q, page[at] if page is not None and page[at]["verse_ref_id"] == ref else None))
+        yield pairs
+
+
+def _read_ahead(streams: list[Iterator[list[Pair]]], depth: int) -> Iterator[list[Pair]]:
+    """Chunks from every stream, each read by its own thread, in arrival order."""
+    out: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+
+    def drain(stream: Iterator[list[Pair]]) -> None:
+        try:
+            with db.dedicated_client():  # one pool per translation's reader
+                for chunk in stream:
+                    out.put(chunk)
+        except BaseException as exc:
+            out.put(exc)
+        finally:
+            out.put(done)
+
+    for stream in streams:
+        threading.Thread(target=copy_context().run, args=(drain, stream), daemon=True).start()
+    running = len(streams)
+    while running:
+        item = out.get()
+        if item is done:
+            running -= 1
+        elif isinstance(item, BaseException):
+            raise item
+        else:
+            yield item
+
+
+# ── Checking ──────────────────────────────────────────────────────────────────
+
+def _check_chunk(pairs: list[Pair]) -> list[blanks.Finding]:
+    findings = []
+    for q, vt in pairs:
+        if vt is None:
+            findings.append(blanks.Finding(q["id"], q["verse_ref_id"], q["translation_id"], [blanks.MISSING_TEXT]))
+            continue
+        finding = blanks.inspect_question(q, vt["text"])
+        if finding is not None:
+            findings.append(finding)
+    return findings
+
+
+def _checked(chunks: Iterator[list[Pair]], workers: int) -> Iterator[tuple[int, list[blanks.Finding]]]:
+    """(pairs checked, findings) per chunk, with at most 2 × `workers` chunks in flight."""
+    if workers <= 1:
+        for pairs in chunks:
+            yield len(pairs), _check_chunk(pairs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: list[tuple[int, Future]] = []
+        for pairs in chunks:
+            pending.append((len(pairs), pool.submit(_check_chunk, pairs)))
+            if len(pending) >= 2 * workers:
+                n, future = pending.pop(0)
+                yield n, future.result()
+        for n, future in pending:
+            yield n, future.result()
+
+
+@dataclass
+class ScanResult:
+    questions: int
+    findings: list[blanks.Finding]
+    fixed_questions: int
+    fixed_texts: int
+    seconds: float
+
+    def counts(self) -> Counter:
+        return Counter(kind for f in self.findings for kind in f.issues)
+
+
+def scan(
+    translation_ids: list[str] | None = None,
+    workers: int = WORKERS,
+    fix: bool = False,
+    page_size: int = db.PAGE_SIZE,
+) -> ScanResult:
+    """Check the active BLANKS questions of `translation_ids` (default: all active translations)."""
+    start = time.perf_counter()
+    tids = translation_ids or [t["id"] for t in db.get_translations()]
+    streams = [iter_pairs(tid, page_size) for tid in tids]
+    questions = 0
+    findings: list[blanks.Finding] = []
+    for n, found in _checked(_read_ahead(streams, depth=2 * max(workers, 1)), workers):
+        questions += n
+        findings += found
+
+    fixed_questions = fixed_texts = 0
+    if fix:
+        texts: dict[str, dict[str, str]] = {}
+        for f in findings:
+            if f.text is not None:
+                texts.setdefault(f.translation_id, {})[f.verse_ref_id] = f.text
+        for tid, by_ref in texts.items():
+            fixed_texts += db.upsert_verse_texts(tid, by_ref)
+        fixed_questions = db.update_answer_jsons(
+            [
+                {
+                    "id": f.question_id,
+                    "type": "BLANKS",
+                    "verse_ref_id": f.verse_ref_id,
+                    "translation_id": f.translation_id,
+                    "answer_json": f.answer_json,
+                }
+                for f in findings
+                if f.answer_json is not None
+            ]
+        )
+    return ScanResult(questions, findings, fixed_questions, fixed_texts, round(time.perf_counter() - start, 2))
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Check BLANKS questions against their verse text.")
+    p.add_argument("translations", nargs="*", help="translation ids (default: every active translation)")
+    p.add_argument("--workers", type=int, default=WORKERS, help="checker processes")
+    p.add_argument("--report", help="write every finding to this JSON Lines file")
+    p.add_argument("--fix", action="store_true", help="repair whitespace, indices and answers in bulk")
+    args = p.parse_args(argv)
+
+    result = scan(args.translations, args.workers, args.fix)
+    counts = result.counts()
+    print(f"{result.questions:,} questions checked in {result.seconds} s, {len(result.findings):,} with issues")
+    for kind in blanks.KINDS:
+        if counts[kind]:
+            print(f"  {kind:<16}{counts[kind]:>8,}")
+    fixable = sum(1 for f in result.findings if f.text is not None or f.answer_json is not None)
+    if args.fix:
+        print(f"fixed {result.fixed_questions:,} questions and {result.fixed_texts:,} verse texts")
+    elif fixable:
+        print(f"{fixable:,} can be repaired with --fix")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for finding in result.findings:
+                f.write(json.dumps(asdict(finding), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Tag-versioned in-process cache used by `lib.db`.
+
+Every entry is stored with the tags it depends on (e.g. ``("verse_ref",
+id)``, ``("translation", "NIV")``, ``("table", "book")``) and the version
+of each tag at the time it was filled. `invalidate` bumps tag versions, so
+only entries that depend on a written tag go stale.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+Tag = tuple[str, Hashable]
+
+MISS = object()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires: float
+    versions: tuple[tuple[Tag, int], ...]
+
+
+class TaggedCache:
+    """LRU + TTL cache whose entries are invalidated by tag version."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._versions: dict[Tag, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # dropped for size or age
+        self.invalidations = 0  # dropped because a tag was written
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for `key`, or `MISS`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return MISS
+            if any(self._versions.get(tag, 0) != v for tag, v in entry.versions):
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def snapshot(self, tags: Iterable[Tag]) -> tuple[tuple[Tag, int], ...]:
+        """
+        Current versions of `tags`. Take this *before* reading the source
+        so a write that lands mid-read leaves the new entry already stale.
+        """
+        with self._lock:
+            return tuple((tag, self._versions.get(tag, 0)) for tag in tags)
+
+    def put(self, key: Hashable, value: Any, versions: tuple[tuple[Tag, int], ...], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic() + ttl, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tags: Tag) -> None:
+        """Mark every entry depending on any of `tags` as stale."""
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate_pct": round(100 * self.hits / lookups) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
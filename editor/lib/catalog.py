@@ -0,0 +1,695 @@
+"""In-process verse catalog for the editor's browser.
+
+Loads `book`, `verse_ref`, `verse_text`, `verse_release` and the active
+BLANKS `question` rows once into flat per-column arrays and answers the
+browser's book/chapter/verse/text filters and both sort orders in memory.
+Text search goes through a per-translation `TextIndex` (built on first
+use) and can also be ordered by relevance. Near-duplicate texts are found
+through a per-translation `lib.dedup.MinHashIndex`, also built on first
+use.
+
+The catalog keeps itself current by patching in the editor's own writes
+(`verse_saved`, `question_saved`, `question_deleted`, `refresh_books`).
+Writes made elsewhere are picked up by a full reload once the catalog is
+older than `max_age` seconds.
+
+A copy is kept on disk as a `lib.snapshot` file (CATALOG_SNAPSHOT, by
+default `state/catalog.snap`), so a new editor process maps it and shows
+its first page without waiting on Supabase. The reload that brings it up
+to date — once it is older than CATALOG_MAX_AGE seconds — then runs in
+the background, and the snapshot is rewritten after it and after the
+editor's own writes.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from lib import db, dedup, snapshot
+from lib.textindex import TextIndex
+
+SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT", str(Path(__file__).parents[1] / "state" / "catalog.snap"))
+MAX_AGE = float(os.environ.get("CATALOG_MAX_AGE", "600"))
+
+# Bumped when the snapshot's columns change; older snapshots are ignored.
+SNAPSHOT_VERSION = 1
+
+# Seconds to wait after a failed background reload before trying again.
+_RETRY_AFTER = 60
+
+# Seconds a background reload waits before starting, so it doesn't compete
+# for the interpreter with the page that asked for the catalog.
+_RELOAD_DELAY = 2.0
+
+# Sentinel for a verse_ref without a verse_release row / rank.
+NO_RANK = -1
+
+# Rows per verse_ref_id IN query when refreshing a subset of the catalog.
+_REFRESH_CHUNK = 100
+
+
+class _Texts:
+    """verse_text rows for one translation, column by column."""
+
+    def __init__(self) -> None:
+        self.ref_pos = array("l")
+        self.ids: list[str] = []
+        self.text: list[str] = []
+        self.row_of_ref: dict[int, int] = {}
+        self._index: TextIndex | None = None
+        self._dups: dedup.MinHashIndex | None = None
+
+    def put(self, ref_pos: int, verse_text_id: str, text: str) -> int:
+        row = self.row_of_ref.get(ref_pos)
+        if row is None:
+            row = len(self.ids)
+            self.ref_pos.append(ref_pos)
+            self.ids.append(verse_text_id)
+            self.text.append(text)
+            self.row_of_ref[ref_pos] = row
+            if self._index is not None:
+                self._index.update(row, None, text)
+            if self._dups is not None:
+                self._dups.update(row, text)
+        else:
+            old = self.text[row]
+            self.ids[row] = verse_text_id
+            self.text[row] = text
+            if self._index is not None and old != text:
+                self._index.update(row, old, text)
+            if self._dups is not None and old != text:
+                self._dups.update(row, text)
+        return row
+
+    def index(self) -> TextIndex:
+        if self._index is None:
+            self._index = TextIndex(self.text)
+        return self._index
+
+    def dups(self) -> dedup.MinHashIndex:
+        if self._dups is None:
+            self._dups = dedup.MinHashIndex(self.text)
+        return self._dups
+
+
+class VerseCatalog:
+    """Columnar, in-memory copy of the verse browser's data."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.loaded_at = 0.0
+        self.version = 0  # bumped by every change to the data
+        self._saved_version = 0  # version the snapshot was last written (or read) at
+        self.error: str | None = None  # why the last background reload / save failed
+        self._failed_at = 0.0
+        self._syncing = False
+        self._clear()
+
+    @property
+    def dirty(self) -> bool:
+        """Changed since the snapshot was written."""
+        return self.version != self._saved_version
+
+    def _clear(self) -> None:
+        # reference rows, as db.get_translations / db.get_books return them
+        self.translations: list[dict] = []
+        self.book_rows: list[dict] = []
+        self.books: dict[int, tuple[str, int]] = {}  # id -> (name, sort_order)
+        # verse_ref columns
+        self.ref_ids: list[str] = []
+        self.ref_pos: dict[str, int] = {}
+        self.book_id = array("h")
+        self.chapter = array("l")
+        self.verse = array("l")
+        # verse_release columns, aligned with verse_ref
+        self.rank = array("l")
+        self.released = array("b")  # -1 = no release row
+        self.difficulty = array("d")  # nan = no release row
+        # translation_id -> verse_text columns
+        self.texts: dict[str, _Texts] = {}
+        # (translation_id, ref_pos) -> (question_id, answer_json); answer_json
+        # stays JSON text, as read from a snapshot, until a row shows it
+        self.questions: dict[tuple[str, int], tuple[str, dict | str]] = {}
+        self.question_key: dict[str, tuple[str, int]] = {}
+        # Lazily built orderings, dropped whenever refs move or appear
+        self._canonical: dict[str, list[int]] = {}
+        self._by_book: dict[str, dict[int, list[int]]] = {}
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def load(self) -> None:
+        """(Re)load the whole catalog from Supabase."""
+        translations, books, refs, releases, texts, questions = db.gather(
+            lambda: db.fetch_all("translation", db.TRANSLATION_COLUMNS, filters={"active": True}),
+            lambda: db.fetch_all("book", db.BOOK_COLUMNS, order="sort_order"),
+            lambda: db.fetch_all("verse_ref", "id, book_id, chapter, verse"),
+            lambda: db.fetch_all(
+                "verse_release", "verse_ref_id, global_rank, released, global_difficulty", order="verse_ref_id"
+            ),
+            lambda: db.fetch_all("verse_text", "id, verse_ref_id, translation_id, text"),
+            lambda: db.fetch_all(
+                "question",
+                "id, verse_ref_id, translation_id, answer_json",
+                filters={"type": "BLANKS", "active": True},
+            ),
+        )
+        with self._lock:
+            self._clear()
+            self._set_reference(translations, books)
+            self._apply_rows(refs, releases, texts, questions)
+            self.loaded_at = time.time()
+            self.version += 1
+
+    def _set_reference(self, translations: list[dict], books: list[dict]) -> None:
+        self.translations = translations
+        self.book_rows = books
+        self.books = {b["id"]: (b["name"], b["sort_order"]) for b in books}
+        db.prime_reference_data(translations, books)
+
+    def refresh_books(self, book_ids: set[int] | list[int]) -> None:
+        """Reload every verse of the given books, e.g. after an import."""
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+        refs = db.fetch_all("verse_ref", "id, book_id, chapter, verse", in_filter=("book_id", book_ids))
+        ids = [r["id"] for r in refs]
+        calls = []
+        for i in range(0, len(ids), _REFRESH_CHUNK):
+            chunk = ("verse_ref_id", ids[i : i + _REFRESH_CHUNK])
+            calls += [
+                lambda chunk=chunk: db.fetch_all(
+                    "verse_release",
+                    "verse_ref_id, global_rank, released, global_difficulty",
+                    order="verse_ref_id",
+                    in_filter=chunk,
+                ),
+                lambda chunk=chunk: db.fetch_all(
+                    "verse_text", "id, verse_ref_id, translation_id, text", in_filter=chunk
+                ),
+                lambda chunk=chunk: db.fetch_all(
+                    "question",
+                    "id, verse_ref_id, translation_id, answer_json",
+                    filters={"type": "BLANKS", "active": True},
+                    in_filter=chunk,
+                ),
+            ]
+        pages = db.gather(*calls)
+        releases = [row for page in pages[0::3] for row in page]
+        texts = [row for page in pages[1::3] for row in page]
+        questions = [row for page in pages[2::3] for row in page]
+        refreshed = set(ids)
+        with self._lock:
+            # Questions deactivated elsewhere won't come back; drop ours first.
+            for qid, (tid, pos) in list(self.question_key.items()):
+                if self.ref_ids[pos] in refreshed:
+                    del self.question_key[qid]
+                    self.questions.pop((tid, pos), None)
+            self._apply_rows(refs, releases, texts, questions)
+            self.version += 1
+
+    def _apply_rows(self, refs: list[dict], releases: list[dict], texts: list[dict], questions: list[dict]) -> None:
+        for r in refs:
+            self._put_ref(r["id"], r["book_id"], r["chapter"], r["verse"])
+        for r in releases:
+            pos = self.ref_pos.get(r["verse_ref_id"])
+            if pos is not None:
+                self._put_release(pos, r["global_rank"], r["released"], r.get("global_difficulty"))
+        for r in texts:
+            pos = self.ref_pos.get(r["verse_ref_id"])
+            if pos is None:
+                continue
+            t = self.texts.get(r["translation_id"])
+            if t is None:
+                t = self.texts[r["translation_id"]] = _Texts()
+            if pos not in t.row_of_ref:
+                self._drop_orders()
+            t.put(pos, r["id"], r["text"])
+        for q in questions:
+            pos = self.ref_pos.get(q["verse_ref_id"])
+            if pos is not None:
+                self._put_question(q["translation_id"], pos, q["id"], q["answer_json"])
+
+    def _put_ref(self, ref_id: str, book_id: int, chapter: int, verse: int) -> int:
+        pos = self.ref_pos.get(ref_id)
+        if pos is None:
+            pos = len(self.ref_ids)
+            self.ref_ids.append(ref_id)
+            self.ref_pos[ref_id] = pos
+            self.book_id.append(book_id)
+            self.chapter.append(chapter)
+            self.verse.append(verse)
+            self.rank.append(NO_RANK)
+            self.released.append(-1)
+            self.difficulty.append(math.nan)
+            self._drop_orders()
+        elif (self.book_id[pos], self.chapter[pos], self.verse[pos]) != (book_id, chapter, verse):
+            self.book_id[pos], self.chapter[pos], self.verse[pos] = book_id, chapter, verse
+            self._drop_orders()
+        return pos
+
+    def _put_release(self, pos: int, rank: int, released: bool, difficulty: float | None) -> None:
+        self.rank[pos] = rank
+        self.released[pos] = 1 if released else 0
+        if difficulty is not None:
+            self.difficulty[pos] = float(difficulty)
+        elif math.isnan(self.difficulty[pos]):
+            self.difficulty[pos] = 500.0  # column default
+
+    def _put_question(self, translation_id: str, pos: int, question_id: str, answer_json: dict) -> None:
+        old = self.questions.get((translation_id, pos))
+        if old is not None:
+            self.question_key.pop(old[0], None)
+        self.questions[(translation_id, pos)] = (question_id, answer_json)
+        self.question_key[question_id] = (translation_id, pos)
+
+    def _drop_orders(self) -> None:
+        self._canonical = {}
+        self._by_book = {}
+
+    # ── Snapshot ──────────────────────────────────────────────────────────────
+
+    def save_snapshot(self, path: str) -> int:
+        """Write the catalog to a snapshot file; return its size in bytes."""
+        with self._lock:
+            # Copy under the lock; encoding and writing happen outside it.
+            columns: dict[str, Any] = {
+                "translation.id": [t["id"] for t in self.translations],
+                "translation.name": [t["name"] for t in self.translations],
+                "book.id": np.array([b["id"] for b in self.book_rows], dtype="<i2"),
+                "book.sort_order": np.array([b["sort_order"] for b in self.book_rows], dtype="<i2"),
+                **{f"book.{c}": [b[c] for b in self.book_rows] for c in ("name", "abbr", "api_bible_id", "testament")},
+                "verse_ref.id": list(self.ref_ids),
+                "verse_ref.book_id": np.array(self.book_id, dtype="<i2"),
+                "verse_ref.chapter": np.array(self.chapter, dtype="<i4"),
+                "verse_ref.verse": np.array(self.verse, dtype="<i4"),
+                "verse_release.global_rank": np.array(self.rank, dtype="<i4"),
+                "verse_release.released": np.array(self.released, dtype="<i1"),
+                "verse_release.global_difficulty": np.array(self.difficulty, dtype="<f8"),
+                # verse_text and question rows are grouped by translation:
+                # <table>.translations[i] has the next <table>.counts[i] rows.
+                "verse_text.translations": list(self.texts),
+                "verse_text.counts": np.array([len(t.ids) for t in self.texts.values()], dtype="<u4"),
+                "verse_text.ref": np.concatenate(
+                    [np.array(t.ref_pos, dtype="<u4") for t in self.texts.values()] or [np.empty(0, "<u4")]
+                ),
+                "verse_text.id": [i for t in self.texts.values() for i in t.ids],
+                "verse_text.text": [x for t in self.texts.values() for x in t.text],
+            }
+            questions = sorted(self.questions.items(), key=lambda item: item[0])
+            meta = {"catalog": SNAPSHOT_VERSION, "source": db.SUPABASE_URL, "loaded_at": self.loaded_at}
+            version = self.version
+        tids = [tid for (tid, _), _ in questions]
+        columns["question.translations"] = sorted(set(tids))
+        columns["question.counts"] = np.array([tids.count(t) for t in columns["question.translations"]], dtype="<u4")
+        columns["question.ref"] = np.array([pos for (_, pos), _ in questions], dtype="<u4")
+        columns["question.id"] = [qid for _, (qid, _) in questions]
+        columns["question.answer_json"] = [a if isinstance(a, str) else json.dumps(a) for _, (_, a) in questions]
+        written = snapshot.write(path, columns, meta)
+        # Only now is the catalog clean, and only up to what was written:
+        # a failed write leaves it dirty, and patches since stay pending.
+        with self._lock:
+            self._saved_version = max(self._saved_version, version)
+        return written
+
+    def load_snapshot(self, path: str) -> bool:
+        """
+        Fill the catalog from a snapshot file, as of when it was loaded from Supabase.
+
+        Returns False, leaving the catalog alone, when there is no usable
+        snapshot: none yet, another format version, or another project's.
+        """
+        try:
+            snap = snapshot.read(path)
+        except snapshot.SnapshotError:
+            return False
+        if snap is None or snap.meta.get("catalog") != SNAPSHOT_VERSION or snap.meta.get("source") != db.SUPABASE_URL:
+            return False
+
+        translations = [{"id": i, "name": n} for i, n in zip(snap.strings("translation.id"), snap.strings("translation.name"))]
+        book_columns = {c: snap.strings(f"book.{c}") for c in ("name", "abbr", "api_bible_id", "testament")}
+        book_columns["id"] = snap.array("book.id").tolist()
+        book_columns["sort_order"] = snap.array("book.sort_order").tolist()
+        books = [{c: book_columns[c][i] for c in db.BOOK_COLUMNS.split(", ")} for i in range(len(book_columns["id"]))]
+
+        ref_ids = snap.strings("verse_ref.id")
+        text_ref = snap.array("verse_text.ref")
+        text_ids = snap.strings("verse_text.id")
+        text = snap.strings("verse_text.text")
+        texts: dict[str, _Texts] = {}
+        start = 0
+        for tid, n in zip(snap.strings("verse_text.translations"), snap.array("verse_text.counts").tolist()):
+            t = texts[tid] = _Texts()
+            t.ref_pos = _array("l", text_ref[start : start + n])
+            t.ids = text_ids[start : start + n]
+            t.text = text[start : start + n]
+            t.row_of_ref = dict(zip(t.ref_pos, range(n)))
+            start += n
+
+        question_ref = snap.array("question.ref").tolist()
+        question_ids = snap.strings("question.id")
+        answers = snap.strings("question.answer_json")
+        questions: dict[tuple[str, int], tuple[str, dict | str]] = {}
+        start = 0
+        for tid, n in zip(snap.strings("question.translations"), snap.array("question.counts").tolist()):
+            for i in range(start, start + n):
+                questions[(tid, question_ref[i])] = (question_ids[i], answers[i])
+            start += n
+
+        with self._lock:
+            self._clear()
+            self._set_reference(translations, books)
+            self.ref_ids = ref_ids
+            self.ref_pos = dict(zip(ref_ids, range(len(ref_ids))))
+            self.book_id = _array("h", snap.array("verse_ref.book_id"))
+            self.chapter = _array("l", snap.array("verse_ref.chapter"))
+            self.verse = _array("l", snap.array("verse_ref.verse"))
+            self.rank = _array("l", snap.array("verse_release.global_rank"))
+            self.released = _array("b", snap.array("verse_release.released"))
+            self.difficulty = _array("d", snap.array("verse_release.global_difficulty"))
+            self.texts = texts
+            self.questions = questions
+            self.question_key = {qid: key for key, (qid, _) in questions.items()}
+            self.loaded_at = snap.meta["loaded_at"]
+            self.version += 1
+            self._saved_version = self.version
+        return True
+
+    def sync(self, max_age: float, path: str = "") -> None:
+        """
+        Bring the catalog and its snapshot at `path` (if any) up to date in a background thread.
+
+        Reloads from Supabase (then rewrites the snapshot) when the data is
+        older than `max_age` seconds, else rewrites the snapshot if the
+        catalog changed since it was written. Readers keep the current data
+        meanwhile. At most one sync runs at a time; a failed reload is
+        retried after a minute and its reason left in `error`.
+        """
+        with self._lock:
+            if self._syncing:
+                return
+            now = time.time()
+            job: Callable[[str], None]
+            if now - self.loaded_at > max_age and now - self._failed_at > _RETRY_AFTER:
+                job = self._reload
+            elif self.dirty and path:
+                job = self._save
+            else:
+                return
+            self._syncing = True
+        threading.Thread(target=self._sync, args=(job, path), name="catalog-sync", daemon=True).start()
+
+    def _sync(self, job: Callable[[str], None], path: str) -> None:
+        try:
+            job(path)
+        finally:
+            with self._lock:
+                self._syncing = False
+
+    def _reload(self, path: str) -> None:
+        time.sleep(_RELOAD_DELAY)
+        try:
+            # Its own pool, so the reload's pages don't hold up the editor's requests.
+            with db.dedicated_client():
+                self.load()
+        except Exception as exc:
+            self._failed_at = time.time()
+            self.error = f"Catalog reload failed: {exc}"
+            return
+        self.error = None
+        self._save(path)
+
+    def _save(self, path: str) -> None:
+        if not path:
+            return
+        try:
+            self.save_snapshot(path)
+        except OSError as exc:
+            self.error = f"Catalog snapshot not saved: {exc}"
+
+    # ── Patching from the editor's own writes ─────────────────────────────────
+
+    def verse_saved(
+        self,
+        verse_ref_id: str,
+        chapter: int,
+        verse: int,
+        verse_text_id: str,
+        text: str,
+        rank: int | None,
+        released: bool,
+    ) -> None:
+        """Mirror a successful `db.save_verse` call."""
+        with self._lock:
+            pos = self.ref_pos.get(verse_ref_id)
+            if pos is None:
+                return
+            self._put_ref(verse_ref_id, self.book_id[pos], chapter, verse)
+            for t in self.texts.values():
+                row = t.row_of_ref.get(pos)
+                if row is not None and t.ids[row] == verse_text_id:
+                    t.put(pos, verse_text_id, text)
+            if rank is not None:
+                self._put_release(pos, rank, released, None)
+            self.version += 1
+
+    def ranks_saved(self, ranks: dict[str, int]) -> None:
+        """Mirror a successful `db.rerank` call (verse_ref_id → new rank)."""
+        with self._lock:
+            for verse_ref_id, rank in ranks.items():
+                pos = self.ref_pos.get(verse_ref_id)
+                if pos is not None:
+                    self.rank[pos] = rank
+            self.version += 1
+
+    def question_saved(self, verse_ref_id: str, translation_id: str, question_id: str, answer_json: dict) -> None:
+        """Mirror a successful `db.save_question` call."""
+        with self._lock:
+            pos = self.ref_pos.get(verse_ref_id)
+            if pos is not None:
+                self._put_question(translation_id, pos, question_id, answer_json)
+                self.version += 1
+
+    def question_deleted(self, question_id: str) -> None:
+        """Mirror a successful `db.soft_delete_question` call."""
+        with self._lock:
+            key = self.question_key.pop(question_id, None)
+            if key is not None:
+                self.questions.pop(key, None)
+                self.version += 1
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def _sort_key(self, pos: int) -> tuple[int, int, int]:
+        book = self.books.get(self.book_id[pos])
+        return (book[1] if book else 0, self.chapter[pos], self.verse[pos])
+
+    def _orders(self, translation_id: str) -> tuple[list[int], dict[int, list[int]]]:
+        canonical = self._canonical.get(translation_id)
+        if canonical is None:
+            t = self.texts.get(translation_id) or _Texts()
+            canonical = sorted(range(len(t.ids)), key=lambda row: self._sort_key(t.ref_pos[row]))
+            by_book: dict[int, list[int]] = {}
+            for row in canonical:
+                by_book.setdefault(self.book_id[t.ref_pos[row]], []).append(row)
+            self._canonical[translation_id] = canonical
+            self._by_book[translation_id] = by_book
+        return canonical, self._by_book[translation_id]
+
+    def search(
+        self,
+        translation_id: str,
+        book_id: int | None = None,
+        chapter: int | None = None,
+        verse: int | None = None,
+        text_search: str = "",
+        sort_by: str = "book",
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> tuple[int, list[dict]]:
+        """
+        Filter and sort the catalog in memory.
+
+        sort_by is "book" (canonical order), "rank" (global_rank, unranked
+        last, ties in canonical order) or "relevance" (best text match first;
+        canonical order when there is no text_search). See `lib.textindex`
+        for the text_search syntax. Returns (total matches, page of rows);
+        each row has verse_text_id, verse_ref_id, book_id, book_name,
+        sort_order, chapter, verse, text, question_id, answer_json,
+        global_rank, released and global_difficulty.
+        """
+        with self._lock:
+            t = self.texts.get(translation_id)
+            if t is None:
+                return 0, []
+            canonical, by_book = self._orders(translation_id)
+            rows = canonical if book_id is None else by_book.get(book_id, [])
+
+            if text_search.strip():
+                ranked = [row for row, _ in t.index().search(text_search)]
+                if sort_by == "relevance":
+                    rows = ranked if book_id is None else [r for r in ranked if self.book_id[t.ref_pos[r]] == book_id]
+                else:
+                    matched = set(ranked)
+                    rows = [r for r in rows if r in matched]
+            if chapter is not None:
+                rows = [r for r in rows if self.chapter[t.ref_pos[r]] == chapter]
+            if verse is not None:
+                rows = [r for r in rows if self.verse[t.ref_pos[r]] == verse]
+
+            if sort_by == "rank":
+                rank = self.rank
+                rows = sorted(rows, key=lambda r: (rank[t.ref_pos[r]] == NO_RANK, rank[t.ref_pos[r]]))
+
+            total = len(rows)
+            page = rows[offset : None if limit is None else offset + limit]
+            return total, [self._row(translation_id, t, r) for r in page]
+
+    def describe(self, verse_ref_ids: list[str], translation_id: str) -> list[dict]:
+        """Reference and text of each verse (empty fields for verses not in the catalog)."""
+        with self._lock:
+            t = self.texts.get(translation_id) or _Texts()
+            out = []
+            for verse_ref_id in verse_ref_ids:
+                pos = self.ref_pos.get(verse_ref_id)
+                if pos is None:
+                    out.append({"verse_ref_id": verse_ref_id, "reference": "", "text": ""})
+                    continue
+                name = self.books.get(self.book_id[pos], (f"Book {self.book_id[pos]}", 0))[0]
+                row = t.row_of_ref.get(pos)
+                out.append(
+                    {
+                        "verse_ref_id": verse_ref_id,
+                        "book_id": self.book_id[pos],
+                        "reference": f"{name} {self.chapter[pos]}:{self.verse[pos]}",
+                        "chapter": self.chapter[pos],
+                        "text": t.text[row] if row is not None else "",
+                    }
+                )
+            return out
+
+    def near_duplicates(
+        self,
+        translation_id: str,
+        texts: list[str],
+        verse_ref_ids: list[str | None] | None = None,
+        threshold: float = dedup.THRESHOLD,
+        limit: int = 3,
+    ) -> list[list[dict]]:
+        """
+        For each of `texts`, up to `limit` catalog verses with near-identical text, most similar first.
+
+        `verse_ref_ids[i]`, when given, is the verse `texts[i]` belongs to,
+        which never counts as its own duplicate. Matches are shaped like
+        `describe` rows plus `similarity` (see `lib.dedup`).
+        """
+        with self._lock:
+            t = self.texts.get(translation_id)
+            if t is None or not texts:
+                return [[] for _ in texts]
+            exclude = [
+                t.row_of_ref.get(self.ref_pos.get(ref, -1)) if ref else None
+                for ref in (verse_ref_ids or [None] * len(texts))
+            ]
+            found = t.dups().similar(texts, threshold, exclude)
+            return [[self._match(t, row, score) for row, score in matches[:limit]] for matches in found]
+
+    def duplicate_pairs(self, translation_id: str, threshold: float = dedup.THRESHOLD) -> list[dict]:
+        """
+        Every pair of verses in a translation whose texts are at least `threshold` similar, most similar first.
+
+        Rows: similarity, then verse_ref_id, reference and text of each verse (`_a` and `_b`).
+        """
+        with self._lock:
+            t = self.texts.get(translation_id)
+            if t is None:
+                return []
+            pairs = []
+            for a, b, score in t.dups().pairs(threshold):
+                if self._sort_key(t.ref_pos[b]) < self._sort_key(t.ref_pos[a]):
+                    a, b = b, a
+                first, second = self._match(t, a, score), self._match(t, b, score)
+                pairs.append(
+                    {
+                        "similarity": score,
+                        **{f"{k}_a": first[k] for k in ("verse_ref_id", "reference", "text")},
+                        **{f"{k}_b": second[k] for k in ("verse_ref_id", "reference", "text")},
+                    }
+                )
+            return pairs
+
+    def _match(self, t: _Texts, row: int, score: float) -> dict:
+        pos = t.ref_pos[row]
+        name = self.books.get(self.book_id[pos], (f"Book {self.book_id[pos]}", 0))[0]
+        return {
+            "verse_ref_id": self.ref_ids[pos],
+            "book_id": self.book_id[pos],
+            "reference": f"{name} {self.chapter[pos]}:{self.verse[pos]}",
+            "chapter": self.chapter[pos],
+            "text": t.text[row],
+            "similarity": score,
+        }
+
+    def _row(self, translation_id: str, t: _Texts, row: int) -> dict:
+        pos = t.ref_pos[row]
+        book_id = self.book_id[pos]
+        name, sort_order = self.books.get(book_id, (f"Book {book_id}", 0))
+        question = self.questions.get((translation_id, pos))
+        if question is not None and isinstance(question[1], str):
+            question = self.questions[(translation_id, pos)] = (question[0], json.loads(question[1]))
+        has_release = self.released[pos] != -1
+        return {
+            "verse_text_id": t.ids[row],
+            "verse_ref_id": self.ref_ids[pos],
+            "book_id": book_id,
+            "book_name": name,
+            "sort_order": sort_order,
+            "chapter": self.chapter[pos],
+            "verse": self.verse[pos],
+            "text": t.text[row],
+            "question_id": question[0] if question else None,
+            "answer_json": question[1] if question else None,
+            "global_rank": self.rank[pos] if has_release else None,
+            "released": bool(self.released[pos]) if has_release else None,
+            "global_difficulty": self.difficulty[pos] if has_release else None,
+        }
+
+
+def _array(typecode: str, values: np.ndarray) -> array:
+    """A snapshot column as an `array.array` of `typecode`."""
+    out = array(typecode)
+    out.frombytes(values.astype(typecode).tobytes())
+    return out
+
+
+_catalog: VerseCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(max_age: float | None = None) -> VerseCatalog:
+    """
+    Return the process-wide catalog, reloading it in the background when older than `max_age` seconds.
+
+    `max_age` defaults to MAX_AGE (CATALOG_MAX_AGE in the environment).
+
+    A new process starts from the snapshot at SNAPSHOT_PATH (set
+    CATALOG_SNAPSHOT= to go without) and waits on Supabase only when there
+    is none. See `VerseCatalog.sync`.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            catalog = VerseCatalog()
+            if not (SNAPSHOT_PATH and catalog.load_snapshot(SNAPSHOT_PATH)):
+                catalog.load()
+            _catalog = catalog
+        _catalog.sync(MAX_AGE if max_age is None else max_age, SNAPSHOT_PATH)
+        return _catalog
@@ -0,0 +1,243 @@
+"""Pooled, retrying supabase-py clients.
+
+`create` builds a client whose PostgREST requests go through an httpx
+pool sized by `ClientConfig`: how many connections it may open, how many
+idle ones it keeps alive and for how long, and the connect / read /
+pool-wait timeouts. Every setting can be overridden from the environment
+(`SUPABASE_POOL_SIZE`, `SUPABASE_RETRIES`, … — see `ClientConfig.from_env`).
+
+`ClientFactory` hands out one shared client per process, or a task's own
+client (and pool) inside `dedicated()`, so a bulk job's connections are
+not taken from the ones the editor's reruns wait on.
+
+`retrying` wraps a client so idempotent requests — selects, upserts,
+updates, deletes and the RPCs named as safe — are retried on transient
+failures (429, 5xx from the gateway, PostgREST connection errors,
+serialization failures, timeouts and dropped connections) with jittered
+exponential backoff. Inserts are never retried.
+
+Retries and time spent waiting for a free connection are recorded in the
+active `lib.metrics` scopes.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Iterator
+
+import httpx
+from supabase import Client, create_client
+
+from lib import metrics
+
+# APIError.code values worth another try: HTTP statuses (when the body
+# wasn't PostgREST JSON, i.e. the gateway answered), PostgREST's
+# "database unreachable / pool exhausted", and Postgres serialization
+# failure and deadlock.
+RETRY_CODES = frozenset(
+    {"408", "429", "500", "502", "503", "504", "520", "PGRST000", "PGRST001", "PGRST002", "PGRST003", "40001", "40P01"}
+)
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    pool_size: int = 20  # connections one client may open
+    keepalive: int = 10  # idle connections kept open
+    keepalive_expiry: float = 30.0  # seconds an idle connection is kept
+    connect_timeout: float = 5.0
+    timeout: float = 30.0  # read / write
+    pool_timeout: float = 10.0  # waiting for a free connection
+    http2: bool = True
+    retries: int = 4  # after the first attempt
+    backoff: float = 0.2  # seconds; doubles per retry, full jitter
+    max_backoff: float = 5.0
+
+    @classmethod
+    def from_env(cls, prefix: str = "SUPABASE_") -> "ClientConfig":
+        """Defaults, overridden by e.g. SUPABASE_POOL_SIZE=40 or SUPABASE_HTTP2=0."""
+        values: dict[str, Any] = {}
+        for f in fields(cls):
+            raw = os.environ.get(prefix + f.name.upper())
+            if raw is None:
+                continue
+            kind = type(f.default)
+            values[f.name] = raw.lower() in ("1", "true", "yes") if kind is bool else kind(raw)
+        return cls(**values)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+# ── Clients ───────────────────────────────────────────────────────────────────
+
+def create(url: str, key: str, config: ClientConfig) -> Client:
+    """A supabase client whose PostgREST requests use a pool sized by `config`."""
+    client = create_client(url, key)
+    rest = client.postgrest
+    old = rest.session
+    # Keep the base URL and auth headers the library set up; only the
+    # transport settings change.
+    rest.session = httpx.Client(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout, pool=config.pool_timeout),
+        limits=httpx.Limits(
+            max_connections=config.pool_size,
+            max_keepalive_connections=config.keepalive,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        http2=config.http2,
+        follow_redirects=True,
+        event_hooks={"request": [_trace_pool_wait]},
+    )
+    old.close()
+    return client
+
+
+def close(client: Any) -> None:
+    """Close a client's connection pool (clients without one are left alone)."""
+    session = getattr(getattr(client, "postgrest", None), "session", None)
+    if session is not None:
+        session.close()
+
+
+def _trace_pool_wait(request: httpx.Request) -> None:
+    # httpcore reports its first event ("connect_tcp" for a new connection,
+    # "send_request_headers" on a reused one) once the pool has given the
+    # request a connection; the time until then is the wait for a free slot.
+    start = time.perf_counter()
+    waited = False
+
+    def trace(event: str, info: dict) -> None:
+        nonlocal waited
+        if not waited:
+            waited = True
+            metrics.record_pool_wait((time.perf_counter() - start) * 1000, event.startswith("connection.connect_tcp"))
+
+    request.extensions["trace"] = trace
+
+
+_own: ContextVar[Any] = ContextVar("db_own_client", default=None)
+
+
+class ClientFactory:
+    """The process's shared client, or the current task's own one inside `dedicated`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._shared: tuple[Callable[[], Any], Any] | None = None
+
+    def get(self, connect: Callable[[], Any]) -> Any:
+        own = _own.get()
+        if own is not None:
+            return own
+        shared = self._shared
+        if shared is None or shared[0] is not connect:
+            with self._lock:
+                # Rebuilt when `connect` changes (benchmarks swap `db._connect`).
+                if self._shared is None or self._shared[0] is not connect:
+                    self._shared = (connect, connect())
+                shared = self._shared
+        return shared[1]
+
+    @contextmanager
+    def dedicated(self, connect: Callable[[], Any]) -> Iterator[Any]:
+        """Use a new client, with its own pool, for everything inside the block; close it after."""
+        client = connect()
+        token = _own.set(client)
+        try:
+            yield client
+        finally:
+            _own.reset(token)
+            close(client)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._shared is not None:
+                close(self._shared[1])
+                self._shared = None
+
+
+# ── Retries ───────────────────────────────────────────────────────────────────
+
+def retryable(exc: BaseException) -> bool:
+    """Whether a failed request may succeed if sent again."""
+    if isinstance(exc, httpx.TransportError):  # timeouts, refused / dropped connections
+        return True
+    return str(getattr(exc, "code", None)) in RETRY_CODES
+
+
+def call_with_retry(execute: Callable[[], Any], config: ClientConfig, label: str = "") -> Any:
+    """`execute()`, retried with jittered exponential backoff while it fails transiently."""
+    attempt = 0
+    while True:
+        try:
+            return execute()
+        except Exception as exc:
+            if attempt >= config.retries or not retryable(exc):
+                if attempt:
+                    metrics.record_retry(label, exc, gave_up=True)
+                raise
+            wait = config.delay(attempt)
+            metrics.record_retry(label, exc, wait_ms=wait * 1000)
+            time.sleep(wait)
+            attempt += 1
+
+
+def retrying(client: Any, config: ClientConfig, idempotent_rpcs: frozenset[str] = frozenset()) -> Any:
+    """`client` with idempotent requests retried (see `call_with_retry`)."""
+    return _Retrying(client, config, idempotent_rpcs, "", True)
+
+
+class _Retrying:
+    """Proxy over a client or query builder that knows whether its request is safe to resend."""
+
+    __slots__ = ("_obj", "_config", "_rpcs", "_label", "_safe")
+
+    def __init__(self, obj: Any, config: ClientConfig, rpcs: frozenset[str], label: str, safe: bool) -> None:
+        self._obj = obj
+        self._config = config
+        self._rpcs = rpcs
+        self._label = label
+        self._safe = safe
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._obj, attr)
+        if attr == "execute":
+            if not self._safe:
+                return value
+            # Newer postgrest-py retries GET 503s itself, with fixed 1, 2, 4 s
+            # waits; these retries replace those.
+            if hasattr(self._obj, "retry"):
+                self._obj.retry(False)
+            return lambda: call_with_retry(value, self._config, self._label)
+        if not callable(value):
+            # e.g. `.not_`, a property returning the builder
+            return self._wrap(value, self._label, self._safe) if hasattr(value, "execute") else value
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            result = value(*args, **kwargs)
+            if attr not in ("table", "from_", "rpc") and not hasattr(result, "execute"):
+                return result
+            label, safe = self._label, self._safe
+            if attr in ("table", "from_") and args:
+                label = str(args[0])
+            elif attr == "rpc" and args:
+                label, safe = f"rpc:{args[0]}", args[0] in self._rpcs
+            elif attr == "insert":
+                label, safe = f"{label}.insert", False
+            elif attr in ("select", "upsert", "update", "delete"):
+                label = f"{label}.{attr}"
+            return self._wrap(result, label, safe)
+
+        return call
+
+    def _wrap(self, obj: Any, label: str, safe: bool) -> "_Retrying":
+        return _Retrying(obj, self._config, self._rpcs, label, safe)
@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import inspect
 import os
-from functools import lru_cache
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timezone
+from functools import wraps
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+
+from lib import blanks, clients, metrics, suggest
+from lib.cache import MISS, Tag, TaggedCache
 
 # Load credentials from the app's .env.local (two levels up from this file)
 load_dotenv(Path(__file__).parents[2] / "app" / ".env.local")
@@ -17,120 +25,242 @@ SUPABASE_URL = os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
 
 
-@lru_cache(maxsize=1)
-def _client() -> Client:
+# Pool size, keep-alive, timeouts and retries; see lib.clients for the
+# SUPABASE_* environment variables that override them.
+CLIENT_CONFIG = clients.ClientConfig.from_env()
+
+# RPCs safe to send twice: reads, and updates that set absolute values.
+IDEMPOTENT_RPCS = frozenset(
+    {"attempt_page", "apply_question_difficulty", "verse_lapse_page", "plan_state_page"}
+)
+
+_clients = clients.ClientFactory()
+
+
+def _connect() -> Client:
+    """A new client with its own connection pool."""
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise EnvironmentError(
             "NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set "
             "in app/.env.local"
         )
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return clients.create(SUPABASE_URL, SUPABASE_KEY, CLIENT_CONFIG)
+
+
+def _client() -> Client:
+    """
+    The current task's client (see `dedicated_client`), else the shared one.
+
+    Idempotent requests are retried on transient failures, and every
+    request is measured while lib.metrics is on.
+    """
+    client = _clients.get(_connect)
+    if metrics.ENABLED:
+        client = metrics.wrap_client(client)
+    return clients.retrying(client, CLIENT_CONFIG, IDEMPOTENT_RPCS)
+
+
+def dedicated_client():
+    """
+    Give a bulk task its own client and connection pool:
+
+        with db.dedicated_client():
+            db.import_verses(...)
+
+    Every `lib.db` call inside the block (and in `gather`s it starts) uses
+    it, so the task's requests don't queue behind — or hold up — the
+    editor's on the shared pool. The pool is closed when the block ends.
+    """
+    return _clients.dedicated(_connect)
+
+
+# ── Concurrent calls ──────────────────────────────────────────────────────────
+# The sync supabase client's connection pool is safe to use from several
+# threads, so independent reads can be issued in parallel.
+
+GATHER_WORKERS = 8
+
+_pool = ThreadPoolExecutor(max_workers=GATHER_WORKERS, thread_name_prefix="db-gather")
+_in_gather: ContextVar[bool] = ContextVar("db_in_gather", default=False)
+
+
+def _run_gathered(fn: Callable[[], Any]) -> Any:
+    _in_gather.set(True)
+    return fn()
+
+
+def gather(*calls: Callable[[], Any]) -> list[Any]:
+    """
+    Run independent zero-argument calls concurrently; return their results in order.
+
+        detail, max_rank = db.gather(lambda: db.get_verse_detail(ref, tid), db.get_max_rank)
+
+    Each call runs in a copy of the caller's context, so `lib.metrics`
+    scopes and a `dedicated_client` still apply. Waits for every call,
+    then re-raises the first failure. Nested gathers run inline rather
+    than wait on the pool.
+    """
+    if len(calls) < 2 or _in_gather.get():
+        return [fn() for fn in calls]
+    futures = [_pool.submit(copy_context().run, _run_gathered, fn) for fn in calls]
+    errors = [f.exception() for f in futures]
+    for exc in errors:
+        if exc is not None:
+            raise exc
+    return [f.result() for f in futures]
+
+
+# ── Read cache ────────────────────────────────────────────────────────────────
+# Reads are cached per process and tagged with what they depend on:
+#   ("table", name)           reference tables and table-wide aggregates
+#   ("translation", id)       search results for one translation
+#   ("verse_ref", id)         everything shown for one verse
+# Writes below invalidate only the tags they touch. Cached search pages
+# are never edited in place: a changed row may no longer match the page's
+# filters or belong at its position in the sort order.
+
+_cache = TaggedCache()
+
+
+def _cached(ttl: float, tags: Callable[..., Iterable[Tag]]):
+    """Cache a read function; `tags` gets the call's arguments by name."""
+
+    def wrap(fn):
+        sig = inspect.signature(fn)
+
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__name__, *bound.arguments.values())
+            value = _cache.get(key)
+            if value is MISS:
+                versions = _cache.snapshot(tags(**bound.arguments))
+                value = fn(*args, **kwargs)
+                _cache.put(key, value, versions, ttl)
+            return value
+
+        return inner
+
+    return wrap
+
+
+def cache_stats() -> dict[str, int]:
+    """Hit/miss/eviction counters for the read cache."""
+    return _cache.stats()
+
+
+def clear_cache() -> None:
+    """Drop every cached read (e.g. after editing the database by hand)."""
+    _cache.clear()
+
+
+def _all_translations() -> list[Tag]:
+    """A ("translation", id) tag per translation, for writes that show in every translation's search results."""
+    return [("translation", t["id"]) for t in get_translations()]
 
 
 # ── Reference data ────────────────────────────────────────────────────────────
 
+TRANSLATION_COLUMNS = "id, name"
+BOOK_COLUMNS = "id, name, abbr, api_bible_id, testament, sort_order"
+TRANSLATIONS_TTL = 300
+BOOKS_TTL = 600
+
+
+@metrics.instrument
+@_cached(ttl=TRANSLATIONS_TTL, tags=lambda: [("table", "translation")])
 def get_translations() -> list[dict]:
     """Return all active translations."""
-    res = _client().table("translation").select("id, name").eq("active", True).execute()
+    res = _client().table("translation").select(TRANSLATION_COLUMNS).eq("active", True).execute()
     return res.data or []
 
 
+@metrics.instrument
+@_cached(ttl=BOOKS_TTL, tags=lambda: [("table", "book")])
 def get_books() -> list[dict]:
     """Return all 66 books ordered canonically."""
-    res = (
-        _client()
-        .table("book")
-        .select("id, name, abbr, testament, sort_order")
-        .order("sort_order")
-        .execute()
-    )
+    res = _client().table("book").select(BOOK_COLUMNS).order("sort_order").execute()
     return res.data or []
 
 
-# ── Verse browser ─────────────────────────────────────────────────────────────
+def prime_reference_data(translations: list[dict], books: list[dict]) -> None:
+    """Cache rows read another way (by lib.catalog) as the results of `get_translations` and `get_books`."""
+    _cache.put(("get_translations",), translations, _cache.snapshot([("table", "translation")]), TRANSLATIONS_TTL)
+    _cache.put(("get_books",), books, _cache.snapshot([("table", "book")]), BOOKS_TTL)
 
-def search_verses(
-    translation_id: str,
-    book_id: int | None,
-    chapter: int | None,
-    verse: int | None,
-    text_search: str,
-    limit: int = 200,
-) -> list[dict]:
-    """
-    Return verses matching the filters.
 
-    Each row contains:
-      verse_ref_id, book_name, chapter, verse, text,
-      question_id, answer_json, active (question),
-      global_rank, released, global_difficulty
-    """
-    # Build the query using PostgREST embedded resource syntax via supabase-py
-    q = (
-        _client()
-        .table("verse_text")
-        .select(
-            "id, text, "
-            "verse_ref!inner(id, chapter, verse, "
-            "  book!inner(id, name, sort_order), "
-            "  verse_release(global_rank, released, global_difficulty), "
-            "  question(id, answer_json, active, type)"
-            ")"
-        )
-        .eq("translation_id", translation_id)
-        .limit(limit)
-    )
+# ── Bulk reads ────────────────────────────────────────────────────────────────
 
-    if book_id is not None:
-        q = q.eq("verse_ref.book_id", book_id)
-    if chapter is not None:
-        q = q.eq("verse_ref.chapter", chapter)
-    if verse is not None:
-        q = q.eq("verse_ref.verse", verse)
-    if text_search:
-        q = q.ilike("text", f"%{text_search}%")
+# PostgREST's default max-rows; larger pages are silently truncated.
+PAGE_SIZE = 1000
 
-    res = q.execute()
-    rows = res.data or []
 
-    # Flatten the nested structure for display
-    result = []
-    for r in rows:
-        vr = r.get("verse_ref", {})
-        book = vr.get("book", {})
-        release = vr.get("verse_release") or {}
-        questions = vr.get("question", [])
-        # Find active BLANKS question for this translation
-        blanks_q = next(
-            (q for q in questions if q.get("type") == "BLANKS" and q.get("active")),
-            None,
-        )
+@metrics.instrument
+def fetch_all(
+    table: str,
+    columns: str,
+    order: str = "id",
+    filters: dict[str, Any] | None = None,
+    in_filter: tuple[str, list] | None = None,
+    page_size: int = PAGE_SIZE,
+) -> list[dict]:
+    """
+    Return every row of `table`, paging with `range()` in `order` order.
 
-        result.append(
-            {
-                "verse_text_id": r["id"],
-                "verse_ref_id": vr.get("id"),
-                "book_id": book.get("id"),
-                "book_name": book.get("name", ""),
-                "sort_order": book.get("sort_order", 0),
-                "chapter": vr.get("chapter"),
-                "verse": vr.get("verse"),
-                "text": r.get("text", ""),
-                "question_id": blanks_q["id"] if blanks_q else None,
-                "answer_json": blanks_q["answer_json"] if blanks_q else None,
-                "global_rank": release.get("global_rank"),
-                "released": release.get("released"),
-                "global_difficulty": release.get("global_difficulty"),
-            }
-        )
+    `filters` are equality filters; `in_filter` is an optional
+    (column, values) pair applied as an IN filter.
+    """
+    db = _client()
+    rows: list[dict] = []
+    start = 0
+    while True:
+        q = db.table(table).select(columns).order(order)
+        for col, val in (filters or {}).items():
+            q = q.eq(col, val)
+        if in_filter is not None:
+            q = q.in_(in_filter[0], in_filter[1])
+        page = q.range(start, start + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+
+def iter_rows(
+    table: str,
+    columns: str,
+    key: str,
+    filters: dict[str, Any] | None = None,
+    page_size: int = PAGE_SIZE,
+) -> Iterator[list[dict]]:
+    """
+    Yield pages of `table` in `key` order, for reading a table without
+    holding all of it.
 
-    # Sort client-side by sort_order → chapter → verse (PostgREST nested ordering is limited)
-    result.sort(key=lambda x: (x["sort_order"], x["chapter"] or 0, x["verse"] or 0))
-    return result
+    `key` must be unique under `filters` and included in `columns`; pages
+    continue from the last key seen (`gt`) rather than an offset.
+    """
+    db = _client()
+    last = None
+    while True:
+        q = db.table(table).select(columns).order(key)
+        for col, val in (filters or {}).items():
+            q = q.eq(col, val)
+        if last is not None:
+            q = q.gt(key, last)
+        page = q.limit(page_size).execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last = page[-1][key]
 
 
 # ── Verse detail ──────────────────────────────────────────────────────────────
 
+@metrics.instrument
+@_cached(ttl=60, tags=lambda verse_ref_id, **_: [("verse_ref", verse_ref_id)])
 def get_verse_detail(verse_ref_id: str, translation_id: str) -> dict | None:
     """Return full detail for the editor modal."""
     res = (
@@ -182,6 +312,7 @@ def get_verse_detail(verse_ref_id: str, translation_id: str) -> dict | None:
 
 # ── Save verse + release ──────────────────────────────────────────────────────
 
+@metrics.instrument
 def save_verse(
     verse_ref_id: str,
     chapter: int,
@@ -194,193 +325,684 @@ def save_verse(
     """Update verse_ref, verse_text, and upsert verse_release."""
     db = _client()
 
-    db.table("verse_ref").update({"chapter": chapter, "verse": verse}).eq(
-        "id", verse_ref_id
-    ).execute()
+    try:
+        db.table("verse_ref").update({"chapter": chapter, "verse": verse}).eq(
+            "id", verse_ref_id
+        ).execute()
 
-    db.table("verse_text").update({"text": text}).eq("id", verse_text_id).execute()
+        db.table("verse_text").update({"text": text}).eq("id", verse_text_id).execute()
 
-    if rank is not None:
-        db.table("verse_release").upsert(
-            {
-                "verse_ref_id": verse_ref_id,
-                "global_rank": rank,
-                "released": released,
-            }
-        ).execute()
+        if rank is not None:
+            db.table("verse_release").upsert(
+                {
+                    "verse_ref_id": verse_ref_id,
+                    "global_rank": rank,
+                    "released": released,
+                }
+            ).execute()
+    finally:
+        # chapter and verse show in every translation's results.
+        _cache.invalidate(("verse_ref", verse_ref_id), ("table", "verse_release"), *_all_translations())
 
 
 # ── Questions ─────────────────────────────────────────────────────────────────
 
+@metrics.instrument
 def save_question(
     verse_ref_id: str,
     translation_id: str,
     word_indices: list[int],
     text: str,
     question_id: str | None = None,
-) -> None:
-    """Upsert a BLANKS question. Derives answers by splitting text on spaces."""
-    words = text.split(" ")
-    sorted_indices = sorted(word_indices)
-    answers = [words[i] for i in sorted_indices if i < len(words)]
+) -> str | None:
+    """
+    Upsert a BLANKS question. Derives answers from the words of `text`
+    (`lib.blanks.words`).
 
+    Returns the question id.
+    """
     payload: dict[str, Any] = {
         "type": "BLANKS",
         "verse_ref_id": verse_ref_id,
         "translation_id": translation_id,
-        "answer_json": {"word_indices": sorted_indices, "answers": answers},
+        "answer_json": blanks.answer_json(text, word_indices),
         "active": True,
     }
 
     db = _client()
-    if question_id:
-        db.table("question").update(
-            {"answer_json": payload["answer_json"], "active": True}
-        ).eq("id", question_id).execute()
-    else:
-        # upsert on the unique key (type, verse_ref_id, translation_id)
-        db.table("question").upsert(payload, on_conflict="type,verse_ref_id,translation_id").execute()
-
-
+    try:
+        if question_id:
+            db.table("question").update(
+                {"answer_json": payload["answer_json"], "active": True}
+            ).eq("id", question_id).execute()
+        else:
+            # upsert on the unique key (type, verse_ref_id, translation_id)
+            res = db.table("question").upsert(payload, on_conflict="type,verse_ref_id,translation_id").execute()
+            question_id = res.data[0]["id"] if res.data else None
+    finally:
+        _cache.invalidate(("verse_ref", verse_ref_id), ("translation", translation_id))
+    return question_id
+
+
+@metrics.instrument
 def soft_delete_question(question_id: str) -> None:
     """Soft-delete a question by setting active=false."""
-    _client().table("question").update({"active": False}).eq("id", question_id).execute()
+    res = _client().table("question").update({"active": False}).eq("id", question_id).execute()
+    _cache.invalidate(
+        *[("verse_ref", q["verse_ref_id"]) for q in res.data or []],
+        *{("translation", q["translation_id"]) for q in res.data or []},
+    )
+
+
+QUESTION_CHUNK_SIZE = 1000  # rows per question upsert (a JSON body, so no URL limit)
+
+
+@metrics.instrument
+def update_answer_jsons(questions: list[dict], chunk_size: int = QUESTION_CHUNK_SIZE) -> int:
+    """
+    Set answer_json on many existing questions, in upserts of `chunk_size`.
+
+    Each dict: id, type, verse_ref_id, translation_id, answer_json (the
+    not-null columns, so the upsert's insert half is valid). Returns rows
+    written.
+    """
+    chunks = [questions[i : i + chunk_size] for i in range(0, len(questions), chunk_size)]
+    db = _client()
+    try:
+        gather(*[lambda chunk=chunk: db.table("question").upsert(chunk, on_conflict="id").execute() for chunk in chunks])
+    finally:
+        _cache.invalidate(
+            *{("translation", q["translation_id"]) for q in questions},
+            *[("verse_ref", q["verse_ref_id"]) for q in questions],
+        )
+    return len(questions)
 
 
 # ── Drip / import ─────────────────────────────────────────────────────────────
 
+@metrics.instrument
 def get_max_rank() -> int:
-    """Return the current maximum global_rank (0 if table is empty)."""
+    """
+    Return the current maximum global_rank (0 if table is empty).
+
+    Always read fresh, never cached: callers hand out the next ranks from
+    it, and another editor or import worker may have just taken some.
+    """
     res = _client().table("verse_release").select("global_rank").order("global_rank", desc=True).limit(1).execute()
     if res.data:
         return res.data[0]["global_rank"]
     return 0
 
 
-def import_verses(verses: list[dict], start_rank: int) -> dict:
+# Rows per bulk request. Kept small enough that `in.(...)` filters over
+# verse_ref uuids stay well under PostgREST's URL length limit.
+IMPORT_CHUNK_SIZE = 100
+
+
+@metrics.instrument
+def import_verses(
+    verses: list[dict],
+    start_rank: int,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    start: int = 0,
+    on_chunk: Callable[[dict], None] | None = None,
+    offset: int = 0,
+) -> dict:
     """
     Batch-import verses.
 
     Each verse dict:
       book_id, chapter, verse, text, blanks (list[int]), translation_id
 
-    Returns: {"new": int, "updated": int, "errors": list[str]}
+    Verses are written in chunks of `chunk_size`: one multi-row upsert per
+    table per chunk, so the number of round trips grows with the number of
+    chunks rather than the number of verses. A failing chunk is reported in
+    `errors` and the remaining chunks still run.
+
+    To resume an interrupted import, pass the `done` and `next_rank` of its
+    last checkpoint as `start` and `start_rank`. `on_chunk` gets a
+    checkpoint after every chunk: the running totals below plus `done`
+    (verses handled) and `next_rank`. `offset` is added to the verse
+    numbers in error messages when `verses` is one part of a larger import.
+
+    Returns: {"new": int, "updated": int, "errors": list[str], "ranks": int}
     """
     db = _client()
     new_count = 0
     updated_count = 0
+    next_rank = start_rank
     errors: list[str] = []
 
-    for i, v in enumerate(verses):
-        try:
-            book_id = v["book_id"]
-            chapter = v["chapter"]
-            verse_num = v["verse"]
-            text = v["text"]
-            blanks = sorted(v["blanks"])
-            translation_id = v.get("translation_id", "NIV")
-
-            # 1. Upsert verse_ref
-            vr_res = (
-                db.table("verse_ref")
-                .upsert(
-                    {"book_id": book_id, "chapter": chapter, "verse": verse_num},
-                    on_conflict="book_id,chapter,verse",
+    for chunk_start in range(start, len(verses), chunk_size):
+        chunk = verses[chunk_start : chunk_start + chunk_size]
+        rows: list[dict] = []
+        for i, v in enumerate(chunk):
+            try:
+                rows.append(
+                    {
+                        "book_id": v["book_id"],
+                        "chapter": v["chapter"],
+                        "verse": v["verse"],
+                        "text": v["text"],
+                        "blanks": sorted(v["blanks"]),
+                        "translation_id": v.get("translation_id", "NIV"),
+                    }
                 )
-                .execute()
+            except Exception as exc:
+                errors.append(f"Verse {offset + chunk_start + i + 1}: {exc}")
+
+        if rows:
+            try:
+                n_new, n_updated, n_ranks = _import_chunk(db, rows, next_rank)
+            except Exception as exc:
+                first, last = offset + chunk_start + 1, offset + chunk_start + len(chunk)
+                errors.append(f"Verses {first}–{last}: {exc}")
+            else:
+                new_count += n_new
+                updated_count += n_updated
+                next_rank += n_ranks
+            finally:
+                # Even a failed chunk may have written some tables.
+                _cache.invalidate(
+                    ("table", "verse_release"),
+                    *{("translation", r["translation_id"]) for r in rows},
+                    *{("verse_ref", r["verse_ref_id"]) for r in rows if "verse_ref_id" in r},
+                )
+        if on_chunk is not None:
+            on_chunk(
+                {
+                    "new": new_count,
+                    "updated": updated_count,
+                    "errors": errors,
+                    "ranks": next_rank - start_rank,
+                    "done": chunk_start + len(chunk),
+                    "next_rank": next_rank,
+                }
             )
-            verse_ref_id = vr_res.data[0]["id"]
 
-            # 2. Upsert verse_text
-            db.table("verse_text").upsert(
-                {
-                    "verse_ref_id": verse_ref_id,
-                    "translation_id": translation_id,
-                    "text": text,
-                },
-                on_conflict="verse_ref_id,translation_id",
-            ).execute()
+    return {"new": new_count, "updated": updated_count, "errors": errors, "ranks": next_rank - start_rank}
 
-            # 3. Check if question already exists
-            existing_q = (
-                db.table("question")
-                .select("id")
-                .eq("type", "BLANKS")
-                .eq("verse_ref_id", verse_ref_id)
-                .eq("translation_id", translation_id)
-                .execute()
-            )
-            is_update = bool(existing_q.data)
 
-            # 4. Upsert question
-            words = text.split(" ")
-            answers = [words[idx] for idx in blanks if idx < len(words)]
-            db.table("question").upsert(
-                {
-                    "type": "BLANKS",
-                    "verse_ref_id": verse_ref_id,
-                    "translation_id": translation_id,
-                    "answer_json": {"word_indices": blanks, "answers": answers},
-                    "active": True,
-                },
-                on_conflict="type,verse_ref_id,translation_id",
-            ).execute()
+def _import_chunk(db: Client, rows: list[dict], start_rank: int) -> tuple[int, int, int]:
+    """Write one chunk of validated import rows. Returns (new, updated, ranks used)."""
+    # A repeated verse + translation is written once with the last text and
+    # blanks, and counted as an update (as if it had been imported twice
+    # in a row). Postgres rejects a multi-row upsert that hits the same
+    # conflict key twice.
+    by_key: dict[tuple, dict] = {}
+    for r in rows:
+        by_key[(r["book_id"], r["chapter"], r["verse"], r["translation_id"])] = r
+    repeats = len(rows) - len(by_key)
+    rows = list(by_key.values())
+
+    # 1. Upsert verse_ref and resolve ids in bulk
+    ref_keys = list(dict.fromkeys((r["book_id"], r["chapter"], r["verse"]) for r in rows))
+    vr_res = (
+        db.table("verse_ref")
+        .upsert(
+            [{"book_id": b, "chapter": c, "verse": v} for b, c, v in ref_keys],
+            on_conflict="book_id,chapter,verse",
+        )
+        .execute()
+    )
+    ref_ids = {(r["book_id"], r["chapter"], r["verse"]): r["id"] for r in vr_res.data or []}
+    for r in rows:
+        r["verse_ref_id"] = ref_ids[(r["book_id"], r["chapter"], r["verse"])]
+
+    # 2. Upsert verse_text
+    db.table("verse_text").upsert(
+        [
+            {"verse_ref_id": r["verse_ref_id"], "translation_id": r["translation_id"], "text": r["text"]}
+            for r in rows
+        ],
+        on_conflict="verse_ref_id,translation_id",
+    ).execute()
 
-            # 5. Upsert verse_release (only for new verses; don't overwrite existing rank)
-            if not is_update:
-                rank = start_rank + new_count
-                db.table("verse_release").upsert(
-                    {
-                        "verse_ref_id": verse_ref_id,
-                        "global_rank": rank,
-                        "released": True,
-                    },
-                    on_conflict="verse_ref_id",
-                ).execute()
-                new_count += 1
-            else:
-                updated_count += 1
+    # 3. Find which questions already exist
+    existing_q = (
+        db.table("question")
+        .select("verse_ref_id, translation_id")
+        .eq("type", "BLANKS")
+        .in_("verse_ref_id", list(ref_ids.values()))
+        .execute()
+    )
+    existing = {(q["verse_ref_id"], q["translation_id"]) for q in existing_q.data or []}
 
-        except Exception as exc:
-            errors.append(f"Verse {i + 1}: {exc}")
+    # 4. Upsert questions
+    question_rows = []
+    for r in rows:
+        question_rows.append(
+            {
+                "type": "BLANKS",
+                "verse_ref_id": r["verse_ref_id"],
+                "translation_id": r["translation_id"],
+                "answer_json": {"word_indices": r["blanks"], "answers": blanks.answers_for(r["text"], r["blanks"])},
+                "active": True,
+            }
+        )
+    db.table("question").upsert(question_rows, on_conflict="type,verse_ref_id,translation_id").execute()
+
+    # 5. Upsert verse_release for new verses only (don't overwrite existing
+    #    ranks). Ranks follow input order; a verse imported in two
+    #    translations in the same chunk gets a single rank.
+    new_rows = [r for r in rows if (r["verse_ref_id"], r["translation_id"]) not in existing]
+    release_rows: dict[str, dict] = {}
+    for r in new_rows:
+        if r["verse_ref_id"] not in release_rows:
+            release_rows[r["verse_ref_id"]] = {
+                "verse_ref_id": r["verse_ref_id"],
+                "global_rank": start_rank + len(release_rows),
+                "released": True,
+            }
+    if release_rows:
+        db.table("verse_release").upsert(list(release_rows.values()), on_conflict="verse_ref_id").execute()
 
-    return {"new": new_count, "updated": updated_count, "errors": errors}
+    return len(new_rows), len(rows) - len(new_rows) + repeats, len(release_rows)
 
 
+@metrics.instrument
 def preview_import(verses: list[dict], translation_id: str = "NIV") -> list[dict]:
     """
     Classify each verse as NEW or UPDATE without writing to DB.
 
+    Verses are grouped by book and looked up in chunks (one query per
+    `IMPORT_CHUNK_SIZE` verses of a book), then classified in memory.
+
+    When `lib.suggest` statistics exist for the translation, verses
+    without 2 valid blanks get suggested ones (`blanks_suggested`), and
+    every verse gets `blank_notes` on its blanks.
+
     Returns list of dicts with: book_id, chapter, verse, text, blanks,
     status ('NEW'|'UPDATE'|'ERROR'), error (str|None), verse_ref_id (str|None)
     """
     db = _client()
+    errors: dict[int, str] = {}
+    keys: dict[int, VerseKey] = {}  # index -> (book_id, chapter, verse) as ints
+    by_book: dict[int, list[int]] = {}
+    for i, v in enumerate(verses):
+        try:
+            keys[i] = (int(v["book_id"]), int(v["chapter"]), int(v["verse"]))
+        except Exception as exc:
+            errors[i] = str(exc)
+            continue
+        by_book.setdefault(keys[i][0], []).append(i)
+
+    # (book_id, chapter, verse) -> (verse_ref_id, has active BLANKS question)
+    found: dict[VerseKey, tuple[str, bool]] = {}
+    for book_id, indices in by_book.items():
+        for chunk_start in range(0, len(indices), IMPORT_CHUNK_SIZE):
+            chunk = indices[chunk_start : chunk_start + IMPORT_CHUNK_SIZE]
+            try:
+                # Exactly the wanted (chapter, verse) pairs, so a chunk never
+                # reads more rows than it has verses (PostgREST's max-rows
+                # would cut a larger result short without an error).
+                pairs = sorted({keys[i][1:] for i in chunk})
+                res = (
+                    db.table("verse_ref")
+                    .select("id, chapter, verse, question(id, type, active)")
+                    .eq("book_id", book_id)
+                    .or_(",".join(f"and(chapter.eq.{c},verse.eq.{v})" for c, v in pairs))
+                    .execute()
+                )
+            except Exception as exc:
+                for i in chunk:
+                    errors[i] = str(exc)
+                continue
+            for vr in res.data or []:
+                has_blanks = any(
+                    q.get("type") == "BLANKS" and q.get("active") for q in (vr.get("question") or [])
+                )
+                found[(book_id, vr["chapter"], vr["verse"])] = (vr["id"], has_blanks)
+
     result = []
+    for i, v in enumerate(verses):
+        if i in errors:
+            result.append({**v, "translation_id": translation_id, "status": "ERROR", "verse_ref_id": None, "error": errors[i]})
+            continue
+        verse_ref_id, has_blanks = found.get(keys[i], (None, False))
+        status = "UPDATE" if has_blanks else "NEW"
+        result.append({**v, "translation_id": translation_id, "status": status, "verse_ref_id": verse_ref_id, "error": None})
+
+    stats = suggest.get_stats(translation_id)
+    if stats is not None:
+        rows = [r for r in result if r["status"] != "ERROR"]
+        todo = [r for r in rows if not suggest.has_valid_blanks(r)]
+        for r, picked in zip(todo, stats.suggest_many(r.get("text") or "" for r in todo)):
+            r["blanks"], r["blanks_suggested"] = picked, True
+        for r in rows:
+            r["blank_notes"] = stats.review(r.get("text") or "", r.get("blanks") or [])
+    return result
 
-    for v in verses:
-        try:
-            existing = (
-                db.table("verse_ref")
-                .select("id, question(id, type, active)")
-                .eq("book_id", v["book_id"])
-                .eq("chapter", v["chapter"])
-                .eq("verse", v["verse"])
+
+# ── Translation text ──────────────────────────────────────────────────────────
+# Bulk reads and writes for lib.ingest. verse_text.content_hash is md5(text),
+# generated by Postgres, so unchanged verses can be skipped without reading
+# their text back.
+
+VerseKey = tuple[int, int, int]  # (book_id, chapter, verse)
+TEXT_CHUNK_SIZE = 1000  # rows per verse_text upsert (a JSON body, so no URL limit)
+
+
+@metrics.instrument
+def get_translation(translation_id: str) -> dict | None:
+    res = _client().table("translation").select("*").eq("id", translation_id).maybe_single().execute()
+    return res.data if res is not None else None
+
+
+@metrics.instrument
+def create_translation(translation_id: str, name: str, license_type: str = "unknown") -> None:
+    """Add a `provider = 'local'` translation (for text loaded from files)."""
+    try:
+        _client().table("translation").insert(
+            {"id": translation_id, "name": name, "provider": "local", "license_type": license_type}
+        ).execute()
+    finally:
+        _cache.invalidate(("table", "translation"))
+
+
+@metrics.instrument
+def find_verse_ref_ids(keys: Iterable[VerseKey]) -> dict[VerseKey, str]:
+    """verse_ref ids of the `keys` that already exist; writes nothing."""
+    wanted = set(keys)
+    book_ids = sorted({k[0] for k in wanted})
+    found: dict[VerseKey, str] = {}
+    for rows in gather(
+        *[
+            lambda b=b: fetch_all("verse_ref", "id, book_id, chapter, verse", filters={"book_id": b})
+            for b in book_ids
+        ]
+    ):
+        found.update(((r["book_id"], r["chapter"], r["verse"]), r["id"]) for r in rows)
+    return {k: ref for k, ref in found.items() if k in wanted}
+
+
+@metrics.instrument
+def get_verse_ref_ids(keys: Iterable[VerseKey]) -> dict[VerseKey, str]:
+    """verse_ref ids for `keys`, creating the verse_refs that don't exist yet."""
+    wanted = set(keys)
+    found = find_verse_ref_ids(wanted)
+
+    missing = sorted(wanted - found.keys())
+    chunks = [missing[i : i + TEXT_CHUNK_SIZE] for i in range(0, len(missing), TEXT_CHUNK_SIZE)]
+    db = _client()
+    for res in gather(
+        *[
+            lambda chunk=chunk: db.table("verse_ref")
+            .upsert([{"book_id": b, "chapter": c, "verse": v} for b, c, v in chunk], on_conflict="book_id,chapter,verse")
+            .execute()
+            for chunk in chunks
+        ]
+    ):
+        found.update(((r["book_id"], r["chapter"], r["verse"]), r["id"]) for r in res.data or [])
+    return {k: found[k] for k in wanted}
+
+
+@metrics.instrument
+def get_text_hashes(translation_id: str) -> dict[str, str]:
+    """verse_ref_id → content_hash of every verse_text row of a translation."""
+    rows = fetch_all(
+        "verse_text", "verse_ref_id, content_hash", order="verse_ref_id", filters={"translation_id": translation_id}
+    )
+    return {r["verse_ref_id"]: r["content_hash"] for r in rows}
+
+
+@metrics.instrument
+def upsert_verse_texts(
+    translation_id: str, texts: dict[str, str], chunk_size: int = TEXT_CHUNK_SIZE
+) -> int:
+    """Upsert verse_ref_id → text for one translation in large chunks. Returns rows written."""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [
+        {"verse_ref_id": ref, "translation_id": translation_id, "text": text, "fetched_at": now}
+        for ref, text in texts.items()
+    ]
+    chunks = [rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    db = _client()
+    try:
+        gather(
+            *[
+                lambda chunk=chunk: db.table("verse_text")
+                .upsert(chunk, on_conflict="verse_ref_id,translation_id")
                 .execute()
-            )
-            if existing.data:
-                vr = existing.data[0]
-                blanks_q = next(
-                    (q for q in (vr.get("question") or []) if q.get("type") == "BLANKS" and q.get("active")),
-                    None,
-                )
-                status = "UPDATE" if blanks_q else "NEW"
-                verse_ref_id = vr["id"]
-            else:
-                status = "NEW"
-                verse_ref_id = None
+                for chunk in chunks
+            ]
+        )
+    finally:
+        _cache.invalidate(("translation", translation_id), *[("verse_ref", ref) for ref in texts])
+    return len(rows)
 
-            result.append({**v, "translation_id": translation_id, "status": status, "verse_ref_id": verse_ref_id, "error": None})
-        except Exception as exc:
-            result.append({**v, "translation_id": translation_id, "status": "ERROR", "verse_ref_id": None, "error": str(exc)})
 
-    return result
+# ── Drip order ────────────────────────────────────────────────────────────────
+
+@metrics.instrument
+@_cached(ttl=60, tags=lambda: [("table", "verse_release")])
+def get_drip_order() -> list[dict]:
+    """Every verse_release row (verse_ref_id, global_rank, released), by rank."""
+    rows = fetch_all("verse_release", "verse_ref_id, global_rank, released", order="global_rank")
+    return sorted(rows, key=lambda r: (r["global_rank"], r["verse_ref_id"]))
+
+
+def plan_rerank(current: dict[str, int | None], order: list[str]) -> dict[str, int]:
+    """
+    New global_rank for the verses that must move so ranks follow `order`.
+
+    Keeps the largest set of verses whose current ranks already fit: verse
+    j can stay after kept verse i only if rank_j − rank_i ≥ j − i, leaving
+    a free rank for each verse between them. With key = rank − position
+    that is a longest non-decreasing subsequence of keys (O(n log n)).
+    Each moved verse takes the next rank after the verse before it, since
+    the app serves verses with global_rank ≤ poolSize. Ranks start at 1
+    and come out strictly increasing, so duplicates are resolved too.
+    """
+    keys: list[int] = []  # tails[k] = smallest key ending a kept run of length k + 1
+    tails: list[int] = []  # position of that tail
+    parent: dict[int, int] = {}
+    for pos, ref in enumerate(order, start=1):
+        rank = current.get(ref)
+        if rank is None or rank < pos:
+            continue  # unranked, or too few ranks below it for the verses in front
+        k = bisect_right(keys, rank - pos)
+        if k:
+            parent[pos] = tails[k - 1]
+        if k == len(keys):
+            keys.append(rank - pos)
+            tails.append(pos)
+        else:
+            keys[k], tails[k] = rank - pos, pos
+
+    kept: list[int] = []
+    pos = tails[-1] if tails else None
+    while pos is not None:
+        kept.append(pos)
+        pos = parent.get(pos)
+    kept.reverse()
+
+    changes: dict[str, int] = {}
+    kept_set = set(kept)
+    rank = 0
+    for pos, ref in enumerate(order, start=1):
+        rank = current[ref] if pos in kept_set else rank + 1
+        if current.get(ref) != rank:
+            changes[ref] = rank
+    return changes
+
+
+@metrics.instrument
+def rerank(order: list[str]) -> dict[str, int]:
+    """
+    Give verse_release rows the ranks of `order`, earliest first, with as
+    few writes as possible (see `plan_rerank`), in one batched upsert.
+
+    Verses with a verse_release row that `order` leaves out keep their
+    relative order after the listed ones. Returns verse_ref_id → new rank
+    for every row written.
+    """
+    if len(set(order)) != len(order):
+        raise ValueError("order lists a verse more than once")
+    rows = fetch_all("verse_release", "verse_ref_id, global_rank", order="global_rank")
+    current = {r["verse_ref_id"]: r["global_rank"] for r in rows}
+    unknown = [ref for ref in order if ref not in current]
+    if unknown:
+        raise ValueError(f"{len(unknown)} verse(s) have no verse_release row, e.g. {unknown[0]}")
+    listed = set(order)
+    rest = [r["verse_ref_id"] for r in sorted(rows, key=lambda r: (r["global_rank"], r["verse_ref_id"]))]
+    changes = plan_rerank(current, [*order, *(ref for ref in rest if ref not in listed)])
+    if not changes:
+        return changes
+
+    try:
+        _client().table("verse_release").upsert(
+            [{"verse_ref_id": ref, "global_rank": rank} for ref, rank in changes.items()], on_conflict="verse_ref_id"
+        ).execute()
+    finally:
+        # Ranks show in every translation's results, not only rank-sorted ones.
+        _cache.invalidate(("table", "verse_release"), *[("verse_ref", ref) for ref in changes], *_all_translations())
+    return changes
+
+
+# ── Attempt log ───────────────────────────────────────────────────────────────
+
+# (created_at, id) of the last attempt read; see `attempt_page` in schema.sql.
+AttemptCursor = tuple[str, str]
+
+
+def to_timestamptz(when: datetime) -> str:
+    """`when` as a UTC timestamptz string, for cursors and `before` bounds."""
+    return when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+@metrics.instrument
+def fetch_attempts_page(
+    after: AttemptCursor | None, before: str | None = None, limit: int = PAGE_SIZE
+) -> list[dict]:
+    """Up to `limit` attempts in (created_at, id) order after `after`, created before `before`."""
+    params: dict[str, Any] = {"p_before": before, "p_limit": limit}
+    if after is not None:
+        params.update(p_after_created_at=after[0], p_after_id=after[1])
+    return _client().rpc("attempt_page", params).execute().data or []
+
+
+def iter_attempt_pages(
+    after: AttemptCursor | None, before: str | None = None, page_size: int = PAGE_SIZE
+) -> Iterator[list[dict]]:
+    """Every attempt after `after` (and created before `before`), one page at a time."""
+    while True:
+        rows = fetch_attempts_page(after, before, page_size)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]["created_at"], rows[-1]["id"]
+
+
+@metrics.instrument
+def latest_attempt_cursor(before: str | None = None) -> AttemptCursor | None:
+    """The (created_at, id) of the newest attempt created before `before`, if any."""
+    q = _client().table("attempt").select("created_at, id")
+    if before is not None:
+        q = q.lt("created_at", before)
+    rows = q.order("created_at", desc=True).order("id", desc=True).limit(1).execute().data
+    return (rows[0]["created_at"], rows[0]["id"]) if rows else None
+
+
+# ── Difficulty recalculation ──────────────────────────────────────────────────
+
+
+@metrics.instrument
+def apply_question_difficulty(difficulty: dict[str, int]) -> list[str]:
+    """
+    Set question.difficulty for many questions in one request and re-sync
+    verse_release.global_difficulty for their verses.
+
+    Returns the affected verse_ref ids.
+    """
+    if not difficulty:
+        return []
+    ids = list(difficulty)
+    try:
+        res = (
+            _client()
+            .rpc("apply_question_difficulty", {"p_ids": ids, "p_difficulty": [difficulty[i] for i in ids]})
+            .execute()
+        )
+    finally:
+        _cache.invalidate(("table", "verse_release"))
+    refs = res.data or []
+    _cache.invalidate(*[("verse_ref", r) for r in refs])
+    return refs
+
+
+# ── Analytics rollups ─────────────────────────────────────────────────────────
+
+@metrics.instrument
+def fetch_lapse_page(after: str | None, limit: int = PAGE_SIZE) -> list[dict]:
+    """
+    Up to `limit` verses' user_verse_state totals, in verse_ref_id order after `after`:
+    {"verse_ref_id", "states", "lapsed" (states with a lapse), "lapses"}.
+    """
+    return _client().rpc("verse_lapse_page", {"p_after": after, "p_limit": limit}).execute().data or []
+
+
+def iter_lapse_pages(page_size: int = PAGE_SIZE) -> Iterator[list[dict]]:
+    """Every verse's lapse totals (see `fetch_lapse_page`), one page at a time."""
+    after = None
+    while True:
+        rows = fetch_lapse_page(after, page_size)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]["verse_ref_id"]
+
+
+# ── Session plans ─────────────────────────────────────────────────────────────
+
+PLAN_CHUNK_SIZE = 1000  # rows per session_plan upsert (a JSON body, so no URL limit)
+
+
+@metrics.instrument
+def fetch_plan_state_page(
+    after: str | None,
+    before: str | None = None,
+    limit: int = PAGE_SIZE,
+    active_since: str | None = None,
+    user_ids: list[str] | None = None,
+) -> list[dict]:
+    """
+    Up to `limit` students' user_verse_state rows, one dict per student in
+    user_id order after `after` and before `before`: {"user_id",
+    "verse_ref_ids", "mastery", "next_due_at" (epoch seconds or None)}.
+    """
+    params = {
+        "p_after": after,
+        "p_before": before,
+        "p_limit": limit,
+        "p_active_since": active_since,
+        "p_user_ids": user_ids,
+    }
+    return _client().rpc("plan_state_page", params).execute().data or []
+
+
+def iter_plan_state_pages(
+    after: str | None = None,
+    before: str | None = None,
+    page_size: int = PAGE_SIZE,
+    active_since: str | None = None,
+) -> Iterator[list[dict]]:
+    """Every (active) student's states between `after` and `before`, one page at a time."""
+    while True:
+        rows = fetch_plan_state_page(after, before, page_size, active_since)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]["user_id"]
+
+
+@metrics.instrument
+def save_session_plans(plans: list[dict], chunk_size: int = PLAN_CHUNK_SIZE) -> int:
+    """Upsert session_plan rows, in chunks of `chunk_size`. Returns rows written."""
+    db = _client()
+    for i in range(0, len(plans), chunk_size):
+        db.table("session_plan").upsert(plans[i : i + chunk_size], on_conflict="user_id").execute()
+    return len(plans)
@@ -0,0 +1,266 @@
+"""Near-duplicate verse texts, found with MinHash signatures and LSH.
+
+A verse's shingles are the overlapping SHINGLE-character windows of its
+normalized text (its `lib.textindex` terms joined by single spaces), so
+case and punctuation never matter and a changed word only touches the
+windows across it. The similarity of two verses is the Jaccard index of
+their shingle sets.
+
+One `MinHashIndex` covers the texts of a single translation (`lib.catalog`
+keeps it next to the `TextIndex`, built on first use and patched on the
+editor's writes). Each text gets a MinHash signature of PERMUTATIONS
+values, cut into BANDS bands of ROWS values, and texts that agree on a
+whole band share a bucket. Texts sharing any bucket are candidates, and
+candidates are scored exactly, so the LSH only decides what gets
+compared: with 32 × 4, a pair at similarity 0.7 is a candidate with
+probability 0.9999, one at 0.3 with probability 0.23. Candidates whose
+signatures agree far less often than the threshold asks are dropped
+before scoring.
+
+Run:
+    cd editor
+    python -m lib.dedup NIV                          # catalog-wide duplicate report
+    python -m lib.dedup NIV --threshold 0.6 --csv dups.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+from lib.textindex import tokenize
+
+SHINGLE = 5  # characters per shingle
+BANDS = 32
+ROWS = 4  # signature values per band
+PERMUTATIONS = BANDS * ROWS
+THRESHOLD = 0.7  # default similarity for calling two verses near-duplicates
+# Candidates whose signatures estimate a similarity this far under the
+# threshold aren't scored exactly (about 5 standard errors at 128 values).
+SLACK = 0.2
+
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 1 << 63, PERMUTATIONS, dtype=np.uint64) | np.uint64(1)  # odd multipliers
+_B = _rng.integers(0, 1 << 63, PERMUTATIONS, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 1 << 63, ROWS, dtype=np.uint64) | np.uint64(1)
+_POW = np.uint64(0x100000001B3) ** np.arange(SHINGLE - 1, -1, -1, dtype=np.uint64)  # window hash weights
+_EMPTY = np.uint32(0xFFFFFFFF)  # signature of a text without shingles
+_BLOCK = 512  # texts hashed together; keeps each permutation's pass in cache
+
+
+def normalize(text: str) -> str:
+    """Case-folded words of `text` joined by single spaces ("Jesus wept." → "jesus wept")."""
+    return " ".join(tokenize(text))
+
+
+@lru_cache(maxsize=8192)
+def shingles(text: str) -> frozenset[str]:
+    norm = normalize(text)
+    if not norm:
+        return frozenset()
+    norm = norm.ljust(SHINGLE)
+    return frozenset(norm[i : i + SHINGLE] for i in range(len(norm) - SHINGLE + 1))
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard index of the two texts' shingle sets (0 when either has none)."""
+    sa, sb = shingles(a), shingles(b)
+    if not sa or not sb:
+        return 0.0
+    common = len(sa & sb)
+    return common / (len(sa) + len(sb) - common)
+
+
+# ── Signatures ────────────────────────────────────────────────────────────────
+
+def signatures(texts: Iterable[str]) -> np.ndarray:
+    """
+    MinHash signatures, one uint32 row of PERMUTATIONS values per text.
+
+    Texts are hashed _BLOCK at a time: each block's texts are laid end to
+    end as code points and every window that stays within one text gets
+    a polynomial hash. Each permutation (a·h + b, top 32 bits of 64) is
+    then applied to all of the block's windows at once and reduced per text.
+    """
+    texts = list(texts)
+    if len(texts) <= _BLOCK:
+        return _signatures(texts)
+    return np.concatenate([_signatures(texts[i : i + _BLOCK]) for i in range(0, len(texts), _BLOCK)])
+
+
+def _signatures(texts: list[str]) -> np.ndarray:
+    norms = [normalize(t) for t in texts]
+    sig = np.full((len(norms), PERMUTATIONS), _EMPTY, dtype=np.uint32)
+    live = [i for i, n in enumerate(norms) if n]
+    if not live:
+        return sig
+    padded = [norms[i].ljust(SHINGLE) for i in live]
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    windows = np.lib.stride_tricks.sliding_window_view(codes, SHINGLE)
+    with np.errstate(over="ignore"):
+        hashes = windows @ _POW
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    # Keep the windows that start at least SHINGLE - 1 before their text's end.
+    keep = np.ones(len(hashes), dtype=bool)
+    for k in range(1, SHINGLE):
+        cut = ends - k
+        keep[cut[cut < len(hashes)]] = False
+    hashes = hashes[keep]
+    hashes = (hashes >> np.uint64(32)) ^ (hashes & np.uint64(0xFFFFFFFF))
+    offsets = starts - np.arange(len(live)) * (SHINGLE - 1)  # window index of each text's first window
+
+    out = np.empty((len(live), PERMUTATIONS), dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for p in range(PERMUTATIONS):
+            out[:, p] = np.minimum.reduceat((hashes * _A[p] + _B[p]) >> np.uint64(32), offsets)
+    sig[live] = out
+    return sig
+
+
+def band_keys(sig: np.ndarray) -> np.ndarray:
+    """One uint64 bucket key per band: (len(sig), BANDS)."""
+    bands = sig.reshape(len(sig), BANDS, ROWS).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        return (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64)
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class MinHashIndex:
+    """
+    LSH buckets over a list of texts, addressed by list position.
+
+    `texts` is held by reference and only read to score candidates, so the
+    owner updates it and then calls `update` for the row.
+    """
+
+    def __init__(self, texts: list[str]) -> None:
+        self.texts = texts
+        self.sig = signatures(texts)
+        self.keys = band_keys(self.sig)
+        self.live = (self.sig != _EMPTY).any(axis=1)
+        self.buckets: list[dict[int, list[int]]] = [{} for _ in range(BANDS)]
+        for row in np.flatnonzero(self.live).tolist():
+            self._bucket(row)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _bucket(self, row: int) -> None:
+        for band, key in enumerate(self.keys[row].tolist()):
+            self.buckets[band].setdefault(key, []).append(row)
+
+    def _unbucket(self, row: int) -> None:
+        for band, key in enumerate(self.keys[row].tolist()):
+            rows = self.buckets[band].get(key)
+            if rows is not None and row in rows:
+                rows.remove(row)
+                if not rows:
+                    del self.buckets[band][key]
+
+    def update(self, row: int, text: str) -> None:
+        """Re-bucket one row after its text changed, or add it (row == len(self))."""
+        if row < len(self.keys):
+            if self.live[row]:
+                self._unbucket(row)
+        else:
+            grow = row + 1 - len(self.keys)
+            self.sig = np.vstack([self.sig, np.full((grow, PERMUTATIONS), _EMPTY, dtype=np.uint32)])
+            self.keys = np.vstack([self.keys, np.zeros((grow, BANDS), dtype=np.uint64)])
+            self.live = np.concatenate([self.live, np.zeros(grow, dtype=bool)])
+        self.sig[row] = signatures([text])[0]
+        self.keys[row] = band_keys(self.sig[row : row + 1])[0]
+        self.live[row] = bool((self.sig[row] != _EMPTY).any())
+        if self.live[row]:
+            self._bucket(row)
+
+    def similar(
+        self, texts: list[str], threshold: float = THRESHOLD, exclude: list[int | None] | None = None
+    ) -> list[list[tuple[int, float]]]:
+        """
+        For each of `texts`, the rows at least `threshold` similar, most similar first.
+
+        `exclude[i]` is a row never returned for `texts[i]` (the verse itself).
+        """
+        sig = signatures(texts)
+        keys = band_keys(sig)
+        out: list[list[tuple[int, float]]] = []
+        for i, (text, row_keys) in enumerate(zip(texts, keys.tolist())):
+            candidates: set[int] = set()
+            for band, key in enumerate(row_keys):
+                candidates.update(self.buckets[band].get(key, ()))
+            if exclude is not None:
+                candidates.discard(exclude[i])
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            rows = rows[(self.sig[rows] == sig[i]).mean(axis=1) >= threshold - SLACK]
+            scored = [(row, similarity(text, self.texts[row])) for row in rows.tolist()]
+            out.append(sorted(((r, s) for r, s in scored if s >= threshold), key=lambda rs: (-rs[1], rs[0])))
+        return out
+
+    def pairs(self, threshold: float = THRESHOLD) -> list[tuple[int, int, float]]:
+        """Every (row, row, similarity) with similarity ≥ `threshold`, most similar first; rows ascending within a pair."""
+        live = np.flatnonzero(self.live)
+        n = len(self.keys)
+        codes: list[np.ndarray] = []
+        for band in range(BANDS):
+            keys = self.keys[live, band]
+            order = np.argsort(keys, kind="stable")
+            rows, keys = live[order], keys[order]
+            same = np.flatnonzero(keys[1:] == keys[:-1])
+            if not len(same):
+                continue
+            # Runs of equal keys: every pair within a run is a candidate.
+            run_starts = same[np.r_[True, np.diff(same) > 1]]
+            run_ends = same[np.r_[np.diff(same) > 1, True]] + 2
+            for lo, hi in zip(run_starts.tolist(), run_ends.tolist()):
+                group = np.sort(rows[lo:hi])
+                a, b = np.triu_indices(len(group), 1)
+                codes.append(group[a] * n + group[b])
+        if not codes:
+            return []
+        a_rows, b_rows = np.divmod(np.unique(np.concatenate(codes)), n)
+        close = (self.sig[a_rows] == self.sig[b_rows]).mean(axis=1) >= threshold - SLACK
+        found = []
+        for a, b in zip(a_rows[close].tolist(), b_rows[close].tolist()):
+            score = similarity(self.texts[a], self.texts[b])
+            if score >= threshold:
+                found.append((a, b, score))
+        return sorted(found, key=lambda abs_: (-abs_[2], abs_[0], abs_[1]))
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Report near-duplicate verse texts in one translation.")
+    p.add_argument("translation")
+    p.add_argument("--threshold", type=float, default=THRESHOLD, help=f"minimum similarity (default {THRESHOLD})")
+    p.add_argument("--csv", help="write every pair to this file instead of listing them")
+    args = p.parse_args(argv)
+
+    from lib.catalog import get_catalog  # lib.catalog imports this module
+
+    catalog = get_catalog()
+    start = time.perf_counter()
+    pairs = catalog.duplicate_pairs(args.translation, args.threshold)
+    elapsed = time.perf_counter() - start
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, ["similarity", "reference_a", "reference_b", "text_a", "text_b", "verse_ref_id_a", "verse_ref_id_b"])
+            writer.writeheader()
+            writer.writerows({k: p[k] for k in writer.fieldnames} for p in pairs)
+    else:
+        for pair in pairs:
+            print(f"{pair['similarity']:.2f}  {pair['reference_a']}  ~  {pair['reference_b']}")
+            print(f"      {pair['text_a']}\n      {pair['text_b']}")
+    print(f"{len(pairs):,} pairs at similarity ≥ {args.threshold} in {elapsed:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Incremental recalculation of `question.difficulty`.
+
+Gives the same result as `update_question_difficulty()` in
+supabase/schema.sql, without rescanning the whole `attempt` table:
+
+* only each user's first 3 valid attempts per question count,
+* attempts answered in under 1500 ms are ignored,
+* difficulty = round((1 − (correct + 5) / (total + 8)) × 1000), a Beta(5, 3) prior.
+
+The job keeps a small SQLite state file holding a watermark (the last
+attempt read), a counter per (user, question) that stops at 3, and
+correct/total sums per question. Each run reads only attempts after the
+watermark, updates the counters, and writes back the difficulties that
+changed in batches through the `apply_question_difficulty` RPC. That RPC
+also re-syncs `verse_release.global_difficulty` for the affected verses.
+
+Run:
+    cd editor
+    python -m lib.difficulty             # process new attempts
+    python -m lib.difficulty --rebuild   # forget the state, start over
+    python -m lib.difficulty --rebuild --from-export exports/attempt
+                                         # start over from exported files;
+                                         # later runs continue from Postgres
+
+The SQL function recounts everything each night, so it also sees deleted
+attempts and hand-edited difficulties; the job only sees new attempts.
+Run --rebuild after deleting attempts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable
+
+from lib import attempt_export, db
+
+FIRST_N = 3  # attempts per (user, question) that count
+MIN_RESPONSE_MS = 1500  # faster answers are ignored
+PRIOR_CORRECT = 5
+PRIOR_WRONG = 3
+
+STATE_PATH = os.environ.get("DIFFICULTY_STATE", str(Path(__file__).parents[1] / "state" / "difficulty.sqlite"))
+
+# Attempts newer than this are left for the next run, so a transaction
+# that commits late with an older created_at isn't skipped.
+SETTLE_SECONDS = 300
+WRITE_BATCH = 500
+_LOOKUP_CHUNK = 500  # SQLite host parameters per query
+_FETCH_CHUNK = 100  # ids per `in.(...)` filter, as in lib.db
+
+
+def difficulty(correct: int, total: int) -> int:
+    """The SQL formula, with numeric's round-half-away-from-zero."""
+    value = (1 - Fraction(correct + PRIOR_CORRECT, total + PRIOR_CORRECT + PRIOR_WRONG)) * 1000
+    return int(value + Fraction(1, 2))  # value > 0, so floor(x + ½) rounds half up
+
+
+def is_valid(attempt: dict) -> bool:
+    ms = attempt.get("response_time_ms")
+    return ms is None or ms >= MIN_RESPONSE_MS
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+class State:
+    """The job's SQLite file: watermark, first-N counters, per-question sums."""
+
+    def __init__(self, path: str = STATE_PATH) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            pragma journal_mode = wal;
+            pragma synchronous = normal;  -- a crash may lose the last page, never corrupt the file
+            create table if not exists meta (key text primary key, value text);
+            create table if not exists pair (key blob primary key, n integer not null) without rowid;
+            create table if not exists question_stats (
+              question_id text primary key,
+              correct     integer not null,
+              total       integer not null,
+              dirty       integer not null    -- changed since last written back
+            );
+            create index if not exists idx_question_dirty on question_stats (dirty) where dirty = 1;
+            """
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def reset(self) -> None:
+        with self.conn:
+            self.conn.executescript("delete from meta; delete from pair; delete from question_stats;")
+
+    def watermark(self) -> db.AttemptCursor | None:
+        rows = dict(self.conn.execute("select key, value from meta where key in ('after_created_at', 'after_id')"))
+        if "after_created_at" not in rows:
+            return None
+        return rows["after_created_at"], rows["after_id"]
+
+    def pair_counts(self, keys: list[bytes]) -> dict[bytes, int]:
+        found: dict[bytes, int] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(self.conn.execute(f"select key, n from pair where key in ({marks})", chunk))
+        return found
+
+    def save_page(
+        self, pairs: dict[bytes, int], sums: dict[str, list[int]], watermark: db.AttemptCursor
+    ) -> None:
+        """Record one page of attempts atomically."""
+        with self.conn:
+            self.conn.executemany("insert or replace into pair (key, n) values (?, ?)", pairs.items())
+            self.conn.executemany(
+                """
+                insert into question_stats (question_id, correct, total, dirty) values (?, ?, ?, 1)
+                on conflict (question_id) do update set
+                  correct = correct + excluded.correct,
+                  total   = total + excluded.total,
+                  dirty   = 1
+                """,
+                [(q, c, t) for q, (c, t) in sums.items()],
+            )
+            self.conn.executemany(
+                "insert or replace into meta (key, value) values (?, ?)",
+                [("after_created_at", watermark[0]), ("after_id", watermark[1])],
+            )
+
+    def dirty(self) -> dict[str, int]:
+        """question_id → difficulty for every question not yet written back."""
+        rows = self.conn.execute("select question_id, correct, total from question_stats where dirty = 1")
+        return {q: difficulty(c, t) for q, c, t in rows}
+
+    def mark_written(self, question_ids: list[str]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "update question_stats set dirty = 0 where question_id = ?", [(q,) for q in question_ids]
+            )
+
+    def difficulties(self) -> dict[str, int]:
+        """Every question with at least one counted attempt (for comparisons)."""
+        rows = self.conn.execute("select question_id, correct, total from question_stats")
+        return {q: difficulty(c, t) for q, c, t in rows}
+
+
+def _pair_key(attempt: dict) -> bytes:
+    return bytes.fromhex((attempt["user_id"] + attempt["question_id"]).replace("-", ""))
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+# (after, before, page_size) → pages of attempts in (created_at, id) order.
+PageSource = Callable[[db.AttemptCursor | None, str | None, int], Iterable[list[dict]]]
+
+
+def ingest(
+    state: State, before: str | None = None, page_size: int = db.PAGE_SIZE, source: PageSource = db.iter_attempt_pages
+) -> dict[str, int]:
+    """Fold every attempt after the watermark (and before `before`) into `state`."""
+    pages = attempts = counted = 0
+    for rows in source(state.watermark(), before, page_size):
+        pages += 1
+        attempts += len(rows)
+        valid = [r for r in rows if is_valid(r)]
+        keys = [_pair_key(r) for r in valid]
+        seen = state.pair_counts(list(set(keys)))
+        changed: dict[bytes, int] = {}
+        sums: dict[str, list[int]] = {}
+        for r, key in zip(valid, keys):
+            n = changed.get(key, seen.get(key, 0))
+            if n >= FIRST_N:
+                continue
+            changed[key] = n + 1
+            s = sums.setdefault(r["question_id"], [0, 0])
+            s[0] += bool(r["is_correct"])
+            s[1] += 1
+            counted += 1
+        state.save_page(changed, sums, (rows[-1]["created_at"], rows[-1]["id"]))
+    return {"pages": pages, "attempts": attempts, "counted": counted}
+
+
+def write_back(state: State, batch: int = WRITE_BATCH) -> dict[str, int]:
+    """Write the difficulties that changed since the last write-back."""
+    pending = state.dirty()
+    ids = list(pending)
+    chunks = [ids[i : i + _FETCH_CHUNK] for i in range(0, len(ids), _FETCH_CHUNK)]
+    current: dict[str, float] = {}
+    for rows in db.gather(
+        *[lambda chunk=chunk: db.fetch_all("question", "id, difficulty", in_filter=("id", chunk)) for chunk in chunks]
+    ):
+        current.update((r["id"], float(r["difficulty"])) for r in rows)
+
+    changed = {q: d for q, d in pending.items() if q in current and current[q] != d}
+    unchanged = [q for q in ids if q not in changed]
+    written = 0
+    items = list(changed.items())
+    for i in range(0, len(items), batch):
+        part = dict(items[i : i + batch])
+        db.apply_question_difficulty(part)
+        state.mark_written(list(part))
+        written += len(part)
+    state.mark_written(unchanged)
+    return {"pending": len(pending), "written": written, "unchanged": len(unchanged)}
+
+
+def run(
+    state_path: str = STATE_PATH,
+    rebuild: bool = False,
+    settle_seconds: float = SETTLE_SECONDS,
+    source: PageSource = db.iter_attempt_pages,
+) -> dict[str, int]:
+    """One pass of the job: read new attempts, then write back changed difficulties."""
+    state = State(state_path)
+    try:
+        if rebuild:
+            state.reset()
+        before = db.to_timestamptz(datetime.now(timezone.utc) - timedelta(seconds=settle_seconds))
+        return {**ingest(state, before, source=source), **write_back(state)}
+    finally:
+        state.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Recalculate question.difficulty from new attempts.")
+    p.add_argument("--state", default=STATE_PATH, help="SQLite state file")
+    p.add_argument("--rebuild", action="store_true", help="forget the state and reprocess every attempt")
+    p.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="skip attempts newer than this (s)")
+    p.add_argument("--from-export", metavar="DIR", help="read attempts from lib.attempt_export files, not Postgres")
+    args = p.parse_args(argv)
+    source = db.iter_attempt_pages
+    if args.from_export:
+        source = partial(attempt_export.iter_pages, root=args.from_export)
+    print(run(args.state, args.rebuild, args.settle, source))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+"""Background, resumable verse imports.
+
+`submit` saves an import's verses in a local SQLite file and returns at
+once. A large upload is streamed in instead — `stage`, `add_verses` per
+chunk, then `queue` — so it is never held in memory whole. A worker
+thread in the editor process reads the verses back one stored chunk at
+a time, runs `db.import_verses` on them and saves a checkpoint after
+every import chunk: verses done, the next drip rank and the running
+totals. The Import dialog polls `get` for progress, so the editor stays
+usable while a job runs.
+
+A job whose process died stays 'running' at its last checkpoint. Any
+worker takes it over once its heartbeat is `LEASE_SECONDS` old and
+continues with the next chunk: the editor's worker, started on the next
+page load, or `python -m lib.import_jobs --work`. A chunk written but not
+yet checkpointed is written again. The upserts make that harmless, though
+its verses are then counted as updates.
+
+Run:
+    cd editor
+    python -m lib.import_jobs            # list recent jobs
+    python -m lib.import_jobs --work     # run queued and interrupted jobs here, then exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from lib import db, metrics
+
+JOBS_PATH = os.environ.get("IMPORT_JOBS", str(Path(__file__).parents[1] / "state" / "import_jobs.sqlite"))
+
+# A running job is taken over when its heartbeat (each checkpoint) is older.
+LEASE_SECONDS = 60
+
+# Staged jobs never queued are dropped after this long.
+STAGED_SECONDS = 24 * 3600
+
+_FINISHED = ("done", "failed", "cancelled")
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    id: str
+    status: str  # staged | queued | running | done | failed | cancelled
+    translation_id: str
+    total: int
+    done: int
+    new: int
+    updated: int
+    errors: list[str]
+    next_rank: int | None  # None until the job first runs
+    book_ids: list[int]
+    created_at: float
+    finished_at: float | None
+    message: str | None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+_COLUMNS = (
+    "id, status, translation_id, total, done, new, updated, errors, next_rank, book_ids, created_at, finished_at, message"
+)
+
+
+def _job(row: tuple) -> Job:
+    values = dict(zip(_COLUMNS.split(", "), row))
+    values["errors"] = json.loads(values["errors"])
+    values["book_ids"] = json.loads(values["book_ids"])
+    return Job(**values)
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class JobStore:
+    """Jobs and their verses in one SQLite file, shared by every worker on the machine."""
+
+    def __init__(self, path: str = JOBS_PATH) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(
+                """
+                pragma journal_mode = wal;
+                create table if not exists job (
+                  id             text primary key,
+                  status         text not null,
+                  translation_id text not null,
+                  total          integer not null default 0,
+                  done           integer not null default 0,  -- verses checkpointed
+                  new            integer not null default 0,
+                  updated        integer not null default 0,
+                  errors         text not null default '[]',
+                  next_rank      integer,
+                  book_ids       text not null default '[]',
+                  owner          text,
+                  heartbeat      real,
+                  created_at     real not null,
+                  finished_at    real,
+                  message        text
+                );
+                create index if not exists idx_job_status on job (status, created_at);
+                -- The verses, in the chunks they were added in.
+                create table if not exists job_verses (
+                  job_id text not null references job (id) on delete cascade,
+                  first  integer not null,  -- index of the chunk's first verse
+                  verses text not null,     -- JSON list, as passed to db.import_verses
+                  primary key (job_id, first)
+                );
+                """
+            )
+            # Staged imports whose dialog was closed without importing.
+            conn.execute("delete from job where status = 'staged' and created_at < ?", (time.time() - STAGED_SECONDS,))
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, so any thread may use the store.
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("pragma foreign_keys = on")
+        return conn
+
+    def submit(self, verses: list[dict], translation_id: str) -> Job:
+        job = self.stage(translation_id)
+        self.add_verses(job.id, verses)
+        self.queue(job.id)
+        return self.get(job.id)  # type: ignore[return-value]
+
+    def stage(self, translation_id: str) -> Job:
+        """A job to add verses to (`add_verses`) before it is queued (`queue`) or dropped (`discard`)."""
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "insert into job (id, status, translation_id, created_at) values (?, 'staged', ?, ?)",
+                (job_id, translation_id, time.time()),
+            )
+        return self.get(job_id)  # type: ignore[return-value]
+
+    def add_verses(self, job_id: str, verses: list[dict]) -> None:
+        """Append a chunk of verses to a staged job."""
+        if not verses:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("begin immediate")
+            total, book_ids = conn.execute(
+                "select total, book_ids from job where id = ? and status = 'staged'", (job_id,)
+            ).fetchone()
+            books = set(json.loads(book_ids)) | {v["book_id"] for v in verses if isinstance(v.get("book_id"), int)}
+            conn.execute(
+                "insert into job_verses (job_id, first, verses) values (?, ?, ?)", (job_id, total, json.dumps(verses))
+            )
+            conn.execute(
+                "update job set total = ?, book_ids = ? where id = ?",
+                (total + len(verses), json.dumps(sorted(books)), job_id),
+            )
+
+    def queue(self, job_id: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("update job set status = 'queued' where id = ? and status = 'staged'", (job_id,))
+
+    def discard(self, job_id: str) -> None:
+        """Drop a staged job and its verses."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("delete from job where id = ? and status = 'staged'", (job_id,))
+
+    def verses(self, job_id: str, start: int = 0) -> Iterator[tuple[int, list[dict]]]:
+        """(index of its first verse, verses) for each chunk holding verses from `start` on, one at a time."""
+        with closing(self._connect()) as conn:
+            (first,) = conn.execute(
+                "select coalesce(max(first), 0) from job_verses where job_id = ? and first <= ?", (job_id, start)
+            ).fetchone()
+        while True:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "select first, verses from job_verses where job_id = ? and first >= ? order by first limit 1",
+                    (job_id, first),
+                ).fetchone()
+            if row is None:
+                return
+            verses = json.loads(row[1])
+            yield row[0], verses
+            first = row[0] + len(verses)
+
+    def get(self, job_id: str) -> Job | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"select {_COLUMNS} from job where id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def recent(self, limit: int = 20) -> list[Job]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"select {_COLUMNS} from job order by created_at desc limit ?", (limit,)).fetchall()
+        return [_job(r) for r in rows]
+
+    def active(self) -> list[Job]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"select {_COLUMNS} from job where status in ('queued', 'running') order by created_at"
+            ).fetchall()
+        return [_job(r) for r in rows]
+
+    def finished_since(self, when: float) -> list[Job]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"select {_COLUMNS} from job where finished_at > ? order by finished_at", (when,)
+            ).fetchall()
+        return [_job(r) for r in rows]
+
+    def claim(self, owner: str) -> Job | None:
+        """Take the oldest queued job, or a running one whose worker stopped checkpointing."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("begin immediate")
+            row = conn.execute(
+                """
+                select id from job
+                where status = 'queued' or (status = 'running' and heartbeat < ?)
+                order by created_at limit 1
+                """,
+                (now - LEASE_SECONDS,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "update job set status = 'running', owner = ?, heartbeat = ? where id = ?", (owner, now, row[0])
+            )
+        return self.get(row[0])
+
+    def checkpoint(self, job_id: str, owner: str, **values) -> bool:
+        """Save progress; False if the job was cancelled or taken over."""
+        values = {k: json.dumps(v) if isinstance(v, list) else v for k, v in values.items()}
+        sets = ", ".join(f"{k} = ?" for k in values)
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                f"update job set {sets}, heartbeat = ? where id = ? and owner = ? and status = 'running'",
+                (*values.values(), time.time(), job_id, owner),
+            )
+        return cur.rowcount == 1
+
+    def finish(self, job_id: str, owner: str, status: str, message: str | None = None) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                update job set status = ?, message = ?, finished_at = ?, owner = null
+                where id = ? and owner = ? and status = 'running'
+                """,
+                (status, message, time.time(), job_id, owner),
+            )
+
+    def cancel(self, job_id: str) -> None:
+        """Stop a job after its current chunk (chunks already written stay)."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                update job set status = 'cancelled', finished_at = ?, owner = null
+                where id = ? and status in ('queued', 'running')
+                """,
+                (time.time(), job_id),
+            )
+
+    def retry(self, job_id: str) -> None:
+        """Queue a failed or cancelled job again; it continues from its last checkpoint."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                update job set status = 'queued', finished_at = null, message = null
+                where id = ? and status in ('failed', 'cancelled')
+                """,
+                (job_id,),
+            )
+
+
+# ── Running ───────────────────────────────────────────────────────────────────
+
+class _Stopped(Exception):
+    """The job was cancelled or taken over between chunks."""
+
+
+def run(store: JobStore, job: Job, owner: str) -> Job:
+    """Import a claimed job's remaining verses, checkpointing after every chunk."""
+    try:
+        if job.next_rank is None:
+            job.next_rank = db.get_max_rank() + 1
+            if not store.checkpoint(job.id, owner, next_rank=job.next_rank):
+                raise _Stopped
+        state = {"done": job.done, "next_rank": job.next_rank, "new": job.new, "updated": job.updated, "errors": job.errors}
+
+        # Its own connection pool, so the editor's reads don't queue behind the upserts.
+        with db.dedicated_client(), metrics.scope("import", verses=job.total - job.done, job=job.id):
+            for first, verses in store.verses(job.id, job.done):
+                before = dict(state)
+
+                def on_chunk(cp: dict) -> None:
+                    state.update(
+                        done=first + cp["done"],
+                        next_rank=cp["next_rank"],
+                        new=before["new"] + cp["new"],
+                        updated=before["updated"] + cp["updated"],
+                        errors=before["errors"] + cp["errors"],
+                    )
+                    if not store.checkpoint(job.id, owner, **state):
+                        raise _Stopped
+
+                db.import_verses(
+                    verses, before["next_rank"], start=before["done"] - first, offset=first, on_chunk=on_chunk
+                )
+    except _Stopped:
+        pass
+    except Exception as exc:
+        store.finish(job.id, owner, "failed", str(exc))
+    else:
+        store.finish(job.id, owner, "done")
+    return store.get(job.id)  # type: ignore[return-value]
+
+
+def work(store: JobStore, owner: str | None = None) -> list[Job]:
+    """Run jobs until none is waiting; return them as they ended."""
+    owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    ran = []
+    while (claimed := store.claim(owner)) is not None:
+        ran.append(run(store, claimed, owner))
+    return ran
+
+
+# ── Editor worker ─────────────────────────────────────────────────────────────
+# One daemon thread per process (per store path) runs jobs in the background.
+
+_workers: dict[str, tuple[threading.Thread, threading.Event]] = {}
+_workers_lock = threading.Lock()
+_taken_until = time.time()  # see take_finished
+_worker_errors: dict[str, str] = {}  # store path → why its worker last failed
+
+
+def _worker_loop(store: JobStore, wake: threading.Event) -> None:
+    while True:
+        wake.clear()
+        try:
+            work(store)
+        except sqlite3.Error as exc:
+            # The store was unreadable (locked, disk full); try again on the next wake-up.
+            _log.warning("import jobs at %s unreadable: %s", store.path, exc)
+            _worker_errors[store.path] = f"Import job store unreadable: {exc}"
+        except Exception as exc:
+            # A bug, not a passing condition: stop here rather than retry it
+            # every lease. ensure_worker starts a new worker on the next page load.
+            _log.exception("import worker for %s stopped", store.path)
+            _worker_errors[store.path] = f"Import worker stopped: {exc!r}"
+            return
+        else:
+            _worker_errors.pop(store.path, None)
+        # Woken by submit; otherwise look for abandoned jobs once a lease.
+        wake.wait(LEASE_SECONDS)
+
+
+def worker_error(path: str = JOBS_PATH) -> str | None:
+    """Why this process's worker for `path` last failed, or None if its last pass went through."""
+    return _worker_errors.get(path)
+
+
+@lru_cache(maxsize=None)
+def get_store(path: str = JOBS_PATH) -> JobStore:
+    return JobStore(path)
+
+
+def ensure_worker(path: str = JOBS_PATH) -> threading.Event:
+    """Start this process's worker for `path` if it isn't running; return its wake-up event."""
+    with _workers_lock:
+        entry = _workers.get(path)
+        if entry is None or not entry[0].is_alive():
+            wake = threading.Event()
+            # A fresh context: the worker's requests don't belong to the
+            # lib.metrics scope of whichever rerun started it.
+            thread = threading.Thread(target=_worker_loop, args=(get_store(path), wake), name="import-jobs", daemon=True)
+            thread.start()
+            entry = _workers[path] = (thread, wake)
+        return entry[1]
+
+
+def submit(verses: list[dict], translation_id: str, path: str = JOBS_PATH) -> Job:
+    """Queue an import and wake this process's worker."""
+    job = get_store(path).submit(verses, translation_id)
+    ensure_worker(path).set()
+    return job
+
+
+def take_finished(path: str = JOBS_PATH) -> list[Job]:
+    """Jobs that ended (in any worker) since the last call in this process, to refresh caches once."""
+    global _taken_until
+    with _workers_lock:
+        jobs = get_store(path).finished_since(_taken_until)
+        if jobs:
+            _taken_until = max(j.finished_at or 0.0 for j in jobs)
+    return jobs
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="List or run background verse imports.")
+    p.add_argument("--work", action="store_true", help="run queued and interrupted jobs, then exit")
+    p.add_argument("--path", default=JOBS_PATH, help="job database")
+    args = p.parse_args(argv)
+
+    jobs = get_store(args.path)
+    for job in work(jobs) if args.work else jobs.recent():
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(job.created_at))
+        print(
+            f"{job.id[:8]}  {when}  {job.status:<9} {job.translation_id:<5} {job.done:>6}/{job.total:<6} "
+            f"new {job.new:<5} updated {job.updated:<5} errors {len(job.errors)}"
+            + (f"  {job.message}" if job.message else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
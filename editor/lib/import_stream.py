@@ -0,0 +1,383 @@
+"""Read verse import files incrementally.
+
+Accepts the Import dialog's format, `{"translation": …, "verses": […]}`
+(or a bare list of verses), and NDJSON — one verse object per line,
+optionally preceded by a `{"translation": "KJV"}` header line. The input
+is read `CHUNK_CHARS` at a time and each verse is decoded on its own, so
+memory stays proportional to one chunk of verses, not the file.
+
+Every verse is checked against the example in `JSON_SCHEMA`
+(lib.prompts): the same fields with the same types, plus ranges. A bad
+verse is skipped and reported with its line, column and character
+offset; broken JSON syntax ends the read with a `ParseError` at the
+same kind of position (NDJSON just skips the broken line).
+
+    reader = VerseReader(open("genesis.ndjson", "rb"))
+    for chunk in reader.chunks(1000):
+        ...
+    reader.errors   # [VerseError(...), ...]
+
+Run:
+    cd editor
+    python -m lib.import_stream verses.json        # count and list problems
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import IO, Any, Iterator
+
+from lib.prompts import JSON_SCHEMA
+
+CHUNK_CHARS = 1 << 16
+MAX_VALUE_CHARS = 1 << 20  # one verse (or NDJSON line) larger than this is an error
+MAX_ERRORS = 1000  # kept; the rest are only counted
+
+# Field → type, from the verse in JSON_SCHEMA.
+FIELDS: dict[str, type] = {k: type(v) for k, v in json.loads(JSON_SCHEMA)["verses"][0].items()}
+OPTIONAL = frozenset({"blanks"})  # preview_import suggests missing blanks
+_TYPE_NAMES = {int: "integer", str: "string", list: "list"}
+
+_WS = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class ParseError(ValueError):
+    """The input isn't valid JSON (or NDJSON) from this point on."""
+
+    def __init__(self, message: str, line: int, column: int, offset: int) -> None:
+        super().__init__(f"line {line}, column {column} (char {offset}): {message}")
+        self.line, self.column, self.offset = line, column, offset
+
+
+@dataclass
+class VerseError:
+    index: int  # 1-based position of the verse in the file
+    line: int
+    column: int
+    offset: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Verse {self.index} (line {self.line}, column {self.column}): {self.message}"
+
+
+def validate(verse: Any, book_ids: set[int] | None = None) -> str | None:
+    """Why `verse` doesn't match JSON_SCHEMA's verse, or None if it does."""
+    if not isinstance(verse, dict):
+        return f"expected an object, got {type(verse).__name__}"
+    for name, kind in FIELDS.items():
+        if name not in verse:
+            if name in OPTIONAL:
+                continue
+            return f'missing "{name}"'
+        value = verse[name]
+        if kind is int and (isinstance(value, bool) or not isinstance(value, int)):
+            return f'"{name}" must be an integer'
+        if not isinstance(value, kind):
+            return f'"{name}" must be a {_TYPE_NAMES[kind]}'
+    if book_ids is not None and verse["book_id"] not in book_ids:
+        return f"unknown book_id {verse['book_id']}"
+    if verse["chapter"] < 1 or verse["verse"] < 1:
+        return "chapter and verse start at 1"
+    if not verse["text"].strip():
+        return '"text" is empty'
+    if any(isinstance(i, bool) or not isinstance(i, int) for i in verse.get("blanks", [])):
+        return '"blanks" must be a list of word indices'
+    return None
+
+
+# ── Scanner ───────────────────────────────────────────────────────────────────
+
+class _Scanner:
+    """A sliding window over a text stream that decodes one JSON value at a time."""
+
+    def __init__(self, source: IO, chunk_chars: int) -> None:
+        self._read = source.read
+        self._chunk = chunk_chars
+        # Binary input is decoded incrementally, so a character may span two
+        # reads; utf-8-sig drops a byte-order mark.
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # characters dropped before buf[0]
+        self.line = 1  # of buf[pos]
+        self.line_start = 0  # offset of that line's first character
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; False at the end of the input."""
+        while not self.eof:
+            raw = self._read(self._chunk)
+            data = self._utf8.decode(raw, final=not raw) if isinstance(raw, bytes) else raw
+            if data:
+                break
+            self.eof = not raw
+        else:
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.base += self.pos
+        self.pos = 0
+        return True
+
+    def advance(self, to: int) -> None:
+        newlines = self.buf.count("\n", self.pos, to)
+        if newlines:
+            self.line += newlines
+            self.line_start = self.base + self.buf.rindex("\n", self.pos, to) + 1
+        self.pos = to
+
+    def where(self, i: int | None = None) -> tuple[int, int, int]:
+        """(line, column, offset) of buf[i] (default: the current position), 1-based line and column."""
+        i = self.pos if i is None else i
+        line, line_start = self.line, self.line_start
+        newlines = self.buf.count("\n", self.pos, i)
+        if newlines:
+            line += newlines
+            line_start = self.base + self.buf.rindex("\n", self.pos, i) + 1
+        offset = self.base + i
+        return line, offset - line_start + 1, offset
+
+    def error(self, message: str, i: int | None = None) -> ParseError:
+        return ParseError(message, *self.where(i))
+
+    def peek(self) -> str:
+        """The next non-whitespace character ("" at the end), without consuming it."""
+        while True:
+            self.advance(_WS.match(self.buf, self.pos).end())
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str, what: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"expected {what}")
+        self.advance(self.pos + 1)
+
+    def value(self) -> Any:
+        """Decode the JSON value at the current position, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                if self._more():
+                    continue
+                raise self.error(exc.msg, exc.pos) from None
+            # A number or literal may continue in the next chunk.
+            if end == len(self.buf) and self._more():
+                continue
+            self.advance(end)
+            return value
+
+    def line_text(self) -> tuple[str, bool]:
+        """The rest of the current line and whether one was read (False at the end)."""
+        while True:
+            nl = self.buf.find("\n", self.pos)
+            if nl >= 0:
+                text = self.buf[self.pos : nl]
+                self.advance(nl + 1)
+                return text, True
+            if not self._more():
+                text = self.buf[self.pos :]
+                self.advance(len(self.buf))
+                return text, bool(text)
+
+    def _more(self) -> bool:
+        if len(self.buf) - self.pos > MAX_VALUE_CHARS:
+            raise self.error(f"value longer than {MAX_VALUE_CHARS:,} characters")
+        return self.fill()
+
+    def head(self, limit: int) -> str:
+        """Up to `limit` characters from the current position, reading ahead without consuming."""
+        while len(self.buf) - self.pos < limit and self.buf.find("\n", self.pos) < 0 and self.fill():
+            pass
+        return self.buf[self.pos : self.pos + limit]
+
+
+# ── Reader ────────────────────────────────────────────────────────────────────
+
+class VerseReader:
+    """Valid verses from a JSON or NDJSON import file, one at a time."""
+
+    def __init__(
+        self,
+        source: IO,
+        translation: str = "NIV",
+        book_ids: set[int] | None = None,
+        ndjson: bool | None = None,  # None: detect
+        chunk_chars: int = CHUNK_CHARS,
+    ) -> None:
+        self.translation = translation
+        self.book_ids = book_ids
+        self.ndjson = ndjson
+        self.count = 0  # verses read, valid or not
+        self.valid = 0
+        self.errors: list[VerseError] = []
+        self.error_count = 0
+        self._scan = _Scanner(source, chunk_chars)
+        self._translation_given = False
+
+    def __iter__(self) -> Iterator[dict]:
+        s = self._scan
+        first = s.peek()
+        if first == "":
+            raise s.error("no verses: the input is empty")
+        if self.ndjson is None:
+            self.ndjson = first == "{" and self._looks_like_ndjson()
+        if self.ndjson:
+            yield from self._ndjson()
+            return
+        if first == "[":
+            yield from self._array()
+        elif first == "{":
+            yield from self._object()
+        else:
+            raise s.error("expected a JSON object or list of verses")
+        if s.peek() != "":
+            raise s.error("unexpected data after the JSON value")
+
+    def chunks(self, size: int) -> Iterator[list[dict]]:
+        chunk: list[dict] = []
+        for verse in self:
+            chunk.append(verse)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _looks_like_ndjson(self) -> bool:
+        # A first line that is a complete object, other than the
+        # {"translation", "verses"} wrapper, starts an NDJSON file.
+        head = self._scan.head(MAX_VALUE_CHARS)
+        first_line = head.split("\n", 1)[0]
+        try:
+            obj = json.loads(first_line)
+        except json.JSONDecodeError:
+            return False
+        return isinstance(obj, dict) and "verses" not in obj
+
+    def _verse(self, value: Any, where: tuple[int, int, int]) -> dict | None:
+        self.count += 1
+        problem = validate(value, self.book_ids)
+        if problem is not None:
+            self._error(where, problem)
+            return None
+        self.valid += 1
+        # Only the schema's fields are kept; anything else the LLM added is dropped.
+        return {k: value[k] for k in FIELDS if k in value}
+
+    def _error(self, where: tuple[int, int, int], message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(VerseError(self.count, *where, message))
+
+    def _set_translation(self, value: Any) -> None:
+        if not isinstance(value, str) or not value.strip():
+            raise self._scan.error('"translation" must be a non-empty string')
+        if self.count and value != self.translation:
+            raise self._scan.error(f'"translation" must come before the verses ({self.count} read as {self.translation})')
+        self.translation = value
+        self._translation_given = True
+
+    def _array(self) -> Iterator[dict]:
+        s = self._scan
+        s.expect("[", '"["')
+        if s.peek() == "]":
+            s.advance(s.pos + 1)
+            return
+        while True:
+            s.peek()
+            where = s.where()
+            verse = self._verse(s.value(), where)
+            if verse is not None:
+                yield verse
+            c = s.peek()
+            if c not in (",", "]"):
+                raise s.error('expected "," or "]" after a verse')
+            s.advance(s.pos + 1)
+            if c == "]":
+                return
+
+    def _object(self) -> Iterator[dict]:
+        s = self._scan
+        s.expect("{", '"{"')
+        has_verses = False
+        if s.peek() != "}":
+            while True:
+                if s.peek() != '"':
+                    raise s.error("expected a key")
+                key = s.value()
+                s.expect(":", '":"')
+                if key == "verses":
+                    if s.peek() != "[":
+                        raise s.error('"verses" must be a list')
+                    has_verses = True
+                    yield from self._array()
+                elif key == "translation":
+                    self._set_translation(s.value())
+                else:
+                    s.value()  # ignored
+                c = s.peek()
+                if c == "}":
+                    break
+                if c != ",":
+                    raise s.error('expected "," or "}"')
+                s.advance(s.pos + 1)
+        s.advance(s.pos + 1)
+        if not has_verses:
+            raise s.error("JSON must contain a 'verses' array.")
+
+    def _ndjson(self) -> Iterator[dict]:
+        s = self._scan
+        while True:
+            where = s.where()
+            text, more = s.line_text()
+            if not more:
+                return
+            if not text.strip():
+                continue
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError as exc:
+                self.count += 1
+                self._error((where[0], exc.colno, where[2] + exc.pos), f"invalid JSON: {exc.msg}")
+                continue
+            if (
+                isinstance(value, dict) and not self.count and not self._translation_given
+                and "translation" in value and "text" not in value
+            ):
+                self._set_translation(value["translation"])  # header line
+                continue
+            verse = self._verse(value, where)
+            if verse is not None:
+                yield verse
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Check a JSON or NDJSON verse import file.")
+    p.add_argument("file")
+    p.add_argument("--ndjson", action="store_true", default=None, help="don't detect the format")
+    args = p.parse_args(argv)
+
+    with open(args.file, "rb") as f:
+        reader = VerseReader(f, ndjson=args.ndjson)
+        try:
+            for _ in reader:
+                pass
+        except ParseError as exc:
+            print(f"stopped at {exc}")
+    kind = "NDJSON" if reader.ndjson else "JSON"
+    print(f"{kind}, translation {reader.translation}: {reader.valid:,} valid verses, {reader.error_count:,} with problems")
+    for err in reader.errors[:50]:
+        print(f"  {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Load whole translations into `verse_text` from local files.
+
+Supported sources:
+
+* OSIS XML — one file per translation (or per book), container or
+  milestone `<verse>` elements; notes and non-canonical titles are dropped.
+* USFM — one file per book (`\\id GEN …`), a directory or a list of files.
+* JSON — a list (or `{"verses": [...]}`) of objects with `book_id` or a
+  `book` code, `chapter`, `verse` and `text`: the editor's import format,
+  and `BibleVerse` from app/lib/bible/types.ts (`bookApiId`).
+
+Books are identified by `book.abbr` (OSIS ids such as "Gen"),
+`book.api_bible_id` (USFM codes such as "GEN") or `book.name`.
+
+OSIS and USFM books are parsed in parallel worker processes, one task per
+book. All verse_ref ids are then resolved in a few bulk reads (missing
+refs are created), and `verse_text.content_hash` (md5, generated by
+Postgres) is compared with the parsed text so only new or changed verses
+are written, in upserts of `db.TEXT_CHUNK_SIZE` rows.
+
+Run:
+    cd editor
+    python -m lib.ingest KJV kjv.osis.xml
+    python -m lib.ingest WEB usfm/ --name "World English Bible" --license public_domain
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from lib import db
+
+WORKERS = min(8, os.cpu_count() or 1)
+
+# book code (lower-case abbr / api_bible_id / name) → book_id
+BookCodes = dict[str, int]
+# (book_id, chapter, verse, text)
+Verse = tuple[int, int, int, str]
+
+_SPACE = re.compile(r"\s+")
+
+
+def clean(text: str) -> str:
+    """Plain verse text: entities decoded, whitespace collapsed."""
+    return _SPACE.sub(" ", html.unescape(text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """Same value as `verse_text.content_hash` (md5(text) in Postgres)."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def book_codes(books: list[dict]) -> BookCodes:
+    codes: BookCodes = {}
+    for b in books:
+        for code in (b.get("abbr"), b.get("api_bible_id"), b.get("name")):
+            if code:
+                codes[code.lower()] = b["id"]
+    return codes
+
+
+# ── OSIS ──────────────────────────────────────────────────────────────────────
+
+_OSIS_TOKEN = re.compile(r"<([/!?]?)([\w:.-]*)([^>]*?)(/?)>|([^<]+)", re.S)
+_OSIS_BOOK = re.compile(rb"<div\b[^>]*\btype=\"book\"[^>]*>")
+_ATTR = re.compile(r"""([\w:]+)\s*=\s*("[^"]*"|'[^']*')""")
+_SKIP = {"note", "title"}  # dropped with their content, except canonical titles inside a verse
+
+
+def _attrs(text: str) -> dict[str, str]:
+    return {k: v[1:-1] for k, v in _ATTR.findall(text)}
+
+
+def parse_osis(xml: str, codes: BookCodes) -> list[Verse]:
+    """Every verse in an OSIS document or fragment, in document order."""
+    verses: list[Verse] = []
+    current: tuple[int, int, int] | None = None
+    parts: list[str] = []
+    skip = 0
+
+    def flush() -> None:
+        if current is not None:
+            text = clean("".join(parts))
+            if text:
+                verses.append((*current, text))
+
+    for m in _OSIS_TOKEN.finditer(xml):
+        kind, tag, attrs, empty, text = m.groups()
+        if text is not None:
+            if current is not None and not skip:
+                parts.append(text)
+            continue
+        if kind in ("!", "?"):
+            continue
+        name = tag.rsplit(":", 1)[-1]
+        if name in _SKIP:
+            if kind == "/":
+                skip = max(0, skip - 1)
+            elif not empty and not (name == "title" and _attrs(attrs).get("canonical") == "true"):
+                skip += 1
+            continue
+        if name == "verse":
+            a = _attrs(attrs)
+            if kind == "/" or "eID" in a:
+                flush()
+                current, parts = None, []
+            elif "osisID" in a:
+                flush()
+                # "Gen.1.1 Gen.1.2" (merged verses): the text goes to the first.
+                book, chapter, verse = a["osisID"].split()[0].split(".")[:3]
+                book_id = codes.get(book.lower())
+                num = re.match(r"\d+", verse)
+                current = (book_id, int(chapter), int(num.group())) if book_id and num else None
+                parts = []
+        elif name in ("lb", "l", "p", "lg") and current is not None:
+            parts.append(" ")
+    flush()
+    return verses
+
+
+def osis_tasks(path: Path) -> list[tuple[str, Path, int, int]]:
+    """One ("osis", path, start, end) byte range per book `<div>` (the whole file if none)."""
+    data = path.read_bytes()
+    starts = [m.start() for m in _OSIS_BOOK.finditer(data)]
+    if not starts:
+        return [("osis", path, 0, len(data))]
+    ends = [*starts[1:], len(data)]
+    return [("osis", path, s, e) for s, e in zip(starts, ends)]
+
+
+# ── USFM ──────────────────────────────────────────────────────────────────────
+
+_USFM_NOTE = re.compile(r"\\(f|fe|x|ef|ex)\s.*?\\\1\*", re.S)
+_USFM_ATTRS = re.compile(r"\|[^\\]*(?=\\\+?\w+\*)")
+# An opening marker swallows the one space after it; a closing marker (\add*) doesn't.
+_USFM_MARKER = re.compile(r"\\(\+?[a-z]+\d*)(?:(\*)|\s?)")
+# Paragraph-level markers whose line is not verse text.
+_USFM_SKIP_LINE = {
+    "id", "ide", "h", "toc", "toc1", "toc2", "toc3", "mt", "mt1", "mt2", "mt3", "mt4", "ms", "ms1", "ms2",
+    "mr", "s", "s1", "s2", "s3", "s4", "sr", "r", "sp", "d", "rem", "sts", "cl", "cd", "imt", "is", "ip",
+}
+
+
+def parse_usfm(text: str, codes: BookCodes) -> list[Verse]:
+    """Every verse of a USFM book."""
+    text = _USFM_ATTRS.sub("", _USFM_NOTE.sub("", text))
+    verses: list[Verse] = []
+    book_id: int | None = None
+    chapter = 0
+    current: int | None = None
+    parts: list[str] = []
+
+    def flush() -> None:
+        if book_id is not None and current is not None:
+            body = clean("".join(parts))
+            if body:
+                verses.append((book_id, chapter, current, body))
+
+    for line in text.splitlines():
+        first = _USFM_MARKER.match(line.lstrip())
+        if first and first.group(1) in _USFM_SKIP_LINE:
+            if first.group(1) == "id":
+                code = line.lstrip()[first.end() :].split(maxsplit=1)
+                book_id = codes.get(code[0].lower()) if code else None
+            continue
+        pos = 0
+        for m in _USFM_MARKER.finditer(line):
+            if current is not None:
+                parts.append(line[pos : m.start()])
+            pos = m.end()
+            marker = m.group(1)
+            if marker in ("c", "v"):
+                num_m = re.match(r"(\d+)\S*\s?", line[pos:])
+                if not num_m:
+                    continue
+                pos += num_m.end()
+                flush()
+                parts = []
+                if marker == "c":
+                    chapter, current = int(num_m.group(1)), None
+                else:
+                    current = int(num_m.group(1))  # "1-2" (merged verses): the text goes to the first
+        if current is not None:
+            parts.append(line[pos:] + " ")
+    flush()
+    return verses
+
+
+# ── JSON ──────────────────────────────────────────────────────────────────────
+
+def parse_json(text: str, codes: BookCodes) -> list[Verse]:
+    data = json.loads(text)
+    rows = data.get("verses", []) if isinstance(data, dict) else data
+    verses: list[Verse] = []
+    for r in rows:
+        book = str(r.get("book_id") or r.get("book") or r.get("bookApiId"))
+        book_id = int(book) if book.isdigit() else codes.get(book.lower())
+        if book_id and r.get("text"):
+            verses.append((book_id, int(r["chapter"]), int(r["verse"]), clean(r["text"])))
+    return verses
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+_PARSERS = {".xml": "osis", ".osis": "osis", ".usfm": "usfm", ".sfm": "usfm", ".json": "json"}
+
+
+def _tasks(paths: list[Path]) -> list[tuple[str, Path, int, int]]:
+    tasks = []
+    for path in paths:
+        if path.is_dir():
+            tasks += _tasks(sorted(p for p in path.iterdir() if p.suffix.lower() in _PARSERS))
+            continue
+        kind = _PARSERS.get(path.suffix.lower())
+        if kind is None:
+            raise ValueError(f"{path}: unknown format (expected {', '.join(_PARSERS)})")
+        tasks += osis_tasks(path) if kind == "osis" else [(kind, path, 0, -1)]
+    return tasks
+
+
+def _parse_task(task: tuple[str, Path, int, int], codes: BookCodes) -> list[Verse]:
+    kind, path, start, end = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start if end >= 0 else -1).decode("utf-8-sig")
+    return {"osis": parse_osis, "usfm": parse_usfm, "json": parse_json}[kind](text, codes)
+
+
+def parse_files(paths: list[Path], codes: BookCodes, workers: int = WORKERS) -> list[Verse]:
+    """Parse every source, one book (or file) per task, in `workers` processes."""
+    tasks = _tasks(paths)
+    if workers <= 1 or len(tasks) <= 1:
+        return [v for t in tasks for v in _parse_task(t, codes)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_parse_task, tasks, [codes] * len(tasks), chunksize=max(1, len(tasks) // (workers * 4)))
+        return [v for r in results for v in r]
+
+
+@dataclass
+class Result:
+    verses: int
+    new: int  # no text yet in this translation
+    changed: int
+    unchanged: int
+    written: int
+    duplicates: int  # repeated (book, chapter, verse) in the sources; the first copy wins
+    seconds: dict[str, float]
+
+
+def ingest(
+    translation_id: str, paths: list[Path], workers: int = WORKERS, dry_run: bool = False
+) -> Result:
+    """Parse `paths` and upsert the new or changed verses of `translation_id`."""
+    if not dry_run and db.get_translation(translation_id) is None:
+        raise ValueError(f"translation {translation_id!r} does not exist (pass --name to create it)")
+    seconds: dict[str, float] = {}
+    start = time.perf_counter()
+
+    verses = parse_files(paths, book_codes(db.get_books()), workers)
+    texts: dict[db.VerseKey, str] = {}
+    for book_id, chapter, verse, text in verses:
+        texts.setdefault((book_id, chapter, verse), text)
+    seconds["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # A dry run only looks refs up; a verse without one counts as new.
+    refs = db.find_verse_ref_ids(texts) if dry_run else db.get_verse_ref_ids(texts)
+    hashes = db.get_text_hashes(translation_id)
+    pending = {k: t for k, t in texts.items() if k not in refs or hashes.get(refs[k]) != content_hash(t)}
+    new = sum(1 for k in pending if refs.get(k) not in hashes)
+    seconds["resolve"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    written = 0 if dry_run else db.upsert_verse_texts(translation_id, {refs[k]: t for k, t in pending.items()})
+    seconds["write"] = time.perf_counter() - start
+    return Result(
+        verses=len(texts),
+        new=new,
+        changed=len(pending) - new,
+        unchanged=len(texts) - len(pending),
+        written=written,
+        duplicates=len(verses) - len(texts),
+        seconds={k: round(v, 2) for k, v in seconds.items()},
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Load a translation into verse_text from OSIS, USFM or JSON files.")
+    p.add_argument("translation", help="translation id, e.g. KJV")
+    p.add_argument("paths", nargs="+", type=Path, help="files or directories")
+    p.add_argument("--name", help="create the translation with this name if it doesn't exist")
+    p.add_argument("--license", default="unknown", help="license_type for a new translation")
+    p.add_argument("--workers", type=int, default=WORKERS, help="parser processes")
+    p.add_argument("--dry-run", action="store_true", help="parse and compare, but write nothing")
+    args = p.parse_args(argv)
+
+    if args.name and db.get_translation(args.translation) is None and not args.dry_run:
+        db.create_translation(args.translation, args.name, args.license)
+    try:
+        print(ingest(args.translation, args.paths, args.workers, args.dry_run))
+    except ValueError as exc:
+        sys.exit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
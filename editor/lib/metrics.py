@@ -0,0 +1,269 @@
+"""Round-trip and latency instrumentation for `lib.db`.
+
+Off by default; set EDITOR_METRICS=1 (or call `enable()`) to turn it on.
+When on:
+
+* every public `lib.db` function records calls and wall time (`instrument`),
+* every PostgREST request records wall time, rows returned and response
+  size, attributed to the `lib.db` function that issued it (`wrap_client`),
+* retries and waits for a pooled connection (`lib.clients`) are counted,
+* numbers are aggregated into the active `scope()`s — the editor opens one
+  per Streamlit rerun and one per import job — and
+* each request and each finished scope is appended as a JSON line to
+  EDITOR_METRICS_LOG (default editor/logs/db_metrics.jsonl; empty = no log).
+
+When off, `instrument` costs one flag check per call and the client is not
+wrapped at all.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Iterator
+
+ENABLED = os.environ.get("EDITOR_METRICS", "").lower() in ("1", "true", "yes")
+LOG_PATH = os.environ.get("EDITOR_METRICS_LOG", str(Path(__file__).parents[1] / "logs" / "db_metrics.jsonl"))
+
+_log_lock = threading.Lock()
+_stats_lock = threading.Lock()  # scopes are shared with `db.gather` worker threads
+
+
+@dataclass
+class Stat:
+    calls: int = 0
+    ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    errors: int = 0
+
+    def add(self, ms: float, rows: int = 0, nbytes: int = 0, error: bool = False) -> None:
+        self.calls += 1
+        self.ms += ms
+        self.rows += rows
+        self.bytes += nbytes
+        self.errors += error
+
+
+@dataclass
+class Scope:
+    """Aggregated numbers for one rerun, import job, benchmark run, …"""
+
+    name: str
+    fields: dict[str, Any] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    functions: dict[str, Stat] = field(default_factory=dict)
+    queries: dict[str, Stat] = field(default_factory=dict)  # "fn → table.op"
+    retries: Stat = field(default_factory=Stat)  # calls = retries, ms = backoff, errors = gave up
+    pool_wait: Stat = field(default_factory=Stat)  # calls = requests, ms = waiting for a connection
+    connections: int = 0  # opened (the rest reused a kept-alive one)
+
+    @property
+    def round_trips(self) -> int:
+        return sum(s.calls for s in self.queries.values())
+
+    def summary(self) -> dict[str, Any]:
+        with _stats_lock:
+            return self._summary()
+
+    def _summary(self) -> dict[str, Any]:
+        return {
+            "scope": self.name,
+            **self.fields,
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "round_trips": self.round_trips,
+            "query_ms": round(sum(s.ms for s in self.queries.values()), 2),
+            "rows": sum(s.rows for s in self.queries.values()),
+            "bytes": sum(s.bytes for s in self.queries.values()),
+            "functions": {k: _rounded(v) for k, v in self.functions.items()},
+            "queries": {k: _rounded(v) for k, v in self.queries.items()},
+            "retries": self.retries.calls,
+            "retry_ms": round(self.retries.ms, 2),
+            "gave_up": self.retries.errors,
+            "pool_wait_ms": round(self.pool_wait.ms, 2),
+            "connections": self.connections,
+        }
+
+
+def _rounded(stat: Stat) -> dict[str, Any]:
+    d = asdict(stat)
+    d["ms"] = round(d["ms"], 2)
+    return d
+
+
+_scopes: ContextVar[tuple[Scope, ...]] = ContextVar("db_metric_scopes", default=())
+_function: ContextVar[str | None] = ContextVar("db_metric_function", default=None)
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = on
+
+
+@contextmanager
+def scope(name: str, **fields: Any) -> Iterator[Scope]:
+    """Aggregate everything recorded inside the block (nested scopes all see it)."""
+    s = Scope(name, fields)
+    token = _scopes.set(_scopes.get() + (s,))
+    try:
+        yield s
+    finally:
+        _scopes.reset(token)
+        if ENABLED and (s.functions or s.queries):
+            _write({"event": "scope", **s.summary()})
+
+
+def instrument(fn):
+    """Record calls and wall time of a public `lib.db` function."""
+    name = fn.__name__
+
+    @wraps(fn)
+    def inner(*args, **kwargs):
+        if not ENABLED:
+            return fn(*args, **kwargs)
+        token = _function.set(_function.get() or name)
+        start = time.perf_counter()
+        error = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            _function.reset(token)
+            with _stats_lock:
+                for s in _scopes.get():
+                    s.functions.setdefault(name, Stat()).add(ms, error=error)
+
+    return inner
+
+
+def record_retry(query: str, exc: BaseException, wait_ms: float = 0.0, gave_up: bool = False) -> None:
+    """A request about to be retried after `wait_ms`, or given up on after its last retry."""
+    if not ENABLED:
+        return
+    with _stats_lock:
+        for s in _scopes.get():
+            if gave_up:
+                s.retries.errors += 1
+            else:
+                s.retries.add(wait_ms)
+    _write(
+        {
+            "event": "gave_up" if gave_up else "retry",
+            "scopes": [s.name for s in _scopes.get()],
+            "function": _function.get(),
+            "query": query,
+            "error": f"{type(exc).__name__}: {exc}"[:200],
+            "wait_ms": round(wait_ms, 2),
+        }
+    )
+
+
+def record_pool_wait(ms: float, new_connection: bool) -> None:
+    """Time one request waited for a pooled connection, and whether it had to open one."""
+    if not ENABLED:
+        return
+    with _stats_lock:
+        for s in _scopes.get():
+            s.pool_wait.add(ms)
+            s.connections += new_connection
+
+
+def wrap_client(client: Any) -> Any:
+    """Return `client` with every request's `execute()` timed and measured."""
+    return _Traced(client, "")
+
+
+_OPS = {"select", "insert", "upsert", "update", "delete"}
+
+
+class _Traced:
+    """Proxy over a supabase-py client or query builder."""
+
+    __slots__ = ("_obj", "_label")
+
+    def __init__(self, obj: Any, label: str) -> None:
+        self._obj = obj
+        self._label = label
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._obj, attr)
+        if attr == "execute":
+            return lambda: _timed_execute(value, self._label)
+        if not callable(value):
+            return value
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            result = value(*args, **kwargs)
+            if attr not in ("table", "from_", "rpc", *_OPS) and not hasattr(result, "execute"):
+                return result
+            label = self._label
+            if attr in ("table", "from_") and args:
+                label = str(args[0])
+            elif attr == "rpc" and args:
+                label = f"rpc:{args[0]}"
+            elif attr in _OPS:
+                label = f"{label}.{attr}"
+            return _Traced(result, label)
+
+        return call
+
+
+def _timed_execute(execute: Any, label: str) -> Any:
+    start = time.perf_counter()
+    error = False
+    res = None
+    try:
+        res = execute()
+        return res
+    except Exception:
+        error = True
+        raise
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        data = getattr(res, "data", None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        # supabase-py doesn't keep the raw body; re-encoding is close enough.
+        nbytes = len(json.dumps(data, default=str)) if data is not None else 0
+        function = _function.get() or "?"
+        key = f"{function} → {label}"
+        with _stats_lock:
+            for s in _scopes.get():
+                s.queries.setdefault(key, Stat()).add(ms, rows, nbytes, error)
+                # Function stats count calls in `instrument`; add the data here.
+                fstat = s.functions.setdefault(function, Stat())
+                fstat.rows += rows
+                fstat.bytes += nbytes
+        _write(
+            {
+                "event": "query",
+                "scopes": [s.name for s in _scopes.get()],
+                "function": _function.get(),
+                "query": label,
+                "ms": round(ms, 2),
+                "rows": rows,
+                "bytes": nbytes,
+                "error": error,
+            }
+        )
+
+
+def _write(record: dict[str, Any]) -> None:
+    if not LOG_PATH:
+        return
+    record = {"ts": time.time(), **record}
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        path = Path(LOG_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
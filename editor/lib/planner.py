@@ -0,0 +1,376 @@
+"""Precomputed game sessions: each student's next `generateSession`, planned in bulk.
+
+generateSession (app/actions/session.ts) builds a session live, with six
+queries per call. The planner builds the same session ahead of time for
+every active student at once and stores it in `session_plan`. Each row
+holds the picked verses in order (due, near-due, new) and the time until
+which the plan holds. The app's `planned_session` RPC then serves a
+session with one keyed read. It falls back to the live path when the
+plan is missing or stale, or when the filters aren't the defaults (both
+testaments, all books).
+
+The rules are generateSession's, applied to NumPy arrays of every
+student's states, one page of students at a time:
+
+* up to 60% of the session are due reviews, most overdue first,
+* up to 30% are near-due (due within 24 h), soonest first,
+* the rest are new: released verses the student hasn't seen, with
+  global_rank ≤ 10 + mastered, easiest (lowest global_difficulty) first.
+
+The live due query takes due verses in no particular order, and it only
+sees the first 1000 verse_ref ids PostgREST returns. The plan uses the
+order above and considers every verse.
+
+A plan goes stale once the student answers anything: recordAttempt
+moves last_seen_at past the plan's computed_at. It also expires at
+valid_until. That is when the next unpicked verse would become due or
+near-due while its bucket still has room, and never later than
+`MAX_AGE` after planning.
+
+A small SQLite state file keeps a watermark over `attempt` and each
+plan's valid_until. An incremental run replans the students with
+attempts since the watermark, plus those whose plans expire within
+`REFRESH_AHEAD`. A full run replans every student active in the last
+`ACTIVE_DAYS`, reading disjoint user_id ranges in parallel. Run it after
+releases or difficulties change, e.g. nightly after lib.difficulty.
+
+Run:
+    cd editor
+    python -m lib.planner          # replan students with new attempts or expiring plans
+    python -m lib.planner --full   # replan every active student
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from lib import db, srs
+from lib.difficulty import SETTLE_SECONDS, PageSource
+
+STATE_PATH = os.environ.get("PLANNER_STATE", str(Path(__file__).parents[1] / "state" / "planner.sqlite"))
+
+SESSION_SIZE = 10  # generateSession's default `count`
+NEAR_DAYS = 1.0  # near-due: due within 24 h
+ACTIVE_DAYS = 30  # a full run plans students who played this recently
+MAX_AGE = timedelta(hours=12)  # plans are replanned at least this often
+REFRESH_AHEAD = timedelta(minutes=10)  # an incremental run replans plans expiring this soon
+USERS_PER_PAGE = 500
+SHARDS = 8  # user_id ranges a full run reads in parallel
+_LOOKUP_CHUNK = 500  # SQLite host parameters per query
+
+SavePlans = Callable[[list[dict]], int]
+
+
+# ── Plans ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class Releases:
+    """Released verses in global_rank order, with each one's place in easiest-first order."""
+
+    verse_ref_ids: np.ndarray  # object
+    rank: np.ndarray  # int64 global_rank, ascending
+    ease: np.ndarray  # int64 position by (global_difficulty, global_rank)
+    position: dict[str, int]
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> Releases:
+        rows = sorted(rows, key=lambda r: r["global_rank"])
+        rank = np.array([r["global_rank"] for r in rows], dtype=np.int64)
+        difficulty = np.array([float(r["global_difficulty"]) for r in rows], dtype=np.float64)
+        ease = np.empty(len(rows), dtype=np.int64)
+        ease[np.lexsort((rank, difficulty))] = np.arange(len(rows))
+        ids = np.array([r["verse_ref_id"] for r in rows], dtype=object)
+        return cls(ids, rank, ease, {v: i for i, v in enumerate(ids)})
+
+    @classmethod
+    def load(cls) -> Releases:
+        return cls.from_rows(
+            db.fetch_all(
+                "verse_release",
+                "verse_ref_id, global_rank, global_difficulty",
+                order="verse_ref_id",
+                filters={"released": True},
+            )
+        )
+
+
+def plan_page(
+    states: list[dict], releases: Releases, now: datetime, size: int = SESSION_SIZE, rules: srs.Rules = srs.RULES
+) -> list[dict]:
+    """session_plan rows for the students of one `plan_state_page` page, as of `now`."""
+    n_users = len(states)
+    if not n_users:
+        return []
+    lengths = np.fromiter((len(s["verse_ref_ids"]) for s in states), np.int64, n_users)
+    user = np.repeat(np.arange(n_users), lengths)
+    verse = np.array([v for s in states for v in s["verse_ref_ids"]], dtype=object)
+    mastery = np.fromiter((m for s in states for m in s["mastery"]), np.float64, user.size)
+    # Days from now; a null next_due_at (nan) is never due, as in SQL.
+    due = (np.array([d for s in states for d in s["next_due_at"]], dtype=np.float64) - now.timestamp()) / 86400
+
+    due_target = int(size * 0.6)
+    near_target = int(size * 0.3)
+    new_target = size - due_target - near_target
+
+    picked_due = srs.first_k_per_user(np.flatnonzero(due <= 0), user, due, due_target)
+    picked_near = srs.first_k_per_user(np.flatnonzero((due > 0) & (due <= NEAR_DAYS)), user, due, near_target)
+
+    # New: each student's candidates are the released verses ranked within
+    # their pool (a prefix in rank order), minus those they have a state for.
+    mastered = np.bincount(user[mastery >= rules.mastered_at], minlength=n_users)
+    reach = np.searchsorted(releases.rank, srs.pool_size(mastered, rules), side="right")
+    cand_user = np.repeat(np.arange(n_users), reach)
+    cand_pos = np.arange(cand_user.size) - np.repeat(np.cumsum(reach) - reach, reach)
+    seen_pos = np.fromiter((releases.position.get(v, -1) for v in verse), np.int64, verse.size)
+    width = len(releases.rank) + 1
+    seen = user[seen_pos >= 0] * width + seen_pos[seen_pos >= 0]
+    unseen = np.flatnonzero(~np.isin(cand_user * width + cand_pos, seen))
+    picked_new = srs.first_k_per_user(unseen, cand_user, releases.ease[cand_pos], new_target)
+
+    owner = np.concatenate([user[picked_due], user[picked_near], cand_user[picked_new]])
+    kind = np.repeat([0, 1, 2], [picked_due.size, picked_near.size, picked_new.size])
+    key = np.concatenate([due[picked_due], due[picked_near], releases.ease[cand_pos[picked_new]]])
+    ids = np.concatenate([verse[picked_due], verse[picked_near], releases.verse_ref_ids[cand_pos[picked_new]]])
+    ids = ids[np.lexsort((key, kind, owner))]
+    n_due = np.bincount(user[picked_due], minlength=n_users)
+    n_near = np.bincount(user[picked_near], minlength=n_users)
+    n_picked = np.bincount(owner, minlength=n_users)
+
+    # Until a verse would join a bucket that still has room.
+    expires = np.full(n_users, MAX_AGE / timedelta(days=1))
+    later = np.flatnonzero(due > 0)
+    later = later[n_due[user[later]] < due_target]
+    np.minimum.at(expires, user[later], due[later])
+    far = np.flatnonzero(due > NEAR_DAYS)
+    far = far[n_near[user[far]] < near_target]
+    np.minimum.at(expires, user[far], due[far] - NEAR_DAYS)
+
+    computed_at = db.to_timestamptz(now)
+    return [
+        {
+            "user_id": s["user_id"],
+            "verse_ref_ids": picks.tolist(),
+            "n_due": int(n_due[u]),
+            "n_near": int(n_near[u]),
+            "computed_at": computed_at,
+            "valid_until": db.to_timestamptz(now + timedelta(days=float(expires[u]))),
+        }
+        for u, (s, picks) in enumerate(zip(states, np.split(ids, np.cumsum(n_picked)[:-1])))
+    ]
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+class PlanState:
+    """The planner's SQLite file: attempt watermark and each plan's valid_until."""
+
+    def __init__(self, path: str = STATE_PATH) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(
+                """
+                pragma journal_mode = wal;
+                create table if not exists meta (key text primary key, value text);
+                create table if not exists plan (user_id text primary key, valid_until real not null);
+                create index if not exists idx_plan_valid_until on plan (valid_until);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Short-lived connections, so the shards of a full run can each record theirs.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def reset(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("delete from meta")
+            conn.execute("delete from plan")
+
+    def meta(self) -> dict[str, str]:
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("select key, value from meta").fetchall())
+
+    def watermark(self) -> db.AttemptCursor | None:
+        m = self.meta()
+        return (m["after_created_at"], m["after_id"]) if "after_created_at" in m else None
+
+    def set_watermark(self, cursor: db.AttemptCursor | None) -> None:
+        if cursor is None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "insert or replace into meta values (?, ?)",
+                [("after_created_at", cursor[0]), ("after_id", cursor[1])],
+            )
+
+    def mark_updated(self, full: bool) -> None:
+        now = str(datetime.now(timezone.utc).timestamp())
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "insert or replace into meta values (?, ?)",
+                [("updated_at", now)] + ([("full_at", now)] if full else []),
+            )
+
+    def record(self, plans: list[dict]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "insert or replace into plan values (?, ?)",
+                [(p["user_id"], datetime.fromisoformat(p["valid_until"]).timestamp()) for p in plans],
+            )
+
+    def forget(self, user_ids: Iterable[str]) -> None:
+        ids = list(user_ids)
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(ids), _LOOKUP_CHUNK):
+                chunk = ids[i : i + _LOOKUP_CHUNK]
+                conn.execute(f"delete from plan where user_id in ({','.join('?' * len(chunk))})", chunk)
+
+    def expiring(self, before: datetime) -> list[str]:
+        """Students whose plans are valid until before `before`."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("select user_id from plan where valid_until < ?", (before.timestamp(),))
+            return [r[0] for r in rows]
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("select count(*) from plan").fetchone()[0]
+
+
+# ── Runs ──────────────────────────────────────────────────────────────────────
+
+def plan_users(
+    pages: Iterable[list[dict]],
+    releases: Releases,
+    state: PlanState,
+    save: SavePlans = db.save_session_plans,
+) -> dict[str, int]:
+    """Plan, save and record every student in `pages` (as `plan_state_page` returns them)."""
+    stats = {"students": 0, "planned": 0}
+    pages = iter(pages)
+    while True:
+        now = datetime.now(timezone.utc)  # before the read, so later attempts make the plan stale
+        page = next(pages, None)
+        if page is None:
+            return stats
+        plans = plan_page(page, releases, now)
+        save(plans)
+        state.record(plans)
+        stats["students"] += len(plans)
+        stats["planned"] += sum(len(p["verse_ref_ids"]) for p in plans)
+
+
+def _shards(n: int) -> list[tuple[str | None, str | None]]:
+    """(after, before) bounds splitting the uuid space into `n` user_id ranges."""
+    bounds = [i * (1 << 128) // n for i in range(n)]
+    return [
+        (
+            str(uuid.UUID(int=lo - 1)) if lo else None,
+            str(uuid.UUID(int=bounds[i + 1])) if i + 1 < n else None,
+        )
+        for i, lo in enumerate(bounds)
+    ]
+
+
+def plan_all(
+    state: PlanState,
+    releases: Releases,
+    active_days: float = ACTIVE_DAYS,
+    shards: int = SHARDS,
+    save: SavePlans = db.save_session_plans,
+) -> dict[str, int]:
+    """Replan every student who played within `active_days`, reading `shards` user_id ranges in parallel."""
+    since = db.to_timestamptz(datetime.now(timezone.utc) - timedelta(days=active_days))
+    results = db.gather(
+        *[
+            lambda after=after, before=before: plan_users(
+                db.iter_plan_state_pages(after, before, USERS_PER_PAGE, since), releases, state, save
+            )
+            for after, before in _shards(shards)
+        ]
+    )
+    return {k: sum(r[k] for r in results) for k in ("students", "planned")}
+
+
+def plan_changed(
+    state: PlanState,
+    releases: Releases,
+    before: str,
+    active_days: float = ACTIVE_DAYS,
+    source: PageSource = db.iter_attempt_pages,
+    save: SavePlans = db.save_session_plans,
+) -> dict[str, int]:
+    """
+    Replan the students with attempts after the watermark (and before
+    `before`) and the active ones whose plans expire soon; forget
+    inactive students' plans.
+    """
+    cursor = state.watermark()
+    changed: set[str] = set()
+    attempts = 0
+    for rows in source(cursor, before, db.PAGE_SIZE):
+        attempts += len(rows)
+        changed.update(r["user_id"] for r in rows)
+        cursor = rows[-1]["created_at"], rows[-1]["id"]
+    expiring = set(state.expiring(datetime.now(timezone.utc) + REFRESH_AHEAD)) - changed
+    since = db.to_timestamptz(datetime.now(timezone.utc) - timedelta(days=active_days))
+    returned: set[str] = set()
+
+    def pages(users: set[str], active_since: str | None) -> Iterable[list[dict]]:
+        ids = sorted(users)
+        for i in range(0, len(ids), USERS_PER_PAGE):
+            chunk = ids[i : i + USERS_PER_PAGE]
+            page = db.fetch_plan_state_page(None, None, len(chunk), active_since, chunk)
+            returned.update(s["user_id"] for s in page)
+            yield page
+
+    stats = plan_users(pages(changed, None), releases, state, save)
+    renewed = plan_users(pages(expiring, since), releases, state, save)
+    state.forget(expiring - returned)
+    state.set_watermark(cursor)
+    return {"attempts": attempts, "changed": len(changed), **stats, "renewed": renewed["students"]}
+
+
+def run(
+    state_path: str = STATE_PATH,
+    full: bool = False,
+    settle_seconds: float = SETTLE_SECONDS,
+    active_days: float = ACTIVE_DAYS,
+) -> dict[str, int]:
+    """One pass: incremental, or full when asked or when there is no watermark yet."""
+    state = PlanState(state_path)
+    releases = Releases.load()
+    before = db.to_timestamptz(datetime.now(timezone.utc) - timedelta(seconds=settle_seconds))
+    full = full or state.watermark() is None
+    if full:
+        # Attempts from here on are the next incremental run's.
+        cursor = db.latest_attempt_cursor(before)
+        stats = plan_all(state, releases, active_days)
+        state.set_watermark(cursor)
+    else:
+        stats = plan_changed(state, releases, before, active_days)
+    state.mark_updated(full)
+    return {"full": full, **stats}
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Precompute students' next game sessions.")
+    p.add_argument("--state", default=STATE_PATH, help="SQLite state file")
+    p.add_argument("--full", action="store_true", help="replan every active student, not just changed ones")
+    p.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="skip attempts newer than this (s)")
+    p.add_argument("--active-days", type=float, default=ACTIVE_DAYS, help="plan students who played this recently")
+    args = p.parse_args(argv)
+    print(run(args.state, args.full, args.settle, args.active_days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""Per-question and per-verse attempt statistics, kept up to date incrementally.
+
+For every question and every verse the job keeps, in a SQLite state file:
+
+* attempts and correct answers (→ accuracy),
+* attempts with a response time, and those under 1500 ms — the share
+  `lib.difficulty` ignores as suspected cheats,
+* a `QuantileSketch` of `response_time_ms`, with its median and p90,
+
+plus, per verse, how many `user_verse_state` rows it has, how many of
+them lapsed and the total `lapse_count` (→ lapse rate).
+
+Like `lib.difficulty`, each run reads only the attempts after its
+watermark, in batches that are folded into the stored rows: counts add,
+sketches merge. Lapse totals are re-read each run (one row per verse,
+through the `verse_lapse_page` RPC). The editor's stats page and verse
+dialog read the state file directly, so they answer from a few hundred
+rows whatever the size of `attempt`.
+
+Run:
+    cd editor
+    python -m lib.rollups             # fold in new attempts, refresh lapses
+    python -m lib.rollups --rebuild   # forget the state, start over
+    python -m lib.rollups --rebuild --from-export exports/attempt
+                                      # start over from exported files
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from lib import attempt_export, db
+from lib.difficulty import MIN_RESPONSE_MS, SETTLE_SECONDS, PageSource
+
+STATE_PATH = os.environ.get("ROLLUPS_STATE", str(Path(__file__).parents[1] / "state" / "rollups.sqlite"))
+
+# Attempts folded into the state per transaction.
+BATCH = 100_000
+_LOOKUP_CHUNK = 500  # SQLite host parameters per query
+_FETCH_CHUNK = 100  # ids per `in.(...)` filter, as in lib.db
+
+
+# ── Quantile sketch ───────────────────────────────────────────────────────────
+
+class QuantileSketch:
+    """
+    A mergeable quantile sketch with relative error `ALPHA` (DDSketch's log buckets).
+
+    A value v ≥ 1 is counted in bucket ⌈log_γ v⌉, γ = (1 + α) / (1 − α),
+    so every quantile comes back within α of the true value. Two sketches
+    merge by adding bucket counts, and a sketch of response times holds at
+    most a few hundred buckets however many values went in.
+    """
+
+    ALPHA = 0.01
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    _LOG_GAMMA = math.log(GAMMA)
+    MAX_BUCKET = 4095  # ~ 10^35; larger values are counted here
+
+    def __init__(self, keys: np.ndarray | None = None, counts: np.ndarray | None = None) -> None:
+        # Sorted, distinct bucket keys and their counts.
+        self.keys = np.empty(0, dtype=np.int16) if keys is None else keys.astype(np.int16)
+        self.counts = np.empty(0, dtype=np.int64) if counts is None else counts.astype(np.int64)
+
+    @classmethod
+    def buckets(cls, values: np.ndarray) -> np.ndarray:
+        """Bucket key of each value (values below 1 count as 1)."""
+        keys = np.ceil(np.log(np.maximum(values, 1.0)) / cls._LOG_GAMMA)
+        return np.minimum(keys, cls.MAX_BUCKET).astype(np.int16)
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "QuantileSketch":
+        keys, counts = np.unique(cls.buckets(np.asarray(list(values), dtype=float)), return_counts=True)
+        return cls(keys, counts)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add `other`'s values to this sketch; returns self."""
+        if not len(other.keys):
+            return self
+        if not len(self.keys):
+            self.keys, self.counts = other.keys.copy(), other.counts.copy()
+            return self
+        keys, inverse = np.unique(np.concatenate([self.keys, other.keys]), return_inverse=True)
+        self.keys = keys.astype(np.int16)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts])).astype(np.int64)
+        return self
+
+    def quantile(self, q: float) -> float | None:
+        """The q-quantile (0 ≤ q ≤ 1), or None for an empty sketch."""
+        total = self.count
+        if not total:
+            return None
+        cum = np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, q * (total - 1), side="right"))
+        return 2 * self.GAMMA ** int(self.keys[min(i, len(self.keys) - 1)]) / (self.GAMMA + 1)
+
+    def to_bytes(self) -> bytes:
+        return self.keys.astype("<i2").tobytes() + self.counts.astype("<u4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        n = len(data) // 6
+        return cls(np.frombuffer(data, "<i2", n), np.frombuffer(data, "<u4", n, offset=2 * n))
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+_STATS = """
+  attempts integer not null,
+  correct  integer not null,
+  timed    integer not null,  -- with a response_time_ms
+  fast     integer not null,  -- under MIN_RESPONSE_MS
+  p50      real,              -- response_time_ms, from the sketch
+  p90      real,
+  sketch   blob not null
+"""
+
+# Sortable columns of `Rollups.verses` / `Rollups.questions`, as SQL. Each
+# has an index on exactly this expression, so a sorted page is an index scan.
+SORTS = {
+    "attempts": "attempts",
+    "accuracy": "1.0 * correct / attempts",
+    "p50": "p50",
+    "p90": "p90",
+    "fast_share": "1.0 * fast / nullif(timed, 0)",
+    "lapse_rate": "1.0 * lapsed / nullif(states, 0)",
+}
+_VERSE_COLUMNS = (
+    "r.verse_ref_id, attempts, correct, timed, fast, p50, p90, "
+    "coalesce(states, 0) as states, coalesce(lapsed, 0) as lapsed, coalesce(lapses, 0) as lapses"
+)
+_QUESTION_COLUMNS = "question_id, verse_ref_id, translation_id, attempts, correct, timed, fast, p50, p90"
+
+
+def _finish(row: sqlite3.Row) -> dict:
+    out = dict(row)
+    out["accuracy"] = out["correct"] / out["attempts"] if out["attempts"] else None
+    out["fast_share"] = out["fast"] / out["timed"] if out["timed"] else None
+    if "states" in out:
+        out["lapse_rate"] = out["lapsed"] / out["states"] if out["states"] else None
+    return out
+
+
+class Rollups:
+    """The rollup state file: watermark, per-question and per-verse rows, lapse totals."""
+
+    def __init__(self, path: str = STATE_PATH) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(
+                f"""
+                pragma journal_mode = wal;
+                create table if not exists meta (key text primary key, value text);
+                create table if not exists question_rollup (
+                  question_id    text primary key,
+                  verse_ref_id   text,
+                  translation_id text,
+                  {_STATS}
+                );
+                create index if not exists idx_question_rollup_verse on question_rollup (verse_ref_id);
+                create table if not exists verse_rollup (
+                  verse_ref_id text primary key,
+                  {_STATS}
+                );
+                create table if not exists verse_lapses (
+                  verse_ref_id text primary key,
+                  states integer not null,
+                  lapsed integer not null,  -- states with lapse_count > 0
+                  lapses integer not null
+                );
+                """
+            )
+            for name, expr in SORTS.items():
+                tables = ["verse_lapses"] if name == "lapse_rate" else ["verse_rollup", "question_rollup"]
+                for table in tables:
+                    conn.execute(f"create index if not exists idx_{table}_{name} on {table} (({expr}))")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, so any thread may use the state.
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def reset(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(
+                "delete from meta; delete from question_rollup; delete from verse_rollup; delete from verse_lapses;"
+            )
+
+    def meta(self) -> dict[str, str]:
+        with closing(self._connect()) as conn:
+            return {k: v for k, v in conn.execute("select key, value from meta")}
+
+    def watermark(self) -> db.AttemptCursor | None:
+        meta = self.meta()
+        if "after_created_at" not in meta:
+            return None
+        return meta["after_created_at"], meta["after_id"]
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def fold(self, rows: list[dict]) -> None:
+        """Add one batch of attempts (in cursor order) to the stored rows, and move the watermark past it."""
+        if not rows:
+            return
+        with closing(self._connect()) as conn, conn:
+            known = self._question_info(conn, {r["question_id"] for r in rows})
+            _lookup_questions(known, rows)
+            verse_of = [r.get("verse_ref_id") or known.get(r["question_id"], (None, None))[0] for r in rows]
+            correct = np.fromiter((bool(r["is_correct"]) for r in rows), dtype=bool, count=len(rows))
+            ms = np.fromiter(
+                (math.nan if r.get("response_time_ms") is None else r["response_time_ms"] for r in rows),
+                dtype=float,
+                count=len(rows),
+            )
+            questions = _aggregate([r["question_id"] for r in rows], correct, ms)
+            self._merge(conn, "question_rollup", "question_id", questions, info=known)
+            has_verse = np.array([v is not None for v in verse_of], dtype=bool)
+            verses = _aggregate([v for v in verse_of if v is not None], correct[has_verse], ms[has_verse])
+            self._merge(conn, "verse_rollup", "verse_ref_id", verses)
+            conn.executemany(
+                "insert or replace into meta (key, value) values (?, ?)",
+                [("after_created_at", rows[-1]["created_at"]), ("after_id", rows[-1]["id"])],
+            )
+
+    def _question_info(self, conn: sqlite3.Connection, ids: set[str]) -> dict[str, tuple[str | None, str | None]]:
+        """question_id → (verse_ref_id, translation_id) for the ids already in the state."""
+        ids_list = list(ids)
+        found: dict[str, tuple[str | None, str | None]] = {}
+        for i in range(0, len(ids_list), _LOOKUP_CHUNK):
+            chunk = ids_list[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for r in conn.execute(
+                f"select question_id, verse_ref_id, translation_id from question_rollup where question_id in ({marks})",
+                chunk,
+            ):
+                found[r[0]] = (r[1], r[2])
+        return found
+
+    def _merge(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        key: str,
+        batch: dict[str, tuple[int, int, int, int, QuantileSketch]],
+        info: dict[str, tuple[str | None, str | None]] | None = None,
+    ) -> None:
+        """Add a batch's aggregates to the stored rows of `table`; `info` fills question_rollup's lookup columns."""
+        ids = list(batch)
+        stored: dict[str, sqlite3.Row] = {}
+        for i in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for r in conn.execute(f"select * from {table} where {key} in ({marks})", chunk):
+                stored[r[key]] = r
+        out = []
+        for id_, (attempts, correct, timed, fast, sketch) in batch.items():
+            old = stored.get(id_)
+            if old is not None:
+                attempts += old["attempts"]
+                correct += old["correct"]
+                timed += old["timed"]
+                fast += old["fast"]
+                sketch = QuantileSketch.from_bytes(old["sketch"]).merge(sketch)
+            lookup = () if info is None else info.get(id_, (None, None))
+            p50, p90 = sketch.quantile(0.5), sketch.quantile(0.9)
+            out.append((id_, *lookup, attempts, correct, timed, fast, p50, p90, sketch.to_bytes()))
+        if out:
+            conn.executemany(f"insert or replace into {table} values ({','.join('?' * len(out[0]))})", out)
+
+    def set_lapses(self, rows: Iterable[dict]) -> int:
+        """Replace the per-verse lapse totals; returns how many verses have any states."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("delete from verse_lapses")
+            n = conn.executemany(
+                "insert into verse_lapses values (?, ?, ?, ?)",
+                ((r["verse_ref_id"], r["states"], r["lapsed"], r["lapses"]) for r in rows),
+            ).rowcount
+            conn.execute("insert or replace into meta (key, value) values ('lapses_at', ?)", (str(time.time()),))
+            return n
+
+    def mark_updated(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("insert or replace into meta (key, value) values ('updated_at', ?)", (str(time.time()),))
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def totals(self) -> dict[str, int]:
+        with closing(self._connect()) as conn:
+            attempts, verses = conn.execute("select coalesce(sum(attempts), 0), count(*) from verse_rollup").fetchone()
+            questions = conn.execute("select count(*) from question_rollup").fetchone()[0]
+        return {"attempts": attempts, "verses": verses, "questions": questions}
+
+    def verses(
+        self, sort: str = "accuracy", descending: bool = False, limit: int = 100, min_attempts: int = 1
+    ) -> list[dict]:
+        """Verses with at least `min_attempts` attempts and a value to sort by, by `sort` (a key of SORTS)."""
+        order = SORTS[sort]
+        # Lapse rates are scanned from verse_lapses' index, the rest from verse_rollup's.
+        tables = (
+            "verse_lapses l join verse_rollup r using (verse_ref_id)"
+            if sort == "lapse_rate"
+            else "verse_rollup r left join verse_lapses l using (verse_ref_id)"
+        )
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"""
+                select {_VERSE_COLUMNS} from {tables}
+                where attempts >= ? and {order} is not null
+                order by {order} {'desc' if descending else 'asc'}
+                limit ?
+                """,
+                (min_attempts, limit),
+            ).fetchall()
+        return [_finish(r) for r in rows]
+
+    def questions(
+        self,
+        sort: str = "accuracy",
+        descending: bool = False,
+        limit: int = 100,
+        min_attempts: int = 1,
+        translation_id: str | None = None,
+    ) -> list[dict]:
+        """Like `verses`, per question (optionally of one translation); there is no lapse_rate."""
+        if sort == "lapse_rate":
+            raise ValueError("lapse_rate is per verse")
+        order = SORTS[sort]
+        where, params = f"attempts >= ? and {order} is not null", [min_attempts]
+        if translation_id is not None:
+            where += " and translation_id = ?"
+            params.append(translation_id)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"""
+                select {_QUESTION_COLUMNS} from question_rollup
+                where {where}
+                order by {order} {'desc' if descending else 'asc'}
+                limit ?
+                """,
+                (*params, limit),
+            ).fetchall()
+        return [_finish(r) for r in rows]
+
+    def verse(self, verse_ref_id: str) -> tuple[dict | None, list[dict]]:
+        """One verse's row (None without attempts or states) and its questions' rows."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"""
+                select {_VERSE_COLUMNS}
+                from verse_rollup r left join verse_lapses l using (verse_ref_id)
+                where r.verse_ref_id = ?
+                """,
+                (verse_ref_id,),
+            ).fetchone()
+            if row is None:
+                # States but no attempts yet
+                row = conn.execute(
+                    """
+                    select verse_ref_id, 0 as attempts, 0 as correct, 0 as timed, 0 as fast,
+                           null as p50, null as p90, states, lapsed, lapses
+                    from verse_lapses where verse_ref_id = ?
+                    """,
+                    (verse_ref_id,),
+                ).fetchone()
+            questions = conn.execute(
+                f"select {_QUESTION_COLUMNS} from question_rollup where verse_ref_id = ? order by translation_id",
+                (verse_ref_id,),
+            ).fetchall()
+        return (None if row is None else _finish(row)), [_finish(q) for q in questions]
+
+
+def _aggregate(
+    ids: list[str], correct: np.ndarray, ms: np.ndarray
+) -> dict[str, tuple[int, int, int, int, QuantileSketch]]:
+    """id → (attempts, correct, timed, fast, sketch) over one batch of attempts."""
+    index: dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(i, len(index)) for i in ids), dtype=np.int64, count=len(ids))
+    n = len(index)
+    timed = ~np.isnan(ms)
+    attempts = np.bincount(codes, minlength=n)
+    n_correct = np.bincount(codes, weights=correct, minlength=n)
+    n_timed = np.bincount(codes, weights=timed, minlength=n)
+    n_fast = np.bincount(codes, weights=timed & (np.nan_to_num(ms) < MIN_RESPONSE_MS), minlength=n)
+
+    # Every (id, bucket) pair once, with its count, sorted by id.
+    width = QuantileSketch.MAX_BUCKET + 1
+    pairs, counts = np.unique(codes[timed] * width + QuantileSketch.buckets(ms[timed]), return_counts=True)
+    owner = pairs // width
+    bounds = np.searchsorted(owner, np.arange(n + 1))
+
+    out = {}
+    for id_, code in index.items():
+        a, b = bounds[code], bounds[code + 1]
+        sketch = QuantileSketch(pairs[a:b] % width, counts[a:b])
+        out[id_] = (int(attempts[code]), int(n_correct[code]), int(n_timed[code]), int(n_fast[code]), sketch)
+    return out
+
+
+def _lookup_questions(known: dict[str, tuple[str | None, str | None]], rows: list[dict]) -> None:
+    """Add (verse_ref_id, translation_id) for the batch's questions not seen before to `known`."""
+    for r in rows:
+        # Exported attempts carry both already.
+        if r["question_id"] not in known and "translation_id" in r:
+            known[r["question_id"]] = (r.get("verse_ref_id"), r["translation_id"])
+    missing = list({r["question_id"] for r in rows} - known.keys())
+    chunks = [missing[i : i + _FETCH_CHUNK] for i in range(0, len(missing), _FETCH_CHUNK)]
+    for found in db.gather(
+        *[
+            lambda chunk=chunk: db.fetch_all("question", "id, verse_ref_id, translation_id", in_filter=("id", chunk))
+            for chunk in chunks
+        ]
+    ):
+        known.update((q["id"], (q["verse_ref_id"], q["translation_id"])) for q in found)
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+def ingest(
+    rollups: Rollups,
+    before: str | None = None,
+    page_size: int = db.PAGE_SIZE,
+    source: PageSource = db.iter_attempt_pages,
+    batch: int = BATCH,
+) -> dict[str, int]:
+    """Fold every attempt after the watermark (and before `before`) into the rollups."""
+    pages = attempts = 0
+    pending: list[dict] = []
+    for rows in source(rollups.watermark(), before, page_size):
+        pages += 1
+        attempts += len(rows)
+        pending += rows
+        if len(pending) >= batch:
+            rollups.fold(pending)
+            pending = []
+    rollups.fold(pending)
+    return {"pages": pages, "attempts": attempts}
+
+
+def refresh_lapses(rollups: Rollups, pages: Callable[[], Iterable[list[dict]]] = db.iter_lapse_pages) -> dict[str, int]:
+    """Re-read every verse's user_verse_state lapse totals."""
+    return {"lapse_verses": rollups.set_lapses(row for page in pages() for row in page)}
+
+
+def run(
+    state_path: str = STATE_PATH,
+    rebuild: bool = False,
+    settle_seconds: float = SETTLE_SECONDS,
+    source: PageSource = db.iter_attempt_pages,
+) -> dict[str, int]:
+    """One pass of the job: fold in new attempts, then refresh the lapse totals."""
+    rollups = Rollups(state_path)
+    if rebuild:
+        rollups.reset()
+    before = db.to_timestamptz(datetime.now(timezone.utc) - timedelta(seconds=settle_seconds))
+    stats = {**ingest(rollups, before, source=source), **refresh_lapses(rollups)}
+    rollups.mark_updated()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Update the per-question and per-verse attempt rollups.")
+    p.add_argument("--state", default=STATE_PATH, help="SQLite state file")
+    p.add_argument("--rebuild", action="store_true", help="forget the state and reprocess every attempt")
+    p.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="skip attempts newer than this (s)")
+    p.add_argument("--from-export", metavar="DIR", help="read attempts from lib.attempt_export files, not Postgres")
+    args = p.parse_args(argv)
+    source = db.iter_attempt_pages
+    if args.from_export:
+        source = partial(attempt_export.iter_pages, root=args.from_export)
+    print(run(args.state, args.rebuild, args.settle, source))
+
+
+if __name__ == "__main__":
+    main()
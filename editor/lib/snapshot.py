@@ -0,0 +1,205 @@
+"""Versioned, memory-mapped binary snapshots of columnar data.
+
+A snapshot is one file of named columns, read back through `mmap`
+without parsing:
+
+    magic      8 bytes   b"LBSNAP\\0\\0"
+    version    u32       FORMAT_VERSION; other versions are rejected
+    length     u32       of the header
+    header     JSON      created_at, caller's meta, and per column its
+                         dtype, count and byte offset in the file
+    columns    …         fixed-width little-endian arrays, 8-byte aligned
+    heap       bytes     UTF-8 of every string column, back to back
+
+A string column is stored as `count + 1` u8 offsets into the heap, so
+string `i` is `heap[offsets[i]:offsets[i + 1]]`. Numeric columns come
+back as read-only numpy views on the mapping — nothing is copied until
+the caller does.
+
+`write` replaces the file atomically, so a reader never maps a partial
+snapshot. `lib.catalog` keeps the editor's catalog in one.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+MAGIC = b"LBSNAP\0\0"
+FORMAT_VERSION = 1
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+class SnapshotError(ValueError):
+    """The file is not a readable snapshot of this format version."""
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+def write(path: str | Path, columns: dict[str, Any], meta: dict | None = None) -> int:
+    """
+    Save `columns` (name → numpy array, or list of str) as a snapshot; return its size in bytes.
+
+    Arrays are stored with their own dtype, converted to little-endian.
+    """
+    arrays: list[tuple[str, str, np.ndarray]] = []  # (name, dtype or "str", stored array)
+    chunks: list[bytes] = []
+    heap_len = 0
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            arr = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+            arrays.append((name, arr.dtype.str, arr))
+            continue
+        encoded = [s.encode() for s in values]
+        offsets = np.full(len(encoded) + 1, heap_len, dtype="<u8")
+        offsets[1:] += np.cumsum([len(b) for b in encoded], dtype="<u8")
+        heap_len = int(offsets[-1])
+        chunks += encoded
+        arrays.append((name, "str", offsets))
+
+    # Offsets depend on the header's length, which depends on the offsets'
+    # digits; lay out from 0, then shift until the header stops growing.
+    layout: dict[str, dict] = {}
+    pos = 0
+    for name, kind, arr in arrays:
+        layout[name] = {"dtype": kind, "count": len(arr) - (kind == "str"), "offset": pos}
+        pos += arr.nbytes + _pad(arr.nbytes)
+    header = {
+        "created_at": time.time(),
+        "meta": meta or {},
+        "columns": layout,
+        "heap": {"offset": pos, "length": heap_len},
+    }
+    start = 0
+    while True:
+        raw = json.dumps(header, separators=(",", ":")).encode()
+        data_start = _PREAMBLE.size + len(raw) + _pad(_PREAMBLE.size + len(raw))
+        if data_start == start:
+            break
+        shift, start = data_start - start, data_start
+        for col in layout.values():
+            col["offset"] += shift
+        header["heap"]["offset"] += shift
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A temp file of its own, in case another thread or process writes the same snapshot.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(raw)))
+        f.write(raw)
+        f.write(b"\0" * _pad(_PREAMBLE.size + len(raw)))
+        for _, _, arr in arrays:
+            f.write(arr.tobytes())
+            f.write(b"\0" * _pad(arr.nbytes))
+        for b in chunks:
+            f.write(b)
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+class Snapshot:
+    """A mapped snapshot file. Column views stay valid while the object is alive."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise SnapshotError(f"{path}: {exc}") from None
+        self.path = Path(path)
+        if len(self._map) < _PREAMBLE.size:
+            raise SnapshotError(f"{path}: truncated")
+        magic, version, header_len = _PREAMBLE.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+        try:
+            header = json.loads(self._map[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        except ValueError:
+            raise SnapshotError(f"{path}: unreadable header") from None
+        self.created_at: float = header["created_at"]
+        self.meta: dict = header["meta"]
+        self._columns: dict[str, dict] = header["columns"]
+        self._heap = header["heap"]
+        ends = [self._heap["offset"] + self._heap["length"]]
+        for col in self._columns.values():
+            if col["dtype"] == "str":
+                ends.append(col["offset"] + 8 * (col["count"] + 1))
+            else:
+                ends.append(col["offset"] + np.dtype(col["dtype"]).itemsize * col["count"])
+        if max(ends) > len(self._map):
+            raise SnapshotError(f"{path}: truncated")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def age(self) -> float:
+        """Seconds since the snapshot was written."""
+        return time.time() - self.created_at
+
+    def count(self, name: str) -> int:
+        return self._columns[name]["count"]
+
+    def array(self, name: str) -> np.ndarray:
+        """A numeric column, as a read-only view on the mapping."""
+        col = self._columns[name]
+        if col["dtype"] == "str":
+            raise TypeError(f"{name} is a string column")
+        return np.frombuffer(self._map, dtype=col["dtype"], count=col["count"], offset=col["offset"])
+
+    def _offsets(self, name: str) -> np.ndarray:
+        col = self._columns[name]
+        if col["dtype"] != "str":
+            raise TypeError(f"{name} is not a string column")
+        return np.frombuffer(self._map, dtype="<u8", count=col["count"] + 1, offset=col["offset"])
+
+    def string(self, name: str, i: int) -> str:
+        """String `i` of a string column, decoded on its own."""
+        offsets = self._offsets(name)
+        base = self._heap["offset"]
+        return self._map[base + int(offsets[i]) : base + int(offsets[i + 1])].decode()
+
+    def strings(self, name: str) -> list[str]:
+        """A whole string column, decoded."""
+        offsets = self._offsets(name).tolist()
+        if len(offsets) < 2:
+            return []
+        base = self._heap["offset"]
+        first = offsets[0]
+        blob = self._map[base + first : base + offsets[-1]]
+        ends = [o - first for o in offsets]
+        if blob.isascii():
+            # Byte offsets are character offsets: decode once, slice.
+            text = blob.decode("ascii")
+            return [text[a:b] for a, b in zip(ends, ends[1:])]
+        return [blob[a:b].decode() for a, b in zip(ends, ends[1:])]
+
+    def columns(self) -> Iterable[str]:
+        return self._columns.keys()
+
+
+def read(path: str | Path) -> Snapshot | None:
+    """Map the snapshot at `path`; None if there is none. Raises SnapshotError if it can't be used."""
+    try:
+        return Snapshot(path)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,374 @@
+"""Spaced-repetition rules from app/lib/srs.ts, and a review-load simulator.
+
+The scalar functions mirror `calcNextDue` / `calcMastery` and the pool
+rule in app/actions/session.ts one-for-one. `simulate` applies the same
+rules to NumPy arrays holding every user-verse pair of a `Snapshot`, one
+simulated session at a time, to forecast reviews per day, mastery and
+pool growth. `Rules` holds the tunable constants so a sweep can try other
+intervals, difficulty factors or mastery steps; `RULES` is production.
+
+Time is measured in days from the moment the snapshot was taken.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+
+from lib import db
+
+
+@dataclass(frozen=True)
+class Rules:
+    """The constants of app/lib/srs.ts and generateSession."""
+
+    intervals_days: tuple[float, ...] = (1, 3, 7, 14, 30)  # SRS_INTERVALS_DAYS
+    factor_base: float = 1.5  # difficultyFactor = factor_base - difficulty / factor_scale
+    factor_scale: float = 1000
+    retry_minutes: float = 10  # an incorrect answer is due again this soon
+    mastery_gain: float = 0.1  # correct: mastery += gain × (1 − mastery)
+    mastery_loss: float = 0.2  # incorrect: mastery −= loss
+    mastered_at: float = 0.7  # "mastered" threshold; grows the pool
+    base_pool: int = 10  # poolSize = base_pool + mastered
+
+
+RULES = Rules()
+DEFAULT_DIFFICULTY = 500
+
+
+# ── Rules (scalar, as in the app) ─────────────────────────────────────────────
+
+def difficulty_factor(difficulty: float, rules: Rules = RULES) -> float:
+    return rules.factor_base - difficulty / rules.factor_scale
+
+
+def next_due_days(
+    correct_streak: int, is_correct: bool, difficulty: float = DEFAULT_DIFFICULTY, rules: Rules = RULES
+) -> float:
+    """Days until the next review (`calcNextDue`); pass the streak *after* the attempt."""
+    if not is_correct:
+        return rules.retry_minutes / (24 * 60)
+    days = rules.intervals_days[min(correct_streak, len(rules.intervals_days) - 1)]
+    return days * difficulty_factor(difficulty, rules)
+
+
+def calc_mastery(current: float, is_correct: bool, rules: Rules = RULES) -> float:
+    if is_correct:
+        return min(1, current + rules.mastery_gain * (1 - current))
+    return max(0, current - rules.mastery_loss)
+
+
+def pool_size(mastered_count: int, rules: Rules = RULES) -> int:
+    return rules.base_pool + mastered_count
+
+
+# ── Rules (vectorized) ────────────────────────────────────────────────────────
+
+def next_due_days_v(
+    streak: np.ndarray, correct: np.ndarray, difficulty: np.ndarray, rules: Rules = RULES
+) -> np.ndarray:
+    intervals = np.asarray(rules.intervals_days, dtype=np.float64)
+    days = intervals[np.minimum(streak, len(intervals) - 1)] * (rules.factor_base - difficulty / rules.factor_scale)
+    return np.where(correct, days, rules.retry_minutes / (24 * 60))
+
+
+def calc_mastery_v(mastery: np.ndarray, correct: np.ndarray, rules: Rules = RULES) -> np.ndarray:
+    return np.where(
+        correct,
+        np.minimum(1.0, mastery + rules.mastery_gain * (1 - mastery)),
+        np.maximum(0.0, mastery - rules.mastery_loss),
+    )
+
+
+# ── Snapshot ──────────────────────────────────────────────────────────────────
+
+@dataclass
+class Snapshot:
+    """
+    Every `user_verse_state` row as parallel arrays, plus what new verses
+    would be introduced next.
+
+    `difficulty` is the `question.difficulty` recordAttempt would use for
+    the pair. `new_difficulty` lists the difficulty of every released verse
+    in `global_rank` order.
+    """
+
+    n_users: int
+    user: np.ndarray  # int32 user index
+    mastery: np.ndarray  # float64
+    streak: np.ndarray  # int32 correct_streak
+    lapses: np.ndarray  # int32 lapse_count
+    due: np.ndarray  # float64, days from taken_at (negative = overdue)
+    difficulty: np.ndarray  # float64
+    new_difficulty: np.ndarray  # float64
+    taken_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def __len__(self) -> int:
+        return len(self.user)
+
+
+def load_snapshot(translation_id: str | None = None) -> Snapshot:
+    """
+    Read the current state from Supabase.
+
+    A pair's difficulty is its verse's active BLANKS question in
+    `translation_id`, or the mean over translations when None (the state
+    table doesn't record which translation a user plays).
+    """
+    q_filters: dict = {"type": "BLANKS", "active": True}
+    if translation_id:
+        q_filters["translation_id"] = translation_id
+    states, questions, releases = db.gather(
+        # Two order columns so range() paging is stable (no id column here).
+        lambda: db.fetch_all(
+            "user_verse_state",
+            "user_id, verse_ref_id, mastery, correct_streak, lapse_count, next_due_at",
+            order="user_id,verse_ref_id",
+        ),
+        lambda: db.fetch_all("question", "id, verse_ref_id, difficulty", filters=q_filters),
+        lambda: db.fetch_all(
+            "verse_release", "verse_ref_id, global_rank", order="verse_ref_id", filters={"released": True}
+        ),
+    )
+
+    totals: dict[str, list[float]] = {}
+    for q in questions:
+        t = totals.setdefault(q["verse_ref_id"], [0.0, 0])
+        t[0] += float(q["difficulty"])
+        t[1] += 1
+    difficulty_of = {ref: s / n for ref, (s, n) in totals.items()}
+
+    taken_at = datetime.now(timezone.utc)
+    users: dict[str, int] = {}
+    n = len(states)
+    user = np.empty(n, dtype=np.int32)
+    mastery = np.empty(n, dtype=np.float64)
+    streak = np.empty(n, dtype=np.int32)
+    lapses = np.empty(n, dtype=np.int32)
+    due = np.empty(n, dtype=np.float64)
+    difficulty = np.empty(n, dtype=np.float64)
+    for i, s in enumerate(states):
+        user[i] = users.setdefault(s["user_id"], len(users))
+        mastery[i] = s["mastery"]
+        streak[i] = s["correct_streak"]
+        lapses[i] = s["lapse_count"]
+        due[i] = _days_between(taken_at, s["next_due_at"])
+        difficulty[i] = difficulty_of.get(s["verse_ref_id"], DEFAULT_DIFFICULTY)
+
+    ranked = sorted(releases, key=lambda r: r["global_rank"])
+    new_difficulty = np.array(
+        [difficulty_of.get(r["verse_ref_id"], DEFAULT_DIFFICULTY) for r in ranked], dtype=np.float64
+    )
+    return Snapshot(len(users), user, mastery, streak, lapses, due, difficulty, new_difficulty, taken_at)
+
+
+def _days_between(start: datetime, iso: str | None) -> float:
+    if not iso:
+        return 0.0  # due now (the column defaults to now())
+    when = datetime.fromisoformat(iso)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - start).total_seconds() / 86400
+
+
+# ── Simulation ────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Behaviour:
+    """How simulated users play. Not taken from the app; tune to taste."""
+
+    active_rate: float = 0.6  # chance a user plays on a given day
+    sessions_per_day: int = 1
+    session_size: int = 10  # generateSession's `count`
+    p_correct: float = 0.7  # at mastery 0, difficulty 500
+    p_mastery: float = 0.25  # added at mastery 1
+    p_difficulty: float = 0.15  # subtracted at difficulty 1000 (added at 0)
+
+
+@dataclass
+class Forecast:
+    """Per-day results of `simulate` (index 0 is the first simulated day)."""
+
+    due: np.ndarray  # pairs due at some point that day, backlog included, at day start
+    reviews: np.ndarray  # attempts on seen verses (due + near-due)
+    new: np.ndarray  # verses introduced
+    correct_rate: np.ndarray
+    mastered: np.ndarray  # pairs with mastery >= mastered_at at day end
+    mean_pool: np.ndarray  # average pool size over users at day end
+    mastery_hist: np.ndarray  # (days, 10) counts of mastery in [0, .1), …, [.9, 1]
+    pairs: np.ndarray  # user-verse pairs at day end
+
+    def rows(self) -> list[dict]:
+        """One dict per day, for tables and charts."""
+        return [
+            {
+                "day": d + 1,
+                "due": int(self.due[d]),
+                "reviews": int(self.reviews[d]),
+                "new": int(self.new[d]),
+                "correct_rate": round(float(self.correct_rate[d]), 3),
+                "mastered": int(self.mastered[d]),
+                "mean_pool": round(float(self.mean_pool[d]), 1),
+                "pairs": int(self.pairs[d]),
+            }
+            for d in range(len(self.due))
+        ]
+
+
+class _Pairs:
+    """Growable struct-of-arrays copy of a snapshot's pairs."""
+
+    def __init__(self, snap: Snapshot) -> None:
+        self.n = len(snap)
+        cap = max(16, self.n * 5 // 4)
+        self.user = _grown(snap.user, cap)
+        self.mastery = _grown(snap.mastery, cap)
+        self.streak = _grown(snap.streak, cap)
+        self.lapses = _grown(snap.lapses, cap)
+        self.due = _grown(snap.due, cap)
+        self.difficulty = _grown(snap.difficulty, cap)
+
+    def append(self, user: np.ndarray, difficulty: np.ndarray, due: float) -> np.ndarray:
+        """Add fresh pairs (mastery 0, streak 0); return their indices."""
+        k = len(user)
+        if self.n + k > len(self.user):
+            cap = max(self.n + k, len(self.user) * 2)
+            for name in ("user", "mastery", "streak", "lapses", "due", "difficulty"):
+                setattr(self, name, _grown(getattr(self, name), cap))
+        idx = np.arange(self.n, self.n + k)
+        self.user[idx] = user
+        self.mastery[idx] = 0
+        self.streak[idx] = 0
+        self.lapses[idx] = 0
+        self.due[idx] = due
+        self.difficulty[idx] = difficulty
+        self.n += k
+        return idx
+
+
+def _grown(a: np.ndarray, cap: int) -> np.ndarray:
+    out = np.zeros(cap, dtype=a.dtype)
+    out[: len(a)] = a
+    return out
+
+
+def first_k_per_user(idx: np.ndarray, user: np.ndarray, key: np.ndarray, k: int) -> np.ndarray:
+    """The entries of `idx` with the `k` smallest `key` values per user."""
+    if k <= 0 or idx.size == 0:
+        return idx[:0]
+    u = user[idx]
+    crowded = np.bincount(u)[u] > k
+    if not crowded.any():
+        return idx
+    many, u = idx[crowded], u[crowded]
+    # One float sort on (user, key) is much cheaper than a two-key lexsort.
+    kv = key[many]
+    lo = kv.min()
+    order = np.argsort(u * (kv.max() - lo + 1.0) + (kv - lo))
+    many, u = many[order], u[order]
+    starts = np.flatnonzero(np.r_[True, u[1:] != u[:-1]])
+    rank = np.arange(u.size) - np.repeat(starts, np.diff(np.r_[starts, u.size]))
+    return np.concatenate([idx[~crowded], many[rank < k]])
+
+
+def simulate(
+    snap: Snapshot,
+    days: int = 90,
+    rules: Rules = RULES,
+    behaviour: Behaviour = Behaviour(),
+    seed: int = 0,
+) -> Forecast:
+    """
+    Forecast `days` days of play from `snap`.
+
+    Each active user plays `sessions_per_day` sessions spread evenly over
+    the day. A session is built like generateSession: up to 60% of
+    `session_size` due reviews (most overdue first), up to 30% near-due
+    (due within 24 h, soonest first), and the rest new verses while the
+    user has room in their pool. Every pick is answered once and updated
+    with `rules`, as recordAttempt does.
+
+    Simplifications: a new verse gets the difficulty of the next verse in
+    `global_rank` order (the app introduces the easiest unseen verse in
+    the pool), difficulties don't drift, and the app's "nothing due, show
+    random verses" fallback isn't modelled.
+    """
+    rng = np.random.default_rng(seed)
+    p = _Pairs(snap)
+    n_users = snap.n_users
+    n_released = len(snap.new_difficulty)
+    introduced = np.bincount(snap.user, minlength=n_users).astype(np.int64)
+
+    size = behaviour.session_size
+    due_target = int(size * 0.6)
+    near_target = int(size * 0.3)
+    new_target = size - due_target - near_target
+    sessions = max(1, behaviour.sessions_per_day)
+
+    out = {k: np.zeros(days) for k in ("due", "reviews", "new", "correct", "mastered", "mean_pool", "pairs")}
+    hist = np.zeros((days, 10), dtype=np.int64)
+
+    mastered = np.bincount(snap.user[snap.mastery >= rules.mastered_at], minlength=n_users)
+
+    for d in range(days):
+        active = rng.random(n_users) < behaviour.active_rate
+        out["due"][d] = np.count_nonzero(p.due[: p.n] < d + 1)
+        for s in range(sessions):
+            now = d + (s + 0.5) / sessions
+            user, due = p.user, p.due
+
+            # Everything due within 24 h, then split; one pass over all pairs.
+            soon = np.flatnonzero(p.due[: p.n] <= now + 1)
+            soon = soon[active[user[soon]]]
+            is_due = due[soon] <= now
+            picked_due = first_k_per_user(soon[is_due], user, due, due_target)
+            picked_near = first_k_per_user(soon[~is_due], user, due, near_target)
+
+            room = np.minimum(rules.base_pool + mastered, n_released) - introduced
+            n_new = np.where(active, np.clip(room, 0, new_target), 0)
+            new_users = np.repeat(np.arange(n_users, dtype=np.int32), n_new)
+            # j-th new verse of a user is their (introduced + j)-th in rank order
+            offsets = np.arange(new_users.size) - np.repeat(np.cumsum(n_new) - n_new, n_new)
+            new_idx = p.append(new_users, snap.new_difficulty[introduced[new_users] + offsets], now)
+            introduced += n_new
+
+            picked = np.concatenate([picked_due, picked_near, new_idx])
+            if picked.size == 0:
+                continue
+            correct = _answer(rng, p.mastery[picked], p.difficulty[picked], behaviour)
+            streak = np.where(correct, p.streak[picked] + 1, 0)
+            was = p.mastery[picked] >= rules.mastered_at
+            p.mastery[picked] = calc_mastery_v(p.mastery[picked], correct, rules)
+            now_mastered = p.mastery[picked] >= rules.mastered_at
+            np.add.at(mastered, p.user[picked], now_mastered.astype(np.int64) - was)
+            p.streak[picked] = streak
+            p.lapses[picked] += ~correct
+            p.due[picked] = now + next_due_days_v(streak, correct, p.difficulty[picked], rules)
+
+            out["reviews"][d] += picked_due.size + picked_near.size
+            out["new"][d] += new_idx.size
+            out["correct"][d] += np.count_nonzero(correct)
+
+        out["mastered"][d] = mastered.sum()
+        out["mean_pool"][d] = rules.base_pool + out["mastered"][d] / max(1, n_users)
+        out["pairs"][d] = p.n
+        hist[d] = np.bincount(np.minimum((p.mastery[: p.n] * 10).astype(np.int64), 9), minlength=10)
+
+    attempts = out["reviews"] + out["new"]
+    return Forecast(
+        due=out["due"],
+        reviews=out["reviews"],
+        new=out["new"],
+        correct_rate=np.divide(out["correct"], attempts, out=np.zeros(days), where=attempts > 0),
+        mastered=out["mastered"],
+        mean_pool=out["mean_pool"],
+        mastery_hist=hist,
+        pairs=out["pairs"],
+    )
+
+
+def _answer(rng: np.random.Generator, mastery: np.ndarray, difficulty: np.ndarray, b: Behaviour) -> np.ndarray:
+    p = b.p_correct + b.p_mastery * mastery - b.p_difficulty * (difficulty - DEFAULT_DIFFICULTY) / DEFAULT_DIFFICULTY
+    return rng.random(mastery.size) < np.clip(p, 0.02, 0.98)
@@ -0,0 +1,287 @@
+"""Suggest BLANKS words without an LLM, from corpus word statistics.
+
+`build` reads a translation's verse texts once and counts, per term:
+
+* `df`    — verses containing it (→ IDF: rare words make better blanks),
+* `count` — occurrences,
+* `cap`   — occurrences capitalized mid-sentence (→ proper names).
+
+The counts are saved as arrays in `state/suggest/<translation>.npz` and
+folded into one score per term on load, so scoring a verse is a term
+lookup per word — tens of microseconds. Following IMPORT_PROMPT
+(lib.prompts), function words and other stopwords never score, names of
+God score high however common they are, other names get a small bonus,
+and two blanks are never the same word or side by side unless the verse
+leaves no choice.
+
+`preview_import` uses the saved statistics to pre-fill missing blanks and
+to note weak ones.
+
+Run:
+    cd editor
+    python -m lib.suggest build NIV                  # read verse_text, save the statistics
+    python -m lib.suggest fill NIV verses.json       # fill in missing blanks in an import file
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from lib import blanks
+from lib.textindex import tokenize
+
+STATS_DIR = os.environ.get("SUGGEST_STATS_DIR", str(Path(__file__).parents[1] / "state" / "suggest"))
+
+# IMPORT_PROMPT's function words (lib.blanks) plus pronouns, auxiliaries
+# and other words too common to be worth a blank.
+STOPWORDS = blanks.FUNCTION_WORDS | frozenset(
+    """
+    i me my mine you your yours thou thee thy thine ye he him his she her hers we us our ours they them their theirs
+    this these those there here then when where who whom whose which what why how if because also even not no nor
+    all any some every each will shall would should may might can could must let unto up out down over about
+    one very just now said says say
+    """.split()
+)
+
+# Names and titles of God, which the prompt asks for first.
+DIVINE_NAMES = frozenset(
+    """
+    god god's lord lord's jesus jesus' christ christ's spirit messiah yahweh jehovah almighty immanuel emmanuel
+    """.split()
+)
+
+DIVINE_SCORE = 0.95
+NAME_BONUS = 0.1
+MIN_SCORE = 0.2  # any word that isn't a stopword
+RARE_DF = 3  # words in this many verses or fewer all count as "rare"
+
+
+@lru_cache(maxsize=65536)
+def term(word: str) -> str:
+    """Case-folded index term(s) of one split word ("Lord," → "lord", "well-pleased" → "well-pleased")."""
+    return "-".join(tokenize(word))
+
+
+# ── Statistics ────────────────────────────────────────────────────────────────
+
+class WordStats:
+    """Per-term corpus counts as parallel arrays, plus a term → score map."""
+
+    def __init__(self, terms: list[str], df: np.ndarray, count: np.ndarray, cap: np.ndarray, n_docs: int) -> None:
+        self.terms = terms
+        self.df, self.count, self.cap = df, count, cap
+        self.n_docs = n_docs
+        self._max_idf = math.log((n_docs + 1) / (RARE_DF + 1)) or 1.0
+        self.scores = {t: self._score(i) for i, t in enumerate(terms)}
+        self._unseen = self._idf_score(0)
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "WordStats":
+        df: Counter[str] = Counter()
+        count: Counter[str] = Counter()
+        cap: Counter[str] = Counter()
+        n_docs = 0
+        for text in texts:
+            n_docs += 1
+            seen = set()
+            sentence_start = True
+            for word in blanks.words(text):
+                t = term(word)
+                if t:
+                    count[t] += 1
+                    seen.add(t)
+                    if word[:1].isupper() and not sentence_start:
+                        cap[t] += 1
+                    sentence_start = False
+                if word.endswith((".", "!", "?", ".”", "?”", "!”", '."', '?"', '!"')):
+                    sentence_start = True
+            df.update(seen)
+        terms = sorted(df)
+        return cls(
+            terms,
+            np.array([df[t] for t in terms], dtype=np.uint32),
+            np.array([count[t] for t in terms], dtype=np.uint32),
+            np.array([cap[t] for t in terms], dtype=np.uint32),
+            n_docs,
+        )
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+            df=self.df,
+            count=self.count,
+            cap=self.cap,
+            n_docs=np.array(self.n_docs),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WordStats":
+        with np.load(path) as z:
+            raw = z["terms"].tobytes().decode("utf-8")
+            return cls(raw.split("\n") if raw else [], z["df"], z["count"], z["cap"], int(z["n_docs"]))
+
+    # ── Scoring ───────────────────────────────────────────────────────────────
+
+    def _idf_score(self, df: int) -> float:
+        idf = min(math.log((self.n_docs + 1) / (df + 1)), self._max_idf)
+        return MIN_SCORE + (1 - MIN_SCORE) * max(idf, 0.0) / self._max_idf
+
+    def _score(self, i: int) -> float:
+        t = self.terms[i]
+        if t in STOPWORDS or t.isdigit():
+            return 0.0
+        if t in DIVINE_NAMES:
+            return DIVINE_SCORE
+        score = self._idf_score(int(self.df[i]))
+        if self.cap[i] * 2 > self.count[i]:
+            score = min(1.0, score + NAME_BONUS)
+        return score
+
+    def score(self, word: str) -> float:
+        """How good a blank `word` makes, 0 (never) to 1."""
+        return self._term_score(term(word))
+
+    def _term_score(self, t: str) -> float:
+        s = self.scores.get(t)
+        if s is not None:
+            return s
+        if not t or t in STOPWORDS or t.isdigit():
+            return 0.0
+        return DIVINE_SCORE if t in DIVINE_NAMES else self._unseen
+
+    def _scored(self, text: str) -> tuple[tuple[str, ...], list[str], list[float]]:
+        words = blanks.words(text)
+        terms = [term(w) for w in words]
+        return words, terms, [self._term_score(t) for t in terms]
+
+    def suggest(self, text: str, k: int = 2) -> list[int]:
+        """Up to `k` word indices for `text`, the best words first, returned sorted."""
+        _, terms, scores = self._scored(text)
+        return self._pick(terms, scores, k)
+
+    @staticmethod
+    def _pick(terms: list[str], scores: list[float], k: int) -> list[int]:
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: (-scores[i], i))
+        picked: list[int] = []
+        for strict in (True, False):
+            for i in ranked:
+                if len(picked) == k:
+                    break
+                if i in picked or any(terms[i] == terms[j] for j in picked):
+                    continue
+                if strict and any(abs(i - j) == 1 for j in picked):
+                    continue
+                picked.append(i)
+        return sorted(picked)
+
+    def review(self, text: str, indices: list[int]) -> list[str]:
+        """Notes on chosen blanks: stopwords, repeats, neighbours, and much better words left out."""
+        words, terms, scores = self._scored(text)
+        notes: list[str] = []
+        chosen = sorted(i for i in indices if 0 <= i < len(words))
+        if len(chosen) != len(indices):
+            notes.append("index past the last word")
+        notes += [f"“{words[i]}” is a function word" for i in chosen if scores[i] == 0]
+        if len({terms[i] for i in chosen}) < len(chosen):
+            notes.append("the same word is blanked twice")
+        if any(b - a == 1 for a, b in zip(chosen, chosen[1:])):
+            notes.append("blanks are next to each other")
+        weakest = min((scores[i] for i in chosen), default=0.0)
+        better = [
+            i for i in self._pick(terms, scores, max(len(chosen), 1))
+            if i not in chosen and scores[i] >= 2 * weakest
+        ]
+        if better:
+            notes.append("stronger: " + ", ".join(f"“{words[i]}” ({i})" for i in better))
+        return notes
+
+    def suggest_many(self, texts: Iterable[str], k: int = 2) -> list[list[int]]:
+        return [self.suggest(text, k) for text in texts]
+
+
+# ── Saved statistics ──────────────────────────────────────────────────────────
+
+_loaded: dict[str, tuple[float, WordStats]] = {}
+
+
+def stats_path(translation_id: str, root: str = STATS_DIR) -> Path:
+    return Path(root) / f"{translation_id}.npz"
+
+
+def get_stats(translation_id: str, root: str = STATS_DIR) -> WordStats | None:
+    """The saved statistics for a translation (reloaded when the file changes), or None."""
+    path = stats_path(translation_id, root)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(str(path))
+    if cached is None or cached[0] != mtime:
+        cached = _loaded[str(path)] = (mtime, WordStats.load(path))
+    return cached[1]
+
+
+def build(translation_id: str, texts: Iterable[str], root: str = STATS_DIR) -> WordStats:
+    stats = WordStats.from_texts(texts)
+    stats.save(stats_path(translation_id, root))
+    return stats
+
+
+def has_valid_blanks(verse: dict) -> bool:
+    """Whether an import row already has 2 distinct in-range blanks."""
+    idx = verse.get("blanks")
+    n = len(blanks.words(verse.get("text") or ""))
+    return (
+        isinstance(idx, list) and len(idx) == 2 and len(set(idx)) == 2
+        and all(isinstance(i, int) and 0 <= i < n for i in idx)
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Corpus statistics for suggesting BLANKS words.")
+    sub = p.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="read verse_text and save the statistics")
+    b.add_argument("translation")
+    f = sub.add_parser("fill", help="fill in missing or invalid blanks in an import JSON file")
+    f.add_argument("translation", help="whose statistics to use")
+    f.add_argument("file", type=Path)
+    f.add_argument("--out", type=Path, help="write here instead of overwriting the file")
+    args = p.parse_args(argv)
+
+    if args.command == "build":
+        from lib import db  # lib.db imports this module
+
+        pages = db.iter_rows("verse_text", "verse_ref_id, text", key="verse_ref_id", filters={"translation_id": args.translation})
+        stats = build(args.translation, (r["text"] for page in pages for r in page))
+        print(f"{stats.n_docs:,} verses, {len(stats.terms):,} terms → {stats_path(args.translation)}")
+        return
+
+    stats = get_stats(args.translation)
+    if stats is None:
+        sys.exit(f"no statistics for {args.translation}; run: python -m lib.suggest build {args.translation}")
+    data = json.loads(args.file.read_text(encoding="utf-8"))
+    verses = data.get("verses", []) if isinstance(data, dict) else data
+    todo = [v for v in verses if not has_valid_blanks(v)]
+    for v, picked in zip(todo, stats.suggest_many(v["text"] for v in todo)):
+        v["blanks"] = picked
+    (args.out or args.file).write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"filled blanks for {len(todo):,} of {len(verses):,} verses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Inverted index over verse text, ranked with BM25.
+
+One `TextIndex` covers the texts of a single translation (see
+`lib.catalog`). Query syntax, as typed into the editor's search box:
+
+    loved world        every word must appear (AND)
+    "only son"         the words must appear next to each other, in order
+    lov*               any word starting with "lov"
+
+Words are case-folded; punctuation is ignored, apostrophes inside a word
+are kept ("God's" → "god's").
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+_WORD = re.compile(r"\w+(?:['’]\w+)*")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into case-folded index terms."""
+    return [w.replace("’", "'") for w in _WORD.findall(text.casefold())]
+
+
+class TextIndex:
+    """
+    Term → postings map over a list of texts, addressed by list position.
+
+    Postings are kept as two parallel sorted arrays (rows, term counts) so
+    a full-Bible translation stays compact. `texts` is held by reference
+    and only read to verify phrase matches.
+    """
+
+    def __init__(self, texts: list[str]) -> None:
+        self.texts = texts
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.doc_len = array("l")
+        self.total_len = 0
+        self._vocab: list[str] | None = None
+        for row, text in enumerate(texts):
+            self._add(row, text)
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    def _add(self, row: int, text: str) -> None:
+        counts = Counter(tokenize(text))
+        while len(self.doc_len) <= row:
+            self.doc_len.append(0)
+        length = sum(counts.values())
+        self.doc_len[row] = length
+        self.total_len += length
+        for term, tf in counts.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                self.postings[term] = (array("l", [row]), array("l", [tf]))
+                self._vocab = None
+                continue
+            rows, tfs = entry
+            if not rows or rows[-1] < row:
+                rows.append(row)
+                tfs.append(tf)
+            else:
+                at = bisect_left(rows, row)
+                rows.insert(at, row)
+                tfs.insert(at, tf)
+
+    def _remove(self, row: int, text: str) -> None:
+        for term in set(tokenize(text)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            rows, tfs = entry
+            at = bisect_left(rows, row)
+            if at < len(rows) and rows[at] == row:
+                del rows[at]
+                del tfs[at]
+                if not rows:
+                    del self.postings[term]
+                    self._vocab = None
+        if row < len(self.doc_len):
+            self.total_len -= self.doc_len[row]
+            self.doc_len[row] = 0
+
+    def update(self, row: int, old_text: str | None, new_text: str) -> None:
+        """Re-index one row after its text changed (old_text=None for a new row)."""
+        if old_text is not None:
+            self._remove(row, old_text)
+        self._add(row, new_text)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def _expand(self, prefix: str) -> list[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        lo = bisect_left(self._vocab, prefix)
+        hi = bisect_right(self._vocab, prefix + "\U0010ffff")
+        return self._vocab[lo:hi]
+
+    def _score_terms(self, terms: list[str], within: dict[int, float] | None) -> dict[int, float]:
+        """BM25 contribution of any of `terms` (one query word) per matching row in `within`."""
+        n_docs = len(self.doc_len) or 1
+        avg_len = self.total_len / n_docs if self.total_len else 1.0
+        scores: dict[int, float] = {}
+        doc_len = self.doc_len
+        for term in terms:
+            rows, tfs = self.postings[term]
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for row, tf in zip(rows, tfs):
+                if within is not None and row not in within:
+                    continue
+                norm = tf + K1 * (1 - B + B * doc_len[row] / avg_len)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (K1 + 1) / norm
+        return scores
+
+    def search(self, query: str) -> list[tuple[int, float]]:
+        """
+        Return every (row, score) matching `query`, best first.
+
+        Ties keep row order. An empty query matches nothing.
+        """
+        words: list[tuple[str, bool]] = []  # (term, is_prefix)
+        phrases: list[list[str]] = []
+        for phrase, bare in _QUERY.findall(query):
+            if phrase:
+                terms = tokenize(phrase)
+                words += [(t, False) for t in terms]
+                if len(terms) > 1:
+                    phrases.append(terms)
+            else:
+                prefix = bare.endswith("*")
+                words += [(t, prefix) for t in tokenize(bare.rstrip("*"))]
+        if not words:
+            return []
+
+        # Score the rarest words first so the AND set shrinks quickly.
+        per_word: list[list[str]] = []
+        for term, prefix in words:
+            terms = self._expand(term) if prefix else ([term] if term in self.postings else [])
+            if not terms:
+                return []
+            per_word.append(terms)
+        per_word.sort(key=lambda ts: sum(len(self.postings[t][0]) for t in ts))
+
+        totals: dict[int, float] | None = None
+        for terms in per_word:
+            scores = self._score_terms(terms, totals)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {row: s + scores[row] for row, s in totals.items() if row in scores}
+            if not totals:
+                return []
+        assert totals is not None
+
+        for pattern in map(_phrase_pattern, phrases):
+            texts = self.texts
+            totals = {row: s for row, s in totals.items() if pattern.search(texts[row].casefold())}
+        return sorted(totals.items(), key=lambda rs: (-rs[1], rs[0]))
+
+
+def _phrase_pattern(terms: list[str]) -> re.Pattern:
+    """Regex matching `terms` as consecutive words of case-folded text."""
+    words = [re.escape(t).replace("'", "['’]") for t in terms]
+    return re.compile(r"(?<![\w'’])" + r"[^\w'’]+".join(words) + r"(?![\w'’])")
@@ -0,0 +1,144 @@
+"""Drip order — rearrange `verse_release.global_rank` in bulk.
+
+Opened from the sidebar of the editor (Streamlit multipage app).
+"""
+
+from __future__ import annotations
+
+import streamlit as st
+
+from lib import db
+from lib.catalog import get_catalog
+
+st.set_page_config(page_title="Drip Order", page_icon="🔀", layout="wide")
+
+st.markdown("## 🔀 Drip Order")
+st.caption(
+    "New users meet verses in `global_rank` order: a verse is served once its rank is within "
+    "the user's pool size. Rearrange the order below, then save it in one batched write — only "
+    "verses whose rank has to change are written."
+)
+
+WINDOW = 200  # rows shown in the order table
+
+catalog = get_catalog()
+releases = db.get_drip_order()
+current = {r["verse_ref_id"]: r["global_rank"] for r in releases}
+released = {r["verse_ref_id"]: r["released"] for r in releases}
+
+col_trans, col_reload = st.columns([3, 1])
+translation = col_trans.selectbox("Show text from", [t["id"] for t in db.get_translations()])
+discard = col_reload.button("↩️ Discard changes")
+if discard or "drip_order" not in st.session_state:
+    st.session_state.drip_order = [r["verse_ref_id"] for r in releases]
+if discard:
+    st.session_state.pop("drip_saved", None)
+
+order: list[str] = st.session_state.drip_order
+# Verses imported since the order was loaded go to the end, as db.rerank would put them.
+listed = set(order)
+order.extend(r["verse_ref_id"] for r in releases if r["verse_ref_id"] not in listed)
+order[:] = [ref for ref in order if ref in current]
+
+if st.session_state.get("drip_saved") is not None:
+    st.success(f"✅ Saved — {st.session_state.drip_saved:,} ranks written.")
+
+if not order:
+    st.info("No verse_release rows yet — import verses first.")
+    st.stop()
+
+
+# ── Move a block ──────────────────────────────────────────────────────────────
+
+with st.expander("Move verses", expanded=True):
+    book_names = {b["id"]: b["name"] for b in db.get_books()}
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 2])
+    book = c1.selectbox("Book", [None, *book_names], format_func=lambda b: "Any" if b is None else book_names[b])
+    ch_from = c2.number_input("Chapters from", min_value=0, value=0, help="0 = every chapter")
+    ch_to = c3.number_input("to", min_value=0, value=0)
+    text = c4.text_input("Text contains", placeholder="e.g. shepherd")
+
+    c1, c2, c3 = st.columns([2, 1, 1])
+    where = c1.radio("Move to", ["Front", "Before position", "End"], horizontal=True)
+    position = c2.number_input(
+        "Position", min_value=1, max_value=len(order), value=1, disabled=where != "Before position"
+    )
+
+    _, matches = catalog.search(translation, book, None, None, text) if (book or text.strip()) else (0, [])
+    selected = {
+        r["verse_ref_id"]
+        for r in matches
+        if r["verse_ref_id"] in current
+        and (not ch_from or r["chapter"] >= ch_from)
+        and (not ch_to or r["chapter"] <= ch_to)
+    }
+    c3.markdown(f"**{len(selected):,}** ranked verses selected")
+    if c3.button("Move", disabled=not selected):
+        block = [ref for ref in order if ref in selected]  # keep their relative order
+        rest = [ref for ref in order if ref not in selected]
+        at = {"Front": 0, "End": len(rest)}.get(where)
+        if at is None:
+            # "Before position" refers to the order as shown, before the move.
+            at = sum(1 for ref in order[: position - 1] if ref not in selected)
+        st.session_state.drip_order = rest[:at] + block + rest[at:]
+        st.session_state.pop("drip_saved", None)
+        st.rerun()
+
+
+# ── Order ─────────────────────────────────────────────────────────────────────
+
+plan = db.plan_rerank(current, order)
+duplicates = len(current) - len(set(current.values()))
+early = sum(1 for ref, rank in plan.items() if rank <= 10 and released.get(ref))
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Ranked verses", f"{len(order):,}")
+c2.metric("Ranks to write", f"{len(plan):,}")
+c3.metric("Duplicate ranks now", f"{duplicates:,}", help="Saving any order resolves them")
+if early:
+    st.warning(f"⚠️ {early} released verse(s) move to rank ≤ 10 — new users will see them immediately.")
+
+start = st.number_input("Show from position", min_value=1, max_value=len(order), value=1, step=WINDOW)
+window = order[start - 1 : start - 1 + WINDOW]
+shown = [float(start + i) for i in range(len(window))]
+rows = catalog.describe(window, translation)
+st.caption("Edit **Position** to move a verse in front of the one now at that position; 2.5 goes between 2 and 3.")
+edited = st.data_editor(
+    {
+        "Position": shown,
+        "Reference": [r["reference"] for r in rows],
+        "Text": [r["text"][:120] for r in rows],
+        "Rank now": [current.get(ref) for ref in window],
+        "Rank after save": [plan.get(ref, current.get(ref)) for ref in window],
+    },
+    disabled=["Reference", "Text", "Rank now", "Rank after save"],
+    hide_index=True,
+    use_container_width=True,
+    key=f"drip_window_{hash(tuple(window))}",
+)
+typed = edited["Position"] if isinstance(edited, dict) else edited["Position"].tolist()
+# A cleared cell (None / NaN) leaves the verse where it was.
+typed = [shown[j] if p is None or p != p else float(p) for j, p in enumerate(typed)]
+if typed != shown:
+    # Sort by position; an edited verse goes before the verse it ties with.
+    keys = [(float(i + 1), True) for i in range(len(order))]
+    for j, p in enumerate(typed):
+        if p != shown[j]:
+            keys[start - 1 + j] = (p, False)
+    st.session_state.drip_order = [order[i] for i in sorted(range(len(order)), key=keys.__getitem__)]
+    st.session_state.pop("drip_saved", None)
+    st.rerun()
+
+
+# ── Save ──────────────────────────────────────────────────────────────────────
+
+if st.button(f"💾 Save order ({len(plan):,} writes)", type="primary", disabled=not plan):
+    try:
+        changes = db.rerank(order)
+    except Exception as exc:
+        st.error(f"Save failed: {exc}")
+    else:
+        catalog.ranks_saved(changes)
+        del st.session_state["drip_order"]
+        st.session_state.drip_saved = len(changes)
+        st.rerun()
@@ -0,0 +1,74 @@
+"""Duplicates — pairs of verses with near-identical text in one translation.
+
+Opened from the sidebar of the editor (Streamlit multipage app). Compares
+every verse of the translation through the catalog's MinHash/LSH index
+(lib/dedup.py).
+"""
+
+from __future__ import annotations
+
+import time
+
+import streamlit as st
+
+from lib import db, dedup
+from lib.catalog import get_catalog
+
+st.set_page_config(page_title="Duplicates", page_icon="👯", layout="wide")
+
+st.markdown("## 👯 Duplicates")
+st.caption(
+    "Verses whose texts match once case and punctuation are ignored, or differ in a word or two: usually the "
+    "same verse imported under a second reference. Similarity is the share of 5-letter pieces the texts have "
+    "in common (Jaccard)."
+)
+
+col_trans, col_threshold, col_run = st.columns([1.5, 3, 1])
+translation = col_trans.selectbox("Translation", [t["id"] for t in db.get_translations()])
+threshold = col_threshold.slider(
+    "Minimum similarity",
+    min_value=0.3,
+    max_value=1.0,
+    value=dedup.THRESHOLD,
+    step=0.05,
+    help="1.0 is the same words; near 0.5 catches parallel passages too.",
+)
+col_run.write("")
+if col_run.button("🔎 Find duplicates", type="primary"):
+    with st.spinner("Comparing verses…"):
+        start = time.perf_counter()
+        pairs = get_catalog().duplicate_pairs(translation, threshold)
+    st.session_state.duplicates = {
+        "translation": translation,
+        "threshold": threshold,
+        "pairs": pairs,
+        "seconds": time.perf_counter() - start,
+    }
+
+report = st.session_state.get("duplicates")
+if not report:
+    st.stop()
+
+pairs = report["pairs"]
+st.markdown(
+    f"**{len(pairs):,} pairs** in {report['translation']} at similarity ≥ {report['threshold']:.2f} "
+    f"· {report['seconds']:.1f} s"
+)
+if not pairs:
+    st.stop()
+
+st.dataframe(
+    [
+        {
+            "Similarity %": round(100 * p["similarity"], 1),
+            "Verse": p["reference_a"],
+            "Duplicate": p["reference_b"],
+            "Text": p["text_a"],
+            "Duplicate text": p["text_b"],
+        }
+        for p in pairs
+    ],
+    hide_index=True,
+    use_container_width=True,
+    height=600,
+)
@@ -0,0 +1,151 @@
+"""SRS forecast — simulate review load under the app's spaced-repetition rules.
+
+Opened from the sidebar of the editor (Streamlit multipage app).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import streamlit as st
+
+from lib import db, srs
+
+st.set_page_config(page_title="SRS Forecast", page_icon="📈", layout="wide")
+
+st.markdown("## 📈 SRS Forecast")
+st.caption(
+    "Replays the rules of app/lib/srs.ts and generateSession over every user-verse state, "
+    "starting from the live `user_verse_state` table. Change the rules below to compare "
+    "against production."
+)
+
+
+# ── Snapshot ──────────────────────────────────────────────────────────────────
+
+translations = [t["id"] for t in db.get_translations()]
+col_trans, col_reload = st.columns([3, 1])
+translation = col_trans.selectbox(
+    "Question difficulty from",
+    [None] + translations,
+    format_func=lambda t: "Mean over translations" if t is None else t,
+)
+if (
+    col_reload.button("🔄 Reload snapshot")
+    or "srs_snapshot" not in st.session_state
+    or st.session_state.srs_snapshot_key != translation
+):
+    with st.spinner("Loading user_verse_state…"):
+        st.session_state.srs_snapshot = srs.load_snapshot(translation)
+        st.session_state.srs_snapshot_key = translation
+
+snap: srs.Snapshot = st.session_state.srs_snapshot
+st.markdown(
+    f"**{len(snap):,} user-verse states** · {snap.n_users:,} users · "
+    f"{len(snap.new_difficulty):,} released verses · taken {snap.taken_at:%Y-%m-%d %H:%M} UTC"
+)
+if not len(snap):
+    st.info("No user_verse_state rows yet — nothing to forecast.")
+    st.stop()
+
+
+# ── Parameters ────────────────────────────────────────────────────────────────
+
+with st.expander("Rules", expanded=True):
+    base = srs.RULES
+    c1, c2, c3, c4 = st.columns(4)
+    intervals_text = c1.text_input("Intervals (days)", ", ".join(f"{d:g}" for d in base.intervals_days))
+    factor_base = c2.number_input("Difficulty factor base", value=base.factor_base, step=0.1)
+    factor_scale = c3.number_input("Difficulty factor scale", value=float(base.factor_scale), step=100.0)
+    retry_minutes = c4.number_input("Retry after wrong (min)", value=float(base.retry_minutes), step=5.0)
+    c1, c2, c3, c4 = st.columns(4)
+    mastery_gain = c1.number_input("Mastery gain", value=base.mastery_gain, step=0.01)
+    mastery_loss = c2.number_input("Mastery loss", value=base.mastery_loss, step=0.01)
+    mastered_at = c3.number_input("Mastered at", value=base.mastered_at, step=0.05)
+    base_pool = c4.number_input("Base pool", value=base.base_pool, step=1)
+
+with st.expander("Player behaviour", expanded=False):
+    b = srs.Behaviour()
+    c1, c2, c3 = st.columns(3)
+    active_rate = c1.slider("Active users per day", 0.0, 1.0, b.active_rate, 0.05)
+    sessions_per_day = c2.number_input("Sessions per active day", min_value=1, value=b.sessions_per_day)
+    session_size = c3.number_input("Questions per session", min_value=1, value=b.session_size)
+    c1, c2, c3 = st.columns(3)
+    p_correct = c1.slider("P(correct) at mastery 0", 0.0, 1.0, b.p_correct, 0.05)
+    p_mastery = c2.slider("+ at mastery 1", 0.0, 1.0, b.p_mastery, 0.05)
+    p_difficulty = c3.slider("− at difficulty 1000", 0.0, 1.0, b.p_difficulty, 0.05)
+
+days = st.slider("Days", 7, 180, 90, 7)
+
+try:
+    intervals = tuple(float(x) for x in intervals_text.replace(" ", "").split(",") if x)
+    if not intervals:
+        raise ValueError
+except ValueError:
+    st.error("Intervals must be a comma-separated list of numbers.")
+    st.stop()
+
+rules = srs.Rules(
+    intervals_days=intervals,
+    factor_base=factor_base,
+    factor_scale=factor_scale,
+    retry_minutes=retry_minutes,
+    mastery_gain=mastery_gain,
+    mastery_loss=mastery_loss,
+    mastered_at=mastered_at,
+    base_pool=int(base_pool),
+)
+behaviour = srs.Behaviour(
+    active_rate=active_rate,
+    sessions_per_day=int(sessions_per_day),
+    session_size=int(session_size),
+    p_correct=p_correct,
+    p_mastery=p_mastery,
+    p_difficulty=p_difficulty,
+)
+
+
+# ── Forecast ──────────────────────────────────────────────────────────────────
+
+with st.spinner("Simulating…"):
+    runs = {"production": srs.simulate(snap, days, srs.RULES, behaviour)}
+    if rules != srs.RULES:
+        runs["tuned"] = srs.simulate(snap, days, rules, behaviour)
+
+
+def _series(attr: str) -> dict[str, list[float]]:
+    return {name: getattr(f, attr).tolist() for name, f in runs.items()}
+
+
+last = {name: f.rows()[-1] for name, f in runs.items()}
+cols = st.columns(len(runs) * 3)
+for i, (name, row) in enumerate(last.items()):
+    f = runs[name]
+    cols[i * 3].metric(f"Reviews/day ({name})", f"{f.reviews.mean():,.0f}", help="Mean over the forecast")
+    cols[i * 3 + 1].metric(f"Mastered on day {days} ({name})", f"{row['mastered']:,}")
+    cols[i * 3 + 2].metric(f"Mean pool on day {days} ({name})", f"{row['mean_pool']:,.1f}")
+
+col_l, col_r = st.columns(2)
+col_l.markdown("**Reviews per day**")
+col_l.line_chart(_series("reviews"))
+col_r.markdown("**Due per day** (backlog included)")
+col_r.line_chart(_series("due"))
+
+col_l, col_r = st.columns(2)
+col_l.markdown("**New verses per day**")
+col_l.line_chart(_series("new"))
+col_r.markdown("**Mean pool size**")
+col_r.line_chart(_series("mean_pool"))
+
+col_l, col_r = st.columns(2)
+col_l.markdown(f"**Mastery distribution on day {days}**")
+buckets = [f"{x:.1f}" for x in np.arange(0, 1, 0.1)]
+for name, f in runs.items():
+    col_l.caption(name)
+    col_l.bar_chart({"mastery": buckets, "pairs": f.mastery_hist[-1].tolist()}, x="mastery", height=200)
+col_r.markdown("**Correct rate**")
+col_r.line_chart(_series("correct_rate"))
+
+with st.expander("Daily numbers"):
+    for name, f in runs.items():
+        st.markdown(f"**{name}**")
+        st.dataframe(f.rows(), hide_index=True, use_container_width=True)
@@ -0,0 +1,113 @@
+"""Verse stats — accuracy, response times, fast answers and lapses per verse or question.
+
+Opened from the sidebar of the editor (Streamlit multipage app). Reads the
+rollups kept by lib/rollups.py.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import streamlit as st
+
+from lib import db, rollups
+from lib.catalog import get_catalog
+
+st.set_page_config(page_title="Verse Stats", page_icon="📊", layout="wide")
+
+st.markdown("## 📊 Verse Stats")
+st.caption(
+    "How verses and their BLANKS questions perform, from every attempt: accuracy, median and p90 "
+    f"response time, the share of answers under {rollups.MIN_RESPONSE_MS} ms (suspected cheats, ignored "
+    "by difficulty) and, per verse, the share of learners' user_verse_state rows with a lapse."
+)
+
+store = rollups.Rollups()
+meta = store.meta()
+totals = store.totals()
+col_info, col_update = st.columns([4, 1])
+if "updated_at" in meta:
+    updated = datetime.fromtimestamp(float(meta["updated_at"])).strftime("%Y-%m-%d %H:%M")
+    col_info.markdown(
+        f"**{totals['attempts']:,} attempts** · {totals['verses']:,} verses · "
+        f"{totals['questions']:,} questions · updated {updated}"
+    )
+else:
+    col_info.info("No rollups yet. Update them here or with `python -m lib.rollups`.")
+if col_update.button("🔄 Update now", help="Fold in attempts since the last update and re-read lapse counts"):
+    with st.spinner("Reading new attempts…"):
+        result = rollups.run()
+    st.toast(f"{result['attempts']:,} new attempts folded in.")
+    st.rerun()
+
+if not totals["attempts"]:
+    st.stop()
+
+
+# ── Table ─────────────────────────────────────────────────────────────────────
+
+SORT_LABELS = {
+    "accuracy": "Accuracy",
+    "p50": "Median time",
+    "p90": "p90 time",
+    "fast_share": "Fast answers",
+    "lapse_rate": "Lapse rate",
+    "attempts": "Attempts",
+}
+
+col_view, col_trans, col_sort, col_dir, col_min, col_limit = st.columns([1.5, 1.5, 1.5, 1.2, 1, 1])
+view = col_view.radio("Per", ["Verse", "Question"], horizontal=True)
+translations = [t["id"] for t in db.get_translations()]
+translation = col_trans.selectbox(
+    "Translation",
+    [None] + translations,
+    format_func=lambda t: "All" if t is None else t,
+    disabled=view == "Verse",
+    help="Questions are per translation; verse rows count every translation's attempts.",
+)
+sorts = [s for s in SORT_LABELS if view == "Verse" or s != "lapse_rate"]
+sort = col_sort.selectbox("Sort by", sorts, format_func=SORT_LABELS.get)
+descending = col_dir.radio("Order", ["Worst first", "Best first"], horizontal=True) == "Worst first"
+# "Worst" is low accuracy, but high times, fast shares and lapse rates.
+if sort == "accuracy":
+    descending = not descending
+min_attempts = col_min.number_input("Min attempts", min_value=1, value=20, step=10)
+limit = col_limit.number_input("Rows", min_value=10, max_value=5000, value=200, step=50)
+
+if view == "Verse":
+    rows = store.verses(sort, descending, int(limit), int(min_attempts))
+else:
+    rows = store.questions(sort, descending, int(limit), int(min_attempts), translation)
+
+described = {
+    d["verse_ref_id"]: d
+    for d in get_catalog().describe(list({r["verse_ref_id"] for r in rows if r["verse_ref_id"]}), translation or "NIV")
+}
+
+
+def _pct(x: float | None) -> float | None:
+    return None if x is None else round(100 * x, 1)
+
+
+def _secs(ms: float | None) -> float | None:
+    return None if ms is None else round(ms / 1000, 1)
+
+
+table = [
+    {
+        "Verse": described.get(r["verse_ref_id"], {}).get("reference", "") or r["verse_ref_id"],
+        **({"Translation": r["translation_id"]} if view == "Question" else {}),
+        "Attempts": r["attempts"],
+        "Accuracy %": _pct(r["accuracy"]),
+        "Median s": _secs(r["p50"]),
+        "p90 s": _secs(r["p90"]),
+        "Fast %": _pct(r["fast_share"]),
+        **({"Lapse %": _pct(r["lapse_rate"]), "Learners": r["states"]} if view == "Verse" else {}),
+        "Text": described.get(r["verse_ref_id"], {}).get("text", ""),
+    }
+    for r in rows
+]
+if not table:
+    st.info(f"No {view.lower()}s with at least {min_attempts} attempts.")
+else:
+    st.dataframe(table, hide_index=True, use_container_width=True, height=600)
@@ -0,0 +1,104 @@
+"""`lib.blanks`: the checks and the mechanical repairs.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from lib import blanks
+
+TEXT = "For God so loved the world, that he gave his only begotten Son"
+
+
+def test_clean_question_has_no_issues() -> None:
+    assert blanks.check(blanks.answer_json(TEXT, [3, 1]), TEXT) == ([], [])
+    # Answers stored the seed.ts way, with punctuation stripped, also match.
+    assert blanks.check({"word_indices": [5], "answers": ["world"]}, TEXT) == ([], [])
+
+
+@pytest.mark.parametrize(
+    "answer, text, issues",
+    [
+        ({"word_indices": [1, 40], "answers": ["God", "x"]}, TEXT, [blanks.OUT_OF_RANGE]),
+        ({"word_indices": [3, 1], "answers": ["loved", "God"]}, TEXT, [blanks.UNSORTED]),
+        ({"word_indices": [1, 1], "answers": ["God", "God"]}, TEXT, [blanks.UNSORTED]),
+        ({"word_indices": [1, 3], "answers": ["God", "hated"]}, TEXT, [blanks.ANSWER_MISMATCH]),
+        ({"word_indices": [1, 3], "answers": ["God"]}, TEXT, [blanks.ANSWER_MISMATCH]),
+        ({"word_indices": [2], "answers": ["God"]}, "For  God so", [blanks.DOUBLE_SPACE]),
+        ({"word_indices": [0], "answers": ["For"]}, TEXT + " ", [blanks.DOUBLE_SPACE, blanks.FUNCTION_WORD]),
+        ({"word_indices": [4], "answers": ["the"]}, TEXT, [blanks.FUNCTION_WORD]),
+        ({"word_indices": [], "answers": []}, TEXT, [blanks.NO_BLANKS]),
+        (None, TEXT, [blanks.NO_BLANKS]),
+    ],
+)
+def test_check_reports_each_issue(answer: dict | None, text: str, issues: list[str]) -> None:
+    assert blanks.check(answer, text)[0] == issues
+
+
+def test_repair_normalizes_spaces_and_shifts_indices() -> None:
+    text = "For  God so\tloved  the world"
+    new_text, answer = blanks.repair({"word_indices": [2, 4], "answers": ["God", "loved"]}, text)
+
+    assert new_text == "For God so loved the world"
+    assert answer == {"word_indices": [1, 3], "answers": ["God", "loved"]}
+
+
+def test_repair_follows_an_answer_to_its_nearest_word() -> None:
+    # A word was added in front, so both blanks point one word early.
+    text = "And God so loved the world, that he gave his only Son"
+    _, answer = blanks.repair({"word_indices": [1, 3], "answers": ["so", "the"]}, text)
+    assert answer == {"word_indices": [2, 4], "answers": ["so", "the"]}
+
+
+def test_repair_rereads_answers_that_match_nothing_and_drops_blanks_past_the_end() -> None:
+    _, answer = blanks.repair({"word_indices": [3, 30], "answers": ["cherished", "Son"]}, TEXT)
+    assert answer == {"word_indices": [3, 12], "answers": ["loved", "Son"]}
+
+    _, answer = blanks.repair({"word_indices": [3, 30], "answers": ["cherished", "daughter"]}, TEXT)
+    assert answer == {"word_indices": [3], "answers": ["loved"]}
+
+
+def test_repair_returns_nothing_when_nothing_changes_or_nothing_is_left() -> None:
+    assert blanks.repair(blanks.answer_json(TEXT, [1, 3]), TEXT) == (None, None)
+    assert blanks.repair({"word_indices": [40], "answers": ["x"]}, TEXT) == (None, None)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_repaired_questions_pass_the_mechanical_checks(seed: int) -> None:
+    rng = random.Random(seed)
+    words = TEXT.split(" ")
+    text = "".join(w + rng.choice([" ", " ", " ", "  ", "\t", " \n"]) for w in words)
+    indices = rng.sample(range(len(text.split(" ")) + 3), rng.randint(1, 3))
+    answers = [rng.choice([*words, "nothing"]) for _ in indices]
+
+    original = {"word_indices": indices, "answers": answers}
+    new_text, answer = blanks.repair(original, text)
+    if answer is None and new_text is None:
+        # Already clean, or no blank points at a word any more.
+        w = text.split(" ")
+        fixable = set(blanks.check(original, text)[0]) & blanks.FIXABLE
+        assert not fixable or all(i >= len(w) or not w[i].split() for i in indices)
+        return
+    issues, _ = blanks.check(answer or original, new_text or text)
+    assert not set(issues) & blanks.FIXABLE
+
+
+def test_inspect_question_offers_repairs_for_fixable_issues_only() -> None:
+    row = {"id": "q1", "verse_ref_id": "v1", "translation_id": "NIV"}
+
+    assert blanks.inspect_question({**row, "answer_json": blanks.answer_json(TEXT, [1, 3])}, TEXT) is None
+
+    unsorted = {"word_indices": [3, 1], "answers": ["loved", "God"]}
+    finding = blanks.inspect_question({**row, "answer_json": unsorted}, TEXT)
+    assert finding is not None
+    assert finding.issues == [blanks.UNSORTED]
+    assert finding.answer_json == {"word_indices": [1, 3], "answers": ["God", "loved"]}
+
+    finding = blanks.inspect_question({**row, "answer_json": blanks.answer_json(TEXT, [4])}, TEXT)
+    assert finding is not None
+    assert (finding.issues, finding.text, finding.answer_json) == ([blanks.FUNCTION_WORD], None, None)
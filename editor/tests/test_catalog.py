@@ -0,0 +1,183 @@
+"""`lib.catalog.VerseCatalog` loaded from a `FakeClient` seeded by `bench.synthetic`.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from bench.fake_supabase import FakeClient
+from bench.synthetic import Catalog, build_catalog
+from lib import catalog as catalog_module
+from lib import db
+from lib.catalog import VerseCatalog
+
+
+@pytest.fixture
+def generated(monkeypatch: pytest.MonkeyPatch) -> Catalog:
+    c = FakeClient()
+    cat = build_catalog(c, n_refs=300, translations=("NIV", "KJV"), seed=0)
+    monkeypatch.setattr(db, "_connect", lambda: c)
+    db.clear_cache()
+    return cat
+
+
+@pytest.fixture
+def vc(generated: Catalog) -> VerseCatalog:
+    vc = VerseCatalog()
+    vc.load()
+    return vc
+
+
+def _everything(vc: VerseCatalog, sort_by: str = "book") -> dict[str, list[dict]]:
+    return {tid: vc.search(tid, sort_by=sort_by)[1] for tid in ("NIV", "KJV")}
+
+
+def _reloaded() -> VerseCatalog:
+    db.clear_cache()
+    fresh = VerseCatalog()
+    fresh.load()
+    return fresh
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+def test_book_order_is_canonical(vc: VerseCatalog, generated: Catalog) -> None:
+    total, rows = vc.search("NIV")
+
+    assert total == len(generated.refs)
+    assert [(r["book_id"], r["chapter"], r["verse"]) for r in rows] == sorted(
+        (b, c, v) for _, b, c, v in generated.refs
+    )
+
+
+def test_rank_order_puts_unranked_last(vc: VerseCatalog) -> None:
+    _, by_book = vc.search("NIV")
+    _, rows = vc.search("NIV", sort_by="rank")
+
+    ranked = sorted((r for r in by_book if r["global_rank"] is not None), key=lambda r: r["global_rank"])
+    unranked = [r for r in by_book if r["global_rank"] is None]
+    assert rows == ranked + unranked
+
+
+def test_filters_and_paging(vc: VerseCatalog, generated: Catalog) -> None:
+    _, book, chapter, _ = generated.refs[len(generated.refs) // 2]
+    expected = sorted((v, rid) for rid, b, c, v in generated.refs if (b, c) == (book, chapter))
+
+    total, rows = vc.search("NIV", book_id=book, chapter=chapter)
+    assert total == len(expected)
+    assert [(r["verse"], r["verse_ref_id"]) for r in rows] == expected
+
+    total, page = vc.search("NIV", offset=10, limit=5)
+    assert total == len(generated.refs)
+    assert page == vc.search("NIV")[1][10:15]
+
+
+# ── Patching from the editor's own writes ─────────────────────────────────────
+
+def test_patched_catalog_matches_a_reload(vc: VerseCatalog) -> None:
+    vc.search("NIV", text_search="lord")  # build the text index, so patches must update it
+    _, rows = vc.search("NIV", sort_by="rank")
+    ranked, unranked = rows[0], rows[-1]
+    assert unranked["global_rank"] is None
+
+    edit = {
+        "verse_ref_id": unranked["verse_ref_id"],
+        "chapter": unranked["chapter"],
+        "verse": unranked["verse"],
+        "verse_text_id": unranked["verse_text_id"],
+        "text": "Zerubbabel builded the house",
+        "rank": 1,
+        "released": True,
+    }
+    db.save_verse(**edit)
+    vc.verse_saved(**edit)
+    changed = db.rerank([ranked["verse_ref_id"]])
+    vc.ranks_saved(changed)
+    qid = db.save_question(unranked["verse_ref_id"], "NIV", [0, 3], edit["text"])
+    answer = {"word_indices": [0, 3], "answers": ["Zerubbabel", "house"]}
+    vc.question_saved(unranked["verse_ref_id"], "NIV", qid, answer)
+    with_question = next(r for r in rows if r["question_id"] and r["verse_ref_id"] != ranked["verse_ref_id"])
+    db.soft_delete_question(with_question["question_id"])
+    vc.question_deleted(with_question["question_id"])
+
+    assert vc.dirty
+    assert vc.search("NIV", text_search="zerubbabel")[1][0]["verse_ref_id"] == unranked["verse_ref_id"]
+    fresh = _reloaded()
+    assert _everything(vc, "rank") == _everything(fresh, "rank")
+    assert _everything(vc) == _everything(fresh)
+
+
+def test_refresh_books_picks_up_an_import(vc: VerseCatalog, generated: Catalog) -> None:
+    book = generated.refs[0][1]
+    db.import_verses(
+        [{"book_id": book, "chapter": 200, "verse": 1, "text": "A new verse", "blanks": [1, 2], "translation_id": "NIV"}],
+        start_rank=10_000,
+    )
+    assert vc.search("NIV", book_id=book, chapter=200) == (0, [])
+
+    vc.refresh_books({book})
+
+    total, rows = vc.search("NIV", book_id=book, chapter=200)
+    assert total == 1
+    assert (rows[0]["text"], rows[0]["global_rank"]) == ("A new verse", 10_000)
+    assert rows[0]["answer_json"]["answers"] == ["new", "verse"]
+    assert _everything(vc) == _everything(_reloaded())
+
+
+# ── Snapshot ──────────────────────────────────────────────────────────────────
+
+def test_snapshot_round_trip(vc: VerseCatalog, tmp_path: Path) -> None:
+    path = str(tmp_path / "catalog.snap")
+    vc.save_snapshot(path)
+
+    mapped = VerseCatalog()
+    assert mapped.load_snapshot(path)
+
+    assert not mapped.dirty
+    assert mapped.loaded_at == vc.loaded_at
+    assert _everything(mapped) == _everything(vc)
+    assert _everything(mapped, "rank") == _everything(vc, "rank")
+    assert mapped.search("KJV", text_search="lord")[1] == vc.search("KJV", text_search="lord")[1]
+
+
+def test_unusable_snapshot_is_ignored(tmp_path: Path) -> None:
+    mapped = VerseCatalog()
+    assert not mapped.load_snapshot(str(tmp_path / "missing.snap"))
+    assert mapped.search("NIV") == (0, [])
+
+
+def test_written_snapshot_clears_dirty(vc: VerseCatalog, tmp_path: Path) -> None:
+    assert vc.dirty
+    vc.save_snapshot(str(tmp_path / "catalog.snap"))
+    assert not vc.dirty
+
+
+def test_failed_snapshot_write_leaves_catalog_dirty(
+    vc: VerseCatalog, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(catalog_module.snapshot, "write", fail)
+    with pytest.raises(OSError):
+        vc.save_snapshot(str(tmp_path / "catalog.snap"))
+    assert vc.dirty
+
+
+def test_patch_during_snapshot_write_stays_dirty(
+    vc: VerseCatalog, generated: Catalog, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    write = catalog_module.snapshot.write
+
+    def patched_meanwhile(*args, **kwargs):
+        vc.ranks_saved({generated.refs[0][0]: 1})
+        return write(*args, **kwargs)
+
+    monkeypatch.setattr(catalog_module.snapshot, "write", patched_meanwhile)
+    vc.save_snapshot(str(tmp_path / "catalog.snap"))
+    assert vc.dirty
@@ -0,0 +1,122 @@
+"""`lib.dedup`: shingle similarity, signatures and `MinHashIndex` updates.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from lib import dedup
+from lib.dedup import MinHashIndex
+
+TEXTS = [
+    "For God so loved the world, that he gave his only begotten Son",  # 0
+    "For God so loved the world that he gave his one and only Son",  # 1: near 0
+    "The LORD is my shepherd; I shall not want.",  # 2
+    "The Lord is my shepherd, I lack nothing.",  # 3: near 2
+    "Jesus wept.",  # 4
+    "...",  # 5: no words, so no shingles
+]
+
+
+def _buckets(index: MinHashIndex) -> list[dict[int, list[int]]]:
+    return [{key: sorted(rows) for key, rows in band.items()} for band in index.buckets]
+
+
+def _assert_same(index: MinHashIndex, rebuilt: MinHashIndex) -> None:
+    assert np.array_equal(index.sig, rebuilt.sig)
+    assert np.array_equal(index.keys, rebuilt.keys)
+    assert np.array_equal(index.live, rebuilt.live)
+    assert _buckets(index) == _buckets(rebuilt)
+    assert index.pairs(0.5) == rebuilt.pairs(0.5)
+
+
+def test_similarity_ignores_case_and_punctuation() -> None:
+    assert dedup.normalize("  Jesus   WEPT. ") == "jesus wept"
+    assert dedup.similarity("Jesus wept.", "jesus, wept") == 1.0
+    assert dedup.similarity("Jesus wept.", "...") == 0.0
+    assert 0.5 < dedup.similarity(TEXTS[0], TEXTS[1]) < 1.0
+    assert dedup.similarity(TEXTS[0], TEXTS[2]) < 0.1
+
+
+def test_signatures_do_not_depend_on_blocks() -> None:
+    rng = random.Random(0)
+    words = " ".join(TEXTS).split()
+    texts = [" ".join(rng.choices(words, k=rng.randint(0, 12))) for _ in range(dedup._BLOCK + 40)]
+
+    together = dedup.signatures(texts)
+    assert np.array_equal(together, np.vstack([dedup.signatures([t]) for t in texts]))
+    assert (together[[i for i, t in enumerate(texts) if not t]] == dedup._EMPTY).all()
+
+
+def test_pairs_and_similar_find_near_duplicates() -> None:
+    index = MinHashIndex(list(TEXTS))
+
+    assert [(a, b) for a, b, _ in index.pairs(0.5)] == [(0, 1)]
+    assert [(a, b) for a, b, _ in index.pairs(0.3)] == [(0, 1), (2, 3)]
+    [hits] = index.similar([TEXTS[0]], 0.5, exclude=[0])
+    assert [row for row, _ in hits] == [1]
+    assert not index.live[5]
+    assert all(5 not in rows for band in index.buckets for rows in band.values())
+
+
+def test_update_rebuckets_a_changed_row() -> None:
+    texts = list(TEXTS)
+    index = MinHashIndex(texts)
+
+    texts[1] = "In the beginning God created the heaven and the earth"
+    index.update(1, texts[1])
+
+    _assert_same(index, MinHashIndex(list(texts)))
+    assert index.similar([TEXTS[1]], 0.5) == [[(0, pytest.approx(dedup.similarity(TEXTS[0], TEXTS[1])))]]
+    assert index.similar([texts[1]], 0.9) == [[(1, 1.0)]]
+
+
+def test_update_to_and_from_an_empty_text() -> None:
+    texts = list(TEXTS)
+    index = MinHashIndex(texts)
+
+    texts[0], texts[5] = "", TEXTS[0]
+    index.update(0, texts[0])
+    index.update(5, texts[5])
+
+    _assert_same(index, MinHashIndex(list(texts)))
+    assert not index.live[0]
+    assert [(a, b) for a, b, _ in index.pairs(0.5)] == [(1, 5)]
+
+
+def test_update_appends_rows() -> None:
+    texts = list(TEXTS)
+    index = MinHashIndex(texts)
+
+    for text in ("Jesus wept!", ""):
+        texts.append(text)
+        index.update(len(texts) - 1, text)
+
+    assert len(index) == len(texts)
+    _assert_same(index, MinHashIndex(list(texts)))
+    assert (4, 6, 1.0) in index.pairs()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_updates_match_a_rebuild(seed: int) -> None:
+    rng = random.Random(seed)
+    pool = [*TEXTS, "", "Jesus wept", "the world", "God so loved"]
+    texts = list(TEXTS)
+    index = MinHashIndex(texts)
+
+    for _ in range(15):
+        row = rng.randint(0, len(texts))
+        text = rng.choice(pool)
+        if row == len(texts):
+            texts.append(text)
+        else:
+            texts[row] = text
+        index.update(row, text)
+
+    _assert_same(index, MinHashIndex(list(texts)))
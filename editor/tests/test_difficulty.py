@@ -0,0 +1,108 @@
+"""`lib.difficulty` against the stand-in's copy of `update_question_difficulty()`.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from bench import fake_supabase
+from bench.fake_supabase import FakeClient
+from bench.synthetic import add_attempts, build_catalog
+from lib import db, difficulty
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_formula_rounds_half_away_from_zero() -> None:
+    assert difficulty.difficulty(0, 0) == 375  # the prior alone: 1 − 5/8
+    assert difficulty.difficulty(4, 8) == 438  # 437.5
+    assert difficulty.difficulty(3, 3) == 273  # 272.7…
+    assert difficulty.difficulty(0, 3) == 545  # 545.4…
+
+
+def test_only_the_first_three_valid_attempts_count() -> None:
+    def attempt(n: int, correct: bool, ms: int | None) -> dict:
+        return {
+            "id": f"00000000-0000-0000-0000-{n:012d}",
+            "user_id": "11111111-1111-1111-1111-111111111111",
+            "question_id": "22222222-2222-2222-2222-222222222222",
+            "is_correct": correct,
+            "response_time_ms": ms,
+            "created_at": (START + timedelta(minutes=n)).isoformat(),
+        }
+
+    attempts = [
+        attempt(1, True, 400),  # too fast: ignored, doesn't use up a slot
+        attempt(2, False, None),  # no response time: counts
+        attempt(3, True, 1500),
+        attempt(4, False, 9000),
+        attempt(5, True, 2000),  # a fourth valid attempt: ignored
+    ]
+    state = difficulty.State(":memory:")
+    # Two pages, so the per-pair counter has to carry over through the state.
+    pages = [attempts[:3], attempts[3:]]
+    stats = difficulty.ingest(state, source=lambda after, before, size: iter(pages))
+
+    assert stats == {"pages": 2, "attempts": 5, "counted": 3}
+    assert state.difficulties() == {"22222222-2222-2222-2222-222222222222": difficulty.difficulty(1, 3)}
+    assert state.watermark() == (attempts[-1]["created_at"], attempts[-1]["id"])
+
+
+@pytest.fixture
+def twins(monkeypatch: pytest.MonkeyPatch) -> tuple[FakeClient, FakeClient]:
+    """Two identical databases: one for the full scan, one for the incremental job."""
+    full = FakeClient()
+    build_catalog(full, n_refs=200, translations=("NIV",), seed=0)
+    add_attempts(full, 5000, n_users=40, questions_per_user=20, start=START, days=30, seed=0)
+    fake_supabase._sync_release_difficulty(full, {q["verse_ref_id"] for q in full.tables["question"]})
+    incr = FakeClient()
+    incr.tables = {t: [dict(r) for r in rows] for t, rows in full.tables.items()}
+    monkeypatch.setattr(db, "_connect", lambda: incr)
+    db.clear_cache()
+    return full, incr
+
+
+def _difficulties(c: FakeClient) -> tuple[dict, dict]:
+    return (
+        {q["id"]: float(q["difficulty"]) for q in c.tables["question"]},
+        {r["verse_ref_id"]: r["global_difficulty"] for r in c.tables["verse_release"]},
+    )
+
+
+def test_incremental_runs_match_the_full_scan(twins: tuple[FakeClient, FakeClient], tmp_path: Path) -> None:
+    full, incr = twins
+    state = str(tmp_path / "difficulty.sqlite")
+
+    for night in range(3):
+        if night:
+            day = START + timedelta(days=30 + night)
+            for c in (full, incr):
+                add_attempts(c, 1000, n_users=40, questions_per_user=20, start=day, seed=night)
+        fake_supabase.update_question_difficulty(full)
+        stats = difficulty.run(state, settle_seconds=0)
+
+        assert stats["written"] > 0
+        assert _difficulties(incr) == _difficulties(full)
+
+    # Nothing new: nothing read, nothing written.
+    stats = difficulty.run(state, settle_seconds=0)
+    assert (stats["attempts"], stats["written"]) == (0, 0)
+
+
+def test_rebuild_gives_the_same_result(twins: tuple[FakeClient, FakeClient], tmp_path: Path) -> None:
+    _, incr = twins
+    state = str(tmp_path / "difficulty.sqlite")
+    difficulty.run(state, settle_seconds=0)
+    expected = _difficulties(incr)
+
+    stats = difficulty.run(state, rebuild=True, settle_seconds=0)
+
+    assert stats["attempts"] == len(incr.tables["attempt"])
+    assert stats["written"] == 0
+    assert _difficulties(incr) == expected
@@ -0,0 +1,47 @@
+"""`lib.import_jobs`' background worker loop.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from lib import import_jobs
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> import_jobs.JobStore:
+    return import_jobs.JobStore(str(tmp_path / "jobs.sqlite"))
+
+
+def test_worker_retries_store_errors_and_stops_on_bugs(
+    store: import_jobs.JobStore, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    passes: list[str | None] = []
+
+    def work(s: import_jobs.JobStore) -> list:
+        passes.append(import_jobs.worker_error(s.path))
+        if len(passes) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        if len(passes) == 2:
+            return []
+        raise KeyError("status")
+
+    monkeypatch.setattr(import_jobs, "work", work)
+    monkeypatch.setattr(import_jobs, "LEASE_SECONDS", 0)
+    monkeypatch.setattr(import_jobs, "_worker_errors", {})
+    with caplog.at_level(logging.WARNING, logger="lib.import_jobs"):
+        import_jobs._worker_loop(store, threading.Event())  # returns once work hits the bug
+
+    # The store error was recorded, then cleared by the pass that went through.
+    assert passes == [None, "Import job store unreadable: database is locked", None]
+    assert import_jobs.worker_error(store.path) == "Import worker stopped: KeyError('status')"
+    assert [r.levelname for r in caplog.records] == ["WARNING", "ERROR"]
+    assert caplog.records[-1].exc_info is not None
@@ -0,0 +1,130 @@
+"""`lib.import_stream`: format detection, chunk boundaries and error positions.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from lib.import_stream import ParseError, VerseReader
+
+VERSES = [
+    {"book_id": 19, "chapter": 23, "verse": 1, "text": "The LORD is my shepherd", "blanks": [1, 4]},
+    {"book_id": 19, "chapter": 23, "verse": 2, "text": "He maketh me to lie down — “in green pastures”"},
+    {"book_id": 19, "chapter": 123456, "verse": 3, "text": "He restoreth my soul 🕊", "blanks": []},
+]
+
+# Keys other than "translation" and "verses" are skipped; a number can be cut by a chunk boundary.
+PRETTY = json.dumps({"translation": "KJV", "year": 1611, "verses": VERSES}, indent=2, ensure_ascii=False)
+NDJSON = "\n".join([json.dumps({"translation": "KJV"}), *(json.dumps(v, ensure_ascii=False) for v in VERSES)]) + "\n"
+
+
+def _read(text: str, **kwargs) -> tuple[VerseReader, list[dict]]:
+    reader = VerseReader(io.BytesIO(text.encode()), **kwargs)
+    return reader, list(reader)
+
+
+# ── Format detection ──────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize(
+    "text, ndjson",
+    [
+        (PRETTY, False),
+        (json.dumps({"translation": "KJV", "verses": VERSES}), False),  # the wrapper on one line
+        (json.dumps(VERSES), False),
+        (json.dumps(VERSES, indent=2), False),
+        (NDJSON, True),
+        (NDJSON.replace("\n", "\r\n"), True),
+        ("\n\n" + NDJSON.split("\n", 1)[1], True),  # no header, blank lines first
+    ],
+)
+def test_format_is_detected(text: str, ndjson: bool) -> None:
+    reader, verses = _read(text)
+    assert reader.ndjson is ndjson
+    assert verses == VERSES
+    assert reader.errors == []
+
+
+def test_header_line_sets_the_translation() -> None:
+    assert _read(NDJSON)[0].translation == "KJV"
+    assert _read(NDJSON.split("\n", 1)[1])[0].translation == "NIV"
+
+
+def test_byte_order_mark_is_dropped() -> None:
+    reader = VerseReader(io.BytesIO(PRETTY.encode("utf-8-sig")))
+    assert list(reader) == VERSES
+
+
+def test_detection_can_be_overridden() -> None:
+    # Read as NDJSON, a one-line list is a single line that isn't a verse.
+    reader, verses = _read(json.dumps(VERSES), ndjson=True)
+    assert verses == []
+    assert [e.message for e in reader.errors] == ["expected an object, got list"]
+
+
+# ── Chunk boundaries ──────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("chunk_chars", [1, 2, 3, 5, 8, 64, 1 << 16])
+@pytest.mark.parametrize("text", [PRETTY, NDJSON], ids=["json", "ndjson"])
+def test_any_chunk_size_reads_the_same(text: str, chunk_chars: int) -> None:
+    # Small reads split multi-byte characters, numbers and keys across chunks.
+    reader, verses = _read(text, chunk_chars=chunk_chars)
+    assert verses == VERSES
+    assert (reader.count, reader.valid, reader.translation) == (3, 3, "KJV")
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 7, 1 << 16])
+def test_error_positions_do_not_depend_on_chunk_size(chunk_chars: int) -> None:
+    bad = dict(VERSES[1], chapter="23")
+    text = json.dumps([VERSES[0], bad, VERSES[2]], indent=2, ensure_ascii=False)
+    reader, verses = _read(text, chunk_chars=chunk_chars)
+
+    assert verses == [VERSES[0], VERSES[2]]
+    [error] = reader.errors
+    assert (error.index, error.message) == (2, '"chapter" must be an integer')
+    offset = text.index("{", text.index("}"))
+    line = text.count("\n", 0, offset) + 1
+    assert (error.line, error.column, error.offset) == (line, offset - text.rindex("\n", 0, offset), offset)
+
+    with pytest.raises(ParseError) as exc:
+        _read(text.replace('"chapter": "23"', '"chapter": 23,,'), chunk_chars=chunk_chars)
+    assert (exc.value.line, exc.value.column) == (line + 2, 19)
+
+
+def test_chunks_group_valid_verses() -> None:
+    text = "\n".join(json.dumps(dict(VERSES[0], verse=v)) for v in range(1, 8))
+    reader = VerseReader(io.StringIO(text), chunk_chars=10)
+    assert [[v["verse"] for v in chunk] for chunk in reader.chunks(3)] == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+# ── Bad input ─────────────────────────────────────────────────────────────────
+
+def test_ndjson_skips_broken_lines() -> None:
+    lines = NDJSON.split("\n")
+    lines[2] = lines[2][:-5]
+    reader, verses = _read("\n".join(lines))
+
+    assert verses == [VERSES[0], VERSES[2]]
+    [error] = reader.errors
+    assert (error.index, error.line) == (2, 3)
+    assert error.message.startswith("invalid JSON")
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("", "no verses: the input is empty"),
+        ('"verses"', "expected a JSON object or list of verses"),
+        ('{\n  "translation": "KJV"\n}', "JSON must contain a 'verses' array."),
+        (json.dumps(VERSES) + " []", "unexpected data after the JSON value"),
+        ('{"verses": [' + json.dumps(VERSES[0]) + '], "translation": "KJV"}', '"translation" must come before the verses'),
+    ],
+)
+def test_json_problems_stop_the_read(text: str, message: str) -> None:
+    with pytest.raises(ParseError, match=message):
+        _read(text)
@@ -0,0 +1,54 @@
+"""`ingest.ingest` against a `FakeClient`.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from bench.fake_supabase import FakeClient
+from lib import db
+from lib.ingest import ingest
+
+BOOK = 19
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> FakeClient:
+    c = FakeClient()
+    c.table("book").insert({"id": BOOK, "name": "Psalms", "abbr": "PSA", "sort_order": BOOK}).execute()
+    c.table("translation").insert({"id": "NIV", "name": "New International Version"}).execute()
+    refs = c.table("verse_ref").insert([{"book_id": BOOK, "chapter": 1, "verse": v} for v in (1, 2)]).execute().data
+    c.table("verse_text").insert({"verse_ref_id": refs[0]["id"], "translation_id": "NIV", "text": "Blessed is the one"}).execute()
+    monkeypatch.setattr(db, "_connect", lambda: c)
+    db.clear_cache()
+    return c
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "psalms.json"
+    texts = ["Blessed is the one", "but whose delight is in the law", "That person is like a tree"]
+    path.write_text(json.dumps([{"book_id": BOOK, "chapter": 1, "verse": v, "text": t} for v, t in enumerate(texts, 1)]))
+    return path
+
+
+def test_dry_run_creates_no_verse_refs(client: FakeClient, source: Path) -> None:
+    result = ingest("NIV", [source], workers=1, dry_run=True)
+
+    assert (result.verses, result.new, result.changed, result.unchanged, result.written) == (3, 2, 0, 1, 0)
+    assert len(client.tables["verse_ref"]) == 2
+    assert len(client.tables["verse_text"]) == 1
+
+
+def test_ingest_creates_missing_verse_refs(client: FakeClient, source: Path) -> None:
+    result = ingest("NIV", [source], workers=1)
+
+    assert (result.verses, result.new, result.changed, result.unchanged, result.written) == (3, 2, 0, 1, 2)
+    assert len(client.tables["verse_ref"]) == 3
+    assert len(client.tables["verse_text"]) == 3
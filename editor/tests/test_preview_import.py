@@ -0,0 +1,77 @@
+"""`db.preview_import` against a `FakeClient` capped at Supabase's 1000 rows per response.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from bench.fake_supabase import FakeClient
+from lib import db
+
+BOOK = 19
+CHAPTERS, VERSES = 60, 40
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> FakeClient:
+    c = FakeClient(max_rows=1000)
+    refs = (
+        c.table("verse_ref")
+        .insert([{"book_id": BOOK, "chapter": ch, "verse": v} for ch in range(1, CHAPTERS + 1) for v in range(1, VERSES + 1)])
+        .execute()
+        .data
+    )
+    c.table("question").insert(
+        [
+            {"type": "BLANKS", "verse_ref_id": r["id"], "translation_id": "NIV", "answer_json": {}, "active": True}
+            for r in refs
+        ]
+    ).execute()
+    monkeypatch.setattr(db, "_connect", lambda: c)
+    return c
+
+
+def test_scattered_existing_verses_are_updates(client: FakeClient) -> None:
+    # Each chunk of 100 spans most chapters and verse numbers, so a
+    # chapter IN × verse IN lookup would match well over 1000 refs.
+    rng = random.Random(0)
+    pairs = rng.sample([(ch, v) for ch in range(1, CHAPTERS + 1) for v in range(1, VERSES + 1)], 1200)
+    verses = [{"book_id": BOOK, "chapter": ch, "verse": v, "text": "x", "blanks": [0]} for ch, v in pairs]
+    verses.append({"book_id": BOOK, "chapter": CHAPTERS + 1, "verse": 1, "text": "x", "blanks": [0]})
+
+    rows = db.preview_import(verses, "NIV")
+
+    assert [r["status"] for r in rows] == ["UPDATE"] * len(pairs) + ["NEW"]
+    assert all(r["verse_ref_id"] for r in rows[:-1])
+    assert rows[-1]["verse_ref_id"] is None
+    assert len({r["verse_ref_id"] for r in rows[:-1]}) == len(pairs)
+
+
+def test_bad_reference_is_an_error_for_that_verse_only(client: FakeClient) -> None:
+    verses = [
+        {"book_id": BOOK, "chapter": 1, "verse": 1, "text": "x", "blanks": [0]},
+        {"book_id": BOOK, "chapter": "one", "verse": 2, "text": "x", "blanks": [0]},
+        {"book_id": BOOK, "chapter": 1, "verse": 3, "text": "x", "blanks": [0]},
+        {"book_id": BOOK + 1, "chapter": 1, "verse": 1, "text": "x", "blanks": [0]},
+    ]
+
+    rows = db.preview_import(verses, "NIV")
+
+    assert [r["status"] for r in rows] == ["UPDATE", "ERROR", "UPDATE", "NEW"]
+    assert rows[1]["error"]
+
+
+def test_numbers_given_as_strings_match_existing_verses(client: FakeClient) -> None:
+    verses = [{"book_id": str(BOOK), "chapter": "2", "verse": "7", "text": "x", "blanks": [0]}]
+
+    rows = db.preview_import(verses, "NIV")
+
+    assert rows[0]["status"] == "UPDATE"
+    assert rows[0]["verse_ref_id"] == next(
+        r["id"] for r in client.tables["verse_ref"] if (r["chapter"], r["verse"]) == (2, 7)
+    )
@@ -0,0 +1,107 @@
+"""`db.plan_rerank` (fewest moved verses) and `db.rerank` against a `FakeClient`.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import random
+from itertools import combinations
+
+import pytest
+
+from bench.fake_supabase import FakeClient
+from lib import db
+
+
+def _apply(current: dict[str, int | None], order: list[str]) -> list[int | None]:
+    changes = db.plan_rerank(current, order)
+    return [changes.get(ref, current.get(ref)) for ref in order]
+
+
+def _fewest_moves(current: dict[str, int | None], order: list[str]) -> int:
+    """Brute force: the most verses that can keep their rank, over every subset."""
+    ranks = [current.get(ref) for ref in order]
+    for size in range(len(order), 0, -1):
+        for kept in combinations(range(len(order)), size):
+            # Kept verse at position p (0-based) needs p free ranks below it,
+            # and j − i free ranks between kept verses i < j.
+            if any(ranks[p] is None for p in kept) or ranks[kept[0]] < kept[0] + 1:
+                continue
+            if all(ranks[j] - ranks[i] >= j - i for i, j in zip(kept, kept[1:])):
+                return len(order) - size
+    return len(order)
+
+
+def test_ranks_in_order_are_left_alone() -> None:
+    current = {"a": 3, "b": 7, "c": 8, "d": 20}
+    assert db.plan_rerank(current, ["a", "b", "c", "d"]) == {}
+
+
+def test_moving_one_verse_to_the_front_writes_only_what_it_must() -> None:
+    current = {ref: rank for rank, ref in enumerate("abcde", start=1)}
+    # No free rank in front of a: e keeps 5 and the four others move after it.
+    assert db.plan_rerank(current, list("eabcd")) == {"a": 6, "b": 7, "c": 8, "d": 9}
+
+    # With gaps, only the moved verse is written.
+    current = {"a": 10, "b": 20, "c": 30, "d": 40, "e": 50}
+    assert db.plan_rerank(current, list("aebcd")) == {"e": 11}
+
+
+def test_duplicates_and_unranked_verses_get_fresh_ranks() -> None:
+    current: dict[str, int | None] = {"a": 1, "b": 1, "c": 1, "d": None, "e": 9}
+    assert _apply(current, list("abcde")) == [1, 2, 3, 4, 9]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_ranks_increase_with_the_fewest_moves(seed: int) -> None:
+    rng = random.Random(seed)
+    n = rng.randint(1, 8)
+    order = [f"v{i}" for i in range(n)]
+    current: dict[str, int | None] = {ref: rng.choice([None, *range(1, 2 * n)]) for ref in order}
+
+    ranks = _apply(current, order)
+
+    assert ranks[0] >= 1
+    assert all(a < b for a, b in zip(ranks, ranks[1:]))
+    assert len(db.plan_rerank(current, order)) == _fewest_moves(current, order)
+
+
+# ── db.rerank ─────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> FakeClient:
+    c = FakeClient()
+    c.table("book").insert({"id": 1, "name": "Genesis", "sort_order": 1}).execute()
+    refs = c.table("verse_ref").insert([{"book_id": 1, "chapter": 1, "verse": v} for v in range(1, 7)]).execute().data
+    c.table("verse_release").insert(
+        [{"verse_ref_id": r["id"], "global_rank": 10 * i, "released": True} for i, r in enumerate(refs, start=1)]
+    ).execute()
+    monkeypatch.setattr(db, "_connect", lambda: c)
+    db.clear_cache()
+    return c
+
+
+def _ranked(c: FakeClient) -> list[str]:
+    return [r["verse_ref_id"] for r in sorted(c.tables["verse_release"], key=lambda r: r["global_rank"])]
+
+
+def test_rerank_puts_listed_verses_first_and_keeps_the_rest_in_order(client: FakeClient) -> None:
+    before = _ranked(client)
+    order = [before[4], before[1]]
+
+    changes = db.rerank(order)
+
+    assert _ranked(client) == [before[4], before[1], before[0], before[2], before[3], before[5]]
+    # Ranks 10–60 leave room in front: only the two listed verses move.
+    assert changes == {before[4]: 1, before[1]: 2}
+    assert db.rerank(_ranked(client)) == {}
+
+
+def test_rerank_rejects_repeated_and_unreleased_verses(client: FakeClient) -> None:
+    refs = _ranked(client)
+    with pytest.raises(ValueError, match="more than once"):
+        db.rerank([refs[0], refs[0]])
+    with pytest.raises(ValueError, match="no verse_release row"):
+        db.rerank([refs[0], "00000000-0000-0000-0000-000000000000"])
@@ -0,0 +1,93 @@
+"""`lib.textindex`: tokenizing, AND / phrase / prefix queries, BM25 order and updates.
+
+    cd editor
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from lib.textindex import TextIndex, tokenize
+
+TEXTS = [
+    "For God so loved the world, that he gave his only begotten Son",  # 0
+    "Beloved, let us love one another: for love is of God",  # 1
+    "The LORD is my shepherd; I shall not want.",  # 2
+    "He that loveth not knoweth not God; for God is love.",  # 3
+    "Son, only be strong and of a good courage",  # 4
+    "And he put on a glove of God’s own making",  # 5
+]
+
+
+@pytest.fixture
+def index() -> TextIndex:
+    return TextIndex(list(TEXTS))
+
+
+def _rows(index: TextIndex, query: str) -> list[int]:
+    return [row for row, _ in index.search(query)]
+
+
+def test_tokenize_folds_case_and_keeps_inner_apostrophes() -> None:
+    assert tokenize("The LORD's  word, “Selah!”") == ["the", "lord's", "word", "selah"]
+    assert tokenize("God’s") == ["god's"]
+
+
+def test_every_word_must_appear(index: TextIndex) -> None:
+    assert sorted(_rows(index, "god love")) == [1, 3]
+    assert _rows(index, "GOD shepherd") == []
+    assert _rows(index, "unknownword") == []
+
+
+def test_phrase_needs_adjacent_words_in_order(index: TextIndex) -> None:
+    assert _rows(index, '"only begotten"') == [0]
+    assert _rows(index, '"begotten only"') == []
+    # Both words in rows 0 and 4, adjacent only in row 4 ("Son, only"): punctuation between is fine.
+    assert _rows(index, '"son only"') == [4]
+    assert sorted(_rows(index, '"only" son')) == [0, 4]
+
+
+def test_phrase_matches_either_apostrophe(index: TextIndex) -> None:
+    assert _rows(index, "\"god's own\"") == [5]
+
+
+def test_prefix_matches_word_starts_only(index: TextIndex) -> None:
+    assert sorted(_rows(index, "lov*")) == [0, 1, 3]  # loved, love, loveth; not "glove" or "beloved"
+    assert _rows(index, "lov* shepherd") == []
+    assert _rows(index, "zz*") == []
+
+
+def test_empty_queries_match_nothing(index: TextIndex) -> None:
+    assert index.search("") == []
+    assert index.search('  "" * ,; ') == []
+
+
+def test_more_occurrences_rank_higher(index: TextIndex) -> None:
+    # Row 3 has "god" twice in a text of similar length; rows with one occurrence follow.
+    hits = index.search("god")
+    assert hits[0][0] == 3
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+
+def test_ties_keep_row_order() -> None:
+    index = TextIndex(["amen amen", "selah", "amen amen", "amen amen"])
+    assert _rows(index, "amen") == [0, 2, 3]
+
+
+def test_update_reindexes_a_row(index: TextIndex) -> None:
+    index.texts[2] = "The Lord is my light and my salvation"
+    index.update(2, TEXTS[2], index.texts[2])
+    assert _rows(index, "shepherd") == []
+    assert _rows(index, '"my light"') == [2]
+
+    index.texts.append("A new song of praise")
+    index.update(len(index.texts) - 1, None, index.texts[-1])
+    assert _rows(index, "prais*") == [6]
+
+    # Scores after the updates match an index built from scratch.
+    rebuilt = TextIndex(list(index.texts))
+    for query in ("god", "lov*", "my", '"only begotten"'):
+        got, want = index.search(query), rebuilt.search(query)
+        assert [row for row, _ in got] == [row for row, _ in want]
+        assert [score for _, score in got] == pytest.approx([score for _, score in want])